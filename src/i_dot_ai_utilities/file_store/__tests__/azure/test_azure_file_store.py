@@ -1,6 +1,10 @@
+import io
+import os
+from pathlib import Path
 from typing import Any
 
 import pytest
+from azure.storage.blob import BlobServiceClient
 
 from i_dot_ai_utilities.file_store.main import FileStore
 
@@ -35,6 +39,9 @@ def test_list_objects(azure_file_store: FileStore) -> None:
     file_keys = [r["key"] for r in list_response]
     assert file_keys == ["app_data/test_file.txt", "app_data/test_file2.txt"]
 
+    limited = azure_file_store.list_objects("test", max_keys=1)
+    assert [r["key"] for r in limited] == ["app_data/test_file.txt"]
+
 
 @pytest.mark.usefixtures("blob_client", "container", "file")
 def test_delete_object(azure_file_store: FileStore) -> None:
@@ -106,3 +113,141 @@ def test_get_empty_json_object(azure_file_store: FileStore) -> None:
 
     download_response: dict[Any, Any] | list[Any] | None = azure_file_store.download_json("test_file.txt")
     assert download_response is None
+
+
+@pytest.mark.usefixtures("blob_client", "container", "file")
+def test_conditional_put_object(azure_file_store: FileStore) -> None:
+    assert not azure_file_store.put_object("test_file.txt", "overwritten", if_none_match=True)
+    assert azure_file_store.put_object("test_file2.txt", "created", if_none_match=True)
+
+    current = azure_file_store.read_object_with_etag("test_file.txt")
+    assert current is not None
+    content, etag = current
+    assert content == b"file_content"
+
+    assert azure_file_store.update_object("test_file.txt", "first update", if_match_etag=etag)
+    assert not azure_file_store.update_object("test_file.txt", "stale update", if_match_etag=etag)
+    assert azure_file_store.read_object("test_file.txt", as_text=True) == "first update"
+
+
+@pytest.mark.usefixtures("blob_client", "container")
+def test_compare_and_swap_json(azure_file_store: FileStore) -> None:
+    def increment(manifest: dict | list | None) -> dict:
+        assert not isinstance(manifest, list)
+        manifest = manifest or {"count": 0}
+        return {"count": manifest["count"] + 1}
+
+    assert azure_file_store.compare_and_swap_json("manifest.json", increment) == {"count": 1}
+    assert azure_file_store.compare_and_swap_json("manifest.json", increment) == {"count": 2}
+
+
+@pytest.mark.usefixtures("blob_client", "container")
+def test_read_ranges(azure_file_store: FileStore) -> None:
+    data = os.urandom(256 * 1024)
+    assert azure_file_store.put_object("ranged.bin", data)
+
+    assert azure_file_store.read_range("ranged.bin", 1000, 24) == data[1000:1024]
+    assert azure_file_store.read_range("ranged.bin", -10) == data[-10:]
+    assert azure_file_store.read_range("ranged.bin", -(len(data) + 100)) == data
+    assert azure_file_store.read_range("ranged.bin", len(data) - 5, 100) == data[-5:]
+    assert azure_file_store.read_range("ranged.bin", len(data) + 5, 10) == b""
+    assert azure_file_store.read_range("missing.bin", 0, 10) is None
+
+    ranges = [(200_000, 100), (0, 10), (50, 10), (100_000, 1000), (len(data) - 5, 100)]
+    results = azure_file_store.read_ranges("ranged.bin", ranges, max_gap=1024)
+    assert results == [data[start : start + length] for start, length in ranges]
+    assert azure_file_store.read_ranges("missing.bin", ranges) is None
+
+    etag = str(azure_file_store.get_object_metadata("ranged.bin")["etag"])  # type: ignore[index]
+    assert azure_file_store.read_range("ranged.bin", 2, 3, if_match_etag=etag) == data[2:5]
+    assert azure_file_store.read_ranges("ranged.bin", [(0, 1), (8, 2)], if_match_etag=etag) == [data[0:1], data[8:10]]
+    assert azure_file_store.put_object("ranged.bin", b"changed")
+    assert azure_file_store.read_range("ranged.bin", 2, 3, if_match_etag=etag) is None
+
+
+def _write_then_fail(store: FileStore) -> None:
+    with store.open_write_stream("aborted.bin", 256 * 1024) as stream:
+        stream.write(os.urandom(3 * 256 * 1024))
+        message = "generator failed"
+        raise RuntimeError(message)
+
+
+@pytest.mark.usefixtures("blob_client", "container")
+def test_open_write_stream(azure_file_store: FileStore) -> None:
+    chunk = os.urandom(100 * 1024)
+    with azure_file_store.open_write_stream(
+        "streamed.bin", 256 * 1024, content_type="application/octet-stream"
+    ) as stream:
+        for _ in range(12):
+            stream.write(chunk)
+        assert stream.tell() == 12 * len(chunk)
+        assert not azure_file_store.object_exists("streamed.bin")
+
+    assert azure_file_store.read_object("streamed.bin") == chunk * 12
+    metadata: dict = azure_file_store.get_object_metadata("streamed.bin")  # type: ignore[assignment]
+    assert metadata["content_type"] == "application/octet-stream"
+
+    with pytest.raises(RuntimeError, match="generator failed"):
+        _write_then_fail(azure_file_store)
+    assert not azure_file_store.object_exists("aborted.bin")
+
+
+@pytest.mark.usefixtures("container")
+def test_put_and_read_object_in_parallel_parts(azure_file_store: FileStore, blob_client: BlobServiceClient) -> None:
+    data = os.urandom(20 * 1024 * 1024)
+    assert azure_file_store.put_object("large.bin", data, metadata={"source": "test"}, max_concurrency=2)
+    blob = blob_client.get_blob_client(azure_file_store.settings.bucket_name, "app_data/large.bin")
+    committed, _ = blob.get_block_list("committed")
+    assert len(committed) == 3
+
+    assert azure_file_store.read_object("large.bin", max_concurrency=2) == data
+    downloaded = io.BytesIO()
+    assert azure_file_store.download_fileobj("large.bin", downloaded, max_concurrency=4)
+    assert downloaded.getvalue() == data
+    assert azure_file_store.get_object_metadata("large.bin")["metadata"] == {"source": "test"}  # type: ignore[index]
+
+
+@pytest.mark.usefixtures("blob_client", "container")
+def test_delete_objects(azure_file_store: FileStore) -> None:
+    keys = [f"batch/{i}.txt" for i in range(5)]
+    for key in keys:
+        assert azure_file_store.put_object(key, "content")
+
+    assert azure_file_store.delete_objects([*keys[:3], "batch/missing.txt"]) == []
+    remaining = [azure_file_store.relative_key(str(obj["key"])) for obj in azure_file_store.iter_objects("batch/")]
+    assert remaining == keys[3:]
+
+
+@pytest.mark.usefixtures("blob_client", "container")
+def test_put_objects(azure_file_store: FileStore) -> None:
+    results = azure_file_store.put_objects(
+        [
+            ("batch/a.txt", "alpha"),
+            ("batch/b.json", b"{}", {"source": "test"}, "application/json"),
+            ("batch/c.bin", io.BytesIO(b"stream")),
+        ],
+        max_workers=2,
+    )
+    assert [result["key"] for result in results] == ["batch/a.txt", "batch/b.json", "batch/c.bin"]
+    assert all(result["success"] for result in results)
+    assert azure_file_store.read_object("batch/c.bin") == b"stream"
+    metadata: dict = azure_file_store.get_object_metadata("batch/b.json")  # type: ignore[assignment]
+    assert metadata["content_type"] == "application/json"
+
+
+@pytest.mark.usefixtures("blob_client", "container")
+def test_move_prefix(azure_file_store: FileStore, tmp_path: Path) -> None:
+    for number in range(12):
+        assert azure_file_store.put_object(f"folder/{number:02d}.txt", f"file {number}")
+    checkpoint = tmp_path / "move.json"
+
+    result = azure_file_store.move_prefix(
+        "folder/", "renamed/", max_workers=4, delete_batch_size=5, checkpoint=checkpoint
+    )
+    assert result["moved"] == 12
+    assert result["failed"] == []
+    assert result["bytes"] == sum(len(f"file {number}") for number in range(12))
+    assert not checkpoint.exists()
+    assert azure_file_store.list_objects("folder/") == []
+    assert len(azure_file_store.list_objects("renamed/")) == 12
+    assert azure_file_store.read_object("renamed/07.txt", as_text=True) == "file 7"
@@ -1,6 +1,11 @@
+import io
+import os
+import threading
+from pathlib import Path
 from typing import Any
 
 import pytest
+from google.cloud import storage
 
 from i_dot_ai_utilities.file_store.main import FileStore
 
@@ -36,6 +41,15 @@ def test_list_objects(gcp_file_store: FileStore) -> None:
     assert file_keys == ["app_data/test_file.txt", "app_data/test_file2.txt"]
 
 
+@pytest.mark.usefixtures("gcs_client", "bucket", "file")
+def test_list_objects_skips_upload_parts(gcp_file_store: FileStore) -> None:
+    assert gcp_file_store.put_object(".file-store-uploads/abandoned/00000", "part")
+
+    file_keys = [r["key"] for r in gcp_file_store.list_objects("")]
+    assert file_keys == ["app_data/test_file.txt"]
+    assert [info["key"] for info in gcp_file_store.iter_objects("")] == ["app_data/test_file.txt"]
+
+
 @pytest.mark.usefixtures("gcs_client", "bucket", "file")
 def test_delete_object(gcp_file_store: FileStore) -> None:
     response = gcp_file_store.delete_object("test_file.txt")
@@ -105,3 +119,212 @@ def test_get_empty_json_object(gcp_file_store: FileStore) -> None:
 
     download_response: dict[Any, Any] | list[Any] | None = gcp_file_store.download_json("test_file.txt")
     assert download_response is None
+
+
+@pytest.mark.usefixtures("gcs_client", "bucket", "file")
+def test_conditional_put_object(gcp_file_store: FileStore) -> None:
+    assert not gcp_file_store.put_object("test_file.txt", "overwritten", if_none_match=True)
+    assert gcp_file_store.put_object("test_file2.txt", "created", if_none_match=True)
+
+    current = gcp_file_store.read_object_with_etag("test_file.txt")
+    assert current is not None
+    content, etag = current
+    assert content == b"file_content"
+
+    assert gcp_file_store.update_object("test_file.txt", "first update", if_match_etag=etag)
+    assert not gcp_file_store.update_object("test_file.txt", "stale update", if_match_etag=etag)
+    assert gcp_file_store.read_object("test_file.txt", as_text=True) == "first update"
+
+
+@pytest.mark.usefixtures("gcs_client", "bucket", "file")
+def test_conditional_put_object_with_etag_keeps_new_metadata(gcp_file_store: FileStore) -> None:
+    metadata = gcp_file_store.get_object_metadata("test_file.txt")
+    assert metadata is not None
+    etag = str(metadata["etag"])
+    assert not etag.isdigit()
+
+    assert gcp_file_store.put_object(
+        "test_file.txt", "{}", metadata={"version": "2"}, content_type="application/json", if_match_etag=etag
+    )
+    updated = gcp_file_store.get_object_metadata("test_file.txt")
+    assert updated is not None
+    assert updated["metadata"] == {"version": "2"}
+    assert updated["content_type"] == "application/json"
+    assert not gcp_file_store.put_object("test_file.txt", "stale", if_match_etag=etag)
+
+
+@pytest.mark.usefixtures("gcs_client", "bucket")
+def test_compare_and_swap_json(gcp_file_store: FileStore) -> None:
+    def increment(manifest: dict | list | None) -> dict:
+        assert not isinstance(manifest, list)
+        manifest = manifest or {"count": 0}
+        return {"count": manifest["count"] + 1}
+
+    assert gcp_file_store.compare_and_swap_json("manifest.json", increment) == {"count": 1}
+    assert gcp_file_store.compare_and_swap_json("manifest.json", increment) == {"count": 2}
+
+
+@pytest.mark.usefixtures("gcs_client", "bucket")
+def test_read_ranges(gcp_file_store: FileStore) -> None:
+    data = os.urandom(256 * 1024)
+    assert gcp_file_store.put_object("ranged.bin", data)
+
+    assert gcp_file_store.read_range("ranged.bin", 1000, 24) == data[1000:1024]
+    assert gcp_file_store.read_range("ranged.bin", -10) == data[-10:]
+    assert gcp_file_store.read_range("ranged.bin", -(len(data) + 100)) == data
+    assert gcp_file_store.read_range("ranged.bin", len(data) - 5, 100) == data[-5:]
+    assert gcp_file_store.read_range("ranged.bin", len(data) + 5, 10) == b""
+    assert gcp_file_store.read_range("missing.bin", 0, 10) is None
+
+    ranges = [(200_000, 100), (0, 10), (50, 10), (100_000, 1000), (len(data) - 5, 100)]
+    results = gcp_file_store.read_ranges("ranged.bin", ranges, max_gap=1024)
+    assert results == [data[start : start + length] for start, length in ranges]
+    assert gcp_file_store.read_ranges("missing.bin", ranges) is None
+
+    # Both the ETag from the metadata and the generation from `read_object_with_etag` are accepted
+    etag = str(gcp_file_store.get_object_metadata("ranged.bin")["etag"])  # type: ignore[index]
+    current = gcp_file_store.read_object_with_etag("ranged.bin")
+    assert current is not None
+    generation = current[1]
+    for version in (etag, generation):
+        assert gcp_file_store.read_range("ranged.bin", 2, 3, if_match_etag=version) == data[2:5]
+        assert gcp_file_store.read_ranges("ranged.bin", [(0, 1), (8, 2)], if_match_etag=version) == [
+            data[0:1],
+            data[8:10],
+        ]
+    assert gcp_file_store.put_object("ranged.bin", b"changed")
+    assert gcp_file_store.read_range("ranged.bin", 2, 3, if_match_etag=etag) is None
+    assert gcp_file_store.read_range("ranged.bin", 2, 3, if_match_etag=generation) is None
+
+
+def _upload_parts_left(gcs_client: storage.Client, gcp_file_store: FileStore) -> list[str]:
+    blobs = gcs_client.bucket(gcp_file_store.settings.bucket_name).list_blobs()
+    return [blob.name for blob in blobs if ".file-store-uploads/" in blob.name]
+
+
+def _write_then_fail(store: FileStore) -> None:
+    with store.open_write_stream("aborted.bin", 256 * 1024) as stream:
+        stream.write(os.urandom(3 * 256 * 1024))
+        message = "generator failed"
+        raise RuntimeError(message)
+
+
+@pytest.mark.usefixtures("bucket")
+def test_open_write_stream(gcp_file_store: FileStore, gcs_client: storage.Client) -> None:
+    chunk = os.urandom(100 * 1024)
+    with gcp_file_store.open_write_stream(
+        "streamed.bin", 256 * 1024, content_type="application/octet-stream"
+    ) as stream:
+        for _ in range(12):
+            stream.write(chunk)
+        assert stream.tell() == 12 * len(chunk)
+        assert not gcp_file_store.object_exists("streamed.bin")
+
+    assert gcp_file_store.read_object("streamed.bin") == chunk * 12
+    metadata: dict = gcp_file_store.get_object_metadata("streamed.bin")  # type: ignore[assignment]
+    assert metadata["content_type"] == "application/octet-stream"
+    assert _upload_parts_left(gcs_client, gcp_file_store) == []
+
+    with pytest.raises(RuntimeError, match="generator failed"):
+        _write_then_fail(gcp_file_store)
+    assert not gcp_file_store.object_exists("aborted.bin")
+    assert _upload_parts_left(gcs_client, gcp_file_store) == []
+
+
+@pytest.mark.usefixtures("bucket")
+def test_open_write_stream_composes_many_parts(gcp_file_store: FileStore, gcs_client: storage.Client) -> None:
+    # More parts than one compose request takes, so the parts are composed through intermediate objects
+    chunks = [os.urandom(1024) for _ in range(40)]
+    with gcp_file_store.open_write_stream("many_parts.bin", 1024) as stream:
+        for chunk in chunks:
+            stream.write(chunk)
+
+    assert gcp_file_store.read_object("many_parts.bin") == b"".join(chunks)
+    assert _upload_parts_left(gcs_client, gcp_file_store) == []
+
+
+@pytest.mark.usefixtures("bucket")
+def test_put_and_read_object_in_parallel_parts(
+    gcp_file_store: FileStore, gcs_client: storage.Client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    upload_from_string = storage.Blob.upload_from_string
+    lock = threading.Lock()
+    uploads = {"parts": 0, "running": 0, "peak": 0}
+
+    def tracked(blob: storage.Blob, *args: Any, **kwargs: Any) -> None:
+        with lock:
+            uploads["parts"] += 1
+            uploads["running"] += 1
+            uploads["peak"] = max(uploads["peak"], uploads["running"])
+        try:
+            upload_from_string(blob, *args, **kwargs)
+        finally:
+            with lock:
+                uploads["running"] -= 1
+
+    monkeypatch.setattr(storage.Blob, "upload_from_string", tracked)
+    data = os.urandom(20 * 1024 * 1024)
+    assert gcp_file_store.put_object("large.bin", data, metadata={"source": "test"}, max_concurrency=2)
+    assert uploads["parts"] == 3
+    assert uploads["peak"] <= 2
+    assert _upload_parts_left(gcs_client, gcp_file_store) == []
+    metadata: dict = gcp_file_store.get_object_metadata("large.bin")  # type: ignore[assignment]
+    assert metadata["metadata"] == {"source": "test"}
+
+    assert gcp_file_store.read_object("large.bin", max_concurrency=2) == data
+    downloaded = io.BytesIO()
+    assert gcp_file_store.download_fileobj("large.bin", downloaded, max_concurrency=4)
+    assert downloaded.getvalue() == data
+
+    # Conditional writes are sent as one resumable upload, not in parts
+    current = gcp_file_store.read_object_with_etag("large.bin")
+    assert current is not None
+    assert gcp_file_store.put_object("large.bin", data[::-1], if_match_etag=current[1], max_concurrency=2)
+    assert uploads["parts"] == 4
+    assert gcp_file_store.read_object("large.bin") == data[::-1]
+
+
+@pytest.mark.usefixtures("gcs_client", "bucket")
+def test_delete_objects(gcp_file_store: FileStore) -> None:
+    keys = [f"batch/{i}.txt" for i in range(5)]
+    for key in keys:
+        assert gcp_file_store.put_object(key, "content")
+
+    assert gcp_file_store.delete_objects([*keys[:3], "batch/missing.txt"]) == []
+    remaining = [gcp_file_store.relative_key(str(obj["key"])) for obj in gcp_file_store.iter_objects("batch/")]
+    assert remaining == keys[3:]
+
+
+@pytest.mark.usefixtures("gcs_client", "bucket")
+def test_put_objects(gcp_file_store: FileStore) -> None:
+    results = gcp_file_store.put_objects(
+        [
+            ("batch/a.txt", "alpha"),
+            ("batch/b.json", b"{}", {"source": "test"}, "application/json"),
+            ("batch/c.bin", io.BytesIO(b"stream")),
+        ],
+        max_workers=2,
+    )
+    assert [result["key"] for result in results] == ["batch/a.txt", "batch/b.json", "batch/c.bin"]
+    assert all(result["success"] for result in results)
+    assert gcp_file_store.read_object("batch/c.bin") == b"stream"
+    metadata: dict = gcp_file_store.get_object_metadata("batch/b.json")  # type: ignore[assignment]
+    assert metadata["content_type"] == "application/json"
+
+
+@pytest.mark.usefixtures("gcs_client", "bucket")
+def test_move_prefix(gcp_file_store: FileStore, tmp_path: Path) -> None:
+    for number in range(12):
+        assert gcp_file_store.put_object(f"folder/{number:02d}.txt", f"file {number}")
+    checkpoint = tmp_path / "move.json"
+
+    result = gcp_file_store.move_prefix(
+        "folder/", "renamed/", max_workers=4, delete_batch_size=5, checkpoint=checkpoint
+    )
+    assert result["moved"] == 12
+    assert result["failed"] == []
+    assert result["bytes"] == sum(len(f"file {number}") for number in range(12))
+    assert not checkpoint.exists()
+    assert gcp_file_store.list_objects("folder/") == []
+    assert len(gcp_file_store.list_objects("renamed/")) == 12
+    assert gcp_file_store.read_object("renamed/07.txt", as_text=True) == "file 7"
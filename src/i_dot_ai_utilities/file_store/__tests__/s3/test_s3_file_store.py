@@ -1,8 +1,39 @@
-from typing import Any
+import asyncio
+import csv
+import io
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from collections.abc import AsyncIterator, Generator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, cast
 
 import pytest
+from botocore.exceptions import ClientError, ConnectionClosedError, EndpointConnectionError
+from mypy_boto3_s3 import S3Client
 
+from i_dot_ai_utilities.file_store.aws_s3 import main as s3_main
+from i_dot_ai_utilities.file_store.aws_s3.main import S3FileStore
+from i_dot_ai_utilities.file_store.benchmark import parse_size, run_benchmark
+from i_dot_ai_utilities.file_store.encryption import LocalKeyWrapper
+from i_dot_ai_utilities.file_store.factory import create_file_store
+from i_dot_ai_utilities.file_store.instrumentation import HistogramHook
+from i_dot_ai_utilities.file_store.lifecycle import ExpirySweeper, expiry_from_metadata
 from i_dot_ai_utilities.file_store.main import FileStore
+from i_dot_ai_utilities.file_store.packs import PackReader
+from i_dot_ai_utilities.file_store.sharding import shard_of
+from i_dot_ai_utilities.file_store.types.file_store_destination_enum import FileStoreDestinationEnum
+from i_dot_ai_utilities.file_store.types.object_change import ObjectChangeType
+from i_dot_ai_utilities.file_store.warm_up import warm_up_lifespan
+from i_dot_ai_utilities.file_store.watch import PrefixWatcher
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.bulk import PutObjectItem
 
 
 @pytest.mark.usefixtures("boto3_client", "bucket")
@@ -26,6 +57,54 @@ def test_copy_object(s3_file_store: FileStore) -> None:
     assert read_response == "file_content"
 
 
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_copy_object_in_parts(s3_file_store: FileStore, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Objects over CopyObject's 5 GiB limit are copied in parts; lower the limit to exercise that path
+    monkeypatch.setattr(s3_main, "_MAX_SINGLE_COPY_SIZE", 8 * 1024 * 1024)
+    data = os.urandom(9 * 1024 * 1024)
+    s3_file_store.put_object("large.bin", data)
+
+    assert s3_file_store.copy_object("large.bin", "large_copy.bin", size=len(data))
+
+    assert s3_file_store.read_object("large_copy.bin") == data
+    metadata = s3_file_store.get_object_metadata("large_copy.bin")
+    assert metadata is not None
+    assert str(metadata["etag"]).endswith("-2")
+    assert not s3_file_store.copy_object("missing.bin", "missing_copy.bin")
+
+
+@pytest.mark.usefixtures("bucket")
+def test_copy_object_of_unknown_size_falls_back_to_parts(
+    s3_file_store: FileStore, boto3_client: S3Client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(s3_main, "_MAX_SINGLE_COPY_SIZE", 8 * 1024 * 1024)
+    data = os.urandom(9 * 1024 * 1024)
+    s3_file_store.put_object("large.bin", data)
+
+    def reject_large_source(**_: Any) -> None:
+        raise ClientError(
+            {
+                "Error": {
+                    "Code": "InvalidRequest",
+                    "Message": "The specified copy source is larger than the maximum allowable size for a copy "
+                    "source: 5368709120",
+                }
+            },
+            "CopyObject",
+        )
+
+    boto3_client.meta.events.register("before-call.s3.CopyObject", reject_large_source)
+    try:
+        assert s3_file_store.copy_object("large.bin", "large_copy.bin")
+    finally:
+        boto3_client.meta.events.unregister("before-call.s3.CopyObject", reject_large_source)
+
+    assert s3_file_store.read_object("large_copy.bin") == data
+    metadata = s3_file_store.get_object_metadata("large_copy.bin")
+    assert metadata is not None
+    assert str(metadata["etag"]).endswith("-2")
+
+
 @pytest.mark.usefixtures("boto3_client", "bucket", "file")
 def test_list_objects(s3_file_store: FileStore) -> None:
     copy_response = s3_file_store.copy_object("test_file.txt", "test_file2.txt")
@@ -103,3 +182,991 @@ def test_get_empty_json_object(s3_file_store: FileStore) -> None:
 
     download_response: dict[Any, Any] | list[Any] | None = s3_file_store.download_json("test_file.txt")
     assert download_response is None
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_rate_limiter_is_shared_between_stores(s3_file_store: FileStore) -> None:
+    store = cast("S3FileStore", s3_file_store)
+    limited_settings = store.settings.model_copy(update={"rate_limit_requests_per_second": 1000})
+    first_store = S3FileStore(store.logger, limited_settings)
+    second_store = S3FileStore(store.logger, limited_settings)
+    assert first_store.rate_limiter is not None
+    assert first_store.rate_limiter is second_store.rate_limiter
+
+    assert first_store.put_object("test_file.txt", "file_content")
+    assert second_store.read_object("test_file.txt", as_text=True) == "file_content"
+
+    utilisation = first_store.rate_limiter.utilisation()
+    assert utilisation["requests"]["consumed"] == 2  # type: ignore[index]
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_rate_limits_per_prefix(s3_file_store: FileStore) -> None:
+    store = cast("S3FileStore", s3_file_store)
+    limited_settings = store.settings.model_copy(
+        update={
+            "rate_limit_requests_per_second": 1000,
+            "rate_limit_scope": "test:prefixes",
+            "rate_limit_prefix_depth": 1,
+        }
+    )
+    limited_store = S3FileStore(store.logger, limited_settings)
+    assert limited_store.rate_limiter is not None
+
+    assert limited_store.put_object("images/a.png", "a")
+    assert limited_store.read_object("images/a.png", as_text=True) == "a"
+    assert limited_store.put_object("logs/2026/b.txt", "b")
+    items: list[PutObjectItem] = [("logs/2026/c.txt", "c"), ("logs/d.txt", "d")]
+    assert all(result["success"] for result in asyncio.run(limited_store.put_objects_async(items)))
+
+    consumed = {
+        prefix: utilisation["requests"]["consumed"]  # type: ignore[index]
+        for prefix, utilisation in limited_store.rate_limiter.prefix_utilisation().items()
+    }
+    assert consumed == {"images/": 2, "logs/": 3}
+    assert limited_store.rate_limiter_for("logs/e.txt") is limited_store.rate_limiter.for_prefix("logs/")
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+@pytest.mark.parametrize("archive_format", ["zip", "tar"])
+def test_stream_and_extract_archive(s3_file_store: FileStore, archive_format: Literal["zip", "tar"]) -> None:
+    s3_file_store.put_object("project/a.txt", "file a")
+    s3_file_store.put_object("project/nested/b.txt", "file b")
+
+    archive_bytes = b"".join(s3_file_store.stream_archive("project/", archive_format=archive_format))
+    assert s3_file_store.put_object(f"project.{archive_format}", archive_bytes)
+
+    uploaded = s3_file_store.extract_archive(f"project.{archive_format}", "restored")
+    assert sorted(uploaded or []) == ["restored/a.txt", "restored/nested/b.txt"]
+    assert s3_file_store.read_object("restored/nested/b.txt", as_text=True) == "file b"
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_stream_archive_names_members_relative_to_prefix_directory(s3_file_store: FileStore) -> None:
+    s3_file_store.put_object("reports/a.csv", "a")
+    s3_file_store.put_object("reports2024/b.csv", "b")
+
+    archive_bytes = b"".join(s3_file_store.stream_archive("reports"))
+    with zipfile.ZipFile(io.BytesIO(archive_bytes)) as zipped:
+        assert sorted(zipped.namelist()) == ["a.csv", "reports2024/b.csv"]
+
+
+@pytest.mark.usefixtures("bucket")
+def test_stream_archive_fails_on_unreadable_member(s3_file_store: FileStore, boto3_client: S3Client) -> None:
+    s3_file_store.put_object("project/a.txt", "file a")
+    s3_file_store.put_object("project/b.txt", "file b")
+
+    def fail_b(params: dict[str, Any], **_: Any) -> None:
+        if params["url_path"].endswith("/b.txt"):
+            raise ClientError({"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "GetObject")
+
+    boto3_client.meta.events.register("before-call.s3.GetObject", fail_b)
+    try:
+        with pytest.raises(OSError, match=r"project/b\.txt"):
+            b"".join(s3_file_store.stream_archive("project/"))
+    finally:
+        boto3_client.meta.events.unregister("before-call.s3.GetObject", fail_b)
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_extract_missing_archive(s3_file_store: FileStore) -> None:
+    assert s3_file_store.extract_archive("missing.zip", "restored") is None
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_prefetch_iter(s3_file_store: FileStore) -> None:
+    for i in range(5):
+        s3_file_store.put_object(f"batch/{i}.txt", f"content {i}")
+
+    from_prefix = list(s3_file_store.prefetch_iter("batch/", depth=2))
+    assert from_prefix == [(f"batch/{i}.txt", f"content {i}".encode()) for i in range(5)]
+
+    from_keys = list(s3_file_store.prefetch_iter(["batch/3.txt", "batch/missing.txt", "batch/1.txt"]))
+    assert from_keys == [("batch/3.txt", b"content 3"), ("batch/missing.txt", None), ("batch/1.txt", b"content 1")]
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket", "file")
+def test_conditional_put_object(s3_file_store: FileStore) -> None:
+    assert not s3_file_store.put_object("test_file.txt", "overwritten", if_none_match=True)
+    assert s3_file_store.put_object("test_file2.txt", "created", if_none_match=True)
+
+    current = s3_file_store.read_object_with_etag("test_file.txt")
+    assert current is not None
+    content, etag = current
+    assert content == b"file_content"
+
+    assert s3_file_store.update_object("test_file.txt", "first update", if_match_etag=etag)
+    assert not s3_file_store.update_object("test_file.txt", "stale update", if_match_etag=etag)
+    assert s3_file_store.read_object("test_file.txt", as_text=True) == "first update"
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_compare_and_swap_json(s3_file_store: FileStore) -> None:
+    def increment(manifest: dict | list | None) -> dict:
+        assert not isinstance(manifest, list)
+        manifest = manifest or {"count": 0}
+        return {"count": manifest["count"] + 1}
+
+    def update(_: int) -> dict | list | None:
+        return s3_file_store.compare_and_swap_json("manifest.json", increment, max_retries=20)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(update, range(8)))
+
+    assert all(results)
+    assert s3_file_store.download_json("manifest.json") == {"count": 8}
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_compare_and_swap_json_does_not_retry_failed_writes(
+    s3_file_store: FileStore, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls = []
+
+    def increment(manifest: dict | list | None) -> dict:
+        calls.append(manifest)
+        return {"count": 1}
+
+    monkeypatch.setattr(s3_file_store, "put_object", lambda *_, **__: False)
+    assert s3_file_store.compare_and_swap_json("manifest.json", increment) is None
+    assert calls == [None]
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_inventory(s3_file_store: FileStore, tmp_path: Path) -> None:
+    for i in range(5):
+        s3_file_store.put_object(f"indexed/{i}.txt", f"content {i}")
+    s3_file_store.put_object("other/0.txt", "not indexed")
+
+    inventory = s3_file_store.inventory("indexed/", path=tmp_path / "inventory.db")
+    assert inventory.refreshed_at is None
+    assert inventory.refresh() == {"created": 5, "updated": 0, "deleted": 0}
+    assert inventory.count() == 5
+    assert inventory.total_size() == 5 * len("content 0")
+    assert inventory.get("other/0.txt") is None
+
+    first_page = inventory.list_objects("indexed/", limit=2)
+    second_page = inventory.list_objects("indexed/", start_after=str(first_page[-1]["key"]), limit=2)
+    assert [obj["key"] for obj in first_page + second_page] == [f"indexed/{i}.txt" for i in range(4)]
+    assert [obj["key"] for obj in inventory.range("indexed/1", "indexed/3")] == ["indexed/1.txt", "indexed/2.txt"]
+
+    s3_file_store.update_object("indexed/1.txt", "changed")
+    s3_file_store.delete_object("indexed/2.txt")
+    s3_file_store.put_object("indexed/9.txt", "new")
+    changes = {change["key"]: change["type"] for change in inventory.poll()}
+    assert changes == {
+        "indexed/1.txt": ObjectChangeType.UPDATED,
+        "indexed/2.txt": ObjectChangeType.DELETED,
+        "indexed/9.txt": ObjectChangeType.CREATED,
+    }
+    inventory.close()
+
+    reopened = s3_file_store.inventory("indexed/", path=tmp_path / "inventory.db")
+    assert reopened.refreshed_at is not None
+    assert reopened.refresh() == {"created": 0, "updated": 0, "deleted": 0}
+    assert reopened.count("indexed/") == 5
+    reopened.close()
+    with pytest.raises(ValueError, match="built for prefix"):
+        s3_file_store.inventory("other/", path=tmp_path / "inventory.db")
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_iter_objects_start_after(s3_file_store: FileStore) -> None:
+    for i in range(5):
+        s3_file_store.put_object(f"events/{i}.json", "{}")
+
+    keys = [obj["key"] for obj in s3_file_store.iter_objects("events/", page_size=2, start_after="events/1.json")]
+    assert keys == [f"app_data/events/{i}.json" for i in range(2, 5)]
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_prefix_watcher(s3_file_store: FileStore) -> None:
+    s3_file_store.put_object("events/0.json", "{}")
+    watcher = PrefixWatcher(s3_file_store, "events/", full_scan_every=2)
+    assert watcher.poll() == []
+
+    s3_file_store.put_object("events/1.json", "{}")
+    s3_file_store.update_object("events/0.json", '{"updated": true}')
+    incremental = watcher.poll()
+    assert [(change["type"], change["key"]) for change in incremental] == [(ObjectChangeType.CREATED, "events/1.json")]
+
+    s3_file_store.delete_object("events/1.json")
+    full = watcher.poll()
+    assert sorted((change["type"].value, change["key"]) for change in full) == [
+        ("deleted", "events/1.json"),
+        ("updated", "events/0.json"),
+    ]
+    assert watcher.state.keys() == {"events/0.json"}
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_watch_includes_existing(s3_file_store: FileStore) -> None:
+    s3_file_store.put_object("events/0.json", "{}")
+    stop = threading.Event()
+
+    for change in s3_file_store.watch("events/", interval=0.01, include_existing=True, stop=stop):
+        assert change["key"] == "events/0.json"
+        assert change["type"] == ObjectChangeType.CREATED
+        stop.set()
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_watch_async(s3_file_store: FileStore) -> None:
+    async def first_change() -> str:
+        stop = asyncio.Event()
+        async for change in s3_file_store.watch_async("events/", interval=0.01, stop=stop):
+            stop.set()
+            return change["key"]
+        return ""
+
+    s3_file_store.put_object("events/0.json", "{}")
+    threading.Timer(0.1, s3_file_store.put_object, ("events/1.json", "{}")).start()
+    assert asyncio.run(first_change()) == "events/1.json"
+
+
+def _use_store_in_child(
+    store: FileStore, parent_client: object, results: "multiprocessing.Queue[tuple[bool, bool]]"
+) -> None:
+    rebuilt = store.get_client() is not parent_client
+    written = store.put_object("forked/child.txt", "written by child")
+    results.put((rebuilt, written))
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not available on this platform")
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_client_rebuilt_after_fork(s3_file_store: FileStore) -> None:
+    parent_client = s3_file_store.get_client()
+    assert s3_file_store.put_object("forked/parent.txt", "written by parent")
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=_use_store_in_child, args=(s3_file_store, parent_client, results))
+    child.start()
+    child.join(timeout=30)
+
+    assert child.exitcode == 0
+    assert results.get(timeout=5) == (True, True)
+    assert s3_file_store.get_client() is parent_client
+    assert s3_file_store.read_object("forked/child.txt", as_text=True) == "written by child"
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_shared_store_across_threads(s3_file_store: FileStore) -> None:
+    client = s3_file_store.get_client()
+
+    def round_trip(i: int) -> bool:
+        key = f"threads/{i}.txt"
+        return (
+            s3_file_store.put_object(key, f"content {i}") and s3_file_store.read_object(key) == f"content {i}".encode()
+        )
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        assert all(executor.map(round_trip, range(64)))
+
+    assert s3_file_store.get_client() is client
+    assert len(list(s3_file_store.iter_objects("threads/"))) == 64
+
+
+def _shout(data: bytes) -> bytes | None:
+    if data == b"skip":
+        return None
+    if data == b"fail":
+        message = "cannot transform"
+        raise ValueError(message)
+    return data.upper()
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_bulk_transform(s3_file_store: FileStore) -> None:
+    for i in range(6):
+        s3_file_store.put_object(f"raw/{i}.txt", f"content {i}")
+    s3_file_store.put_object("raw/skip.txt", "skip")
+    s3_file_store.put_object("raw/fail.txt", "fail")
+
+    results = {
+        result["key"]: result
+        for result in s3_file_store.bulk_transform(
+            "raw/", _shout, dest_key=lambda key: key.replace("raw/", "shouted/"), io_workers=4, processes=2
+        )
+    }
+
+    assert len(results) == 8
+    assert results["raw/skip.txt"] == {"key": "raw/skip.txt", "dest_key": None, "success": True, "error": None}
+    assert not results["raw/fail.txt"]["success"]
+    assert results["raw/fail.txt"]["error"] == "ValueError: cannot transform"
+    assert results["raw/0.txt"]["dest_key"] == "shouted/0.txt"
+    for i in range(6):
+        assert s3_file_store.read_object(f"shouted/{i}.txt", as_text=True) == f"CONTENT {i}"
+    assert s3_file_store.object_exists("shouted/skip.txt") is False
+
+
+def _dest_key_or_raise(key: str) -> str:
+    if key.endswith("bad.txt"):
+        message = f"no destination for {key}"
+        raise KeyError(message)
+    return key.replace("raw/", "shouted/")
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_bulk_transform_reports_dest_key_errors(s3_file_store: FileStore) -> None:
+    s3_file_store.put_object("raw/good.txt", "good")
+    s3_file_store.put_object("raw/bad.txt", "bad")
+
+    results = {
+        result["key"]: result
+        for result in s3_file_store.bulk_transform("raw/", _shout, dest_key=_dest_key_or_raise, processes=1)
+    }
+
+    assert results["raw/good.txt"]["success"]
+    assert not results["raw/bad.txt"]["success"]
+    assert results["raw/bad.txt"]["error"] == "KeyError: 'no destination for raw/bad.txt'"
+    assert s3_file_store.read_object("shouted/good.txt", as_text=True) == "GOOD"
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_instrumentation_hooks(s3_file_store: FileStore) -> None:
+    histogram = HistogramHook()
+    s3_file_store.add_hook(histogram)
+
+    s3_file_store.put_object("hooked.txt", "12345")
+    s3_file_store.read_object("hooked.txt")
+    s3_file_store.read_object("missing.txt")
+    s3_file_store.object_exists("missing.txt")
+
+    stats = histogram.snapshot()
+    assert stats["put_object"]["bytes_out"] == 5
+    assert stats["read_object"]["count"] == 2
+    assert stats["read_object"]["bytes_in"] == 5
+    assert stats["read_object"]["outcomes"] == {"success": 1, "failure": 1}
+    assert stats["object_exists"]["outcomes"] == {"success": 1}
+
+    s3_file_store.remove_hook(histogram)
+    s3_file_store.read_object("hooked.txt")
+    assert histogram.snapshot()["read_object"]["count"] == 2
+
+
+@pytest.mark.usefixtures("bucket")
+def test_instrumentation_counts_sdk_retries(s3_file_store: FileStore, boto3_client: S3Client) -> None:
+    failures = ["retried.txt"]
+
+    def drop_first_attempt(request: Any, **_: Any) -> None:
+        if failures and request.url.endswith(failures[0]):
+            failures.pop()
+            raise ConnectionClosedError(endpoint_url=request.url)
+
+    boto3_client.meta.events.register_first("before-send.s3.PutObject", drop_first_attempt)
+    histogram = HistogramHook()
+    s3_file_store.add_hook(histogram)
+
+    assert s3_file_store.put_object("retried.txt", "12345")
+    assert s3_file_store.put_object("first-time.txt", "12345")
+    stats = histogram.snapshot()["put_object"]
+    assert stats["count"] == 2
+    assert stats["retries"] == 1
+    s3_file_store.remove_hook(histogram)
+
+
+@pytest.fixture
+def other_bucket(boto3_client: S3Client) -> Generator[str, Any, None]:
+    name = "test-other-bucket"
+    boto3_client.create_bucket(Bucket=name)
+    yield name
+    objects = boto3_client.list_objects_v2(Bucket=name).get("Contents", [])
+    for obj in objects:
+        boto3_client.delete_object(Bucket=name, Key=obj["Key"])
+    boto3_client.delete_bucket(Bucket=name)
+
+
+@pytest.mark.usefixtures("bucket")
+def test_operations_on_other_bucket(s3_file_store: FileStore, other_bucket: str) -> None:
+    assert s3_file_store.put_object("elsewhere.txt", "other content", bucket=other_bucket)
+    assert s3_file_store.object_exists("elsewhere.txt", bucket=other_bucket)
+    assert not s3_file_store.object_exists("elsewhere.txt")
+    assert s3_file_store.read_object("elsewhere.txt", as_text=True, bucket=other_bucket) == "other content"
+    assert [obj["key"] for obj in s3_file_store.list_objects("", bucket=other_bucket)] == ["app_data/elsewhere.txt"]
+    assert s3_file_store.compare_and_swap_json("count.json", lambda _: {"count": 1}, bucket=other_bucket)
+    assert s3_file_store.download_json("count.json", bucket=other_bucket) == {"count": 1}
+
+    assert s3_file_store.copy_object("elsewhere.txt", "copied.txt", source_bucket=other_bucket)
+    assert s3_file_store.read_object("copied.txt", as_text=True) == "other content"
+    assert s3_file_store.copy_object("copied.txt", "copied_back.txt", dest_bucket=other_bucket)
+    assert s3_file_store.object_exists("copied_back.txt", bucket=other_bucket)
+
+    assert s3_file_store.delete_object("elsewhere.txt", bucket=other_bucket)
+    assert not s3_file_store.object_exists("elsewhere.txt", bucket=other_bucket)
+
+
+def test_stores_share_client(s3_file_store: FileStore) -> None:
+    other_store = create_file_store(FileStoreDestinationEnum.AWS_S3, s3_file_store.logger)
+    assert other_store.get_client() is s3_file_store.get_client()
+
+    unshared_settings = s3_file_store.settings.model_copy(update={"share_clients": False})
+    unshared_store = S3FileStore(s3_file_store.logger, unshared_settings)
+    assert unshared_store.get_client() is not s3_file_store.get_client()
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_open_write_stream(s3_file_store: FileStore) -> None:
+    part_size = s3_file_store.min_part_size
+    chunk = os.urandom(1024 * 1024)
+    with s3_file_store.open_write_stream("streamed.bin", part_size, content_type="application/octet-stream") as stream:
+        for _ in range(12):
+            stream.write(chunk)
+        assert stream.tell() == 12 * len(chunk)
+        assert not s3_file_store.object_exists("streamed.bin")
+
+    assert s3_file_store.read_object("streamed.bin") == chunk * 12
+    metadata: dict = s3_file_store.get_object_metadata("streamed.bin")  # type: ignore[assignment]
+    assert metadata["content_type"] == "application/octet-stream"
+
+    with io.TextIOWrapper(s3_file_store.open_write_stream("small.csv"), encoding="utf-8", newline="") as text:
+        csv.writer(text).writerows([["a", "b"], [1, 2]])
+    assert s3_file_store.read_object("small.csv", as_text=True) == "a,b\r\n1,2\r\n"
+
+    with pytest.raises(ValueError, match="part_size"):
+        s3_file_store.open_write_stream("too_small.bin", part_size=1024)
+
+
+def _write_then_fail(store: FileStore) -> None:
+    with store.open_write_stream("aborted.bin") as stream:
+        stream.write(os.urandom(store.min_part_size + 1))
+        message = "generator failed"
+        raise RuntimeError(message)
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_open_write_stream_aborts_on_error(s3_file_store: FileStore) -> None:
+    client = cast("S3Client", s3_file_store.get_client())
+    with pytest.raises(RuntimeError, match="generator failed"):
+        _write_then_fail(s3_file_store)
+
+    assert not s3_file_store.object_exists("aborted.bin")
+    assert not client.list_multipart_uploads(Bucket=s3_file_store.settings.bucket_name).get("Uploads")
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_run_benchmark(s3_file_store: FileStore) -> None:
+    results = list(
+        run_benchmark(
+            s3_file_store, sizes=[parse_size("1KiB")], concurrency=[1, 4], objects=4, operations=["put", "read"]
+        )
+    )
+
+    assert [(r["operation"], r["concurrency"]) for r in results] == [("put", 1), ("read", 1), ("put", 4), ("read", 4)]
+    for result in results:
+        assert result["backend"] == "S3FileStore"
+        assert result["object_size"] == 1024
+        assert result["operations"] == 4
+        assert result["errors"] == 0
+        assert result["ops_per_second"] > 0
+        assert result["mb_per_second"] > 0
+        assert 0 < result["p50_seconds"] <= result["p90_seconds"] <= result["p99_seconds"]
+    assert list(s3_file_store.iter_objects("benchmark/")) == []
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_delete_objects(s3_file_store: FileStore) -> None:
+    keys = [f"batch/{i}.txt" for i in range(5)]
+    for key in keys:
+        s3_file_store.put_object(key, "content")
+
+    assert s3_file_store.delete_objects([*keys[:3], "batch/missing.txt"]) == []
+    assert [s3_file_store.relative_key(str(obj["key"])) for obj in s3_file_store.iter_objects("batch/")] == keys[3:]
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_sweep_expired(s3_file_store: FileStore) -> None:
+    offset = [0.0]
+    sweeper = ExpirySweeper(s3_file_store, "scratch/", clock=lambda: time.time() + offset[0])
+    s3_file_store.put_object("scratch/hour.txt", "content", ttl=timedelta(hours=1))
+    s3_file_store.put_object("scratch/day.txt", "content", metadata={"owner": "test"}, ttl=timedelta(days=1))
+    s3_file_store.put_object("scratch/forever.txt", "content")
+
+    metadata: dict = s3_file_store.get_object_metadata("scratch/day.txt")  # type: ignore[assignment]
+    assert metadata["metadata"]["owner"] == "test"
+    assert expiry_from_metadata(metadata["metadata"]) == pytest.approx(time.time() + 86400, abs=5)
+
+    assert sweeper.sweep() == {"inspected": 3, "expired": 0, "deleted": 0, "failed": 0}
+
+    offset[0] = 2 * 3600
+    assert sweeper.sweep() == {"inspected": 0, "expired": 1, "deleted": 1, "failed": 0}
+    assert not s3_file_store.object_exists("scratch/hour.txt")
+
+    s3_file_store.put_object("scratch/later.txt", "content", ttl=timedelta(minutes=1))
+    offset[0] = 2 * 86400
+    assert sweeper.sweep() == {"inspected": 1, "expired": 2, "deleted": 2, "failed": 0}
+    assert [obj["key"] for obj in s3_file_store.iter_objects("scratch/")] == ["app_data/scratch/forever.txt"]
+
+    s3_file_store.put_object("scratch/soon.txt", "content", ttl=timedelta(seconds=-1))
+    assert s3_file_store.sweep_expired("scratch/")["deleted"] == 1
+    assert s3_file_store.sweep_expired("scratch/")["inspected"] == 0
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_stores_have_their_own_lazy_state_lock(s3_file_store: FileStore) -> None:
+    other_store = S3FileStore(s3_file_store.logger, s3_file_store.settings)
+    store_lock = s3_file_store._lazy_state_lock()  # noqa: SLF001
+    assert store_lock is s3_file_store._lazy_state_lock()  # noqa: SLF001
+
+    with store_lock:
+        assert other_store.sweep_expired("scratch/")["inspected"] == 0
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_sweep_expired_keeps_rewritten_objects(s3_file_store: FileStore) -> None:
+    offset = [0.0]
+    sweeper = ExpirySweeper(s3_file_store, "scratch/", clock=lambda: time.time() + offset[0])
+    s3_file_store.put_object("scratch/a.txt", "content", ttl=timedelta(minutes=1))
+    assert sweeper.sweep()["inspected"] == 1
+
+    s3_file_store.put_object("scratch/a.txt", "NEW")
+    offset[0] = 3600
+    assert sweeper.sweep() == {"inspected": 0, "expired": 0, "deleted": 0, "failed": 0}
+    assert s3_file_store.read_object("scratch/a.txt") == b"NEW"
+
+    s3_file_store.put_object("scratch/a.txt", "LATER", ttl=timedelta(hours=2))
+    assert sweeper.sweep()["expired"] == 0
+    assert s3_file_store.object_exists("scratch/a.txt")
+
+
+@pytest.mark.usefixtures("bucket")
+def test_sharded_keys(s3_file_store: FileStore, boto3_client: S3Client) -> None:
+    sharded_store = S3FileStore(s3_file_store.logger, s3_file_store.settings.model_copy(update={"shard_count": 16}))
+    keys = [f"ingest/{i:03d}.json" for i in range(40)]
+    for key in keys:
+        assert sharded_store.put_object(key, key)
+
+    stored = [obj["Key"] for obj in boto3_client.list_objects_v2(Bucket=s3_file_store.settings.bucket_name)["Contents"]]
+    assert len({key.split("/")[1] for key in stored}) > 1
+    assert f"app_data/{shard_of('ingest/000.json', 16)}/ingest/000.json" in stored
+
+    listed = [sharded_store.relative_key(str(obj["key"])) for obj in sharded_store.iter_objects("ingest/", page_size=3)]
+    assert listed == keys
+    assert [obj["key"] for obj in sharded_store.list_objects("ingest/", max_keys=5)] == [
+        f"app_data/{k}" for k in keys[:5]
+    ]
+    assert [obj["key"] for obj in sharded_store.iter_objects("ingest/", start_after="ingest/037.json")] == [
+        f"app_data/{k}" for k in keys[38:]
+    ]
+
+    assert sharded_store.read_object("ingest/007.json", as_text=True) == "ingest/007.json"
+    assert sharded_store.copy_object("ingest/007.json", "copied/007.json")
+    assert sharded_store.object_exists("copied/007.json")
+    assert not s3_file_store.object_exists("ingest/007.json")
+    assert sharded_store.delete_objects(keys) == []
+    assert [obj["key"] for obj in sharded_store.iter_objects("")] == ["app_data/copied/007.json"]
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_packs(s3_file_store: FileStore) -> None:
+    with s3_file_store.open_pack_writer("packs/0001.pack") as writer:
+        for i in range(50):
+            writer.add(f"record-{i:03d}", f"content {i}")
+        writer.add_json("config", {"version": 1})
+    with s3_file_store.open_pack_writer("packs/0002.pack") as writer:
+        writer.add("record-000", b"replaced")
+        writer.add("record-100", b"")
+
+    pack = s3_file_store.open_pack("packs/0001.pack")
+    assert len(pack.names()) == 51
+    assert pack.read("record-007") == b"content 7"
+    assert pack.read_json("config") == {"version": 1}
+    assert pack.read("missing") is None
+    assert pack.read_many(["record-002", "record-001", "missing"]) == {
+        "record-002": b"content 2",
+        "record-001": b"content 1",
+    }
+    assert s3_file_store.open_pack("packs/0001.pack") is pack
+    assert PackReader(s3_file_store, "packs/0001.pack", tail_size=32).read("record-049") == b"content 49"
+    assert s3_file_store.open_pack("packs/missing.pack").read("record-000") is None
+    assert s3_file_store.read_range("packs/0001.pack", 0, 9) == b"content 0"
+    assert s3_file_store.read_range("packs/0001.pack", 1_000_000) == b""
+
+    result = s3_file_store.compact_packs(
+        ["packs/0001.pack", "packs/0002.pack"],
+        "packs/compacted.pack",
+        keep=lambda name: name != "config",
+        delete_sources=True,
+    )
+    assert result == {"key": "packs/compacted.pack", "packs": 2, "records": 51, "dropped": 2, "bytes": 489}
+    compacted = s3_file_store.open_pack("packs/compacted.pack")
+    assert compacted.read("record-000") == b"replaced"
+    assert compacted.read("record-100") == b""
+    assert compacted.read("record-049") == b"content 49"
+    assert "config" not in compacted
+    assert [obj["key"] for obj in s3_file_store.iter_objects("packs/")] == ["app_data/packs/compacted.pack"]
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_packs_rewritten_in_place(s3_file_store: FileStore) -> None:
+    with s3_file_store.open_pack_writer("packs/live.pack") as writer:
+        writer.add("a", b"AAAA")
+        writer.add("b", b"BBBB")
+    pack = s3_file_store.open_pack("packs/live.pack")
+    assert pack.read("b") == b"BBBB"
+
+    with s3_file_store.open_pack_writer("packs/live.pack") as writer:
+        writer.add("x", b"XXXXXXXX")
+        writer.add("b", b"NEWB")
+    reopened = s3_file_store.open_pack("packs/live.pack")
+    assert reopened is not pack
+    assert reopened.names() == ["x", "b"]
+    assert reopened.read("b") == b"NEWB"
+    assert pack.read("b") == b"NEWB"
+
+    other_store = S3FileStore(s3_file_store.logger, s3_file_store.settings)
+    with other_store.open_pack_writer("packs/live.pack") as writer:
+        writer.add("b", b"OTHER")
+    assert reopened.read("b") == b"OTHER"
+    assert reopened.read_many(["b"]) == {"b": b"OTHER"}
+    assert reopened.names() == ["b"]
+    assert s3_file_store.delete_object("packs/live.pack")
+    assert reopened.read("b") is None
+
+    assert s3_file_store.put_object("packs/plain.bin", b"0123456789")
+    etag = str(s3_file_store.get_object_metadata("packs/plain.bin")["etag"])  # type: ignore[index]
+    assert s3_file_store.read_range("packs/plain.bin", 2, 3, if_match_etag=etag) == b"234"
+    assert s3_file_store.read_ranges("packs/plain.bin", [(0, 1), (8, 2)], if_match_etag=etag) == [b"0", b"89"]
+    assert s3_file_store.put_object("packs/plain.bin", b"changed")
+    assert s3_file_store.read_range("packs/plain.bin", 2, 3, if_match_etag=etag) is None
+
+
+@pytest.mark.usefixtures("bucket")
+def test_reads_quote_if_match_etags(s3_file_store: FileStore, boto3_client: S3Client) -> None:
+    data = os.urandom(20 * 1024 * 1024)
+    assert s3_file_store.put_object("etags/large.bin", data)
+    etag = str(s3_file_store.get_object_metadata("etags/large.bin")["etag"]).strip('"')  # type: ignore[index]
+    quoted = f'"{etag}"'
+    if_match: list[str] = []
+    boto3_client.meta.events.register(
+        "before-call.s3.GetObject", lambda params, **_: if_match.append(params["headers"].get("If-Match"))
+    )
+
+    assert s3_file_store.read_range("etags/large.bin", 2, 3, if_match_etag=etag) == data[2:5]
+    assert if_match == [quoted]
+    if_match.clear()
+
+    assert s3_file_store.read_object("etags/large.bin") == data
+    assert len(if_match) > 1
+    assert if_match[1:] == [quoted] * (len(if_match) - 1)
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_read_ranges(s3_file_store: FileStore) -> None:
+    data = os.urandom(256 * 1024)
+    assert s3_file_store.put_object("ranged.bin", data)
+    histogram = HistogramHook()
+    s3_file_store.add_hook(histogram)
+
+    assert s3_file_store.read_range("ranged.bin", 1000, 24) == data[1000:1024]
+    assert s3_file_store.read_range("ranged.bin", -10) == data[-10:]
+    assert s3_file_store.read_range("ranged.bin", len(data) - 5, 100) == data[-5:]
+    assert s3_file_store.read_range("missing.bin", 0, 10) is None
+
+    ranges = [(200_000, 100), (0, 10), (50, 10), (100_000, 1000), (len(data) - 5, 100)]
+    results = s3_file_store.read_ranges("ranged.bin", ranges, max_gap=1024)
+    assert results == [data[start : start + length] for start, length in ranges]
+    assert histogram.snapshot()["read_range"]["count"] == 4 + 4
+    assert s3_file_store.read_ranges("missing.bin", ranges) is None
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_open(s3_file_store: FileStore) -> None:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zipped:
+        for i in range(20):
+            zipped.writestr(f"member-{i:02d}.bin", os.urandom(256 * 1024))
+        zipped.writestr("wanted.txt", "found it")
+    assert s3_file_store.put_object("archive.zip", archive.getvalue())
+
+    with s3_file_store.open("archive.zip", block_size=64 * 1024) as remote:
+        with zipfile.ZipFile(remote) as zipped:
+            assert zipped.read("wanted.txt") == b"found it"
+        assert remote.bytes_fetched < len(archive.getvalue()) / 10
+
+    with s3_file_store.open("archive.zip") as remote:
+        assert remote.read() == archive.getvalue()
+
+    with pytest.raises(FileNotFoundError):
+        s3_file_store.open("missing.zip")
+    with pytest.raises(ValueError, match="Unsupported mode"):
+        s3_file_store.open("archive.zip", "wb")
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_tables(s3_file_store: FileStore) -> None:
+    pa = pytest.importorskip("pyarrow")
+    batches = (
+        pa.record_batch({"id": list(range(start, start + 1000)), "payload": [os.urandom(200) for _ in range(1000)]})
+        for start in range(0, 10_000, 1000)
+    )
+    assert s3_file_store.write_table("tables/events.parquet", batches, row_group_size=2500)
+
+    everything = s3_file_store.read_table("tables/events.parquet")
+    assert everything is not None
+    assert everything.num_rows == 10_000
+    size = s3_file_store.get_object_metadata("tables/events.parquet")["content_length"]  # type: ignore[index]
+
+    histogram = HistogramHook()
+    s3_file_store.add_hook(histogram)
+    table = s3_file_store.read_table("tables/events.parquet", columns=["id"], filters=[("id", ">=", 9990)])
+    assert table is not None
+    assert table.column_names == ["id"]
+    assert table.column("id").to_pylist() == list(range(9990, 10_000))
+    assert histogram.snapshot()["read_range"]["bytes_in"] < size / 10  # type: ignore[operator]
+
+    second = s3_file_store.read_table("tables/events.parquet", row_groups=[1])
+    assert second is not None
+    assert second.column("id")[0].as_py() == 2500
+    assert s3_file_store.read_table("tables/missing.parquet") is None
+    assert not s3_file_store.write_table("tables/empty.parquet", [])
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_download_fileobj_in_parallel_parts(s3_file_store: FileStore, boto3_client: S3Client) -> None:
+    data = os.urandom(20 * 1024 * 1024)
+    assert s3_file_store.put_object("large.bin", data)
+
+    requests: list[str] = []
+    boto3_client.meta.events.register(
+        "before-call.s3.GetObject", lambda params, **_: requests.append(params.get("headers", {}).get("Range", ""))
+    )
+    downloaded = io.BytesIO()
+    assert s3_file_store.download_fileobj("large.bin", downloaded, max_concurrency=4)
+    assert downloaded.getvalue() == data
+    assert len(requests) == 3
+    assert all(request.startswith("bytes=") for request in requests)
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_put_and_read_object_in_parallel_parts(s3_file_store: FileStore, boto3_client: S3Client) -> None:
+    data = os.urandom(20 * 1024 * 1024)
+    parts: list[int] = []
+    boto3_client.meta.events.register("before-call.s3.UploadPart", lambda **_: parts.append(1))
+    assert s3_file_store.put_object("large.bin", data, metadata={"source": "test"}, max_concurrency=2)
+    assert len(parts) == 3
+    metadata = s3_file_store.get_object_metadata("large.bin")
+    assert metadata is not None
+    assert str(metadata["etag"]).endswith("-3")
+
+    requests: list[str] = []
+    boto3_client.meta.events.register(
+        "before-call.s3.GetObject", lambda params, **_: requests.append(params.get("headers", {}).get("Range", ""))
+    )
+    histogram = HistogramHook()
+    s3_file_store.add_hook(histogram)
+    assert s3_file_store.read_object("large.bin", max_concurrency=2) == data
+    assert requests == ["bytes=0-8388607", "bytes=8388608-16777215", "bytes=16777216-20971519"]
+    # Parts fetched on worker threads count towards the read
+    assert histogram.snapshot()["read_object"]["requests"] == 3
+    s3_file_store.remove_hook(histogram)
+
+    # Small and empty objects still take one request, and conditional writes a single PutObject
+    requests.clear()
+    assert s3_file_store.put_object("empty.txt", "")
+    assert s3_file_store.read_object("empty.txt", as_text=True) == ""
+    assert s3_file_store.put_object("large.bin", data[:100] * 100_000, if_match_etag=str(metadata["etag"]))
+    assert len(parts) == 3
+    assert s3_file_store.read_object("large.bin") == data[:100] * 100_000
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_existence_index(s3_file_store: FileStore) -> None:
+    for number in range(20):
+        assert s3_file_store.put_object(f"dedup/{number}.bin", b"x")
+
+    index = s3_file_store.existence_index("dedup/", false_positive_rate=0.001)
+    assert not s3_file_store.hooks
+    histogram = HistogramHook()
+    s3_file_store.add_hook(histogram)
+
+    assert index.object_exists("dedup/3.bin")
+    assert not any(index.object_exists(f"dedup/new-{candidate}.bin") for candidate in range(200))
+    stats = index.stats()
+    assert stats["keys"] == 20
+    assert stats["lookups"] == 201
+    assert stats["negatives"] + stats["false_positives"] == 200
+    assert histogram.snapshot()["object_exists"]["count"] == stats["probable_positives"]
+
+    assert s3_file_store.put_object("dedup/new-7.bin", b"x")
+    assert s3_file_store.copy_object("dedup/3.bin", "dedup/copied.bin")
+    assert index.might_exist("dedup/new-7.bin")
+    assert index.object_exists("dedup/copied.bin")
+    assert index.object_exists("elsewhere/key.bin") is False
+
+    with s3_file_store.open_write_stream("dedup/streamed.bin", s3_file_store.min_part_size) as stream:
+        stream.write(os.urandom(s3_file_store.min_part_size + 1))
+    with s3_file_store.open_pack_writer("dedup/records.pack") as writer:
+        writer.add("record", b"x")
+    assert index.might_exist("dedup/streamed.bin")
+    assert index.might_exist("dedup/records.pack")
+    assert index.stats()["keys"] == 24
+
+    index.close()
+    assert index not in s3_file_store.hooks
+    assert not s3_file_store.write_listeners
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_put_objects(s3_file_store: FileStore) -> None:
+    closed = io.BytesIO(b"gone")
+    closed.close()
+    items: list[PutObjectItem] = [
+        ("batch/a.txt", "alpha"),
+        ("batch/b.json", b"{}", {"source": "test"}, "application/json"),
+        ("batch/c.bin", io.BytesIO(b"stream")),
+        ("batch/d.bin", closed),
+    ]
+    results = s3_file_store.put_objects(items, max_workers=2)
+    assert [result["key"] for result in results] == ["batch/a.txt", "batch/b.json", "batch/c.bin", "batch/d.bin"]
+    assert [result["success"] for result in results] == [True, True, True, False]
+    assert results[3]["error"] is not None
+    assert s3_file_store.read_object("batch/c.bin") == b"stream"
+    assert s3_file_store.get_object_metadata("batch/b.json")["content_type"] == "application/json"  # type: ignore[index]
+
+
+@pytest.mark.usefixtures("bucket")
+def test_put_objects_reports_transport_errors(s3_file_store: FileStore, boto3_client: S3Client) -> None:
+    def fail_unreachable(params: dict[str, Any], **_: Any) -> None:
+        if params["url_path"].endswith("unreachable.txt"):
+            raise EndpointConnectionError(endpoint_url=params["url_path"])
+
+    boto3_client.meta.events.register("before-call.s3.PutObject", fail_unreachable)
+    try:
+        results = s3_file_store.put_objects([("batch/ok.txt", "ok"), ("batch/unreachable.txt", "lost")])
+    finally:
+        boto3_client.meta.events.unregister("before-call.s3.PutObject", fail_unreachable)
+    assert [result["success"] for result in results] == [True, False]
+    assert str(results[1]["error"]).startswith("EndpointConnectionError")
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_put_objects_async(s3_file_store: FileStore) -> None:
+    async def generate() -> AsyncIterator[tuple[str, bytes]]:
+        for number in range(10):
+            yield f"async-batch/{number}.txt", str(number).encode()
+
+    results = asyncio.run(s3_file_store.put_objects_async(generate(), max_workers=3))
+    assert all(result["success"] for result in results)
+    assert [result["key"] for result in results] == [f"async-batch/{number}.txt" for number in range(10)]
+    assert s3_file_store.read_object("async-batch/7.txt") == b"7"
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_encrypted(s3_file_store: FileStore) -> None:
+    data = os.urandom(6 * 1024 * 1024)
+    store = s3_file_store.encrypted(LocalKeyWrapper(os.urandom(32)), chunk_size=16 * 1024)
+    assert store.put_object("secret/large.bin", io.BytesIO(data))
+    assert s3_file_store.read_object("secret/large.bin") != data
+
+    assert store.read_object("secret/large.bin") == data
+    histogram = HistogramHook()
+    s3_file_store.add_hook(histogram)
+    assert store.read_range("secret/large.bin", 3_000_000, 100) == data[3_000_000:3_000_100]
+    assert histogram.snapshot()["read_range"]["bytes_in"] < 100 * 1024  # type: ignore[operator]
+    assert store.read_range("secret/large.bin", -10) == data[-10:]
+    assert store.read_range("secret/large.bin", -(len(data) + 100)) == data
+
+    downloaded = io.BytesIO()
+    assert store.download_fileobj("secret/large.bin", downloaded)
+    assert downloaded.getvalue() == data
+
+    assert store.put_object("secret/text.txt", "hello")
+    assert store.read_object("secret/text.txt", as_text=True) == "hello"
+    other = s3_file_store.encrypted(LocalKeyWrapper(os.urandom(32)))
+    assert other.read_object("secret/text.txt") is None
+    assert store.read_object("secret/missing.txt") is None
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_warm_up(s3_file_store: FileStore, boto3_client: S3Client) -> None:
+    pings: list[str] = []
+    boto3_client.meta.events.register("before-call.s3.HeadBucket", lambda params, **_: pings.append(params["url_path"]))
+    result = s3_file_store.warm_up(connections=3)
+    assert result["requested"] == 3
+    assert result["connections"] == 3
+    assert result["first_request_seconds"] <= result["seconds"]
+    assert len(pings) == 4
+    assert s3_file_store.warm_up(connections=0)["connections"] == 0
+    assert len(pings) == 4
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_warm_up_lifespan(s3_file_store: FileStore) -> None:
+    events: list[str] = []
+
+    @asynccontextmanager
+    async def app_lifespan(app: str) -> AsyncIterator[dict[str, str]]:
+        events.append(f"start {app}")
+        yield {"state": "ready"}
+        events.append("stop")
+
+    async def run() -> Any:
+        async with warm_up_lifespan(s3_file_store, connections=2, lifespan=app_lifespan)("app") as state:
+            events.append("serving")
+            return state
+
+    assert asyncio.run(run()) == {"state": "ready"}
+    assert events == ["start app", "serving", "stop"]
+    assert asyncio.run(s3_file_store.warm_up_async())["connections"] == s3_file_store.settings.warm_up_connections
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_move_object(s3_file_store: FileStore) -> None:
+    assert s3_file_store.put_object("rename/old.txt", "content")
+    assert s3_file_store.move_object("rename/old.txt", "rename/new.txt")
+    assert not s3_file_store.object_exists("rename/old.txt")
+    assert s3_file_store.read_object("rename/new.txt", as_text=True) == "content"
+    assert not s3_file_store.move_object("rename/missing.txt", "rename/other.txt")
+
+
+@pytest.mark.usefixtures("bucket")
+def test_move_prefix(s3_file_store: FileStore, boto3_client: S3Client, tmp_path: Path) -> None:
+    for number in range(25):
+        assert s3_file_store.put_object(f"folder/{number:02d}.txt", f"file {number}")
+    checkpoint = tmp_path / "move.json"
+    with pytest.raises(ValueError, match="inside source_prefix"):
+        s3_file_store.move_prefix("folder/", "folder/sub/")
+
+    # Listed sizes pick the copy method, so no object is looked up before it's copied
+    heads: list[str] = []
+    boto3_client.meta.events.register("before-call.s3.HeadObject", lambda params, **_: heads.append(params["url_path"]))
+    result = s3_file_store.move_prefix(
+        "folder/", "renamed/", max_workers=4, delete_batch_size=10, checkpoint=checkpoint
+    )
+    assert heads == []
+    assert result["moved"] == 25
+    assert result["failed"] == []
+    assert result["bytes"] == sum(len(f"file {number}") for number in range(25))
+    assert result["objects_per_second"] > 0
+    assert not result["resumed"]
+    assert not checkpoint.exists()
+    assert s3_file_store.list_objects("folder/") == []
+    assert len(s3_file_store.list_objects("renamed/")) == 25
+    assert s3_file_store.read_object("renamed/07.txt", as_text=True) == "file 7"
+
+
+@pytest.mark.usefixtures("boto3_client", "bucket")
+def test_move_prefix_resumes_from_checkpoint(s3_file_store: FileStore, tmp_path: Path) -> None:
+    for number in range(12):
+        assert s3_file_store.put_object(f"resume/{number:02d}.txt", "x")
+    copy_object = s3_file_store.copy_object
+
+    def interrupt(source_key: str, dest_key: str, **kwargs: Any) -> bool:
+        if source_key == "resume/08.txt":
+            raise KeyboardInterrupt
+        return copy_object(source_key, dest_key, **kwargs)
+
+    checkpoint = tmp_path / "move.json"
+    s3_file_store.copy_object = interrupt  # type: ignore[method-assign]
+    with pytest.raises(KeyboardInterrupt):
+        s3_file_store.move_prefix("resume/", "resumed/", max_workers=1, delete_batch_size=4, checkpoint=checkpoint)
+    assert checkpoint.exists()
+    assert len(s3_file_store.list_objects("resume/")) == 4
+
+    s3_file_store.copy_object = copy_object  # type: ignore[method-assign]
+    result = s3_file_store.move_prefix("resume/", "resumed/", checkpoint=checkpoint)
+    assert result["resumed"]
+    assert result["moved"] == 12
+    assert not checkpoint.exists()
+    assert len(s3_file_store.list_objects("resumed/")) == 12
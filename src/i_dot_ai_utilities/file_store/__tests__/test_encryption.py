@@ -0,0 +1,88 @@
+import os
+from collections.abc import Sequence
+
+import pytest
+
+from i_dot_ai_utilities.file_store.encryption import TAG_SIZE, DecryptingFile, EncryptingWriter, LocalKeyWrapper
+from i_dot_ai_utilities.file_store.remote_file import RemoteFile
+from i_dot_ai_utilities.file_store.write_stream import ObjectWriteStream
+
+KEY = os.urandom(32)
+
+
+def _encrypt(data: bytes, wrapper: LocalKeyWrapper, chunk_size: int) -> bytes:
+    uploaded: list[bytes] = []
+
+    def put(content: bytes) -> bool:
+        uploaded.append(content)
+        return True
+
+    with EncryptingWriter(ObjectWriteStream("key", 1 << 30, lambda: None, put), wrapper, chunk_size) as writer:
+        for offset in range(0, len(data), 7000):
+            writer.write(data[offset : offset + 7000])
+    return uploaded[0]
+
+
+def _open(encrypted: bytes, wrapper: LocalKeyWrapper) -> DecryptingFile:
+    def read_ranges(ranges: Sequence[tuple[int, int]]) -> list[bytes]:
+        return [encrypted[start : start + length] for start, length in ranges]
+
+    return DecryptingFile(RemoteFile("key", len(encrypted), read_ranges, block_size=1000), wrapper)
+
+
+@pytest.mark.parametrize("size", [0, 1, 4096, 4097, 50_000])
+def test_round_trip(size: int) -> None:
+    data = os.urandom(size)
+    wrapper = LocalKeyWrapper(KEY)
+    encrypted = _encrypt(data, wrapper, chunk_size=4096)
+    with _open(encrypted, wrapper) as file:
+        assert file.size == size
+        assert file.read() == data
+
+
+def test_random_access() -> None:
+    data = os.urandom(50_000)
+    wrapper = LocalKeyWrapper(KEY)
+    with _open(_encrypt(data, wrapper, chunk_size=4096), wrapper) as file:
+        file.seek(12_000)
+        assert file.read(10_000) == data[12_000:22_000]
+        file.seek(-5, os.SEEK_END)
+        assert file.read() == data[-5:]
+        assert file.read(10) == b""
+
+
+def test_tampering_and_truncation_are_detected() -> None:
+    data = os.urandom(20_000)
+    wrapper = LocalKeyWrapper(KEY)
+    encrypted = _encrypt(data, wrapper, chunk_size=4096)
+
+    tampered = bytearray(encrypted)
+    tampered[-100] ^= 1
+    with _open(bytes(tampered), wrapper) as file, pytest.raises(OSError, match="Failed to decrypt chunk 4"):
+        file.read()
+
+    truncated = encrypted[: -(len(data) % 4096 + TAG_SIZE)]
+    with _open(truncated, wrapper) as file, pytest.raises(OSError, match="Failed to decrypt chunk 3"):
+        file.read()
+
+    with pytest.raises(OSError, match="is not encrypted"):
+        _open(data, wrapper)
+
+    # A header length covering only the fixed fields, with no room for the key ID and wrapped key
+    short_header = encrypted[:8] + (24).to_bytes(4, "big") + encrypted[12:]
+    with pytest.raises(OSError, match="has a corrupt header"):
+        _open(short_header, wrapper)
+
+
+def test_key_rotation() -> None:
+    old = LocalKeyWrapper(KEY, key_id="2025")
+    encrypted = _encrypt(b"secret", old, chunk_size=16)
+
+    rotated = LocalKeyWrapper(os.urandom(32), key_id="2026", previous_keys={"2025": KEY})
+    with _open(encrypted, rotated) as file:
+        assert file.read() == b"secret"
+
+    with pytest.raises(OSError, match="Failed to unwrap"):
+        _open(encrypted, LocalKeyWrapper(os.urandom(32), key_id="2026"))
+    with pytest.raises(ValueError, match="32 bytes"):
+        LocalKeyWrapper(b"short")
@@ -0,0 +1,26 @@
+import pytest
+
+from i_dot_ai_utilities.file_store.existence import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom = BloomFilter(1000, 0.01)
+    keys = [f"uploads/{index}.bin" for index in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate() -> None:
+    bloom = BloomFilter(1000, 0.01)
+    for index in range(1000):
+        bloom.add(f"present/{index}")
+    false_positives = sum(f"absent/{index}" in bloom for index in range(10_000))
+    assert false_positives < 300
+    assert bloom.expected_false_positive_rate == pytest.approx(0.01, rel=0.5)
+
+
+def test_bloom_filter_rejects_invalid_rate() -> None:
+    with pytest.raises(ValueError, match="false_positive_rate"):
+        BloomFilter(100, 0)
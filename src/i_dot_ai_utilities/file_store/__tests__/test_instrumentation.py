@@ -0,0 +1,64 @@
+import pytest
+
+from i_dot_ai_utilities.file_store.instrumentation import HistogramHook, MetricsWriterHook
+from i_dot_ai_utilities.file_store.types.operation_event import OperationEvent, OperationOutcome
+from i_dot_ai_utilities.metrics.interfaces import MetricsWriter
+
+
+class RecordingWriter(MetricsWriter):
+    def __init__(self) -> None:
+        self.metrics: list[tuple[str, float, dict | None]] = []
+        self.batches: list[tuple[dict[str, float], dict | None]] = []
+
+    def put_metric(self, metric_name: str, value: float, dimensions: dict | None = None) -> None:
+        self.metrics.append((metric_name, value, dimensions))
+
+    def put_metrics(self, values: dict[str, float], dimensions: dict | None = None) -> None:
+        self.batches.append((values, dimensions))
+
+
+def make_event(
+    operation: str = "read_object", duration: float = 0.01, outcome: OperationOutcome = "success", bytes_in: int = 0
+) -> OperationEvent:
+    return OperationEvent(
+        operation=operation,
+        key="key",
+        duration_seconds=duration,
+        bytes_in=bytes_in,
+        bytes_out=0,
+        requests=1,
+        retries=0,
+        outcome=outcome,
+        error=None,
+    )
+
+
+def test_histogram_hook_percentiles() -> None:
+    hook = HistogramHook(buckets=(0.01, 0.1, 1.0))
+    for _ in range(90):
+        hook.on_operation(make_event(duration=0.005, bytes_in=10))
+    for _ in range(10):
+        hook.on_operation(make_event(duration=0.5, outcome="failure"))
+
+    stats = hook.snapshot()["read_object"]
+    assert stats["count"] == 100
+    assert stats["outcomes"] == {"success": 90, "failure": 10}
+    assert stats["p50_seconds"] == 0.01
+    assert stats["p90_seconds"] == 0.01
+    assert stats["p99_seconds"] == 1.0
+    assert stats["mean_seconds"] == pytest.approx(0.0545)
+    assert stats["bytes_in"] == 900
+
+    hook.reset()
+    assert hook.snapshot() == {}
+
+
+def test_metrics_writer_hook_skips_zero_values() -> None:
+    writer = RecordingWriter()
+    hook = MetricsWriterHook(writer, operations=["read_object"])
+
+    hook.on_operation(make_event(bytes_in=100))
+    hook.on_operation(make_event(operation="put_object"))
+
+    dimensions = {"operation": "read_object", "outcome": "success"}
+    assert writer.batches == [({"file_store_duration_ms": pytest.approx(10), "file_store_bytes_in": 100}, dimensions)]
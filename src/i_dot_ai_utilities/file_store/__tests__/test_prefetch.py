@@ -0,0 +1,63 @@
+import threading
+import time
+
+from i_dot_ai_utilities.file_store.prefetch import prefetch_map
+
+
+class ConcurrencyTracker:
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def fetch(self, item: int) -> bytes:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return b"x" * item
+
+
+def test_prefetch_map_preserves_order() -> None:
+    items = [5, 1, 4, 2, 3]
+    results = list(prefetch_map(items, lambda item: item * 10, depth=3))
+    assert results == [(5, 50), (1, 10), (4, 40), (2, 20), (3, 30)]
+
+
+def test_prefetch_map_limits_depth() -> None:
+    tracker = ConcurrencyTracker()
+    results = list(prefetch_map([1] * 20, tracker.fetch, depth=4))
+    assert len(results) == 20
+    assert 1 < tracker.peak <= 4
+
+
+def test_prefetch_map_respects_memory_budget() -> None:
+    tracker = ConcurrencyTracker()
+    results = list(
+        prefetch_map(
+            [100] * 10,
+            tracker.fetch,
+            depth=8,
+            max_bytes=200,
+            estimate_size=lambda item: item,
+            result_size=len,
+        )
+    )
+    assert len(results) == 10
+    assert tracker.peak <= 2
+
+
+def test_prefetch_map_allows_items_larger_than_budget() -> None:
+    results = list(prefetch_map([1000, 1000], lambda item: item, max_bytes=10, estimate_size=lambda item: item))
+    assert [item for item, _ in results] == [1000, 1000]
+
+
+def test_prefetch_map_discards_unconsumed_results() -> None:
+    discarded: list[int] = []
+    results = prefetch_map(range(10), lambda item: item, depth=4, discard=discarded.append)
+    assert next(results) == (0, 0)
+    results.close()
+    assert discarded
+    assert 0 not in discarded
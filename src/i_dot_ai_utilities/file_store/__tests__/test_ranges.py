@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+
+from i_dot_ai_utilities.file_store.ranges import coalesce, http_range, read_ranges
+
+DATA = bytes(range(256)) * 64
+
+
+class RecordingReader:
+    def __init__(self) -> None:
+        self.requests: list[tuple[int, int]] = []
+        self.lock = threading.Lock()
+
+    def read(self, start: int, length: int) -> bytes:
+        with self.lock:
+            self.requests.append((start, length))
+        return DATA[start : start + length]
+
+
+def test_http_range() -> None:
+    assert http_range(0, 10) == "bytes=0-9"
+    assert http_range(100, None) == "bytes=100-"
+    assert http_range(-24, None) == "bytes=-24"
+
+
+def test_coalesce_merges_nearby_ranges() -> None:
+    ranges = [(1000, 10), (0, 10), (15, 5), (5, 20), (500, 0)]
+    assert coalesce(ranges, max_gap=10) == [(0, 25), (1000, 10)]
+    assert coalesce(ranges, max_gap=0) == [(0, 25), (1000, 10)]
+    assert coalesce([(0, 10), (12, 10)], max_gap=0) == [(0, 10), (12, 10)]
+
+
+def test_coalesce_limits_request_size() -> None:
+    assert coalesce([(0, 10), (10, 10), (20, 10)], max_gap=0, max_request_size=20) == [(0, 20), (20, 10)]
+
+
+def test_read_ranges() -> None:
+    reader = RecordingReader()
+    ranges = [(9000, 100), (0, 16), (20, 4), (100, 0), (16000, 1000)]
+    results = read_ranges(reader.read, ranges, max_gap=64)
+    assert results == [DATA[start : start + length] for start, length in ranges]
+    assert sorted(reader.requests) == [(0, 24), (9000, 100), (16000, 1000)]
+
+
+def test_read_ranges_fails_if_a_request_fails() -> None:
+    assert read_ranges(lambda start, _: None if start else b"x", [(0, 1), (10_000, 1)], max_gap=0) is None
+
+
+def test_read_ranges_rejects_negative_ranges() -> None:
+    with pytest.raises(ValueError, match="non-negative"):
+        read_ranges(RecordingReader().read, [(-10, 5)])
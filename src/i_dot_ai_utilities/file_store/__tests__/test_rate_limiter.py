@@ -0,0 +1,190 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from i_dot_ai_utilities.file_store.rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    get_rate_limiter,
+    key_prefix,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_allows_burst_then_waits() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(5) == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_over_time() -> None:
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=10, clock=clock)
+    bucket.reserve(10)
+
+    clock.now = 0.5
+    assert bucket.available() == pytest.approx(5)
+
+    clock.now = 10
+    assert bucket.available() == pytest.approx(10)
+
+
+def test_token_bucket_rejects_invalid_rate() -> None:
+    with pytest.raises(ValueError, match="greater than zero"):
+        TokenBucket(rate=0)
+
+
+def test_rate_limiter_waits_on_the_slowest_bucket() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_second=100, bytes_per_second=1000, clock=clock)
+
+    assert limiter.reserve(num_bytes=1000, requests=1) == 0.0
+    assert limiter.reserve(num_bytes=500, requests=1) == pytest.approx(0.5)
+
+
+def test_rate_limiter_record_bytes_delays_next_caller() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(bytes_per_second=1000, clock=clock)
+
+    limiter.record_bytes(2000)
+    assert limiter.reserve(num_bytes=0, requests=1) == 0.0
+    assert limiter.reserve(num_bytes=1, requests=1) == pytest.approx(1.001)
+
+
+def test_rate_limiter_utilisation() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_second=10, clock=clock)
+    limiter.acquire()
+    limiter.acquire()
+
+    utilisation = limiter.utilisation()
+    assert utilisation["requests"] == {
+        "limit_per_second": 10,
+        "available": 8,
+        "utilisation": pytest.approx(0.2),
+        "consumed": 2,
+    }
+    assert "bytes" not in utilisation
+    assert utilisation["waited_seconds"] == 0.0
+
+
+def test_rate_limiter_async_acquire() -> None:
+    limiter = RateLimiter(requests_per_second=1000)
+
+    async def run() -> None:
+        await asyncio.gather(*(limiter.acquire_async() for _ in range(5)))
+
+    asyncio.run(run())
+    assert limiter.requests is not None
+    assert limiter.requests.consumed() == 5
+
+
+def test_rate_limiter_ready_async_waits_without_taking_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_second=10, clock=clock)
+    limiter.reserve(requests=10)
+    slept: list[float] = []
+
+    async def sleep(seconds: float) -> None:
+        slept.append(seconds)
+        clock.now += seconds
+
+    async def run() -> None:
+        await limiter.ready_async()
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    asyncio.run(run())
+    assert slept == [pytest.approx(0.1)]
+    assert limiter.requests is not None
+    assert limiter.requests.consumed() == 10
+    assert limiter.reserve() == 0.0
+
+
+def test_rate_limiter_for_prefix() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_second=10, clock=clock)
+    first = limiter.for_prefix("a/")
+
+    assert limiter.for_prefix("a/") is first
+    assert first.reserve(requests=10) == 0.0
+    assert first.reserve() == pytest.approx(0.1)
+    assert limiter.for_prefix("b/").reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    assert list(limiter.prefix_utilisation()) == ["a/", "b/"]
+
+
+def test_rate_limiter_evicts_idle_prefixes_first() -> None:
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_second=10, clock=clock, max_prefixes=3)
+    busy = limiter.for_prefix("busy/")
+    busy.reserve(requests=20)
+    limiter.for_prefix("idle/")
+    limiter.for_prefix("recent/").reserve(requests=5)
+
+    limiter.for_prefix("new/")
+    assert list(limiter.prefix_utilisation()) == ["busy/", "new/", "recent/"]
+    assert limiter.for_prefix("busy/") is busy
+
+    # With none idle, the least recently used goes
+    limiter.for_prefix("new/").reserve(requests=5)
+    limiter.for_prefix("newer/")
+    assert list(limiter.prefix_utilisation()) == ["busy/", "new/", "newer/"]
+
+
+def test_key_prefix() -> None:
+    assert key_prefix("a/b/c/d.txt", 2) == "a/b/"
+    assert key_prefix("a/b.txt", 2) == "a/"
+    assert key_prefix("b.txt", 1) == ""
+
+
+def _reserve_and_exit(bucket: TokenBucket) -> None:
+    bucket.reserve(1)
+    os._exit(0)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_locks_are_reset_in_forked_children() -> None:
+    bucket = TokenBucket(rate=1000)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold_lock() -> None:
+        with bucket._lock:  # noqa: SLF001
+            held.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    held.wait()
+    try:
+        child = multiprocessing.get_context("fork").Process(target=_reserve_and_exit, args=(bucket,))
+        with pytest.warns(DeprecationWarning, match="fork"):
+            child.start()
+        child.join(timeout=10)
+        if child.is_alive():
+            child.kill()
+        assert child.exitcode == 0
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_get_rate_limiter_is_shared_per_scope() -> None:
+    first = get_rate_limiter("test:shared", requests_per_second=5)
+    second = get_rate_limiter("test:shared", requests_per_second=50)
+    other = get_rate_limiter("test:other", requests_per_second=5)
+
+    assert first is second
+    assert first is not other
@@ -0,0 +1,56 @@
+import io
+import os
+from collections.abc import Sequence
+
+import pytest
+
+from i_dot_ai_utilities.file_store.remote_file import RemoteFile
+
+DATA = os.urandom(100_000)
+
+
+class RecordingObject:
+    def __init__(self) -> None:
+        self.requests: list[tuple[int, int]] = []
+
+    def read_ranges(self, ranges: Sequence[tuple[int, int]]) -> list[bytes]:
+        self.requests.extend(ranges)
+        return [DATA[start : start + length] for start, length in ranges]
+
+
+def test_remote_file_seeks_and_reads() -> None:
+    remote = RemoteFile("key", len(DATA), RecordingObject().read_ranges, block_size=1000)
+    assert remote.seek(-10, os.SEEK_END) == len(DATA) - 10
+    assert remote.read() == DATA[-10:]
+    assert remote.read(5) == b""
+    remote.seek(1500)
+    assert remote.read(2000) == DATA[1500:3500]
+    assert remote.tell() == 3500
+    remote.seek(10, os.SEEK_CUR)
+    assert remote.read(10) == DATA[3510:3520]
+    with pytest.raises(ValueError, match="Negative seek"):
+        remote.seek(-1)
+
+
+def test_remote_file_caches_blocks() -> None:
+    recorder = RecordingObject()
+    remote = RemoteFile("key", len(DATA), recorder.read_ranges, block_size=1000, read_ahead=0)
+    for _ in range(3):
+        remote.seek(50_100)
+        assert remote.read(100) == DATA[50_100:50_200]
+    assert recorder.requests == [(50_000, 1000)]
+
+
+def test_remote_file_reads_ahead_when_sequential() -> None:
+    recorder = RecordingObject()
+    remote = io.BufferedReader(RemoteFile("key", len(DATA), recorder.read_ranges, block_size=1000, read_ahead=8))
+    chunks = iter(lambda: remote.read(100), b"")
+    assert b"".join(chunks) == DATA
+    assert len(recorder.requests) < 20
+    assert sum(length for _, length in recorder.requests) <= len(DATA) + 8000
+
+
+def test_remote_file_raises_on_failed_read() -> None:
+    remote = RemoteFile("key", len(DATA), lambda _: None)
+    with pytest.raises(OSError, match="Failed to read key"):
+        remote.read(10)
@@ -0,0 +1,99 @@
+import gc
+from typing import TYPE_CHECKING, Any, cast
+
+import pytest
+
+from i_dot_ai_utilities.file_store.settings import Settings
+from i_dot_ai_utilities.file_store.success_log import SuccessLogger, _flush_at_exit, _summary_loggers
+from i_dot_ai_utilities.file_store.types.success_log_mode import SuccessLogMode
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
+
+
+class RecordingLogger:
+    def __init__(self) -> None:
+        self.messages: list[tuple[str, dict[str, Any]]] = []
+
+    def info(self, message_template: str, **kwargs: Any) -> None:
+        self.messages.append((message_template, kwargs))
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_success_logger(mode: SuccessLogMode, **kwargs: Any) -> tuple[SuccessLogger, RecordingLogger]:
+    logger = RecordingLogger()
+    return SuccessLogger(cast("StructuredLogger", logger), mode, **kwargs), logger
+
+
+@pytest.mark.parametrize(("mode", "expected"), [(SuccessLogMode.PER_CALL, 3), (SuccessLogMode.OFF, 0)])
+def test_per_call_and_off(mode: SuccessLogMode, expected: int) -> None:
+    success_log, logger = make_success_logger(mode)
+    for i in range(3):
+        success_log.log("put_object", "Uploaded {key}", key=f"{i}.txt")
+    assert len(logger.messages) == expected
+
+
+def test_sampled() -> None:
+    success_log, logger = make_success_logger(SuccessLogMode.SAMPLED, sample_rate=0.1)
+    for _ in range(2000):
+        success_log.log("put_object", "Uploaded {key}", key="key")
+    assert 100 < len(logger.messages) < 300
+    assert logger.messages[0] == ("Uploaded {key}", {"key": "key", "sample_rate": 0.1})
+
+
+def test_summary() -> None:
+    clock = FakeClock()
+    success_log, logger = make_success_logger(SuccessLogMode.SUMMARY, summary_seconds=10, clock=clock)
+    for _ in range(3):
+        success_log.log("put_object", "Uploaded {key}", 100, key="key")
+    success_log.log("delete_object", "Deleted {key}", key="key")
+    assert logger.messages == []
+
+    clock.now = 10
+    success_log.log("put_object", "Uploaded {key}", 100, key="key")
+    assert len(logger.messages) == 1
+    assert logger.messages[0][1] == {
+        "count": 5,
+        "num_bytes": 400,
+        "seconds": 10,
+        "operations": {
+            "delete_object": {"count": 1, "num_bytes": 0},
+            "put_object": {"count": 4, "num_bytes": 400},
+        },
+    }
+
+    success_log.log("put_object", "Uploaded {key}", 50, key="key")
+    success_log.flush()
+    assert logger.messages[-1][1]["num_bytes"] == 50
+    success_log.flush()
+    assert len(logger.messages) == 2
+
+
+def test_summary_loggers_are_flushed_at_exit_by_one_callback() -> None:
+    first, first_logger = make_success_logger(SuccessLogMode.SUMMARY)
+    second, second_logger = make_success_logger(SuccessLogMode.SUMMARY)
+    first.log("put_object", "Uploaded {key}", 10, key="key")
+    second.log("delete_object", "Deleted {key}", key="key")
+
+    _flush_at_exit()
+
+    assert first_logger.messages[0][1]["operations"] == {"put_object": {"count": 1, "num_bytes": 10}}
+    assert second_logger.messages[0][1]["operations"] == {"delete_object": {"count": 1, "num_bytes": 0}}
+    registered = len(_summary_loggers)
+    del first
+    gc.collect()
+    assert len(_summary_loggers) == registered - 1
+    assert second in _summary_loggers
+
+
+def test_mode_from_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("IAI_FS_SUCCESS_LOG_MODE", "summary")
+    settings = Settings()  # type: ignore[call-arg]
+    assert settings.success_log_mode == SuccessLogMode.SUMMARY
@@ -0,0 +1,45 @@
+import io
+import tempfile
+from typing import BinaryIO, cast
+
+from i_dot_ai_utilities.file_store.main import FileStore
+from i_dot_ai_utilities.file_store.transfers import (
+    BLOCK_ALIGNMENT,
+    MAX_BLOCKS,
+    MIN_BLOCK_SIZE,
+    block_size_for,
+    concurrency_for,
+)
+
+MiB = 1024 * 1024
+
+
+def test_block_size_grows_with_object_size() -> None:
+    assert block_size_for(None) == MIN_BLOCK_SIZE
+    assert block_size_for(10 * MiB) == MIN_BLOCK_SIZE
+    huge = 500 * 1024 * MiB
+    assert block_size_for(huge) * MAX_BLOCKS >= huge
+    assert block_size_for(huge) % BLOCK_ALIGNMENT == 0
+
+
+def test_configured_block_size_is_aligned() -> None:
+    assert block_size_for(10 * MiB, 5 * MiB) == 5 * MiB
+    assert block_size_for(None, 1000) == BLOCK_ALIGNMENT
+
+
+def test_concurrency_by_object_size() -> None:
+    assert concurrency_for(1024, MIN_BLOCK_SIZE) == 1
+    assert concurrency_for(20 * MiB, MIN_BLOCK_SIZE) == 3
+    assert concurrency_for(1024 * MiB, MIN_BLOCK_SIZE) == 8
+    assert concurrency_for(1024 * MiB, MIN_BLOCK_SIZE, max_concurrency=2) == 2
+    assert concurrency_for(None, MIN_BLOCK_SIZE, max_concurrency=4) == 4
+
+
+def test_payload_size_keeps_spooled_files_in_memory() -> None:
+    with tempfile.SpooledTemporaryFile(max_size=MiB) as spool:
+        spool.write(b"x" * 100)
+        spool.seek(10)
+        assert FileStore._payload_size(cast("BinaryIO", spool)) == 90  # noqa: SLF001
+        assert not spool._rolled  # type: ignore[attr-defined]  # noqa: SLF001
+        assert spool.tell() == 10
+    assert FileStore._payload_size(io.BytesIO(b"abc")) == 3  # noqa: SLF001
@@ -0,0 +1,323 @@
+import contextlib
+import io
+import posixpath
+import queue
+import shutil
+import tarfile
+import threading
+import zipfile
+from collections import deque
+from collections.abc import Generator, Iterable, Iterator
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+from typing import IO, TYPE_CHECKING, BinaryIO, Literal, cast
+
+from i_dot_ai_utilities.file_store import instrumentation
+from i_dot_ai_utilities.file_store.prefetch import prefetch_map
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+ArchiveFormat = Literal["zip", "tar"]
+
+DEFAULT_SPOOL_SIZE = 8 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+_QUEUE_POLL_SECONDS = 0.1
+
+
+class _ArchiveCancelledError(Exception):
+    """Raised inside the archive writer thread when the consumer stops reading"""
+
+
+class _QueueWriter(io.RawIOBase):
+    """
+    Unseekable writable stream that hands fixed-size chunks to a bounded queue,
+    blocking the writer while the consumer is behind
+    """
+
+    def __init__(self, chunks: "queue.Queue[bytes | None]", cancelled: threading.Event, chunk_size: int):
+        super().__init__()
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:  # type: ignore[override]
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def put(self, chunk: bytes | None) -> None:
+        while not self._cancelled.is_set():
+            try:
+                self._chunks.put(chunk, timeout=_QUEUE_POLL_SECONDS)
+            except queue.Full:
+                continue
+            else:
+                return
+        raise _ArchiveCancelledError
+
+    def finish(self) -> None:
+        if self._buffer:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+
+
+def _spooled_size(spool: IO[bytes]) -> int:
+    size = spool.seek(0, io.SEEK_END)
+    spool.seek(0)
+    return size
+
+
+def _fetch_member(store: "FileStore", key: str, spool_size: int) -> IO[bytes] | None:
+    spool = SpooledTemporaryFile(max_size=spool_size)  # noqa: SIM115
+    if not store.download_fileobj(key, cast("BinaryIO", spool)):
+        spool.close()
+        return None
+    spool.seek(0)
+    return cast("IO[bytes]", spool)
+
+
+def _member_name(store: "FileStore", storage_key: str, prefix: str) -> str:
+    key = store.relative_key(storage_key)
+    # The prefix is treated as a directory, so `reports` names `reports/a.csv` as `a.csv`
+    # but leaves `reports2024/a.csv` whole rather than cutting it to `2024/a.csv`
+    directory = prefix.rstrip("/") + "/" if prefix.strip("/") else ""
+    name = key[len(directory) :].lstrip("/") if key.startswith(directory) else key
+    return name or posixpath.basename(key)
+
+
+def _modified_time(last_modified: str | int) -> datetime | None:
+    try:
+        return datetime.fromisoformat(str(last_modified))
+    except ValueError:
+        return None
+
+
+def _prefetched_members(
+    store: "FileStore", prefix: str, *, max_in_flight: int, spool_size: int
+) -> Generator[tuple[str, datetime | None, IO[bytes]], None, None]:
+    """
+    Yields the name, modified time and spooled contents of each object under a prefix, in listing order,
+    keeping up to `max_in_flight` downloads running ahead of the consumer.
+    Raises `OSError` if an object can't be read, rather than leaving it out of the archive.
+    """
+
+    def fetch(obj: dict[str, str | int]) -> IO[bytes] | None:
+        return _fetch_member(store, store.relative_key(str(obj["key"])), spool_size)
+
+    def discard(spool: IO[bytes] | None) -> None:
+        if spool is not None:
+            spool.close()
+
+    members = prefetch_map(store.iter_objects(prefix), fetch, depth=max_in_flight, discard=discard)
+    try:
+        for obj, spool in members:
+            if spool is None:
+                message = f"Could not read archive member {obj['key']}"
+                raise OSError(message)
+            yield _member_name(store, str(obj["key"]), prefix), _modified_time(obj["last_modified"]), spool
+    finally:
+        members.close()
+
+
+def _write_zip(
+    writer: _QueueWriter, members: Iterable[tuple[str, datetime | None, IO[bytes]]], compression: int
+) -> None:
+    with zipfile.ZipFile(writer, mode="w", compression=compression) as zip_archive:
+        for name, modified, spool in members:
+            with spool:
+                info = zipfile.ZipInfo(name, date_time=modified.timetuple()[:6] if modified else _ZIP_EPOCH)
+                info.compress_type = compression
+                info.file_size = _spooled_size(spool)
+                with zip_archive.open(info, mode="w") as member:
+                    shutil.copyfileobj(spool, member, DEFAULT_CHUNK_SIZE)
+
+
+def _write_tar(writer: _QueueWriter, members: Iterable[tuple[str, datetime | None, IO[bytes]]]) -> None:
+    with tarfile.open(fileobj=writer, mode="w|") as tar_archive:
+        for name, modified, spool in members:
+            with spool:
+                info = tarfile.TarInfo(name)
+                info.size = _spooled_size(spool)
+                info.mtime = int(modified.timestamp()) if modified else 0
+                tar_archive.addfile(info, spool)
+
+
+def stream_archive(
+    store: "FileStore",
+    prefix: str,
+    archive_format: ArchiveFormat = "zip",
+    *,
+    max_in_flight: int = 8,
+    spool_size: int = DEFAULT_SPOOL_SIZE,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    compression: int = zipfile.ZIP_DEFLATED,
+) -> Iterator[bytes]:
+    """
+    Stream a zip or tar archive of every object under a prefix.
+
+    Members are downloaded `max_in_flight` at a time ahead of the archive writer, each into a temporary
+    file that stays in memory up to `spool_size` bytes and spills to disk beyond that, and archive bytes
+    are handed to the consumer through a bounded queue, so memory use doesn't grow with the prefix size.
+    If an object can't be read, the archive is abandoned and the iterator raises `OSError` after the bytes
+    already written, so a consumer never mistakes an incomplete archive for a complete one.
+
+    Args:
+        store: The file store to read from
+        prefix: Prefix of the objects to archive; member names are relative to it as a directory
+        archive_format: `zip` or `tar`
+        max_in_flight: Number of members downloaded concurrently ahead of the writer
+        spool_size: Size above which a member is buffered on disk rather than in memory
+        chunk_size: Size of the chunks yielded to the consumer
+        compression: zipfile compression method for zip archives
+
+    Returns:
+        Iterator of archive bytes
+    """
+    chunks: queue.Queue[bytes | None] = queue.Queue(maxsize=max_in_flight)
+    cancelled = threading.Event()
+    writer = _QueueWriter(chunks, cancelled, chunk_size)
+
+    def produce() -> None:
+        members = _prefetched_members(store, prefix, max_in_flight=max_in_flight, spool_size=spool_size)
+        try:
+            if archive_format == "zip":
+                _write_zip(writer, members, compression)
+            else:
+                _write_tar(writer, members)
+            writer.finish()
+        except _ArchiveCancelledError:
+            return
+        finally:
+            members.close()
+            with contextlib.suppress(_ArchiveCancelledError):
+                writer.put(None)
+
+    with instrumentation.OperationThreadPoolExecutor(max_workers=1) as producer:
+        future = producer.submit(produce)
+        try:
+            while (chunk := chunks.get()) is not None:
+                yield chunk
+            future.result()
+        finally:
+            cancelled.set()
+
+
+def _member_key(dest_prefix: str, name: str) -> str | None:
+    normalised = posixpath.normpath(name.lstrip("/"))
+    if normalised in (".", "..") or normalised.startswith("../"):
+        return None
+    return posixpath.join(dest_prefix, normalised) if dest_prefix else normalised
+
+
+def _spool(source: IO[bytes], spool_size: int) -> IO[bytes]:
+    spool = SpooledTemporaryFile(max_size=spool_size)  # noqa: SIM115
+    shutil.copyfileobj(source, spool, DEFAULT_CHUNK_SIZE)
+    spool.seek(0)
+    return cast("IO[bytes]", spool)
+
+
+def _zip_members(archive_file: IO[bytes], spool_size: int) -> Iterator[tuple[str, IO[bytes]]]:
+    with zipfile.ZipFile(archive_file) as zip_archive:
+        for info in zip_archive.infolist():
+            if info.is_dir():
+                continue
+            with zip_archive.open(info) as source:
+                yield info.filename, _spool(source, spool_size)
+
+
+def _tar_members(archive_file: IO[bytes], spool_size: int) -> Iterator[tuple[str, IO[bytes]]]:
+    with tarfile.open(fileobj=archive_file, mode="r:*") as tar_archive:
+        for info in tar_archive:
+            if not info.isfile():
+                continue
+            source = tar_archive.extractfile(info)
+            if source is None:
+                continue
+            with source:
+                yield info.name, _spool(source, spool_size)
+
+
+def _upload_member(store: "FileStore", key: str, spool: IO[bytes]) -> bool:
+    with spool:
+        return store.put_object(key, cast("BinaryIO", spool))
+
+
+def _upload_members(
+    store: "FileStore", members: Iterable[tuple[str, IO[bytes]]], dest_prefix: str, max_in_flight: int
+) -> list[str]:
+    uploaded: list[str] = []
+    pending: deque[tuple[str, Future[bool]]] = deque()
+
+    def collect() -> None:
+        key, future = pending.popleft()
+        if future.result():
+            uploaded.append(key)
+
+    with instrumentation.OperationThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for name, spool in members:
+            key = _member_key(dest_prefix, name)
+            if key is None:
+                spool.close()
+                store.logger.warning("Skipping archive member outside the destination: {name}", name=name)
+                continue
+            if len(pending) >= max_in_flight:
+                collect()
+            pending.append((key, executor.submit(_upload_member, store, key, spool)))
+        while pending:
+            collect()
+    return uploaded
+
+
+def extract_archive(
+    store: "FileStore",
+    key: str,
+    dest_prefix: str,
+    archive_format: ArchiveFormat | None = None,
+    *,
+    max_in_flight: int = 8,
+    spool_size: int = DEFAULT_SPOOL_SIZE,
+) -> list[str] | None:
+    """
+    Extract a zip or tar archive (optionally gzip, bzip2 or xz compressed) into objects under a prefix.
+
+    The archive is downloaded into a temporary file that spills to disk beyond `spool_size` bytes, and
+    members are uploaded `max_in_flight` at a time as they are decoded.
+
+    Args:
+        store: The file store holding the archive
+        key: Key of the archive object
+        dest_prefix: Prefix the members are uploaded under
+        archive_format: `zip` or `tar`, detected from the archive contents if None
+        max_in_flight: Number of members uploaded concurrently
+        spool_size: Size above which the archive and members are buffered on disk rather than in memory
+
+    Returns:
+        List of keys that were uploaded, or None if the archive couldn't be read
+    """
+    with SpooledTemporaryFile(max_size=spool_size) as archive_file:
+        if not store.download_fileobj(key, cast("BinaryIO", archive_file)):
+            return None
+        archive_file.seek(0)
+        try:
+            if archive_format is None:
+                archive_format = "zip" if zipfile.is_zipfile(archive_file) else "tar"
+                archive_file.seek(0)
+            members = (
+                _zip_members(cast("IO[bytes]", archive_file), spool_size)
+                if archive_format == "zip"
+                else _tar_members(cast("IO[bytes]", archive_file), spool_size)
+            )
+            return _upload_members(store, members, dest_prefix, max_in_flight)
+        except (zipfile.BadZipFile, tarfile.TarError):
+            store.logger.exception("Failed to extract archive {key}", key=key)
+            return None
@@ -1,23 +1,140 @@
+import io
+import itertools
 import json
+from collections.abc import Callable, Iterator, Sequence
+from datetime import timedelta
+from functools import partial
 from typing import Any, BinaryIO, Unpack
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 from mypy_boto3_s3.client import S3Client
-from mypy_boto3_s3.type_defs import BucketTypeDef, CopySourceTypeDef
+from mypy_boto3_s3.type_defs import (
+    BucketTypeDef,
+    CompletedPartTypeDef,
+    CopySourceTypeDef,
+    CreateMultipartUploadRequestTypeDef,
+    GetObjectRequestTypeDef,
+    ListObjectsV2RequestTypeDef,
+    ObjectTypeDef,
+    PutObjectRequestTypeDef,
+)
+from s3transfer.manager import TransferManager
 
+from i_dot_ai_utilities.file_store import instrumentation, ranges, sharding, transfers
+from i_dot_ai_utilities.file_store.clients import client_key, shared_client
+from i_dot_ai_utilities.file_store.lifecycle import with_expiry
 from i_dot_ai_utilities.file_store.main import FileStore
+from i_dot_ai_utilities.file_store.rate_limiter import rate_limiter_from_settings
 from i_dot_ai_utilities.file_store.settings import Settings
+from i_dot_ai_utilities.file_store.success_log import success_logger_from_settings
 from i_dot_ai_utilities.file_store.types.kwargs_dicts import S3ClientKwargs
+from i_dot_ai_utilities.file_store.write_stream import MultipartUpload
 from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
 
+_PRECONDITION_FAILED_CODES = ("PreconditionFailed", "ConditionalRequestConflict", "412")
+_MIN_PART_SIZE = 5 * 1024 * 1024
+_DELETE_BATCH_SIZE = 1000
+# Largest object CopyObject accepts; larger objects are copied in parts with UploadPartCopy
+_MAX_SINGLE_COPY_SIZE = 5 * 1024 * 1024 * 1024
+_COPY_SOURCE_TOO_LARGE = "copy source is larger than the maximum allowable size"
+
+
+def _count_retries(context: dict[str, Any], **_: Any) -> None:
+    """
+    Count the times botocore retried a request against the operations running on this thread,
+    for requests that succeeded and those that failed
+    :param context: The request context, holding botocore's attempt count
+    """
+    retries = context.get("retries", {}).get("attempt", 1) - 1
+    if retries:
+        instrumentation.record_retry(retries)
+
+
+def _quoted_etag(etag: str) -> str:
+    """
+    Quote an ETag for an If-Match header, as S3 returns them, so callers can pass ETags with or without quotes
+    :param etag: The ETag
+    :return: The ETag in double quotes
+    """
+    return etag if etag.startswith('"') else f'"{etag}"'
+
+
+class _S3MultipartUpload(MultipartUpload):
+    """
+    An S3 multipart upload, for `open_write_stream`
+    """
+
+    def __init__(
+        self,
+        store: "S3FileStore",
+        bucket: str,
+        key: str,
+        upload_id: str,
+        *,
+        throttle: Callable[[bytes | None], None],
+        log_success: Callable[..., None],
+    ):
+        self.store = store
+        self.bucket = bucket
+        self.key = key
+        self.upload_id = upload_id
+        self.throttle = throttle
+        self.log_success = log_success
+        self.parts: list[CompletedPartTypeDef] = []
+        self.size = 0
+
+    def upload_part(self, part_number: int, data: bytes) -> bool:
+        self.throttle(data)
+        try:
+            response = self.store.client.upload_part(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=part_number, Body=data
+            )
+        except ClientError:
+            self.store.logger.exception(
+                "Failed to upload part {part_number} of {key}", part_number=part_number, key=self.key
+            )
+            return False
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self.size += len(data)
+        return True
+
+    def complete(self) -> bool:
+        self.throttle(None)
+        try:
+            self.store.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={"Parts": self.parts}
+            )
+        except ClientError:
+            self.store.logger.exception("Failed to complete upload of {key}", key=self.key)
+            return False
+        self.log_success(
+            "open_write_stream",
+            "Successfully uploaded object: {key} to bucket: {bucket} in {parts} parts",
+            self.size,
+            key=self.key,
+            bucket=self.bucket,
+            parts=len(self.parts),
+        )
+        return True
+
+    def abort(self) -> None:
+        self.throttle(None)
+        try:
+            self.store.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except ClientError:
+            self.store.logger.exception("Failed to abort upload of {key}", key=self.key)
+
 
 class S3FileStore(FileStore):
     """
     File storage class providing CRUD operations for S3 bucket objects in AWS S3 and minio
     """
 
+    min_part_size = _MIN_PART_SIZE
+
     def __init_boto3_client(self, **kwargs: Unpack[S3ClientKwargs]) -> S3Client:
         """
         This function returns the client connection to S3 or minio using boto3,
@@ -55,15 +172,212 @@ class S3FileStore(FileStore):
         """
         self.logger = logger
         self.settings = settings
-        self.client: S3Client = self.__init_boto3_client(**kwargs)
+        self.__client_kwargs = kwargs
+        self._ensure_clients()
+        self.rate_limiter = rate_limiter_from_settings("s3", settings)
+        self.success_log = success_logger_from_settings(logger, settings)
+
+    def _create_clients(self) -> None:
+        credentials = (
+            self.settings.environment.lower() in ["local", "test"],
+            self.settings.minio_address,
+            self.settings.aws_access_key_id,
+            self.settings.aws_secret_access_key,
+        )
+        self.__client = shared_client(
+            client_key("s3", credentials, self.__client_kwargs) if self.settings.share_clients else None,
+            lambda: self.__init_boto3_client(**self.__client_kwargs),
+        )
+        for event in ("after-call.s3", "after-call-error.s3"):
+            self.__client.meta.events.register(event, _count_retries, unique_id=f"file-store-retries-{event}")
+
+    @property
+    def client(self) -> S3Client:
+        """
+        The boto3 client for the current process, rebuilt after a fork.
+        boto3 clients are thread-safe, so one client is shared by every thread in a process.
+        """
+        self._ensure_clients()
+        return self.__client
+
+    def _ping(self) -> bool:
+        try:
+            self.client.head_bucket(Bucket=self.settings.bucket_name)
+        except ClientError:
+            return True
+        except BotoCoreError:
+            self.logger.exception("Failed to reach bucket {bucket}", bucket=self.settings.bucket_name)
+            return False
+        return True
 
     def __prefix_key(self, key: str) -> str:
         """
-        Returns the key with a prefix if it's set
+        Returns the key with the data directory and shard prefixes, if they're set
         :param key: The S3 object key
         :return: The key with a prefix if it's set
         """
-        return key if not self.settings.data_dir else f"{self.settings.data_dir}/{key}"
+        return sharding.physical_key(key, self.settings.data_dir, self.settings.shard_count)
+
+    @staticmethod
+    def __object_info(obj: ObjectTypeDef) -> dict[str, str | int]:
+        """
+        Returns the listing information for an S3 object
+        :param obj: An object from a `list_objects_v2` response
+        :return: Dictionary containing object information
+        """
+        return {
+            "key": str(obj["Key"]),
+            "size": int(obj["Size"]),
+            "last_modified": obj["LastModified"].isoformat(),
+            "etag": str(obj["ETag"]).strip('"'),
+        }
+
+    def __transfer_config(
+        self, max_concurrency: int | None, multipart_threshold: int = transfers.SINGLE_REQUEST_SIZE
+    ) -> TransferConfig:
+        """
+        Returns the boto3 managed transfer configuration for the store's transfer settings
+        :param max_concurrency: Limit for this call, instead of the store's `transfer_max_concurrency`
+        :param multipart_threshold: Size above which objects are transferred in parts
+        :return: The transfer configuration
+        """
+        block_size = transfers.block_size_for(None, self.settings.transfer_block_size)
+        return TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=block_size,
+            max_concurrency=max_concurrency or self.settings.transfer_max_concurrency,
+        )
+
+    def __transfer_manager(
+        self, max_concurrency: int | None, multipart_threshold: int = transfers.SINGLE_REQUEST_SIZE
+    ) -> TransferManager:
+        """
+        Returns a boto3 managed transfer for the store's transfer settings. Its worker threads count their requests
+        and retries towards the operation that started the transfer.
+        :param max_concurrency: Limit for this call, instead of the store's `transfer_max_concurrency`
+        :param multipart_threshold: Size above which objects are transferred in parts
+        :return: The transfer manager, to use as a context manager
+        """
+        return TransferManager(
+            self.client,
+            self.__transfer_config(max_concurrency, multipart_threshold),
+            executor_cls=instrumentation.OperationThreadPoolExecutor,
+        )
+
+    def __upload_in_parts(
+        self,
+        bucket: str,
+        key: str,
+        data: str | bytes | BinaryIO,
+        *,
+        metadata: dict[str, str] | None,
+        content_type: str | None,
+        max_concurrency: int | None,
+    ) -> bool:
+        """
+        Upload an object with a boto3 managed multipart upload, sending its parts in parallel
+        :param bucket: The bucket
+        :param key: The prefixed object key
+        :param data: Data to upload
+        :param metadata: Optional metadata dictionary
+        :param content_type: Optional content type
+        :param max_concurrency: Limit for this call, instead of the store's `transfer_max_concurrency`
+        :return: True if successful, False otherwise
+        """
+        fileobj = io.BytesIO(data.encode("utf-8")) if isinstance(data, str) else data
+        if isinstance(fileobj, bytes):
+            fileobj = io.BytesIO(fileobj)
+        extra_args: dict[str, Any] = {}
+        if metadata:
+            extra_args["Metadata"] = metadata
+        if content_type:
+            extra_args["ContentType"] = content_type
+        num_bytes = self._success_payload_size(data)
+        self._throttle(data, key=key)
+        try:
+            with self.__transfer_manager(max_concurrency) as manager:
+                manager.upload(fileobj, bucket, key, extra_args=extra_args).result()
+        except ClientError:
+            self.logger.exception("Failed to upload object {key}", key=key)
+            return False
+        self._log_success(
+            "put_object",
+            "Successfully uploaded object: {key} to bucket: {bucket}",
+            num_bytes,
+            key=key,
+            bucket=bucket,
+        )
+        return True
+
+    def __read_in_parts(self, bucket: str, key: str, max_concurrency: int | None) -> bytes:
+        """
+        Read an object in ranged parts. The first part is fetched on its own, so small objects take one request;
+        the rest of a larger object is fetched in parallel. Every part must match the first part's ETag, so a
+        concurrent overwrite fails the read rather than mixing versions.
+        :param bucket: The bucket
+        :param key: The prefixed object key
+        :param max_concurrency: Limit for this call, instead of the store's `transfer_max_concurrency`
+        :return: The object's content
+        """
+        first_part = transfers.block_size_for(None, self.settings.transfer_block_size)
+        try:
+            response = self.client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{first_part - 1}")
+        except ClientError as exception:
+            if exception.response["Error"]["Code"] == "InvalidRange":
+                # The object is empty
+                return b""
+            raise
+        first: bytes = response["Body"].read()
+        size = int(response.get("ContentRange", f"/{len(first)}").rpartition("/")[2])
+        if size <= len(first):
+            return first
+
+        etag = response["ETag"]
+        part_size = transfers.block_size_for(size, self.settings.transfer_block_size)
+        concurrency = self._transfer_concurrency(size, max_concurrency)
+
+        def fetch(start: int) -> bytes:
+            self._throttle(key=key)
+            end = min(start + part_size, size) - 1
+            part = self.client.get_object(
+                Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=_quoted_etag(etag)
+            )
+            content: bytes = part["Body"].read()
+            return content
+
+        with instrumentation.OperationThreadPoolExecutor(max_workers=concurrency) as pool:
+            parts = list(pool.map(fetch, range(len(first), size, part_size)))
+        return b"".join([first, *parts])
+
+    def _start_multipart_upload(
+        self,
+        key: str,
+        metadata: dict[str, str] | None = None,
+        content_type: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> MultipartUpload | None:
+        bucket = bucket or self.settings.bucket_name
+        key = self.__prefix_key(key)
+        request: CreateMultipartUploadRequestTypeDef = {"Bucket": bucket, "Key": key}
+        if metadata:
+            request["Metadata"] = metadata
+        if content_type:
+            request["ContentType"] = content_type
+        self._throttle(key=key)
+        try:
+            response = self.client.create_multipart_upload(**request)
+        except ClientError:
+            self.logger.exception("Failed to start upload of {key}", key=key)
+            return None
+        return _S3MultipartUpload(
+            self,
+            bucket,
+            key,
+            response["UploadId"],
+            throttle=partial(self._throttle, key=key),
+            log_success=self._log_success,
+        )
 
     def get_client(self) -> S3Client:
         return self.client
@@ -74,56 +388,95 @@ class S3FileStore(FileStore):
         data: str | bytes | BinaryIO,
         metadata: dict[str, str] | None = None,
         content_type: str | None = None,
+        *,
+        if_match_etag: str | None = None,
+        if_none_match: bool = False,
+        bucket: str | None = None,
+        ttl: timedelta | None = None,
+        max_concurrency: int | None = None,
     ) -> bool:
         """
-        Create/upload an object to S3.
+        Create/upload an object to S3. Objects over 8 MiB are uploaded in parallel multipart parts, unless
+        a precondition is given, since conditional writes are only supported by a single PutObject request.
 
         Args:
             key: S3 object key (path)
             data: Data to upload (string, bytes, or file-like object)
             metadata: Optional metadata dictionary
             content_type: Optional content type
+            if_match_etag: Only write if the object's current ETag matches this value
+            if_none_match: Only write if the object doesn't already exist
+            bucket: Bucket to use instead of the configured one
+            ttl: Delete the object this long after it's written, when `sweep_expired` next runs
+            max_concurrency: Largest number of parts uploaded at once, instead of `transfer_max_concurrency`
 
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if successful, False otherwise (including when a precondition isn't met)
         """
-        bucket = self.settings.bucket_name
+        metadata = with_expiry(metadata, ttl)
+        bucket = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        if self._payload_size(data) > transfers.SINGLE_REQUEST_SIZE and not (if_match_etag or if_none_match):
+            return self.__upload_in_parts(
+                bucket, key, data, metadata=metadata, content_type=content_type, max_concurrency=max_concurrency
+            )
+        request: PutObjectRequestTypeDef = {"Bucket": bucket, "Key": key, "Body": data}
+        if metadata:
+            request["Metadata"] = metadata
+        if content_type:
+            request["ContentType"] = content_type
+        if if_match_etag:
+            request["IfMatch"] = _quoted_etag(if_match_etag)
+        if if_none_match:
+            request["IfNoneMatch"] = "*"
+        num_bytes = self._success_payload_size(data)
+        self._throttle(data, key=key)
         try:
-            # Use explicit arguments instead of **kwargs to satisfy mypy
-            if metadata and content_type:
-                self.client.put_object(Bucket=bucket, Key=key, Body=data, Metadata=metadata, ContentType=content_type)
-            elif metadata:
-                self.client.put_object(Bucket=bucket, Key=key, Body=data, Metadata=metadata)
-            elif content_type:
-                self.client.put_object(Bucket=bucket, Key=key, Body=data, ContentType=content_type)
+            self.client.put_object(**request)
+            self._log_success(
+                "put_object",
+                "Successfully uploaded object: {key} to bucket: {bucket}",
+                num_bytes,
+                key=key,
+                bucket=bucket,
+            )
+        except ClientError as exception:
+            if exception.response["Error"]["Code"] in _PRECONDITION_FAILED_CODES:
+                self.logger.warning("Precondition failed uploading object {key}", key=key)
             else:
-                self.client.put_object(Bucket=bucket, Key=key, Body=data)
-
-            self.logger.info("Successfully uploaded object: {key} to bucket: {bucket}", key=key, bucket=bucket)
-        except ClientError:
-            self.logger.exception("Failed to upload object {key}", key=key)
+                self.logger.exception("Failed to upload object {key}", key=key)
             return False
         else:
             return True
 
-    def read_object(self, key: str, as_text: bool = False, encoding: str = "utf-8") -> bytes | str | None:
+    def read_object(
+        self,
+        key: str,
+        as_text: bool = False,
+        encoding: str = "utf-8",
+        *,
+        bucket: str | None = None,
+        max_concurrency: int | None = None,
+    ) -> bytes | str | None:
         """
-        Read/download an object from S3.
+        Read/download an object from S3. Objects over 8 MiB are fetched in parallel ranged parts.
 
         Args:
             key: S3 object key (path)
             as_text: If True, return as string, otherwise as bytes
             encoding: Text encoding if as_text is True
+            bucket: Bucket to use instead of the configured one
+            max_concurrency: Largest number of parts downloaded at once, instead of `transfer_max_concurrency`
 
         Returns:
-            Object content as bytes or string, None if not found
+            Object content as bytes or string, None if not found or it changed while being read
         """
-        bucket = self.settings.bucket_name
+        bucket = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            response = self.client.get_object(Bucket=bucket, Key=key)
-            content: bytes = response["Body"].read()
+            content = self.__read_in_parts(bucket, key, max_concurrency)
+            self._record_transfer(len(content), key=key)
 
             if as_text:
                 try:
@@ -138,18 +491,100 @@ class S3FileStore(FileStore):
         except ClientError as exception:
             if exception.response["Error"]["Code"] == "NoSuchKey":
                 self.logger.warning("Object not found: {key}", key=key)
+            elif exception.response["Error"]["Code"] in _PRECONDITION_FAILED_CODES:
+                self.logger.warning("Object {key} changed while being read", key=key)
             else:
                 self.logger.exception("Failed to read object {key}", key=key)
             return None
         else:
             return content
 
+    def read_object_with_etag(self, key: str, *, bucket: str | None = None) -> tuple[bytes, str] | None:
+        """
+        Read/download an object from S3 along with its ETag, for use with `if_match_etag`
+
+        Args:
+            key: S3 object key (path)
+            bucket: Bucket to use instead of the configured one
+
+        Returns:
+            Tuple of object content and ETag, None if not found
+        """
+        bucket = bucket or self.settings.bucket_name
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            response = self.client.get_object(Bucket=bucket, Key=key)
+            content: bytes = response["Body"].read()
+            self._record_transfer(len(content), key=key)
+        except ClientError as exception:
+            if exception.response["Error"]["Code"] == "NoSuchKey":
+                self.logger.warning("Object not found: {key}", key=key)
+            else:
+                self.logger.exception("Failed to read object {key}", key=key)
+            return None
+        else:
+            return content, response["ETag"].strip('"')
+
+    def read_range(
+        self,
+        key: str,
+        start: int,
+        length: int | None = None,
+        *,
+        bucket: str | None = None,
+        if_match_etag: str | None = None,
+    ) -> bytes | None:
+        """
+        Read part of an object from S3 with a ranged GET, without downloading the rest of it.
+
+        Args:
+            key: S3 object key (path)
+            start: Offset of the first byte, or minus the number of bytes to read from the end of the object
+            length: Number of bytes to read, or None to read to the end; must be None if `start` is negative
+            bucket: Bucket to use instead of the configured one
+            if_match_etag: Only read if the object's current ETag matches this value
+
+        Returns:
+            The bytes in the range, which are fewer than `length` if the range runs past the end of the object,
+            None if not found or it has changed
+        """
+        ranges.check_range(start, length)
+        if length == 0:
+            return b""
+        bucket = bucket or self.settings.bucket_name
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            request: GetObjectRequestTypeDef = {"Bucket": bucket, "Key": key, "Range": ranges.http_range(start, length)}
+            if if_match_etag:
+                request["IfMatch"] = _quoted_etag(if_match_etag)
+            response = self.client.get_object(**request)
+            content: bytes = response["Body"].read()
+            self._record_transfer(len(content), key=key)
+        except ClientError as exception:
+            code = exception.response["Error"]["Code"]
+            if code == "InvalidRange":
+                return b""
+            if code == "NoSuchKey":
+                self.logger.warning("Object not found: {key}", key=key)
+            elif code in _PRECONDITION_FAILED_CODES:
+                self.logger.warning("Object {key} has changed", key=key)
+            else:
+                self.logger.exception("Failed to read range of object {key}", key=key)
+            return None
+        else:
+            return content
+
     def update_object(
         self,
         key: str,
         data: str | bytes | BinaryIO,
         metadata: dict[str, str] | None = None,
         content_type: str | None = None,
+        *,
+        if_match_etag: str | None = None,
+        bucket: str | None = None,
     ) -> bool:
         """
         Update an existing object in S3 (same as create_object)
@@ -159,45 +594,91 @@ class S3FileStore(FileStore):
             data: New data to upload
             metadata: Optional metadata dictionary
             content_type: Optional content type
+            if_match_etag: Only write if the object's current ETag matches this value
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
         """
-        return self.put_object(key, data, metadata, content_type)
+        return self.put_object(key, data, metadata, content_type, if_match_etag=if_match_etag, bucket=bucket)
 
-    def delete_object(self, key: str) -> bool:
+    def delete_object(self, key: str, *, bucket: str | None = None) -> bool:
         """
         Delete an object from S3.
 
         Args:
             key: S3 object key (path)
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
         """
-        bucket = self.settings.bucket_name
+        bucket = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
             self.client.delete_object(Bucket=bucket, Key=key)
-            self.logger.info("Successfully deleted object: {key} from bucket: {bucket}", key=key, bucket=bucket)
+            self._log_success(
+                "delete_object", "Successfully deleted object: {key} from bucket: {bucket}", key=key, bucket=bucket
+            )
         except ClientError:
             self.logger.exception("Failed to delete object {key}", key=key)
             return False
         else:
             return True
 
-    def object_exists(self, key: str) -> bool:
+    def delete_objects(self, keys: Sequence[str], *, bucket: str | None = None) -> list[str]:
+        """
+        Delete objects from S3, up to 1000 per request. Keys that don't exist count as deleted.
+
+        Args:
+            keys: S3 object keys (paths)
+            bucket: Bucket to use instead of the configured one
+
+        Returns:
+            list[str]: The keys that couldn't be deleted, empty if every object was
+        """
+        bucket = bucket or self.settings.bucket_name
+        failed: list[str] = []
+        for start in range(0, len(keys), _DELETE_BATCH_SIZE):
+            batch = {self.__prefix_key(key): key for key in keys[start : start + _DELETE_BATCH_SIZE]}
+            self._throttle()
+            try:
+                response = self.client.delete_objects(
+                    Bucket=bucket, Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True}
+                )
+            except ClientError:
+                self.logger.exception("Failed to delete {count} objects", count=len(batch))
+                failed.extend(batch.values())
+                continue
+            errors = response.get("Errors", [])
+            for error in errors:
+                self.logger.warning(
+                    "Failed to delete object {key}: {code}", key=error.get("Key"), code=error.get("Code")
+                )
+                failed.append(batch.get(str(error.get("Key")), str(error.get("Key"))))
+            self._log_success(
+                "delete_objects",
+                "Successfully deleted {count} objects from bucket: {bucket}",
+                count=len(batch) - len(errors),
+                bucket=bucket,
+            )
+        return failed
+
+    def object_exists(self, key: str, *, bucket: str | None = None) -> bool:
         """
         Check if an object exists in S3
 
         Args:
             key: S3 object key (path)
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             bool: True if object exists, False otherwise
         """
-        bucket = self.settings.bucket_name
+        bucket = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
             self.client.head_object(Bucket=bucket, Key=key)
         except ClientError as exception:
@@ -208,19 +689,53 @@ class S3FileStore(FileStore):
         else:
             return True
 
-    def download_object_url(self, key: str, expiration: int = 3600) -> str | None:
+    def download_fileobj(
+        self, key: str, fileobj: BinaryIO, *, bucket: str | None = None, max_concurrency: int | None = None
+    ) -> bool:
+        """
+        Download an object from S3 into a writable file-like object, without holding it in memory.
+        Objects over 8 MiB are fetched in concurrent ranged parts.
+
+        Args:
+            key: S3 object key (path)
+            fileobj: Writable binary file-like object
+            bucket: Bucket to use instead of the configured one
+            max_concurrency: Largest number of parts downloaded at once, instead of `transfer_max_concurrency`
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        bucket = bucket or self.settings.bucket_name
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            start = fileobj.tell()
+            with self.__transfer_manager(max_concurrency) as manager:
+                manager.download(bucket, key, fileobj).result()
+            self._record_transfer(fileobj.tell() - start, key=key)
+        except ClientError as exception:
+            if exception.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                self.logger.warning("Object not found: {key}", key=key)
+            else:
+                self.logger.exception("Failed to download object {key}", key=key)
+            return False
+        else:
+            return True
+
+    def download_object_url(self, key: str, expiration: int = 3600, *, bucket: str | None = None) -> str | None:
         """
         Get an objects pre-signed URL
 
         Args:
             key: S3 object key (path)
             expiration: Expiration time in seconds
+            bucket: Bucket to use instead of the configured one
         Returns:
             str: S3 object pre-signed URL as string. If error, returns None
         """
-        bucket = self.settings.bucket_name
+        bucket = bucket or self.settings.bucket_name
         try:
-            does_object_exist = self.object_exists(key)
+            does_object_exist = self.object_exists(key, bucket=bucket)
             if not does_object_exist:
                 return None
             return str(
@@ -234,52 +749,127 @@ class S3FileStore(FileStore):
             self.logger.exception("Error checking object existence {key}", key=self.__prefix_key(key))
             return None
 
-    def list_objects(self, prefix: str = "", max_keys: int = 1000) -> list[dict[str, str | int]]:
+    def list_objects(
+        self, prefix: str = "", max_keys: int = 1000, *, bucket: str | None = None
+    ) -> list[dict[str, str | int]]:
         """
         List objects in S3 bucket with optional prefix filter
 
         Args:
             prefix: Optional prefix to filter objects
             max_keys: Maximum number of objects to return
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             List of dictionaries containing object information
         """
-        bucket = self.settings.bucket_name
+        if self.settings.shard_count:
+            return list(itertools.islice(self.iter_objects(prefix, max_keys, bucket=bucket), max_keys))
+        bucket = bucket or self.settings.bucket_name
         prefix = self.__prefix_key(prefix)
         objects = []
+        self._throttle(key=prefix)
         try:
             response = self.client.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=max_keys)
             for obj in response.get("Contents", []):
-                objects.append(
-                    {
-                        "key": str(obj["Key"]),
-                        "size": int(obj["Size"]),
-                        "last_modified": obj["LastModified"].isoformat(),
-                        "etag": str(obj["ETag"]).strip('"'),
-                    }
-                )
+                objects.append(self.__object_info(obj))
         except ClientError:
             self.logger.exception("Failed to list objects with prefix {prefix}", prefix=prefix)
             return []
         else:
-            return objects  # type: ignore[return-value]
+            return objects
+
+    def iter_objects(
+        self,
+        prefix: str = "",
+        page_size: int = 1000,
+        strict: bool = False,
+        start_after: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> Iterator[dict[str, str | int]]:
+        """
+        Iterate over every object in S3 bucket with optional prefix filter, fetching pages as they are consumed
+
+        Args:
+            prefix: Optional prefix to filter objects
+            page_size: Number of objects to fetch per request
+            strict: If True, raise errors instead of logging them and ending the iteration early,
+                for callers that need to know the listing is complete
+            start_after: Only return objects with keys after this one, e.g. the last key seen by a previous listing
+            bucket: Bucket to use instead of the configured one
+
+        Returns:
+            Iterator of dictionaries containing object information
+        """
+        if self.settings.shard_count:
+            return sharding.merge_shards(
+                lambda shard_prefix, shard_start_after: self.__iter_listing(
+                    shard_prefix, page_size, strict, shard_start_after, bucket=bucket
+                ),
+                prefix,
+                start_after,
+                self.settings.data_dir,
+                self.settings.shard_count,
+            )
+        return self.__iter_listing(
+            self.__prefix_key(prefix),
+            page_size,
+            strict,
+            self.__prefix_key(start_after) if start_after else None,
+            bucket=bucket,
+        )
+
+    def __iter_listing(
+        self, prefix: str, page_size: int, strict: bool, start_after: str | None, *, bucket: str | None
+    ) -> Iterator[dict[str, str | int]]:
+        """
+        Iterate over the objects under a prefix in the bucket, as `iter_objects` does
+        :param prefix: The prefix in the bucket, including the data directory and shard
+        :param start_after: Only return objects with keys in the bucket after this one
+        :return: Iterator of dictionaries containing object information
+        """
+        request: ListObjectsV2RequestTypeDef = {
+            "Bucket": bucket or self.settings.bucket_name,
+            "Prefix": prefix,
+            "MaxKeys": page_size,
+        }
+        if start_after:
+            request["StartAfter"] = start_after
+        try:
+            while True:
+                self._throttle(key=prefix)
+                response = self.client.list_objects_v2(**request)
+                for obj in response.get("Contents", []):
+                    yield self.__object_info(obj)
+                continuation_token = response.get("NextContinuationToken")
+                if not response.get("IsTruncated") or not continuation_token:
+                    return
+                request["ContinuationToken"] = continuation_token
+        except ClientError:
+            if strict:
+                raise
+            self.logger.exception("Failed to list objects with prefix {prefix}", prefix=prefix)
 
     def get_object_metadata(
         self,
         key: str,
+        *,
+        bucket: str | None = None,
     ) -> dict[str, str | int | dict[str, Any]] | None:
         """
         Get metadata for an S3 object
 
         Args:
             key: S3 object key (path)
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             Dictionary containing object metadata or None if not found
         """
-        bucket = self.settings.bucket_name
+        bucket = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
             response = self.client.head_object(Bucket=bucket, Key=key)
             return {
@@ -301,23 +891,41 @@ class S3FileStore(FileStore):
         self,
         source_key: str,
         dest_key: str,
+        *,
+        source_bucket: str | None = None,
+        dest_bucket: str | None = None,
+        size: int | None = None,
     ) -> bool:
         """
-        Copy an object within S3
+        Copy an object within S3, or between buckets. The copy is done server-side by S3, with a single
+        CopyObject request up to 5 GiB and in concurrent UploadPartCopy parts above that. Objects of unknown
+        size are copied with CopyObject first, and in parts only if S3 rejects them as too large.
 
         Args:
             source_key: Source S3 object key
             dest_key: Destination S3 object key
+            source_bucket: Bucket to copy from instead of the configured one
+            dest_bucket: Bucket to copy to instead of the configured one
+            size: The source object's size in bytes, if known, which picks the copy method up front
 
         Returns:
             bool: True if successful, False otherwise
         """
-        bucket = self.settings.bucket_name
         source_key = self.__prefix_key(source_key)
         dest_key = self.__prefix_key(dest_key)
+        self._throttle(key=dest_key)
+        copy_source: CopySourceTypeDef = {"Bucket": source_bucket or self.settings.bucket_name, "Key": source_key}
+        dest_bucket = dest_bucket or self.settings.bucket_name
         try:
-            copy_source: CopySourceTypeDef = {"Bucket": bucket, "Key": source_key}
-            self.client.copy_object(CopySource=copy_source, Bucket=bucket, Key=dest_key)
+            if size is None or size <= _MAX_SINGLE_COPY_SIZE:
+                try:
+                    self.client.copy_object(CopySource=copy_source, Bucket=dest_bucket, Key=dest_key)
+                except ClientError as exception:
+                    if size is not None or _COPY_SOURCE_TOO_LARGE not in exception.response["Error"].get("Message", ""):
+                        raise
+                    self.__copy_in_parts(copy_source, dest_bucket, dest_key)
+            else:
+                self.__copy_in_parts(copy_source, dest_bucket, dest_key)
         except ClientError:
             self.logger.exception(
                 "Failed to copy object {source_key} to {dest_key}",
@@ -326,14 +934,31 @@ class S3FileStore(FileStore):
             )
             return False
         else:
-            self.logger.info("Successfully copied {source_key} to {dest_key}", source_key=source_key, dest_key=dest_key)
+            self._log_success(
+                "copy_object",
+                "Successfully copied {source_key} to {dest_key}",
+                source_key=source_key,
+                dest_key=dest_key,
+            )
             return True
 
+    def __copy_in_parts(self, copy_source: CopySourceTypeDef, dest_bucket: str, dest_key: str) -> None:
+        """
+        Copy an object over CopyObject's 5 GiB limit with a boto3 managed copy, in concurrent UploadPartCopy parts
+        :param copy_source: The bucket and prefixed key to copy from
+        :param dest_bucket: The bucket to copy to
+        :param dest_key: The prefixed key to copy to
+        """
+        with self.__transfer_manager(None, multipart_threshold=_MAX_SINGLE_COPY_SIZE) as manager:
+            manager.copy(copy_source, dest_bucket, dest_key).result()
+
     def upload_json(
         self,
         key: str,
         data: dict | list,
         metadata: dict[str, str] | None = None,
+        *,
+        bucket: str | None = None,
     ) -> bool:
         """
         Upload JSON data to S3
@@ -342,6 +967,7 @@ class S3FileStore(FileStore):
             key: S3 object key (path)
             data: Dictionary or list to serialize as JSON
             metadata: Optional metadata dictionary
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
@@ -353,6 +979,7 @@ class S3FileStore(FileStore):
                 data=json_data,
                 metadata=metadata,
                 content_type="application/json",
+                bucket=bucket,
             )
         except (TypeError, ValueError):
             self.logger.exception("Failed to serialize data as JSON")
@@ -361,17 +988,20 @@ class S3FileStore(FileStore):
     def download_json(
         self,
         key: str,
+        *,
+        bucket: str | None = None,
     ) -> dict | list | None:
         """
         Download and parse JSON data from S3
 
         Args:
             key: S3 object key (path)
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             Parsed JSON data (dict or list) or None if not found/invalid
         """
-        content = self.read_object(key, as_text=True)
+        content = self.read_object(key, as_text=True, bucket=bucket)
         if content is None:
             return None
 
@@ -388,6 +1018,7 @@ class S3FileStore(FileStore):
         Returns:
             A list of dicts containing bucket information
         """
+        self._throttle()
         try:
             buckets: list[BucketTypeDef] = self.client.list_buckets()["Buckets"]
         except ClientError:
@@ -405,6 +1036,7 @@ class S3FileStore(FileStore):
         """
         if name is None:
             name = self.settings.bucket_name
+        self._throttle()
         try:
             self.client.create_bucket(Bucket=name)
             self.logger.info("Successfully created bucket: {name}", name=name)
@@ -1,15 +1,131 @@
+import base64
+import copy
+import itertools
 import json
+import time
+import uuid
+from collections.abc import Callable, Iterator, Sequence
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from typing import Any, BinaryIO, Unpack
 
-from azure.core.exceptions import AzureError, ResourceNotFoundError
-from azure.storage.blob import BlobSasPermissions, BlobServiceClient, generate_blob_sas
-
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    AzureError,
+    HttpResponseError,
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+)
+from azure.core.pipeline import PipelineResponse
+from azure.storage.blob import (
+    BlobBlock,
+    BlobClient,
+    BlobProperties,
+    BlobSasPermissions,
+    BlobServiceClient,
+    ContainerClient,
+    ContentSettings,
+    generate_blob_sas,
+)
+
+from i_dot_ai_utilities.file_store import instrumentation, ranges, sharding, transfers
+from i_dot_ai_utilities.file_store.clients import client_key, shared_client
+from i_dot_ai_utilities.file_store.lifecycle import with_expiry
 from i_dot_ai_utilities.file_store.main import FileStore
+from i_dot_ai_utilities.file_store.rate_limiter import rate_limiter_from_settings
 from i_dot_ai_utilities.file_store.settings import Settings
+from i_dot_ai_utilities.file_store.success_log import success_logger_from_settings
 from i_dot_ai_utilities.file_store.types.kwargs_dicts import AzureClientKwargs
+from i_dot_ai_utilities.file_store.write_stream import MultipartUpload
 from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
 
+_DELETE_BATCH_SIZE = 256
+# Missing blobs count as deleted
+_DELETED_STATUS_CODES = (202, 404)
+_RANGE_NOT_SATISFIABLE = 416
+# Seconds between checks on a copy Blob Storage is still running
+_COPY_POLL_INTERVAL = 1.0
+# Set in a request's pipeline context once its first attempt has had a response
+_ATTEMPTED = "file_store_attempted"
+
+
+def _count_retry(response: PipelineResponse) -> None:
+    """
+    Response hook counting each attempt at a request after the first as a retry, against the operations running
+    on this thread. The SDK calls it for every attempt, and the attempts at a request share its pipeline context.
+    :param response: The response to one attempt
+    """
+    if response.context.get(_ATTEMPTED):
+        instrumentation.record_retry()
+    response.context[_ATTEMPTED] = True
+
+
+class _AzureBlockUpload(MultipartUpload):
+    """
+    A block blob upload, for `open_write_stream`. Parts are staged as blocks and committed as a block list.
+    Block IDs include a random upload ID, so concurrent uploads to the same blob don't overwrite each other's blocks.
+    """
+
+    def __init__(
+        self,
+        store: "AzureFileStore",
+        blob_client: BlobClient,
+        metadata: dict[str, str] | None,
+        content_type: str | None,
+        *,
+        throttle: Callable[[bytes | None], None],
+        log_success: Callable[..., None],
+    ):
+        self.store = store
+        self.blob_client = blob_client
+        self.metadata = metadata
+        self.content_type = content_type
+        self.throttle = throttle
+        self.log_success = log_success
+        self.upload_id = uuid.uuid4().hex
+        self.blocks: list[BlobBlock] = []
+        self.size = 0
+
+    def upload_part(self, part_number: int, data: bytes) -> bool:
+        block_id = base64.b64encode(f"{self.upload_id}-{part_number:08d}".encode()).decode()
+        self.throttle(data)
+        try:
+            self.blob_client.stage_block(block_id, data, length=len(data))
+        except AzureError:
+            self.store.logger.exception(
+                "Failed to upload part {part_number} of {key}", part_number=part_number, key=self.blob_client.blob_name
+            )
+            return False
+        self.blocks.append(BlobBlock(block_id=block_id))
+        self.size += len(data)
+        return True
+
+    def complete(self) -> bool:
+        self.throttle(None)
+        try:
+            self.blob_client.commit_block_list(
+                self.blocks,
+                metadata=self.metadata,
+                content_settings=ContentSettings(content_type=self.content_type) if self.content_type else None,
+            )
+        except AzureError:
+            self.store.logger.exception("Failed to complete upload of {key}", key=self.blob_client.blob_name)
+            return False
+        self.log_success(
+            "open_write_stream",
+            "Successfully uploaded object: {key} to container: {container} in {parts} parts",
+            self.size,
+            key=self.blob_client.blob_name,
+            container=self.blob_client.container_name,
+            parts=len(self.blocks),
+        )
+        return True
+
+    def abort(self) -> None:
+        # Blob Storage has no way to discard staged blocks; uncommitted blocks are garbage collected after a week
+        self.blocks.clear()
+
 
 class AzureFileStore(FileStore):
     """
@@ -21,13 +137,18 @@ class AzureFileStore(FileStore):
             if not self.settings.azure_connection_string:
                 message = "Azure connection string is required for local/test environments"
                 raise ValueError(message)
-            return BlobServiceClient.from_connection_string(self.settings.azure_connection_string, **kwargs)
+            return BlobServiceClient.from_connection_string(
+                self.settings.azure_connection_string, raw_response_hook=_count_retry, **kwargs
+            )
         else:
             if not self.settings.azure_account_key or not self.settings.azure_account_url:
                 message = "Azure account key and URL are required for production environments"
                 raise ValueError(message)
             return BlobServiceClient(
-                account_url=self.settings.azure_account_url, credential=self.settings.azure_account_key, **kwargs
+                account_url=self.settings.azure_account_url,
+                credential=self.settings.azure_account_key,
+                raw_response_hook=_count_retry,
+                **kwargs,
             )
 
     def __init__(self, logger: StructuredLogger, settings: Settings, **kwargs: Unpack[AzureClientKwargs]) -> None:
@@ -37,16 +158,122 @@ class AzureFileStore(FileStore):
         """
         self.logger = logger
         self.settings = settings
-        self.client: BlobServiceClient = self.__init_azure_client(**kwargs)
-        self.container_client = self.client.get_container_client(self.settings.bucket_name)
+        self.__client_kwargs = kwargs
+        self._ensure_clients()
+        self.rate_limiter = rate_limiter_from_settings("azure", settings)
+        self.success_log = success_logger_from_settings(logger, settings)
+
+    def _create_clients(self) -> None:
+        credentials = (
+            self.settings.environment.lower() in ["local", "test"],
+            self.settings.azure_connection_string,
+            self.settings.azure_account_url,
+            self.settings.azure_account_key,
+        )
+        self.__client = shared_client(
+            client_key("azure", credentials, self.__client_kwargs) if self.settings.share_clients else None,
+            lambda: self.__init_azure_client(**self.__client_kwargs),
+        )
+        self.__container_client = self.__client.get_container_client(self.settings.bucket_name)
+
+    @property
+    def client(self) -> BlobServiceClient:
+        """
+        The Blob Storage client for the current process, rebuilt after a fork.
+        Azure clients are thread-safe, so one client is shared by every thread in a process.
+        """
+        self._ensure_clients()
+        return self.__client
+
+    @property
+    def container_client(self) -> ContainerClient:
+        self._ensure_clients()
+        return self.__container_client
+
+    def __container(self, bucket: str | None) -> ContainerClient:
+        """
+        Returns the client for a container, sharing the service client's connection pool
+        :param bucket: The container name, or None for the configured container
+        :return: The container client
+        """
+        return self.container_client if bucket is None else self.client.get_container_client(bucket)
+
+    def __transfer_blob_client(self, bucket: str | None, key: str, size: int | None) -> BlobClient:
+        """
+        Returns a client for a blob with its single request limits and block size tuned for an object of
+        `size` bytes, like the other backends' transfers. Sizes passed to the store's constructor take precedence.
+        :param bucket: The container name, or None for the configured container
+        :param key: The prefixed object key
+        :param size: The object's size in bytes, or None if it isn't known
+        :return: The blob client
+        """
+        blob_client = self.__container(bucket).get_blob_client(key)
+        block_size = transfers.block_size_for(size, self.settings.transfer_block_size)
+        tuned = {
+            "max_single_put_size": transfers.SINGLE_REQUEST_SIZE,
+            "max_block_size": block_size,
+            "max_single_get_size": transfers.SINGLE_REQUEST_SIZE,
+            "max_chunk_get_size": block_size,
+        }
+        # The SDK reads these sizes from the configuration `get_blob_client` shares with the container client,
+        # so the blob client gets its own copy rather than changing them for every transfer
+        config = copy.copy(blob_client._config)  # noqa: SLF001
+        for name, value in tuned.items():
+            if self.__client_kwargs.get(name) is None:
+                setattr(config, name, value)
+        blob_client._config = config  # noqa: SLF001
+        return blob_client
+
+    def _ping(self) -> bool:
+        try:
+            self.container_client.exists()
+        except HttpResponseError:
+            return True
+        except AzureError:
+            self.logger.exception("Failed to reach container {container}", container=self.settings.bucket_name)
+            return False
+        return True
 
     def __prefix_key(self, key: str) -> str:
         """
-        Returns the key with a prefix if it's set
+        Returns the key with the data directory and shard prefixes, if they're set
         :param key: The Blob Storage object key
         :return: The key with a prefix if it's set
         """
-        return key if not self.settings.data_dir else f"{self.settings.data_dir}/{key}"
+        return sharding.physical_key(key, self.settings.data_dir, self.settings.shard_count)
+
+    @staticmethod
+    def __object_info(blob: BlobProperties) -> dict[str, str | int]:
+        """
+        Returns the listing information for a blob
+        :param blob: A blob from a `list_blobs` response
+        :return: Dictionary containing object information
+        """
+        return {
+            "key": str(blob.name),
+            "size": blob.size or 0,
+            "last_modified": blob.last_modified.isoformat() if blob.last_modified else "",
+            "etag": blob.etag.strip('"') if blob.etag else "",
+        }
+
+    def _start_multipart_upload(
+        self,
+        key: str,
+        metadata: dict[str, str] | None = None,
+        content_type: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> MultipartUpload | None:
+        key = self.__prefix_key(key)
+        blob_client = self.__container(bucket).get_blob_client(key)
+        return _AzureBlockUpload(
+            self,
+            blob_client,
+            metadata,
+            content_type,
+            throttle=partial(self._throttle, key=key),
+            log_success=self._log_success,
+        )
 
     def get_client(self) -> BlobServiceClient:
         return self.client
@@ -57,64 +284,111 @@ class AzureFileStore(FileStore):
         data: str | bytes | BinaryIO,
         metadata: dict[str, str] | None = None,
         content_type: str | None = None,
+        *,
+        if_match_etag: str | None = None,
+        if_none_match: bool = False,
+        bucket: str | None = None,
+        ttl: timedelta | None = None,
+        max_concurrency: int | None = None,
     ) -> bool:
         """
-        Create/upload an object to Blob Storage.
+        Create/upload an object to Blob Storage. Objects over 8 MiB are uploaded as blocks in parallel, with
+        blocks sized by the object's size (or `IAI_FS_TRANSFER_BLOCK_SIZE`).
 
         Args:
             key: Blob Storage object key (path)
             data: Data to upload (string, bytes, or file-like object)
             metadata: Optional metadata dictionary
             content_type: Optional content type
+            if_match_etag: Only write if the object's current ETag matches this value
+            if_none_match: Only write if the object doesn't already exist
+            bucket: Container to use instead of the configured one
+            ttl: Delete the object this long after it's written, when `sweep_expired` next runs
+            max_concurrency: Largest number of blocks uploaded at once, instead of `transfer_max_concurrency`
 
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if successful, False otherwise (including when a precondition isn't met)
         """
-        container_name = self.settings.bucket_name
+        metadata = with_expiry(metadata, ttl)
+        size = self._payload_size(data) or None
+        concurrency = self._transfer_concurrency(size, max_concurrency)
+        container_name = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        num_bytes = self._success_payload_size(data)
+        self._throttle(data, key=key)
         try:
-            blob_client = self.container_client.get_blob_client(key)
+            blob_client = self.__transfer_blob_client(bucket, key, size)
 
             upload_kwargs: dict[str, Any] = {}
             if metadata:
                 upload_kwargs["metadata"] = metadata
             if content_type:
                 upload_kwargs["content_type"] = content_type
+            if if_match_etag:
+                upload_kwargs["etag"] = if_match_etag if if_match_etag.startswith('"') else f'"{if_match_etag}"'
+                upload_kwargs["match_condition"] = MatchConditions.IfNotModified
+
+            blob_client.upload_blob(
+                data,
+                overwrite=not if_none_match,
+                max_concurrency=concurrency,
+                raw_response_hook=instrumentation.carry(_count_retry),
+                **upload_kwargs,
+            )
 
-            if isinstance(data, str) or hasattr(data, "read"):
-                blob_client.upload_blob(data, overwrite=True, **upload_kwargs)
-            else:
-                blob_client.upload_blob(data, overwrite=True, **upload_kwargs)
-
-            self.logger.info(
-                "Successfully uploaded object: {key} to container: {container}", key=key, container=container_name
+            self._log_success(
+                "put_object",
+                "Successfully uploaded object: {key} to container: {container}",
+                num_bytes,
+                key=key,
+                container=container_name,
             )
+        except (ResourceModifiedError, ResourceExistsError):
+            self.logger.warning("Precondition failed uploading object {key}", key=key)
+            return False
         except AzureError:
             self.logger.exception("Failed to upload object {key}", key=key)
             return False
         else:
             return True
 
-    def read_object(self, key: str, as_text: bool = False, encoding: str = "utf-8") -> bytes | str | None:
+    def read_object(
+        self,
+        key: str,
+        as_text: bool = False,
+        encoding: str = "utf-8",
+        *,
+        bucket: str | None = None,
+        max_concurrency: int | None = None,
+    ) -> bytes | str | None:
         """
-        Read/download an object from Blob Storage.
+        Read/download an object from Blob Storage. The first request fetches up to 8 MiB; the rest of a larger
+        object is fetched in blocks in parallel.
 
         Args:
             key: Blob Storage object key (path)
             as_text: If True, return as string, otherwise as bytes
             encoding: Text encoding if as_text is True
+            bucket: Container to use instead of the configured one
+            max_concurrency: Largest number of chunks downloaded at once, instead of `transfer_max_concurrency`
 
         Returns:
             Object content as bytes or string, None if not found
         """
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            blob_client = self.container_client.get_blob_client(key)
+            blob_client = self.__transfer_blob_client(bucket, key, None)
+            downloader = blob_client.download_blob(
+                max_concurrency=self._transfer_concurrency(None, max_concurrency),
+                raw_response_hook=instrumentation.carry(_count_retry),
+            )
+            content_bytes: bytes = downloader.readall()
+            self._record_transfer(len(content_bytes), key=key)
             if as_text:
-                content: str = blob_client.download_blob().readall().decode(encoding)
+                content: str = content_bytes.decode(encoding)
                 return content
             else:
-                content_bytes: bytes = blob_client.download_blob().readall()
                 return content_bytes
         except ResourceNotFoundError:
             self.logger.warning("Object not found: {key}", key=key)
@@ -123,12 +397,99 @@ class AzureFileStore(FileStore):
             self.logger.exception("Failed to read object {key}", key=key)
             return None
 
+    def read_object_with_etag(self, key: str, *, bucket: str | None = None) -> tuple[bytes, str] | None:
+        """
+        Read/download an object from Blob Storage along with its ETag, for use with `if_match_etag`
+
+        Args:
+            key: Blob Storage object key (path)
+            bucket: Container to use instead of the configured one
+
+        Returns:
+            Tuple of object content and ETag, None if not found
+        """
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            blob_client = self.__transfer_blob_client(bucket, key, None)
+            downloader = blob_client.download_blob(
+                max_concurrency=self._transfer_concurrency(None), raw_response_hook=instrumentation.carry(_count_retry)
+            )
+            content: bytes = downloader.readall()
+            self._record_transfer(len(content), key=key)
+        except ResourceNotFoundError:
+            self.logger.warning("Object not found: {key}", key=key)
+            return None
+        except AzureError:
+            self.logger.exception("Failed to read object {key}", key=key)
+            return None
+        else:
+            return content, (downloader.properties.etag or "").strip('"')
+
+    def read_range(
+        self,
+        key: str,
+        start: int,
+        length: int | None = None,
+        *,
+        bucket: str | None = None,
+        if_match_etag: str | None = None,
+    ) -> bytes | None:
+        """
+        Read part of an object from Blob Storage with a ranged download, without downloading the rest of it.
+        Blob Storage doesn't support suffix ranges, so a negative `start` first fetches the blob's size.
+
+        Args:
+            key: Blob Storage object key (path)
+            start: Offset of the first byte, or minus the number of bytes to read from the end of the object
+            length: Number of bytes to read, or None to read to the end; must be None if `start` is negative
+            bucket: Container to use instead of the configured one
+            if_match_etag: Only read if the object's current ETag matches this value
+
+        Returns:
+            The bytes in the range, which are fewer than `length` if the range runs past the end of the object,
+            None if not found or it has changed
+        """
+        ranges.check_range(start, length)
+        if length == 0:
+            return b""
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            blob_client = self.__container(bucket).get_blob_client(key)
+            if start < 0:
+                size = blob_client.get_blob_properties().size
+                self._throttle(key=key)
+                start = max(0, size + start)
+            conditions: dict[str, Any] = {}
+            if if_match_etag:
+                conditions["etag"] = if_match_etag if if_match_etag.startswith('"') else f'"{if_match_etag}"'
+                conditions["match_condition"] = MatchConditions.IfNotModified
+            content: bytes = blob_client.download_blob(offset=start, length=length, **conditions).readall()
+            self._record_transfer(len(content), key=key)
+        except ResourceNotFoundError:
+            self.logger.warning("Object not found: {key}", key=key)
+            return None
+        except ResourceModifiedError:
+            self.logger.warning("Object {key} has changed", key=key)
+            return None
+        except AzureError as exception:
+            if isinstance(exception, HttpResponseError) and exception.status_code == _RANGE_NOT_SATISFIABLE:
+                return b""
+            self.logger.exception("Failed to read range of object {key}", key=key)
+            return None
+        else:
+            return content
+
     def update_object(
         self,
         key: str,
         data: str | bytes | BinaryIO,
         metadata: dict[str, str] | None = None,
         content_type: str | None = None,
+        *,
+        if_match_etag: str | None = None,
+        bucket: str | None = None,
     ) -> bool:
         """
         Update an existing object in Blob Storage (same as create_object)
@@ -138,29 +499,36 @@ class AzureFileStore(FileStore):
             data: New data to upload
             metadata: Optional metadata dictionary
             content_type: Optional content type
+            if_match_etag: Only write if the object's current ETag matches this value
+            bucket: Container to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
         """
-        return self.put_object(key, data, metadata, content_type)
+        return self.put_object(key, data, metadata, content_type, if_match_etag=if_match_etag, bucket=bucket)
 
-    def delete_object(self, key: str) -> bool:
+    def delete_object(self, key: str, *, bucket: str | None = None) -> bool:
         """
         Delete an object from Blob Storage.
 
         Args:
             key: Blob Storage object key (path)
+            bucket: Container to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
         """
-        container_name = self.settings.bucket_name
+        container_name = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            blob_client = self.container_client.get_blob_client(key)
+            blob_client = self.__container(bucket).get_blob_client(key)
             blob_client.delete_blob()
-            self.logger.info(
-                "Successfully deleted object: {key} from container: {container}", key=key, container=container_name
+            self._log_success(
+                "delete_object",
+                "Successfully deleted object: {key} from container: {container}",
+                key=key,
+                container=container_name,
             )
         except ResourceNotFoundError:
             self.logger.warning("Object not found for deletion: {key}", key=key)
@@ -171,19 +539,59 @@ class AzureFileStore(FileStore):
         else:
             return True
 
-    def object_exists(self, key: str) -> bool:
+    def delete_objects(self, keys: Sequence[str], *, bucket: str | None = None) -> list[str]:
+        """
+        Delete objects from Blob Storage, up to 256 per batch request. Keys that don't exist count as deleted.
+
+        Args:
+            keys: Blob Storage object keys (paths)
+            bucket: Container to use instead of the configured one
+
+        Returns:
+            list[str]: The keys that couldn't be deleted, empty if every object was
+        """
+        container_name = bucket or self.settings.bucket_name
+        failed: list[str] = []
+        for start in range(0, len(keys), _DELETE_BATCH_SIZE):
+            batch = {self.__prefix_key(key): key for key in keys[start : start + _DELETE_BATCH_SIZE]}
+            self._throttle()
+            try:
+                responses = list(self.__container(bucket).delete_blobs(*batch, raise_on_any_failure=False))
+            except AzureError:
+                self.logger.exception("Failed to delete {count} objects", count=len(batch))
+                failed.extend(batch.values())
+                continue
+            errors = [
+                key
+                for key, response in zip(batch, responses, strict=True)
+                if response.status_code not in _DELETED_STATUS_CODES
+            ]
+            for key in errors:
+                self.logger.warning("Failed to delete object {key}", key=key)
+                failed.append(batch[key])
+            self._log_success(
+                "delete_objects",
+                "Successfully deleted {count} objects from container: {container}",
+                count=len(batch) - len(errors),
+                container=container_name,
+            )
+        return failed
+
+    def object_exists(self, key: str, *, bucket: str | None = None) -> bool:
         """
         Check if an object exists in Blob Storage
 
         Args:
             key: Blob Storage object key (path)
+            bucket: Container to use instead of the configured one
 
         Returns:
             bool: True if object exists, False otherwise
         """
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            blob_client = self.container_client.get_blob_client(key)
+            blob_client = self.__container(bucket).get_blob_client(key)
             client_exists: bool = blob_client.exists()
         except AzureError:
             self.logger.exception("Error checking object {key} existence", key=key)
@@ -191,21 +599,56 @@ class AzureFileStore(FileStore):
         else:
             return client_exists
 
-    def download_object_url(self, key: str, expiration: int = 3600) -> str | None:
+    def download_fileobj(
+        self, key: str, fileobj: BinaryIO, *, bucket: str | None = None, max_concurrency: int | None = None
+    ) -> bool:
+        """
+        Download an object from Blob Storage into a writable file-like object, without holding it in memory.
+        Large objects are fetched in chunks in parallel.
+
+        Args:
+            key: Blob Storage object key (path)
+            fileobj: Writable binary file-like object
+            bucket: Container to use instead of the configured one
+            max_concurrency: Largest number of chunks downloaded at once, instead of `transfer_max_concurrency`
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            blob_client = self.__transfer_blob_client(bucket, key, None)
+            downloader = blob_client.download_blob(
+                max_concurrency=self._transfer_concurrency(None, max_concurrency),
+                raw_response_hook=instrumentation.carry(_count_retry),
+            )
+            self._record_transfer(downloader.readinto(fileobj), key=key)
+        except ResourceNotFoundError:
+            self.logger.warning("Object not found: {key}", key=key)
+            return False
+        except AzureError:
+            self.logger.exception("Failed to download object {key}", key=key)
+            return False
+        else:
+            return True
+
+    def download_object_url(self, key: str, expiration: int = 3600, *, bucket: str | None = None) -> str | None:
         """
         Get an objects pre-signed URL
 
         Args:
             key: Blob Storage object key (path)
             expiration: Expiration time in seconds
+            bucket: Container to use instead of the configured one
         Returns:
             str: Blob Storage object pre-signed URL as string. If error, returns None
         """
         try:
-            if not self.object_exists(key):
+            if not self.object_exists(key, bucket=bucket):
                 return None
 
-            blob_client = self.container_client.get_blob_client(self.__prefix_key(key))
+            blob_client = self.__container(bucket).get_blob_client(self.__prefix_key(key))
 
             # For local/test environment with Azurite, use the fixed account key
             if self.settings.environment.lower() in ["local", "test"]:
@@ -241,52 +684,123 @@ class AzureFileStore(FileStore):
         else:
             return f"{blob_client.url}?{sas_token}"
 
-    def list_objects(self, prefix: str = "", max_keys: int = 1000) -> list[dict[str, str | int]]:
+    def list_objects(
+        self, prefix: str = "", max_keys: int = 1000, *, bucket: str | None = None
+    ) -> list[dict[str, str | int]]:
         """
         List objects in Blob Storage container with optional prefix filter
 
         Args:
             prefix: Optional prefix to filter objects
             max_keys: Maximum number of objects to return
+            bucket: Container to use instead of the configured one
 
         Returns:
             List of dictionaries containing object information
         """
+        if self.settings.shard_count:
+            return list(itertools.islice(self.iter_objects(prefix, max_keys, bucket=bucket), max_keys))
         prefix = self.__prefix_key(prefix)
         objects = []
+        self._throttle(key=prefix)
         try:
-            blob_list = self.container_client.list_blobs(name_starts_with=prefix, results_per_page=max_keys)
-            for blob in blob_list:
-                objects.append(
-                    {
-                        "key": str(blob.name),
-                        "size": blob.size or 0,
-                        "last_modified": blob.last_modified.isoformat() if blob.last_modified else "",
-                        "etag": blob.etag.strip('"') if blob.etag else "",
-                    }
-                )
+            blob_list = self.__container(bucket).list_blobs(name_starts_with=prefix, results_per_page=max_keys)
+            # The pager fetches further pages as it's iterated, so stop after `max_keys` as S3's MaxKeys does
+            for blob in itertools.islice(blob_list, max_keys):
+                objects.append(self.__object_info(blob))
         except AzureError:
             self.logger.exception("Failed to list objects with prefix {prefix}", prefix=prefix)
             return []
         else:
-            return objects  # type: ignore[return-value]
+            return objects
+
+    def iter_objects(
+        self,
+        prefix: str = "",
+        page_size: int = 1000,
+        strict: bool = False,
+        start_after: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> Iterator[dict[str, str | int]]:
+        """
+        Iterate over every object in Blob Storage container with optional prefix filter,
+        fetching pages as they are consumed
+
+        Args:
+            prefix: Optional prefix to filter objects
+            page_size: Number of objects to fetch per request
+            strict: If True, raise errors instead of logging them and ending the iteration early,
+                for callers that need to know the listing is complete
+            start_after: Only return objects with keys after this one, e.g. the last key seen by a previous listing
+            bucket: Container to use instead of the configured one
+
+        Returns:
+            Iterator of dictionaries containing object information
+        """
+        if self.settings.shard_count:
+            return sharding.merge_shards(
+                lambda shard_prefix, shard_start_after: self.__iter_listing(
+                    shard_prefix, page_size, strict, shard_start_after, bucket=bucket
+                ),
+                prefix,
+                start_after,
+                self.settings.data_dir,
+                self.settings.shard_count,
+            )
+        return self.__iter_listing(
+            self.__prefix_key(prefix),
+            page_size,
+            strict,
+            self.__prefix_key(start_after) if start_after else None,
+            bucket=bucket,
+        )
+
+    def __iter_listing(
+        self, prefix: str, page_size: int, strict: bool, start_after: str | None, *, bucket: str | None
+    ) -> Iterator[dict[str, str | int]]:
+        """
+        Iterate over the objects under a prefix in the bucket, as `iter_objects` does
+        :param prefix: The prefix in the bucket, including the data directory and shard
+        :param start_after: Only return objects with keys in the bucket after this one
+        :return: Iterator of dictionaries containing object information
+        """
+        # Blob listings can't start from a key, so earlier blobs are listed and skipped
+        try:
+            pages = self.__container(bucket).list_blobs(name_starts_with=prefix, results_per_page=page_size).by_page()
+            while True:
+                self._throttle(key=prefix)
+                page = next(pages, None)
+                if page is None:
+                    return
+                for blob in page:
+                    if start_after is None or blob.name > start_after:
+                        yield self.__object_info(blob)
+        except AzureError:
+            if strict:
+                raise
+            self.logger.exception("Failed to list objects with prefix {prefix}", prefix=prefix)
 
     def get_object_metadata(
         self,
         key: str,
+        *,
+        bucket: str | None = None,
     ) -> dict[str, str | int | dict[str, Any]] | None:
         """
         Get metadata for a Blob Storage object
 
         Args:
             key: Blob Storage object key (path)
+            bucket: Container to use instead of the configured one
 
         Returns:
             Dictionary containing object metadata or None if not found
         """
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            blob_client = self.container_client.get_blob_client(key)
+            blob_client = self.__container(bucket).get_blob_client(key)
             properties = blob_client.get_blob_properties()
 
             return {
@@ -308,24 +822,35 @@ class AzureFileStore(FileStore):
         self,
         source_key: str,
         dest_key: str,
+        *,
+        source_bucket: str | None = None,
+        dest_bucket: str | None = None,
+        size: int | None = None,  # noqa: ARG002
     ) -> bool:
         """
-        Copy an object within Blob Storage
+        Copy an object within Blob Storage, or between containers in the same account.
+        The copy is done server-side by Blob Storage; copies it runs asynchronously are waited for, so the
+        destination is complete when this returns
 
         Args:
             source_key: Source Blob Storage object key
             dest_key: Destination Blob Storage object key
+            source_bucket: Container to copy from instead of the configured one
+            dest_bucket: Container to copy to instead of the configured one
+            size: The source object's size in bytes, if known; not needed by Blob Storage
 
         Returns:
             bool: True if successful, False otherwise
         """
         source_key = self.__prefix_key(source_key)
         dest_key = self.__prefix_key(dest_key)
+        self._throttle(key=dest_key)
         try:
-            source_blob_client = self.container_client.get_blob_client(source_key)
-            dest_blob_client = self.container_client.get_blob_client(dest_key)
+            source_blob_client = self.__container(source_bucket).get_blob_client(source_key)
+            dest_blob_client = self.__container(dest_bucket).get_blob_client(dest_key)
 
-            dest_blob_client.start_copy_from_url(source_blob_client.url)
+            copy = dest_blob_client.start_copy_from_url(source_blob_client.url)
+            status = self.__wait_for_copy(dest_blob_client, str(copy["copy_status"]))
         except AzureError:
             self.logger.exception(
                 "Failed to copy object {source_key} to {dest_key}",
@@ -333,15 +858,43 @@ class AzureFileStore(FileStore):
                 dest_key=dest_key,
             )
             return False
-        else:
-            self.logger.info("Successfully copied {source_key} to {dest_key}", source_key=source_key, dest_key=dest_key)
-            return True
+        if status != "success":
+            self.logger.error(
+                "Failed to copy object {source_key} to {dest_key}: copy {status}",
+                source_key=source_key,
+                dest_key=dest_key,
+                status=status,
+            )
+            return False
+        self._log_success(
+            "copy_object",
+            "Successfully copied {source_key} to {dest_key}",
+            source_key=source_key,
+            dest_key=dest_key,
+        )
+        return True
+
+    @staticmethod
+    def __wait_for_copy(blob_client: BlobClient, status: str) -> str:
+        """
+        Wait for a copy started with `start_copy_from_url` to finish. Copies between accounts, or of large blobs,
+        run asynchronously, and the destination isn't usable until the copy status leaves "pending"
+        :param blob_client: The destination blob
+        :param status: The copy status returned when the copy was started
+        :return: The final copy status: "success", "failed" or "aborted"
+        """
+        while status == "pending":
+            time.sleep(_COPY_POLL_INTERVAL)
+            status = str(blob_client.get_blob_properties().copy.status)
+        return status
 
     def upload_json(
         self,
         key: str,
         data: dict | list,
         metadata: dict[str, str] | None = None,
+        *,
+        bucket: str | None = None,
     ) -> bool:
         """
         Upload JSON data to Blob Storage
@@ -350,6 +903,7 @@ class AzureFileStore(FileStore):
             key: Blob Storage object key (path)
             data: Dictionary or list to serialize as JSON
             metadata: Optional metadata dictionary
+            bucket: Container to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
@@ -361,6 +915,7 @@ class AzureFileStore(FileStore):
                 data=json_data,
                 metadata=metadata,
                 content_type="application/json",
+                bucket=bucket,
             )
         except (TypeError, ValueError):
             self.logger.exception("Failed to serialize data as JSON")
@@ -369,17 +924,20 @@ class AzureFileStore(FileStore):
     def download_json(
         self,
         key: str,
+        *,
+        bucket: str | None = None,
     ) -> dict | list | None:
         """
         Download and parse JSON data from Blob Storage
 
         Args:
             key: Blob Storage object key (path)
+            bucket: Container to use instead of the configured one
 
         Returns:
             Parsed JSON data (dict or list) or None if not found/invalid
         """
-        content = self.read_object(key, as_text=True)
+        content = self.read_object(key, as_text=True, bucket=bucket)
         if content is None:
             return None
 
@@ -396,6 +954,7 @@ class AzureFileStore(FileStore):
         Returns:
             A list of dicts containing the name and creation time for each container
         """
+        self._throttle()
         try:
             containers = self.client.list_containers()
             return [{"Name": container.name, "CreationTime": container.last_modified} for container in containers]
@@ -412,6 +971,7 @@ class AzureFileStore(FileStore):
         """
         if name is None:
             name = self.settings.bucket_name
+        self._throttle()
         try:
             self.client.create_container(name)
             self.logger.info("Successfully created container: {name}", name=name)
@@ -0,0 +1,226 @@
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+import uuid
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import TextIO, cast
+
+from i_dot_ai_utilities.file_store.factory import create_file_store
+from i_dot_ai_utilities.file_store.main import FileStore
+from i_dot_ai_utilities.file_store.types.benchmark_result import BenchmarkOperation, BenchmarkResult
+from i_dot_ai_utilities.file_store.types.file_store_destination_enum import FileStoreDestinationEnum
+from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
+
+DEFAULT_SIZES = (1024, 1024 * 1024, 16 * 1024 * 1024)
+DEFAULT_CONCURRENCY = (1, 8, 32)
+DEFAULT_OBJECTS = 64
+OPERATIONS: tuple[BenchmarkOperation, ...] = ("put", "read", "list", "copy", "delete")
+
+_SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "kib": 1024, "m": 1024**2, "mib": 1024**2, "g": 1024**3, "gib": 1024**3}
+_BACKENDS = {"s3": "AWS_S3", "azure": "AZURE_BLOB_STORAGE", "gcp": "GCP_CLOUD_STORAGE"}
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse an object size such as `512`, `4KiB` or `16MiB`; units are binary
+
+    Args:
+        value: The size
+
+    Returns:
+        int: The size in bytes
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([a-z]*)\s*", value.lower())
+    if match is None or match.group(2) not in _SIZE_UNITS:
+        message = f"Invalid size: {value}"
+        raise ValueError(message)
+    return int(match.group(1)) * _SIZE_UNITS[match.group(2)]
+
+
+def _timed(call: Callable[[], object]) -> tuple[float, bool]:
+    start = time.perf_counter()
+    try:
+        succeeded = bool(call())
+    except Exception:  # noqa: BLE001
+        succeeded = False
+    return time.perf_counter() - start, succeeded
+
+
+def _percentile(durations: Sequence[float], quantile: float) -> float:
+    """
+    Nearest-rank percentile of sorted durations
+    """
+    if not durations:
+        return 0.0
+    return durations[max(0, math.ceil(quantile * len(durations)) - 1)]
+
+
+class _Run:
+    """
+    One benchmark run against a store, timing each phase on a thread pool of the phase's concurrency
+    """
+
+    def __init__(self, store: FileStore, backend: str, objects: int):
+        self.store = store
+        self.backend = backend
+        self.objects = objects
+        self.run_id = uuid.uuid4().hex[:12]
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+        self.prefix = f"benchmark/{self.run_id}"
+
+    def measure(
+        self,
+        operation: BenchmarkOperation,
+        object_size: int,
+        concurrency: int,
+        calls: Sequence[Callable[[], object]],
+    ) -> BenchmarkResult:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            # Start the worker threads before the clock does
+            list(pool.map(lambda _: None, range(concurrency)))
+            start = time.perf_counter()
+            outcomes = list(pool.map(_timed, calls))
+            seconds = time.perf_counter() - start
+        durations = sorted(duration for duration, _ in outcomes)
+        succeeded = sum(1 for _, ok in outcomes if ok)
+        transferred = succeeded * object_size if operation in ("put", "read", "copy") else 0
+        return BenchmarkResult(
+            run_id=self.run_id,
+            timestamp=self.timestamp,
+            backend=self.backend,
+            operation=operation,
+            object_size=object_size,
+            concurrency=concurrency,
+            operations=len(calls),
+            errors=len(calls) - succeeded,
+            seconds=seconds,
+            ops_per_second=len(calls) / seconds if seconds else 0.0,
+            mb_per_second=transferred / seconds / 1_000_000 if seconds else 0.0,
+            p50_seconds=_percentile(durations, 0.5),
+            p90_seconds=_percentile(durations, 0.9),
+            p99_seconds=_percentile(durations, 0.99),
+        )
+
+    def phases(self, object_size: int, concurrency: int) -> Iterator[BenchmarkResult]:
+        """
+        Put, read, list, copy and delete `objects` objects of `object_size` bytes, in that order,
+        so each phase works on the objects the previous one left behind
+        """
+        store = self.store
+        payload = os.urandom(object_size)
+        directory = f"{self.prefix}/{object_size}-{concurrency}"
+        keys = [f"{directory}/{i:06d}" for i in range(self.objects)]
+        copies = [f"{directory}-copies/{i:06d}" for i in range(self.objects)]
+
+        yield self.measure("put", object_size, concurrency, [partial(store.put_object, key, payload) for key in keys])
+        yield self.measure("read", object_size, concurrency, [partial(store.read_object, key) for key in keys])
+        yield self.measure("list", object_size, concurrency, [partial(store.list_objects, directory)] * self.objects)
+        yield self.measure(
+            "copy",
+            object_size,
+            concurrency,
+            [partial(store.copy_object, key, copy) for key, copy in zip(keys, copies, strict=True)],
+        )
+        yield self.measure("delete", object_size, concurrency, [partial(store.delete_object, key) for key in keys])
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(store.delete_object, copies))
+
+
+def run_benchmark(
+    store: FileStore,
+    *,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+    objects: int = DEFAULT_OBJECTS,
+    operations: Sequence[BenchmarkOperation] = OPERATIONS,
+    backend: str | None = None,
+) -> Iterator[BenchmarkResult]:
+    """
+    Measure throughput and latency of put, read, list, copy and delete against a store, for every combination
+    of object size and concurrency. Objects are written under `benchmark/<run id>/` and deleted afterwards.
+
+    Puts and deletes always run, to create and clean up the objects the other operations need,
+    but only the operations asked for are reported.
+
+    Args:
+        store: The file store to benchmark
+        sizes: Object sizes in bytes
+        concurrency: Numbers of concurrent calls
+        objects: Number of objects, and so calls, per operation at each size and concurrency level
+        operations: The operations to report
+        backend: Label for the results; defaults to the store's class name
+
+    Returns:
+        Iterator of results as each operation finishes
+    """
+    run = _Run(store, backend or type(store).__name__, objects)
+    for object_size in sizes:
+        for workers in concurrency:
+            for result in run.phases(object_size, workers):
+                if result["operation"] in operations:
+                    yield result
+
+
+def _write_results(results: Iterator[BenchmarkResult], output: TextIO) -> None:
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Benchmark a backend configured by the usual `IAI_FS_` environment variables, writing one JSON line
+    per result so results from successive runs can be appended to the same file and compared
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m i_dot_ai_utilities.file_store.benchmark",
+        description="Benchmark file store operations across object sizes and concurrency levels",
+    )
+    parser.add_argument("--backend", choices=sorted(_BACKENDS), default="s3")
+    parser.add_argument("--sizes", default="1KiB,1MiB,16MiB", help="comma-separated object sizes")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated numbers of concurrent calls")
+    parser.add_argument("--objects", type=int, default=DEFAULT_OBJECTS, help="objects per operation and level")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="comma-separated operations to report")
+    parser.add_argument("--output", default="-", help="JSON lines file to append results to, or - for stdout")
+    parser.add_argument("--create-bucket", action="store_true", help="create the configured bucket first")
+    args = parser.parse_args(argv)
+
+    operations = [operation.strip() for operation in args.operations.split(",")]
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(sorted(unknown))}")
+    try:
+        sizes = [parse_size(size) for size in args.sizes.split(",")]
+    except ValueError as e:
+        parser.error(str(e))
+
+    store = create_file_store(FileStoreDestinationEnum[_BACKENDS[args.backend]], StructuredLogger(level="warning"))
+    if args.create_bucket:
+        store.create_bucket(store.settings.bucket_name)
+
+    results = run_benchmark(
+        store,
+        sizes=sizes,
+        concurrency=[int(level) for level in args.concurrency.split(",")],
+        objects=args.objects,
+        operations=cast("list[BenchmarkOperation]", operations),
+        backend=args.backend,
+    )
+    if args.output == "-":
+        _write_results(results, sys.stdout)
+    else:
+        with Path(args.output).open("a", encoding="utf-8") as output:
+            _write_results(results, output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import asyncio
+import os
+import queue
+from collections.abc import AsyncIterable, Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, BinaryIO
+
+from i_dot_ai_utilities.file_store.prefetch import DEFAULT_MAX_BYTES, prefetch_map
+from i_dot_ai_utilities.file_store.types.bulk_result import BulkTransformResult
+from i_dot_ai_utilities.file_store.types.put_object_result import PutObjectResult
+
+if TYPE_CHECKING:
+    from multiprocessing.context import BaseContext
+
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+DEFAULT_IO_WORKERS = 8
+
+# `(key, data)`, `(key, data, metadata)` or `(key, data, metadata, content_type)`, as passed to `put_object`
+PutObjectItem = (
+    tuple[str, str | bytes | BinaryIO]
+    | tuple[str, str | bytes | BinaryIO, dict[str, str] | None]
+    | tuple[str, str | bytes | BinaryIO, dict[str, str] | None, str | None]
+)
+
+
+def _result(key: str, dest_key: str | None, error: str | None = None) -> BulkTransformResult:
+    return BulkTransformResult(key=key, dest_key=dest_key, success=error is None, error=error)
+
+
+class _Pipeline:
+    """
+    Moves each key through download (I/O threads), transform (process pool) and upload (I/O threads),
+    chaining the stages with future callbacks so no thread blocks waiting on another stage.
+    Finished items are put on `results`; at most `max_in_flight` items are between stages at once.
+    """
+
+    def __init__(
+        self,
+        store: "FileStore",
+        dest_store: "FileStore",
+        transform: Callable[[bytes], bytes | None],
+        dest_key: Callable[[str], str],
+        *,
+        io_pool: ThreadPoolExecutor,
+        process_pool: ProcessPoolExecutor,
+    ):
+        self.store = store
+        self.dest_store = dest_store
+        self.transform = transform
+        self.dest_key = dest_key
+        self.io_pool = io_pool
+        self.process_pool = process_pool
+        self.results: queue.Queue[BulkTransformResult] = queue.Queue()
+
+    def start(self, key: str) -> None:
+        self._submit(key, self.io_pool, self.store.read_object, key, callback=self._downloaded)
+
+    def _submit(
+        self,
+        key: str,
+        executor: ThreadPoolExecutor | ProcessPoolExecutor,
+        fn: Callable,
+        *args: object,
+        callback: Callable[[str, Future], None],
+    ) -> None:
+        try:
+            future = executor.submit(fn, *args)
+        except RuntimeError as e:
+            # Raised when the pool has been shut down or a worker process died
+            self.results.put(_result(key, None, f"Could not schedule work: {e}"))
+            return
+        future.add_done_callback(lambda done: self._complete(key, done, callback))
+
+    def _complete(self, key: str, future: Future, callback: Callable[[str, Future], None]) -> None:
+        if future.cancelled():
+            self.results.put(_result(key, None, "Cancelled"))
+        elif (error := future.exception()) is not None:
+            self.results.put(_result(key, None, f"{type(error).__name__}: {error}"))
+        else:
+            try:
+                callback(key, future)
+            except Exception as e:  # noqa: BLE001
+                # Exceptions raised in done-callbacks are swallowed by concurrent.futures, so a failing
+                # callback (e.g. a `dest_key` that raises) must still report a result or bulk_transform hangs
+                self.results.put(_result(key, None, f"{type(e).__name__}: {e}"))
+
+    def _downloaded(self, key: str, future: Future) -> None:
+        data = future.result()
+        if data is None:
+            self.results.put(_result(key, None, "Download failed"))
+            return
+        self._submit(key, self.process_pool, self.transform, data, callback=self._transformed)
+
+    def _transformed(self, key: str, future: Future) -> None:
+        data = future.result()
+        if data is None:
+            self.results.put(_result(key, None))
+            return
+        dest_key = self.dest_key(key)
+        self._submit(
+            key,
+            self.io_pool,
+            self.dest_store.put_object,
+            dest_key,
+            data,
+            callback=lambda _, done: self._uploaded(key, dest_key, done),
+        )
+
+    def _uploaded(self, key: str, dest_key: str, future: Future) -> None:
+        self.results.put(_result(key, dest_key, None if future.result() else "Upload failed"))
+
+
+def bulk_transform(
+    store: "FileStore",
+    keys: str | Iterable[str],
+    transform: Callable[[bytes], bytes | None],
+    *,
+    dest_key: Callable[[str], str] | None = None,
+    dest_store: "FileStore | None" = None,
+    io_workers: int = DEFAULT_IO_WORKERS,
+    processes: int | None = None,
+    max_in_flight: int | None = None,
+    mp_context: "BaseContext | None" = None,
+) -> Iterator[BulkTransformResult]:
+    """
+    Download objects, run a CPU-heavy transform on each in a process pool and upload the results.
+
+    Downloads and uploads run on `io_workers` threads and transforms on `processes` worker processes, so
+    transfers and transforms overlap and transforms aren't limited by the GIL. No more than `max_in_flight`
+    objects are held between stages at once, which bounds memory and stops downloads running far ahead of a
+    slower transform stage. Results stream back as each object finishes, in completion order.
+
+    Args:
+        store: The file store to read from
+        keys: Either a prefix, in which case every object under it is processed, or an iterable of keys
+        transform: Function run in a worker process on each object's content, returning the bytes to upload,
+            or None to skip the upload. It must be picklable, i.e. defined at module level
+        dest_key: Maps a source key to the key the transformed content is uploaded to; defaults to the same key
+        dest_store: The file store to upload to; defaults to `store`
+        io_workers: Number of threads for downloads and uploads
+        processes: Number of transform processes; defaults to the number of CPUs
+        max_in_flight: Maximum number of objects between stages; defaults to twice the total number of workers
+        mp_context: Multiprocessing context for the process pool, e.g. `multiprocessing.get_context("spawn")`
+
+    Returns:
+        Iterator of results, one per key, as each completes
+    """
+    dest_store = dest_store or store
+    dest_key = dest_key or str
+    items: Iterable[str] = (
+        (store.relative_key(str(obj["key"])) for obj in store.iter_objects(keys)) if isinstance(keys, str) else keys
+    )
+    source = iter(items)
+    processes = processes or os.cpu_count() or 1
+    limit = max_in_flight or 2 * (io_workers + processes)
+    with (
+        ThreadPoolExecutor(max_workers=io_workers) as io_pool,
+        ProcessPoolExecutor(max_workers=processes, mp_context=mp_context) as process_pool,
+    ):
+        pipeline = _Pipeline(store, dest_store, transform, dest_key, io_pool=io_pool, process_pool=process_pool)
+        in_flight = 0
+        try:
+            while True:
+                while in_flight < limit and (key := next(source, None)) is not None:
+                    pipeline.start(key)
+                    in_flight += 1
+                if not in_flight:
+                    return
+                yield pipeline.results.get()
+                in_flight -= 1
+        finally:
+            io_pool.shutdown(wait=False, cancel_futures=True)
+            process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _put(store: "FileStore", item: PutObjectItem) -> PutObjectResult:
+    """
+    Upload one item of a batch, turning a failure into an error in its result
+    :param store: The file store to upload to
+    :param item: The key, data and optional metadata and content type
+    :return: The item's result
+    """
+    key, data, *options = item
+    try:
+        success = store.put_object(key, data, *options)  # type: ignore[arg-type]
+    except Exception as e:  # noqa: BLE001
+        # Raised reading a file-like object, by invalid data, or by SDK transport errors (e.g. botocore's
+        # EndpointConnectionError) that put_object doesn't catch; one item failing mustn't end the batch
+        return PutObjectResult(key=key, success=False, error=f"{type(e).__name__}: {e}")
+    return PutObjectResult(key=key, success=success, error=None if success else "Upload failed")
+
+
+def _item_size(item: PutObjectItem) -> int:
+    data = item[1]
+    return len(data) if isinstance(data, str | bytes) else 0
+
+
+def put_objects(
+    store: "FileStore",
+    items: Iterable[PutObjectItem],
+    *,
+    max_workers: int = DEFAULT_IO_WORKERS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> list[PutObjectResult]:
+    """
+    Upload many objects with up to `max_workers` uploads running at once. Items are taken from `items` as
+    uploads finish, so a generator that reads files as it goes holds only the items being uploaded, and no more
+    than about `max_bytes` of string and bytes data is held at once.
+
+    Args:
+        store: The file store to upload to
+        items: `(key, data)`, `(key, data, metadata)` or `(key, data, metadata, content_type)` tuples
+        max_workers: Maximum number of concurrent uploads
+        max_bytes: Memory budget for the data of the items being uploaded
+
+    Returns:
+        A result per item, in the order given
+    """
+    return [
+        result
+        for _, result in prefetch_map(
+            items,
+            lambda item: _put(store, item),
+            depth=max_workers,
+            max_bytes=max_bytes,
+            estimate_size=_item_size,
+        )
+    ]
+
+
+async def put_objects_async(
+    store: "FileStore",
+    items: Iterable[PutObjectItem] | AsyncIterable[PutObjectItem],
+    *,
+    max_workers: int = DEFAULT_IO_WORKERS,
+) -> list[PutObjectResult]:
+    """
+    Async variant of `put_objects`. Uploads run on a pool of `max_workers` threads and the event loop waits for
+    a free worker, and for the store's rate limit if one is set, before taking the next item, so items can come
+    from an async source such as a request body and rate-limited uploads don't hold a thread while they wait.
+
+    Args:
+        store: The file store to upload to
+        items: `(key, data)`, `(key, data, metadata)` or `(key, data, metadata, content_type)` tuples
+        max_workers: Maximum number of concurrent uploads
+
+    Returns:
+        A result per item, in the order given
+    """
+    loop = asyncio.get_running_loop()
+    workers = asyncio.Semaphore(max_workers)
+    tasks: list[asyncio.Future[PutObjectResult]] = []
+
+    async def start(item: PutObjectItem) -> None:
+        await workers.acquire()
+        limiter = store.rate_limiter_for(item[0])
+        if limiter is not None:
+            await limiter.ready_async(_item_size(item))
+        task = loop.run_in_executor(pool, _put, store, item)
+        task.add_done_callback(lambda _: workers.release())
+        tasks.append(task)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        if isinstance(items, AsyncIterable):
+            async for item in items:
+                await start(item)
+        else:
+            for item in items:
+                await start(item)
+        return list(await asyncio.gather(*tasks))
+    finally:
+        # Don't block the event loop if it's cancelled while uploads are running
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,64 @@
+import os
+import threading
+from collections.abc import Callable, Hashable, Mapping
+from typing import Any, TypeVar
+
+ClientT = TypeVar("ClientT")
+
+_clients: dict[Hashable, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """
+    Clients hold connections and locks that aren't safe to use across a fork, so each child starts afresh
+    """
+    global _clients_lock  # noqa: PLW0603
+    _clients.clear()
+    _clients_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def client_key(backend: str, credentials: tuple[object, ...], kwargs: Mapping[str, Any]) -> Hashable | None:
+    """
+    Build the registry key for a client, or None if the client can't be shared because a kwarg isn't hashable
+
+    Args:
+        backend: Name of the storage backend, e.g. `s3`
+        credentials: Settings that identify the account and endpoint the client connects to
+        kwargs: Extra keyword arguments the client is built with
+
+    Returns:
+        The key, or None
+    """
+    key = (backend, credentials, tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def shared_client(key: Hashable | None, factory: Callable[[], ClientT]) -> ClientT:
+    """
+    Return the process-wide client for `key`, creating it with `factory` on first use, so stores for
+    different buckets with the same credentials share one client and its connection pool.
+    A `key` of None always creates a new client.
+
+    Args:
+        key: Identifies the credentials and options the client is built with, from `client_key`
+        factory: Creates the client
+
+    Returns:
+        The shared client
+    """
+    if key is None:
+        return factory()
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = factory()
+        return client  # type: ignore[no-any-return]
@@ -0,0 +1,506 @@
+import io
+import os
+import shutil
+import struct
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from types import TracebackType
+from typing import TYPE_CHECKING, BinaryIO, Self
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from i_dot_ai_utilities.file_store.write_stream import DEFAULT_PART_SIZE, ObjectWriteStream
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+    from i_dot_ai_utilities.file_store.remote_file import RemoteFile
+
+ENCRYPTION_MAGIC = b"IAIENC01"
+# Plaintext bytes per chunk; each chunk is encrypted separately, so a ranged read decrypts only the chunks it covers
+DEFAULT_CHUNK_SIZE = 64 * 1024
+TAG_SIZE = 16
+_DATA_KEY_SIZE = 32
+_NONCE_SIZE = 12
+
+# Magic, header length, chunk size and the nonce prefix, followed by the key ID and wrapped data key
+_HEADER = struct.Struct(">8sII8s")
+_LENGTH = struct.Struct(">H")
+# Chunk number and whether it's the last chunk, authenticated with each chunk so chunks can't be
+# reordered and the object can't be truncated at a chunk boundary
+_CHUNK_AAD = struct.Struct(">QB")
+_CHUNK_NONCE = struct.Struct(">I")
+
+
+class KeyWrapper(ABC):
+    """
+    Encrypts (wraps) the random data key of each object with a key encryption key, e.g. a local key or a KMS key.
+    Wrapped keys are stored in the object's header with the ID of the key that wrapped them, so keys can be
+    rotated while objects wrapped with older keys stay readable.
+    """
+
+    key_id: str
+
+    @abstractmethod
+    def wrap(self, data_key: bytes) -> bytes:
+        """
+        Args:
+            data_key: The data key to wrap
+
+        Returns:
+            The wrapped key, stored in the object's header
+        """
+
+    @abstractmethod
+    def unwrap(self, wrapped_key: bytes, key_id: str) -> bytes:
+        """
+        Args:
+            wrapped_key: A key returned by `wrap`
+            key_id: The `key_id` of the wrapper that wrapped it
+
+        Returns:
+            The data key
+        """
+
+
+class LocalKeyWrapper(KeyWrapper):
+    """
+    Wraps data keys with AES-256-GCM under a key held by the application
+
+    :param key: The 32-byte key encryption key
+    :param key_id: ID stored with each wrapped key, so the key can be found again after rotation
+    :param previous_keys: Older keys by ID, to unwrap keys wrapped before a rotation
+    """
+
+    def __init__(self, key: bytes, key_id: str = "local", previous_keys: Mapping[str, bytes] | None = None):
+        if len(key) != _DATA_KEY_SIZE:
+            message = "Key encryption keys must be 32 bytes"
+            raise ValueError(message)
+        self.key_id = key_id
+        self._keys = {**(previous_keys or {}), key_id: key}
+
+    def wrap(self, data_key: bytes) -> bytes:
+        nonce = os.urandom(_NONCE_SIZE)
+        return nonce + AESGCM(self._keys[self.key_id]).encrypt(nonce, data_key, self.key_id.encode("utf-8"))
+
+    def unwrap(self, wrapped_key: bytes, key_id: str) -> bytes:
+        key = self._keys.get(key_id)
+        if key is None:
+            message = f"Unknown key encryption key {key_id!r}"
+            raise ValueError(message)
+        nonce, ciphertext = wrapped_key[:_NONCE_SIZE], wrapped_key[_NONCE_SIZE:]
+        return AESGCM(key).decrypt(nonce, ciphertext, key_id.encode("utf-8"))
+
+
+def _chunk_nonce(prefix: bytes, index: int) -> bytes:
+    return prefix + _CHUNK_NONCE.pack(index)
+
+
+def _header(chunk_size: int, nonce_prefix: bytes, key_id: str, wrapped_key: bytes) -> bytes:
+    """
+    The header written at the start of an encrypted object
+    :param chunk_size: Plaintext bytes per chunk
+    :param nonce_prefix: Random nonce prefix; chunk nonces are the prefix followed by the chunk number
+    :param key_id: The ID of the key that wrapped the data key
+    :param wrapped_key: The wrapped data key
+    :return: The header
+    """
+    key_id_bytes = key_id.encode("utf-8")
+    variable = _LENGTH.pack(len(key_id_bytes)) + key_id_bytes + _LENGTH.pack(len(wrapped_key)) + wrapped_key
+    return _HEADER.pack(ENCRYPTION_MAGIC, _HEADER.size + len(variable), chunk_size, nonce_prefix) + variable
+
+
+class EncryptingWriter(io.BufferedIOBase):
+    """
+    Writable stream that encrypts data a chunk at a time and writes the chunks to an `ObjectWriteStream`, so
+    neither the plaintext nor the ciphertext of the whole object is held in memory.
+
+    Like `ObjectWriteStream`, the object is committed on `close` and nothing is written if a `with` block raises.
+    Failed uploads raise `OSError`.
+
+    :param stream: The stream the encrypted object is written to
+    :param key_wrapper: Wraps the object's data key
+    :param chunk_size: Plaintext bytes per chunk
+    """
+
+    def __init__(self, stream: ObjectWriteStream, key_wrapper: KeyWrapper, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__()
+        if chunk_size < 1:
+            message = "chunk_size must be positive"
+            raise ValueError(message)
+        self.stream = stream
+        self.chunk_size = chunk_size
+        data_key = AESGCM.generate_key(bit_length=256)
+        self._cipher = AESGCM(data_key)
+        self._nonce_prefix = os.urandom(_NONCE_SIZE - _CHUNK_NONCE.size)
+        self._header = _header(chunk_size, self._nonce_prefix, key_wrapper.key_id, key_wrapper.wrap(data_key))
+        self._buffer = bytearray()
+        self._chunks = 0
+        self._size = 0
+        self.stream.write(self._header)
+
+    @property
+    def name(self) -> str:
+        return self.stream.key
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._size
+
+    def write(self, data: bytes | bytearray | memoryview) -> int:  # type: ignore[override]
+        if self.closed:
+            message = "write to closed file"
+            raise ValueError(message)
+        view = memoryview(data).cast("B")
+        self._buffer += view
+        self._size += len(view)
+        while len(self._buffer) > self.chunk_size:
+            self.__write_chunk(bytes(self._buffer[: self.chunk_size]), final=False)
+            del self._buffer[: self.chunk_size]
+        return len(view)
+
+    def __write_chunk(self, plaintext: bytes, *, final: bool) -> None:
+        """
+        Encrypt a chunk and write it to the stream
+        :param plaintext: The chunk's plaintext
+        :param final: Whether it's the last chunk
+        """
+        aad = self._header + _CHUNK_AAD.pack(self._chunks, final)
+        self.stream.write(self._cipher.encrypt(_chunk_nonce(self._nonce_prefix, self._chunks), plaintext, aad))
+        self._chunks += 1
+
+    def close(self) -> None:
+        """
+        Write the last chunk, which may be empty, and commit the object
+        """
+        if self.closed:
+            return
+        try:
+            self.__write_chunk(bytes(self._buffer), final=True)
+            self._buffer.clear()
+            self.stream.close()
+        finally:
+            super().close()
+
+    def abort(self) -> None:
+        """
+        Discard the object without committing it
+        """
+        if self.closed:
+            return
+        self.stream.abort()
+        self._buffer.clear()
+        super().close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class DecryptingFile(io.RawIOBase):
+    """
+    Read-only, seekable file over an encrypted object. Only the chunks covering each read are fetched, through
+    a `RemoteFile`, and decrypted, so ranged reads and libraries that seek around a file work as they do on
+    plain objects. Tampered, truncated or reordered chunks raise `OSError`.
+
+    :param remote: The encrypted object
+    :param key_wrapper: Unwraps the object's data key
+    """
+
+    def __init__(self, remote: "RemoteFile", key_wrapper: KeyWrapper):
+        super().__init__()
+        self.remote = remote
+        prefix = remote.read(_HEADER.size)
+        if len(prefix) < _HEADER.size:
+            self.__fail("is not encrypted")
+        magic, header_length, self.chunk_size, self._nonce_prefix = _HEADER.unpack(prefix)
+        if magic != ENCRYPTION_MAGIC or header_length < _HEADER.size or self.chunk_size < 1:
+            self.__fail("is not encrypted")
+        self._header = prefix + remote.read(header_length - _HEADER.size)
+        if len(self._header) != header_length:
+            self.__fail("is truncated")
+        self._cipher = AESGCM(self.__data_key(key_wrapper))
+        body = remote.size - header_length
+        stored_chunk = self.chunk_size + TAG_SIZE
+        self._chunk_count = -(-body // stored_chunk)
+        if self._chunk_count < 1:
+            self.__fail("is truncated")
+        self.size = body - self._chunk_count * TAG_SIZE
+        self._position = 0
+        self._chunk: tuple[int, bytes] | None = None
+
+    def __fail(self, reason: str) -> None:
+        message = f"Object {self.remote.key} {reason}"
+        raise OSError(message)
+
+    def __data_key(self, key_wrapper: KeyWrapper) -> bytes:
+        """
+        Read the key ID and wrapped data key from the header and unwrap the data key
+        :param key_wrapper: The key wrapper
+        :return: The data key
+        """
+        offset = _HEADER.size
+        try:
+            (key_id_length,) = _LENGTH.unpack_from(self._header, offset)
+            key_id = self._header[offset + _LENGTH.size : offset + _LENGTH.size + key_id_length].decode("utf-8")
+            offset += _LENGTH.size + key_id_length
+            (wrapped_length,) = _LENGTH.unpack_from(self._header, offset)
+        except (struct.error, UnicodeDecodeError) as e:
+            message = f"Object {self.remote.key} has a corrupt header"
+            raise OSError(message) from e
+        wrapped_key = self._header[offset + _LENGTH.size : offset + _LENGTH.size + wrapped_length]
+        try:
+            return key_wrapper.unwrap(wrapped_key, key_id)
+        except (InvalidTag, ValueError) as e:
+            message = f"Failed to unwrap the data key of {self.remote.key}"
+            raise OSError(message) from e
+
+    @property
+    def name(self) -> str:
+        return self.remote.key
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = self.size + offset
+        else:
+            message = f"Invalid whence: {whence}"
+            raise ValueError(message)
+        if position < 0:
+            message = f"Negative seek position {position}"
+            raise ValueError(message)
+        self._position = position
+        return position
+
+    def __read_chunk(self, index: int) -> bytes:
+        """
+        Fetch and decrypt a chunk, keeping the last one decrypted for reads within it
+        :param index: The chunk number
+        :return: The chunk's plaintext
+        """
+        if self._chunk is not None and self._chunk[0] == index:
+            return self._chunk[1]
+        stored_chunk = self.chunk_size + TAG_SIZE
+        final = index == self._chunk_count - 1
+        self.remote.seek(len(self._header) + index * stored_chunk)
+        ciphertext = self.remote.read(stored_chunk)
+        aad = self._header + _CHUNK_AAD.pack(index, final)
+        try:
+            plaintext = self._cipher.decrypt(_chunk_nonce(self._nonce_prefix, index), ciphertext, aad)
+        except InvalidTag as e:
+            message = f"Failed to decrypt chunk {index} of {self.remote.key}"
+            raise OSError(message) from e
+        self._chunk = (index, plaintext)
+        return plaintext
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        if self.closed:
+            message = "I/O operation on closed file"
+            raise ValueError(message)
+        view = memoryview(buffer).cast("B")
+        end = min(self.size, self._position + len(view))
+        written = 0
+        while self._position < end:
+            index, offset = divmod(self._position, self.chunk_size)
+            chunk = self.__read_chunk(index)[offset : offset + end - self._position]
+            view[written : written + len(chunk)] = chunk
+            written += len(chunk)
+            self._position += len(chunk)
+        return written
+
+    def readall(self) -> bytes:
+        return self.read(max(0, self.size - self._position)) or b""
+
+    def close(self) -> None:
+        self.remote.close()
+        self._chunk = None
+        super().close()
+
+
+class EncryptedFileStore:
+    """
+    Client-side envelope encryption over a `FileStore`. Each object gets a random AES-256 data key, wrapped by
+    `key_wrapper` and stored in the object's header, and its content is encrypted with AES-GCM in chunks of
+    `chunk_size` bytes. Uploads encrypt a chunk at a time into a multipart upload, and reads fetch and decrypt
+    only the chunks they need, so neither direction holds a whole object in memory, and ranged reads stay cheap.
+
+    Objects are only readable through an `EncryptedFileStore`; everything else, e.g. listing, copying and
+    deleting, is done on the underlying store.
+
+    :param store: The store holding the encrypted objects
+    :param key_wrapper: Wraps and unwraps data keys
+    :param chunk_size: Plaintext bytes per chunk, a trade-off between the 16 bytes each chunk adds and the
+        bytes fetched to read a small range
+    """
+
+    def __init__(self, store: "FileStore", key_wrapper: KeyWrapper, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.store = store
+        self.key_wrapper = key_wrapper
+        self.chunk_size = chunk_size
+
+    def open_write_stream(
+        self,
+        key: str,
+        part_size: int = DEFAULT_PART_SIZE,
+        metadata: dict[str, str] | None = None,
+        content_type: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> EncryptingWriter:
+        """
+        Open a writable stream that encrypts data as it's written and uploads it in parts.
+        See `FileStore.open_write_stream`.
+
+        Args:
+            key: Object key (path)
+            part_size: Bytes buffered before each part is uploaded
+            metadata: Optional metadata dictionary, which is not encrypted
+            content_type: Optional content type of the plaintext
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            EncryptingWriter: The stream, which raises `OSError` if the upload fails
+        """
+        stream = self.store.open_write_stream(key, part_size, metadata, content_type, bucket=bucket)
+        return EncryptingWriter(stream, self.key_wrapper, self.chunk_size)
+
+    def put_object(
+        self,
+        key: str,
+        data: str | bytes | BinaryIO,
+        metadata: dict[str, str] | None = None,
+        content_type: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> bool:
+        """
+        Encrypt and upload an object, streaming file-like objects a chunk at a time
+
+        Args:
+            key: Object key (path)
+            data: Data to upload (string, bytes, or file-like object)
+            metadata: Optional metadata dictionary, which is not encrypted
+            content_type: Optional content type of the plaintext
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self.open_write_stream(key, metadata=metadata, content_type=content_type, bucket=bucket) as writer:
+                if isinstance(data, str | bytes):
+                    writer.write(data.encode("utf-8") if isinstance(data, str) else data)
+                else:
+                    shutil.copyfileobj(data, writer, self.chunk_size)
+        except OSError:
+            self.store.logger.exception("Failed to upload encrypted object {key}", key=key)
+            return False
+        return True
+
+    def open(self, key: str, *, bucket: str | None = None) -> DecryptingFile:
+        """
+        Open an encrypted object as a seekable, read-only binary file that decrypts the chunks it reads
+
+        Args:
+            key: Object key (path)
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            DecryptingFile: The file, which raises `OSError` if a read or decryption fails
+        """
+        remote = self.store.open(key, block_size=self.chunk_size + TAG_SIZE, bucket=bucket)
+        try:
+            return DecryptingFile(remote, self.key_wrapper)
+        except OSError:
+            remote.close()
+            raise
+
+    def read_object(
+        self, key: str, as_text: bool = False, encoding: str = "utf-8", *, bucket: str | None = None
+    ) -> bytes | str | None:
+        """
+        Download and decrypt an object
+
+        Args:
+            key: Object key (path)
+            as_text: If True, return as string, otherwise as bytes
+            encoding: Text encoding if as_text is True
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            Object content as bytes or string, None if not found or it couldn't be decrypted
+        """
+        try:
+            with self.open(key, bucket=bucket) as file:
+                content = file.readall()
+        except OSError:
+            self.store.logger.exception("Failed to read encrypted object {key}", key=key)
+            return None
+        return content.decode(encoding) if as_text else content
+
+    def read_range(self, key: str, start: int, length: int | None = None, *, bucket: str | None = None) -> bytes | None:
+        """
+        Read part of an encrypted object, fetching and decrypting only the chunks that cover it
+
+        Args:
+            key: Object key (path)
+            start: Offset of the first plaintext byte, or minus the number of bytes to read from the end
+            length: Number of bytes to read, or None to read to the end; must be None if `start` is negative
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            The bytes in the range, None if not found or it couldn't be decrypted
+        """
+        try:
+            with self.open(key, bucket=bucket) as file:
+                # Like an HTTP suffix range, a suffix longer than the object reads all of it
+                file.seek(max(0, file.size + start) if start < 0 else start)
+                content = file.read(length if length is not None else -1)
+        except (OSError, ValueError):
+            self.store.logger.exception("Failed to read range of encrypted object {key}", key=key)
+            return None
+        return content or b""
+
+    def download_fileobj(self, key: str, fileobj: BinaryIO, *, bucket: str | None = None) -> bool:
+        """
+        Download and decrypt an object into a writable file-like object, a chunk at a time
+
+        Args:
+            key: Object key (path)
+            fileobj: Writable binary file-like object
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self.open(key, bucket=bucket) as file:
+                shutil.copyfileobj(file, fileobj, self.chunk_size)
+        except OSError:
+            self.store.logger.exception("Failed to download encrypted object {key}", key=key)
+            return False
+        return True
@@ -0,0 +1,211 @@
+import hashlib
+import math
+import threading
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from i_dot_ai_utilities.file_store.types.existence_index_stats import ExistenceIndexStats
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+# Keys the filter is sized for beyond those listed, so writes after a refresh don't raise the false positive rate
+_HEADROOM = 2
+_MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    """
+    Set membership with no false negatives and a bounded rate of false positives, in about 10 bits per key
+    at a 1% false positive rate
+
+    :param capacity: Number of keys the filter is sized for
+    :param false_positive_rate: False positive rate once `capacity` keys have been added
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE):
+        if not 0 < false_positive_rate < 1:
+            message = "false_positive_rate must be between 0 and 1"
+            raise ValueError(message)
+        capacity = max(capacity, 1)
+        self.bits = max(64, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.count = 0
+        self._array = bytearray(-(-self.bits // 8))
+
+    def __positions(self, key: str) -> list[int]:
+        """
+        The bits for a key, from two halves of one hash combined as `h1 + i * h2` (Kirsch-Mitzenmacher)
+        :param key: The key
+        :return: The bit positions
+        """
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return [(first + index * second) % self.bits for index in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self.__positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self.__positions(key))
+
+    @property
+    def expected_false_positive_rate(self) -> float:
+        """
+        The false positive rate expected with the number of keys added so far
+        """
+        return float((1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes)
+
+
+class ExistenceIndex:
+    """
+    Answers `object_exists` for keys under a prefix without a request when a key definitely doesn't exist,
+    for workloads such as deduplication where most keys checked are new. A Bloom filter of the prefix's keys
+    is built from a listing by `refresh`; keys it rules out are reported missing straight away, and only
+    keys it might hold are checked with the backend.
+
+    The index is a write listener on its store, so objects written under the prefix through the store, with
+    `put_object` and the methods built on it, `copy_object` or `open_write_stream` (including packs and
+    encrypted writes), are added as they're written. Objects written by another process aren't seen until the
+    next `refresh`; record them with `add` if they need to be seen sooner. Deleted keys stay in the filter
+    and are checked with the backend, so they're still answered correctly.
+
+    :param store: The store the prefix is in
+    :param prefix: Prefix of the keys to index
+    :param capacity: Number of keys to size the filter for, or None for twice the number listed
+    :param false_positive_rate: Rate of missing keys checked with the backend once the filter is full
+    """
+
+    def __init__(
+        self,
+        store: "FileStore",
+        prefix: str = "",
+        *,
+        capacity: int | None = None,
+        false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+    ):
+        self.store = store
+        self.prefix = prefix
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.refreshed_at: str | None = None
+        self._filter: BloomFilter | None = None
+        # Keys written while a refresh is listing, which the listing may have missed
+        self._written_during_refresh: list[str] | None = None
+        self._negatives = 0
+        self._probable_positives = 0
+        self._false_positives = 0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """
+        Rebuild the filter from a listing of the prefix. Lookups carry on against the previous filter,
+        or the backend if there isn't one, until the new one is ready. Listing errors are raised.
+
+        Returns:
+            The number of keys listed
+        """
+        with self._lock:
+            self._written_during_refresh = []
+        try:
+            keys = [
+                self.store.relative_key(str(obj["key"])) for obj in self.store.iter_objects(self.prefix, strict=True)
+            ]
+            bloom = BloomFilter(
+                self.capacity or max(len(keys) * _HEADROOM, _MIN_CAPACITY),
+                self.false_positive_rate,
+            )
+            for key in keys:
+                bloom.add(key)
+            with self._lock:
+                for key in self._written_during_refresh:
+                    bloom.add(key)
+                self._filter = bloom
+                self.refreshed_at = datetime.now(timezone.utc).isoformat()
+        finally:
+            with self._lock:
+                self._written_during_refresh = None
+        return len(keys)
+
+    def add(self, key: str) -> None:
+        """
+        Record that an object exists, e.g. one written without going through the store's methods
+
+        Args:
+            key: Object key (path)
+        """
+        if not key.startswith(self.prefix):
+            return
+        with self._lock:
+            # Rewrites aren't added again, so they don't count towards the filter's capacity
+            if self._filter is not None and key not in self._filter:
+                self._filter.add(key)
+            if self._written_during_refresh is not None:
+                self._written_during_refresh.append(key)
+
+    def might_exist(self, key: str) -> bool:
+        """
+        Whether an object might exist, without a request: False means it definitely doesn't
+
+        Args:
+            key: Object key (path)
+
+        Returns:
+            bool: False if the key is under the prefix and not in the filter, True otherwise
+        """
+        with self._lock:
+            return self._filter is None or not key.startswith(self.prefix) or key in self._filter
+
+    def object_exists(self, key: str) -> bool:
+        """
+        Check if an object exists, with a request to the backend only if the filter might hold its key
+
+        Args:
+            key: Object key (path)
+
+        Returns:
+            bool: True if object exists, False otherwise
+        """
+        if not self.might_exist(key):
+            with self._lock:
+                self._negatives += 1
+            return False
+        exists = self.store.object_exists(key)
+        if self._filter is not None and key.startswith(self.prefix):
+            with self._lock:
+                self._probable_positives += 1
+                self._false_positives += not exists
+        return exists
+
+    def stats(self) -> ExistenceIndexStats:
+        """
+        Returns:
+            ExistenceIndexStats: The filter's size, lookup counts and expected and observed false positive rates
+        """
+        with self._lock:
+            bloom = self._filter
+            missing = self._negatives + self._false_positives
+            return ExistenceIndexStats(
+                prefix=self.prefix,
+                keys=bloom.count if bloom else 0,
+                bits=bloom.bits if bloom else 0,
+                hashes=bloom.hashes if bloom else 0,
+                lookups=self._negatives + self._probable_positives,
+                negatives=self._negatives,
+                probable_positives=self._probable_positives,
+                false_positives=self._false_positives,
+                expected_false_positive_rate=bloom.expected_false_positive_rate if bloom else 0.0,
+                false_positive_rate=self._false_positives / missing if missing else 0.0,
+                refreshed_at=self.refreshed_at,
+            )
+
+    def close(self) -> None:
+        """
+        Stop following the store's writes
+        """
+        self.store.remove_write_listener(self.add)
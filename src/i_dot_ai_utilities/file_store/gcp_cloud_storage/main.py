@@ -1,17 +1,186 @@
+import contextlib
+import itertools
 import json
 import os
+import threading
+import uuid
+from collections.abc import Callable, Iterator, Sequence
 from datetime import timedelta
+from functools import partial
 from typing import Any, BinaryIO
 
+from google.api_core.exceptions import PreconditionFailed, RequestRangeNotSatisfiable
+from google.auth.exceptions import GoogleAuthError
 from google.cloud import storage
 from google.cloud.exceptions import GoogleCloudError, NotFound
+from requests import Response
 from typing_extensions import Unpack
 
+from i_dot_ai_utilities.file_store import instrumentation, prefetch, ranges, sharding, transfers
+from i_dot_ai_utilities.file_store.clients import client_key, shared_client
+from i_dot_ai_utilities.file_store.lifecycle import with_expiry
 from i_dot_ai_utilities.file_store.main import FileStore
+from i_dot_ai_utilities.file_store.rate_limiter import rate_limiter_from_settings
 from i_dot_ai_utilities.file_store.settings import Settings
+from i_dot_ai_utilities.file_store.success_log import success_logger_from_settings
 from i_dot_ai_utilities.file_store.types.kwargs_dicts import GCPClientKwargs
+from i_dot_ai_utilities.file_store.write_stream import MultipartUpload
 from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
 
+# Cloud Storage composes at most 32 objects in one request
+_MAX_COMPOSE_SOURCES = 32
+# Directory under the data directory holding the parts of uploads in progress, which listings leave out
+_UPLOAD_PARTS_DIR = ".file-store-uploads"
+_DELETE_WORKERS = 8
+# Statuses the client library retries by default
+_RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class _ComposeUpload(MultipartUpload):
+    """
+    A Cloud Storage upload in parts, for `open_write_stream` and parallel `put_object` uploads. Each part is
+    uploaded as a temporary object under `parts_prefix`, outside the store's key space, and the parts are composed
+    into the destination in order on completion. Parts can be uploaded concurrently and in any order. Every 32 parts
+    are composed into an intermediate object, so uploads can have any number of parts.
+    """
+
+    def __init__(
+        self,
+        store: "GCPFileStore",
+        bucket: storage.Bucket,
+        key: str,
+        metadata: dict[str, str] | None,
+        content_type: str | None,
+        *,
+        parts_prefix: str,
+        throttle: Callable[[bytes | None], None],
+        log_success: Callable[..., None],
+    ):
+        self.store = store
+        self.bucket = bucket
+        self.key = key
+        self.metadata = metadata
+        self.content_type = content_type
+        self.throttle = throttle
+        self.log_success = log_success
+        self.part_prefix = f"{parts_prefix}{uuid.uuid4().hex}/"
+        self.components: dict[int, storage.Blob] = {}
+        self.parts = 0
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def upload_part(self, part_number: int, data: bytes) -> bool:
+        self.throttle(data)
+        try:
+            blob = self.bucket.blob(f"{self.part_prefix}{part_number:08d}")
+            blob.upload_from_string(data)
+        except GoogleCloudError:
+            self.store.logger.exception(
+                "Failed to upload part {part_number} of {key}", part_number=part_number, key=self.key
+            )
+            return False
+        with self._lock:
+            self.components[part_number] = blob
+            self.parts += 1
+            self.size += len(data)
+        return True
+
+    def __compose(self, destination: storage.Blob, sources: list[storage.Blob]) -> storage.Blob:
+        """
+        Compose blobs into `destination` and delete them
+        :param destination: The blob to compose into
+        :param sources: Up to 32 blobs, in order
+        :return: The destination
+        """
+        self.throttle(None)
+        destination.compose(sources)
+        self.throttle(None)
+        self.bucket.delete_blobs(sources, on_error=lambda _: None)
+        return destination
+
+    def complete(self) -> bool:
+        destination = self.bucket.blob(self.key)
+        if self.metadata:
+            destination.metadata = self.metadata
+        if self.content_type:
+            destination.content_type = self.content_type
+        sources = [blob for _, blob in sorted(self.components.items())]
+        try:
+            level = 0
+            while len(sources) > _MAX_COMPOSE_SOURCES:
+                sources = [
+                    self.__compose(
+                        self.bucket.blob(f"{self.part_prefix}composed-{level}-{start:08d}"),
+                        sources[start : start + _MAX_COMPOSE_SOURCES],
+                    )
+                    for start in range(0, len(sources), _MAX_COMPOSE_SOURCES)
+                ]
+                level += 1
+            self.__compose(destination, sources)
+        except GoogleCloudError:
+            self.store.logger.exception("Failed to complete upload of {key}", key=self.key)
+            return False
+        self.components = {}
+        self.log_success(
+            "open_write_stream",
+            "Successfully uploaded object: {key} to bucket: {bucket} in {parts} parts",
+            self.size,
+            key=self.key,
+            bucket=self.bucket.name,
+            parts=self.parts,
+        )
+        return True
+
+    def abort(self) -> None:
+        components, self.components = list(self.components.values()), {}
+        try:
+            self.throttle(None)
+            self.bucket.delete_blobs(components, on_error=lambda _: None)
+        except GoogleCloudError:
+            self.store.logger.exception("Failed to delete the parts of upload of {key}", key=self.key)
+
+
+def _blocks(data: str | bytes | BinaryIO, block_size: int) -> Iterator[bytes]:
+    """
+    Split an upload payload into blocks, reading file-like objects a block at a time
+    :param data: The payload
+    :param block_size: Bytes per block
+    :return: The blocks, in order
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if isinstance(data, bytes):
+        for start in range(0, len(data), block_size):
+            yield data[start : start + block_size]
+        return
+    while block := data.read(block_size):
+        yield block
+
+
+def _count_retry(response: Response, *_: Any, **__: Any) -> Response:
+    """
+    HTTP session hook counting a retry against the operations running on this thread for each response the client
+    library retries by default. This is approximate: it misses retried connection errors, and also counts
+    responses to requests that aren't retried, such as unconditional writes or those out of attempts.
+    :param response: The response to one attempt at a request
+    :return: The response, unchanged
+    """
+    if response.status_code in _RETRYABLE_STATUS_CODES:
+        instrumentation.record_retry()
+    return response
+
+
+def _with_retry_count(client: storage.Client) -> storage.Client:
+    """
+    Count the retries of a client's requests
+    :param client: The client
+    :return: The client, with `_count_retry` on its HTTP session
+    """
+    hooks = getattr(client._http, "hooks", {}).get("response")  # noqa: SLF001
+    if hooks is not None and _count_retry not in hooks:
+        hooks.append(_count_retry)
+    return client
+
 
 class GCPFileStore(FileStore):
     """
@@ -42,16 +211,247 @@ class GCPFileStore(FileStore):
         """
         self.logger = logger
         self.settings = settings
-        self.client: storage.Client = self.__init_gcp_client(**kwargs)
-        self.bucket = self.client.bucket(self.settings.bucket_name)
+        self.__client_kwargs = kwargs
+        self._ensure_clients()
+        self.rate_limiter = rate_limiter_from_settings("gcp", settings)
+        self.success_log = success_logger_from_settings(logger, settings)
+
+    def _create_clients(self) -> None:
+        credentials = (self.settings.environment.lower() in ["local", "test"],)
+        self.__client = shared_client(
+            client_key("gcp", credentials, self.__client_kwargs) if self.settings.share_clients else None,
+            lambda: _with_retry_count(self.__init_gcp_client(**self.__client_kwargs)),
+        )
+        self.__bucket = self.__client.bucket(self.settings.bucket_name)
+
+    @property
+    def client(self) -> storage.Client:
+        """
+        The Cloud Storage client for the current process, rebuilt after a fork.
+        The client's HTTP session is shared by every thread in a process.
+        """
+        self._ensure_clients()
+        return self.__client
+
+    @property
+    def bucket(self) -> storage.Bucket:
+        self._ensure_clients()
+        return self.__bucket
+
+    def _ping(self) -> bool:
+        try:
+            self.bucket.exists()
+        except GoogleCloudError:
+            return True
+        except (GoogleAuthError, OSError):
+            self.logger.exception("Failed to reach bucket {bucket}", bucket=self.settings.bucket_name)
+            return False
+        return True
+
+    def __bucket_for(self, bucket: str | None) -> storage.Bucket:
+        """
+        Returns the bucket to use for an operation
+        :param bucket: The bucket name, or None for the configured bucket
+        :return: The bucket
+        """
+        return self.bucket if bucket is None else self.client.bucket(bucket)
 
     def __prefix_key(self, key: str) -> str:
         """
-        Returns the key with a prefix if it's set
+        Returns the key with the data directory and shard prefixes, if they're set
         :param key: The Cloud Storage object key
         :return: The key with a prefix if it's set
         """
-        return key if not self.settings.data_dir else f"{self.settings.data_dir}/{key}"
+        return sharding.physical_key(key, self.settings.data_dir, self.settings.shard_count)
+
+    @staticmethod
+    def __object_info(blob: storage.Blob) -> dict[str, str | int]:
+        """
+        Returns the listing information for a blob
+        :param blob: A blob from a `list_blobs` response
+        :return: Dictionary containing object information
+        """
+        return {
+            "key": blob.name,
+            "size": blob.size or 0,
+            "last_modified": blob.time_created.isoformat() if blob.time_created else "",
+            "etag": blob.etag or "",
+        }
+
+    @staticmethod
+    def __upload_preconditions(
+        bucket: storage.Bucket, key: str, if_match_etag: str | None, if_none_match: bool
+    ) -> dict[str, Any] | None:
+        """
+        Returns the generation precondition for an upload.
+        Generations (as returned by `read_object_with_etag`) are used as-is, while ETags cost a metadata request,
+        made on a blob of its own so the metadata and content type being uploaded aren't replaced by the reload.
+        :param bucket: The bucket being written to
+        :param key: The key of the object being written
+        :param if_match_etag: A generation number or ETag the object must currently have
+        :param if_none_match: Whether the object must not exist
+        :return: Upload keyword arguments, or None if the object no longer has the given ETag
+        """
+        if if_none_match:
+            return {"if_generation_match": 0}
+        if not if_match_etag:
+            return {}
+        if if_match_etag.isdigit():
+            return {"if_generation_match": int(if_match_etag)}
+        current = bucket.blob(key)
+        try:
+            current.reload()
+        except NotFound:
+            return None
+        return {"if_generation_match": current.generation} if current.etag == if_match_etag else None
+
+    def __upload_blob(
+        self,
+        blob: storage.Blob,
+        data: str | bytes | BinaryIO,
+        size: int | None,
+        *,
+        metadata: dict[str, str] | None,
+        content_type: str | None,
+        **upload_kwargs: Any,
+    ) -> None:
+        """
+        Upload an object in a single request, or as a resumable upload in chunks if it's large or of unknown size
+        :param blob: The blob to write
+        :param data: Data to upload
+        :param size: The size of the data in bytes, or None if it isn't known
+        :param metadata: Optional metadata dictionary
+        :param content_type: Optional content type
+        :param upload_kwargs: Preconditions for the upload
+        """
+        if metadata:
+            blob.metadata = metadata
+        if content_type:
+            blob.content_type = content_type
+        if size is None or size > transfers.SINGLE_REQUEST_SIZE:
+            blob.chunk_size = transfers.block_size_for(size, self.settings.transfer_block_size)
+        if isinstance(data, str | bytes):
+            blob.upload_from_string(data, **upload_kwargs)
+        else:
+            blob.upload_from_file(data, **upload_kwargs)
+
+    def __upload_in_parts(
+        self,
+        bucket: storage.Bucket,
+        key: str,
+        data: str | bytes | BinaryIO,
+        *,
+        size: int,
+        metadata: dict[str, str] | None,
+        content_type: str | None,
+        max_concurrency: int | None,
+    ) -> bool:
+        """
+        Upload an object as temporary parts sent in parallel, then compose them into the object, since resumable
+        uploads can only send their chunks in order. Only `max_concurrency` parts are held in memory at once.
+        :param bucket: The bucket
+        :param key: The prefixed object key
+        :param data: Data to upload
+        :param size: The size of the data in bytes
+        :param metadata: Optional metadata dictionary
+        :param content_type: Optional content type
+        :param max_concurrency: Limit for this call, instead of the store's `transfer_max_concurrency`
+        :return: True if successful, False otherwise
+        """
+        block_size = transfers.block_size_for(size, self.settings.transfer_block_size)
+        upload = _ComposeUpload(
+            self,
+            bucket,
+            key,
+            metadata,
+            content_type,
+            parts_prefix=self.__upload_parts_prefix(),
+            throttle=partial(self._throttle, key=key),
+            log_success=lambda *_, **__: None,
+        )
+        parts = prefetch.prefetch_map(
+            enumerate(_blocks(data, block_size), 1),
+            lambda part: upload.upload_part(*part),
+            depth=self._transfer_concurrency(size, max_concurrency),
+        )
+        with contextlib.closing(parts):
+            uploaded = all(uploaded for _, uploaded in parts)
+        if uploaded and upload.complete():
+            return True
+        upload.abort()
+        return False
+
+    def __download(
+        self, blob: storage.Blob, write: Callable[[bytes], object], max_concurrency: int | None = None
+    ) -> int:
+        """
+        Download a blob in blocks. The first block is fetched on its own, so small objects take one request;
+        the rest of a larger object is fetched `max_concurrency` blocks at a time and written in order. Every
+        block must come from the generation of the first, so a concurrent overwrite fails the download rather
+        than mixing versions.
+        :param blob: The blob
+        :param write: Called with each block, in order
+        :param max_concurrency: Limit for this call, instead of the store's `transfer_max_concurrency`
+        :return: The number of bytes downloaded
+        """
+        first_block = transfers.block_size_for(None, self.settings.transfer_block_size)
+        try:
+            data = blob.download_as_bytes(start=0, end=first_block - 1)
+        except RequestRangeNotSatisfiable:
+            return 0
+        write(data)
+        # Objects stored gzip-encoded are decompressed on download, which ignores the range
+        if len(data) < first_block or blob.content_encoding == "gzip":
+            return len(data)
+
+        generation = blob.generation
+        self._throttle(key=blob.name)
+        blob.reload(if_generation_match=generation)
+        size = blob.size or 0
+        block_size = transfers.block_size_for(size, self.settings.transfer_block_size)
+        concurrency = self._transfer_concurrency(size, max_concurrency)
+
+        def fetch(start: int) -> bytes:
+            self._throttle(key=blob.name)
+            block: bytes = blob.bucket.blob(blob.name).download_as_bytes(
+                start=start, end=min(start + block_size, size) - 1, if_generation_match=generation
+            )
+            return block
+
+        starts = range(first_block, size, block_size)
+        with instrumentation.OperationThreadPoolExecutor(max_workers=concurrency) as pool:
+            # A window of blocks at a time, so at most `concurrency` blocks are held in memory
+            for offset in range(0, len(starts), concurrency):
+                for block in pool.map(fetch, starts[offset : offset + concurrency]):
+                    write(block)
+        return size
+
+    def __upload_parts_prefix(self) -> str:
+        """
+        Returns the prefix in the bucket the parts of `open_write_stream` uploads are written under
+        :return: The prefix, inside the data directory but not inside any key or shard
+        """
+        return sharding.physical_key(f"{_UPLOAD_PARTS_DIR}/", self.settings.data_dir, 0)
+
+    def _start_multipart_upload(
+        self,
+        key: str,
+        metadata: dict[str, str] | None = None,
+        content_type: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> MultipartUpload | None:
+        key = self.__prefix_key(key)
+        return _ComposeUpload(
+            self,
+            self.__bucket_for(bucket),
+            key,
+            metadata,
+            content_type,
+            parts_prefix=self.__upload_parts_prefix(),
+            throttle=partial(self._throttle, key=key),
+            log_success=self._log_success,
+        )
 
     def get_client(self) -> storage.Client:
         return self.client
@@ -62,64 +462,112 @@ class GCPFileStore(FileStore):
         data: str | bytes | BinaryIO,
         metadata: dict[str, str] | None = None,
         content_type: str | None = None,
+        *,
+        if_match_etag: str | None = None,
+        if_none_match: bool = False,
+        bucket: str | None = None,
+        ttl: timedelta | None = None,
+        max_concurrency: int | None = None,
     ) -> bool:
         """
-        Create/upload an object to Cloud Storage.
+        Create/upload an object to Cloud Storage. Objects over 8 MiB are uploaded as parts in parallel and
+        composed into the object, unless a precondition is given. Conditional uploads over 8 MiB, and file-like
+        objects of unknown size, are sent as a resumable upload in chunks, in order.
 
         Args:
             key: Cloud Storage object key (path)
             data: Data to upload (string, bytes, or file-like object)
             metadata: Optional metadata dictionary
             content_type: Optional content type
+            if_match_etag: Only write if the object's current generation (as returned by `read_object_with_etag`)
+                or ETag matches this value
+            if_none_match: Only write if the object doesn't already exist
+            bucket: Bucket to use instead of the configured one
+            ttl: Delete the object this long after it's written, when `sweep_expired` next runs
+            max_concurrency: Largest number of parts uploaded at once, instead of `transfer_max_concurrency`
 
         Returns:
-            bool: True if successful, False otherwise
+            bool: True if successful, False otherwise (including when a precondition isn't met)
         """
-        bucket_name = self.settings.bucket_name
+        metadata = with_expiry(metadata, ttl)
+        size = self._payload_size(data) or None
+        bucket_name = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        num_bytes = self._success_payload_size(data)
+        self._throttle(data, key=key)
         try:
-            blob = self.bucket.blob(key)
-
-            if metadata:
-                blob.metadata = metadata
-
-            if content_type:
-                blob.content_type = content_type
+            target_bucket = self.__bucket_for(bucket)
+            upload_kwargs = self.__upload_preconditions(target_bucket, key, if_match_etag, if_none_match)
+            if upload_kwargs is None:
+                self.logger.warning("Precondition failed uploading object {key}", key=key)
+                return False
 
-            if isinstance(data, str):
-                blob.upload_from_string(data)
-            elif hasattr(data, "read"):
-                blob.upload_from_file(data)
+            if upload_kwargs == {} and size is not None and size > transfers.SINGLE_REQUEST_SIZE:
+                uploaded = self.__upload_in_parts(
+                    target_bucket,
+                    key,
+                    data,
+                    size=size,
+                    metadata=metadata,
+                    content_type=content_type,
+                    max_concurrency=max_concurrency,
+                )
+                if not uploaded:
+                    return False
             else:
-                blob.upload_from_string(data)
+                blob = target_bucket.blob(key)
+                self.__upload_blob(blob, data, size, metadata=metadata, content_type=content_type, **upload_kwargs)
 
-            self.logger.info("Successfully uploaded object: {key} to bucket: {bucket}", key=key, bucket=bucket_name)
+            self._log_success(
+                "put_object",
+                "Successfully uploaded object: {key} to bucket: {bucket}",
+                num_bytes,
+                key=key,
+                bucket=bucket_name,
+            )
+        except PreconditionFailed:
+            self.logger.warning("Precondition failed uploading object {key}", key=key)
+            return False
         except GoogleCloudError:
             self.logger.exception("Failed to upload object {key}", key=key)
             return False
         else:
             return True
 
-    def read_object(self, key: str, as_text: bool = False, encoding: str = "utf-8") -> bytes | str | None:
+    def read_object(
+        self,
+        key: str,
+        as_text: bool = False,
+        encoding: str = "utf-8",
+        *,
+        bucket: str | None = None,
+        max_concurrency: int | None = None,
+    ) -> bytes | str | None:
         """
-        Read/download an object from Cloud Storage.
+        Read/download an object from Cloud Storage. Objects larger than one block are fetched in parallel blocks.
 
         Args:
             key: Cloud Storage object key (path)
             as_text: If True, return as string, otherwise as bytes
             encoding: Text encoding if as_text is True
+            bucket: Bucket to use instead of the configured one
+            max_concurrency: Largest number of blocks downloaded at once, instead of `transfer_max_concurrency`
 
         Returns:
             Object content as bytes or string, None if not found
         """
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            blob = self.bucket.blob(key)
+            blob = self.__bucket_for(bucket).blob(key)
+            blocks: list[bytes] = []
+            self.__download(blob, blocks.append, max_concurrency)
+            content_bytes = b"".join(blocks)
+            self._record_transfer(len(content_bytes), key=key)
             if as_text:
-                content: str = blob.download_as_text(encoding=encoding)
+                content: str = content_bytes.decode(encoding)
                 return content
             else:
-                content_bytes: bytes = blob.download_as_bytes()
                 return content_bytes
         except NotFound:
             self.logger.warning("Object not found: {key}", key=key)
@@ -128,12 +576,93 @@ class GCPFileStore(FileStore):
             self.logger.exception("Failed to read object {key}", key=key)
             return None
 
+    def read_object_with_etag(self, key: str, *, bucket: str | None = None) -> tuple[bytes, str] | None:
+        """
+        Read/download an object from Cloud Storage along with its generation, for use with `if_match_etag`
+
+        Args:
+            key: Cloud Storage object key (path)
+            bucket: Bucket to use instead of the configured one
+
+        Returns:
+            Tuple of object content and generation, None if not found
+        """
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            blob = self.__bucket_for(bucket).blob(key)
+            content: bytes = blob.download_as_bytes()
+            self._record_transfer(len(content), key=key)
+        except NotFound:
+            self.logger.warning("Object not found: {key}", key=key)
+            return None
+        except GoogleCloudError:
+            self.logger.exception("Failed to read object {key}", key=key)
+            return None
+        else:
+            return content, str(blob.generation)
+
+    def read_range(
+        self,
+        key: str,
+        start: int,
+        length: int | None = None,
+        *,
+        bucket: str | None = None,
+        if_match_etag: str | None = None,
+    ) -> bytes | None:
+        """
+        Read part of an object from Cloud Storage with a ranged download, without downloading the rest of it.
+
+        Args:
+            key: Cloud Storage object key (path)
+            start: Offset of the first byte, or minus the number of bytes to read from the end of the object
+            length: Number of bytes to read, or None to read to the end; must be None if `start` is negative
+            bucket: Bucket to use instead of the configured one
+            if_match_etag: Only read if the object's current generation or ETag matches this value
+
+        Returns:
+            The bytes in the range, which are fewer than `length` if the range runs past the end of the object,
+            None if not found or it has changed
+        """
+        ranges.check_range(start, length)
+        if length == 0:
+            return b""
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            blob = self.__bucket_for(bucket).blob(key)
+            # Generations are returned by `read_object_with_etag` and ETags by `get_object_metadata`
+            conditions: dict[str, Any] = {}
+            if if_match_etag and if_match_etag.isdigit():
+                conditions["if_generation_match"] = int(if_match_etag)
+            elif if_match_etag:
+                conditions["if_etag_match"] = if_match_etag
+            content: bytes = blob.download_as_bytes(start=start, end=ranges.last_byte(start, length), **conditions)
+            self._record_transfer(len(content), key=key)
+        except RequestRangeNotSatisfiable:
+            return b""
+        except NotFound:
+            self.logger.warning("Object not found: {key}", key=key)
+            return None
+        except PreconditionFailed:
+            self.logger.warning("Object {key} has changed", key=key)
+            return None
+        except GoogleCloudError:
+            self.logger.exception("Failed to read range of object {key}", key=key)
+            return None
+        else:
+            return content
+
     def update_object(
         self,
         key: str,
         data: str | bytes | BinaryIO,
         metadata: dict[str, str] | None = None,
         content_type: str | None = None,
+        *,
+        if_match_etag: str | None = None,
+        bucket: str | None = None,
     ) -> bool:
         """
         Update an existing object in Cloud Storage (same as create_object)
@@ -143,28 +672,37 @@ class GCPFileStore(FileStore):
             data: New data to upload
             metadata: Optional metadata dictionary
             content_type: Optional content type
+            if_match_etag: Only write if the object's current generation or ETag matches this value
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
         """
-        return self.put_object(key, data, metadata, content_type)
+        return self.put_object(key, data, metadata, content_type, if_match_etag=if_match_etag, bucket=bucket)
 
-    def delete_object(self, key: str) -> bool:
+    def delete_object(self, key: str, *, bucket: str | None = None) -> bool:
         """
         Delete an object from Cloud Storage.
 
         Args:
             key: Cloud Storage object key (path)
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
         """
-        bucket_name = self.settings.bucket_name
+        bucket_name = bucket or self.settings.bucket_name
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            blob = self.bucket.blob(key)
+            blob = self.__bucket_for(bucket).blob(key)
             blob.delete()
-            self.logger.info("Successfully deleted object: {key} from bucket: {bucket}", key=key, bucket=bucket_name)
+            self._log_success(
+                "delete_object",
+                "Successfully deleted object: {key} from bucket: {bucket}",
+                key=key,
+                bucket=bucket_name,
+            )
         except NotFound:
             self.logger.warning("Object not found for deletion: {key}", key=key)
             return False
@@ -174,19 +712,56 @@ class GCPFileStore(FileStore):
         else:
             return True
 
-    def object_exists(self, key: str) -> bool:
+    def delete_objects(self, keys: Sequence[str], *, bucket: str | None = None) -> list[str]:
+        """
+        Delete objects from Cloud Storage. Cloud Storage has no multi-object delete, so objects are deleted
+        one per request, several at once. Keys that don't exist count as deleted.
+
+        Args:
+            keys: Cloud Storage object keys (paths)
+            bucket: Bucket to use instead of the configured one
+
+        Returns:
+            list[str]: The keys that couldn't be deleted, empty if every object was
+        """
+        target = self.__bucket_for(bucket)
+
+        def delete(key: str) -> bool:
+            self._throttle()
+            try:
+                target.blob(self.__prefix_key(key)).delete()
+            except NotFound:
+                return True
+            except GoogleCloudError:
+                self.logger.exception("Failed to delete object {key}", key=key)
+                return False
+            return True
+
+        with instrumentation.OperationThreadPoolExecutor(max_workers=_DELETE_WORKERS) as pool:
+            failed = [key for key, deleted in zip(keys, pool.map(delete, keys), strict=True) if not deleted]
+        self._log_success(
+            "delete_objects",
+            "Successfully deleted {count} objects from bucket: {bucket}",
+            count=len(keys) - len(failed),
+            bucket=target.name,
+        )
+        return failed
+
+    def object_exists(self, key: str, *, bucket: str | None = None) -> bool:
         """
         Check if an object exists in Cloud Storage
 
         Args:
             key: Cloud Storage object key (path)
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             bool: True if object exists, False otherwise
         """
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            blob = self.bucket.blob(key)
+            blob = self.__bucket_for(bucket).blob(key)
             blob_exists: bool = blob.exists()
         except GoogleCloudError:
             self.logger.exception("Error checking object {key} existence", key=key)
@@ -194,26 +769,57 @@ class GCPFileStore(FileStore):
         else:
             return blob_exists
 
-    def download_object_url(self, key: str, expiration: int = 3600) -> str | None:
+    def download_fileobj(
+        self, key: str, fileobj: BinaryIO, *, bucket: str | None = None, max_concurrency: int | None = None
+    ) -> bool:
+        """
+        Download an object from Cloud Storage into a writable file-like object, without holding it in memory.
+        Objects larger than one block are fetched in parallel blocks.
+
+        Args:
+            key: Cloud Storage object key (path)
+            fileobj: Writable binary file-like object
+            bucket: Bucket to use instead of the configured one
+            max_concurrency: Largest number of blocks downloaded at once, instead of `transfer_max_concurrency`
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        key = self.__prefix_key(key)
+        self._throttle(key=key)
+        try:
+            blob = self.__bucket_for(bucket).blob(key)
+            self._record_transfer(self.__download(blob, fileobj.write, max_concurrency), key=key)
+        except NotFound:
+            self.logger.warning("Object not found: {key}", key=key)
+            return False
+        except GoogleCloudError:
+            self.logger.exception("Failed to download object {key}", key=key)
+            return False
+        else:
+            return True
+
+    def download_object_url(self, key: str, expiration: int = 3600, *, bucket: str | None = None) -> str | None:
         """
         Get an objects pre-signed URL
 
         Args:
             key: Cloud Storage object key (path)
             expiration: Expiration time in seconds
+            bucket: Bucket to use instead of the configured one
         Returns:
             str: Cloud Storage object pre-signed URL as string. If error, returns None
         """
         try:
-            if not self.object_exists(key):
+            if not self.object_exists(key, bucket=bucket):
                 return None
 
-            blob = self.bucket.blob(self.__prefix_key(key))
+            blob = self.__bucket_for(bucket).blob(self.__prefix_key(key))
 
             if self.settings.environment.lower() in ["local", "test"]:
                 # For testing, return a simple URL since signed URLs don't work without proper creds
                 base_url = os.getenv("STORAGE_EMULATOR_HOST", "http://localhost:9023")
-                return f"{base_url}/{self.settings.bucket_name}/{self.__prefix_key(key)}"
+                return f"{base_url}/{bucket or self.settings.bucket_name}/{self.__prefix_key(key)}"
 
             url = blob.generate_signed_url(expiration=timedelta(seconds=expiration), method="GET")
             return str(url)
@@ -221,52 +827,126 @@ class GCPFileStore(FileStore):
             self.logger.exception("Error generating signed URL for {key}", key=self.__prefix_key(key))
             return None
 
-    def list_objects(self, prefix: str = "", max_keys: int = 1000) -> list[dict[str, str | int]]:
+    def list_objects(
+        self, prefix: str = "", max_keys: int = 1000, *, bucket: str | None = None
+    ) -> list[dict[str, str | int]]:
         """
         List objects in Cloud Storage bucket with optional prefix filter
 
         Args:
             prefix: Optional prefix to filter objects
             max_keys: Maximum number of objects to return
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             List of dictionaries containing object information
         """
+        if self.settings.shard_count:
+            return list(itertools.islice(self.iter_objects(prefix, max_keys, bucket=bucket), max_keys))
         prefix = self.__prefix_key(prefix)
         objects = []
+        self._throttle(key=prefix)
         try:
-            blobs = self.client.list_blobs(self.bucket, prefix=prefix, max_results=max_keys)
-            for blob in blobs:
-                objects.append(
-                    {
-                        "key": blob.name,
-                        "size": blob.size or 0,
-                        "last_modified": blob.time_created.isoformat() if blob.time_created else "",
-                        "etag": blob.etag or "",
-                    }
-                )
+            parts_prefix = self.__upload_parts_prefix()
+            blobs = self.client.list_blobs(self.__bucket_for(bucket), prefix=prefix, page_size=max_keys)
+            for blob in itertools.islice((blob for blob in blobs if not blob.name.startswith(parts_prefix)), max_keys):
+                objects.append(self.__object_info(blob))
         except GoogleCloudError:
             self.logger.exception("Failed to list objects with prefix {prefix}", prefix=prefix)
             return []
         else:
             return objects
 
+    def iter_objects(
+        self,
+        prefix: str = "",
+        page_size: int = 1000,
+        strict: bool = False,
+        start_after: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> Iterator[dict[str, str | int]]:
+        """
+        Iterate over every object in Cloud Storage bucket with optional prefix filter,
+        fetching pages as they are consumed
+
+        Args:
+            prefix: Optional prefix to filter objects
+            page_size: Number of objects to fetch per request
+            strict: If True, raise errors instead of logging them and ending the iteration early,
+                for callers that need to know the listing is complete
+            start_after: Only return objects with keys after this one, e.g. the last key seen by a previous listing
+            bucket: Bucket to use instead of the configured one
+
+        Returns:
+            Iterator of dictionaries containing object information
+        """
+        if self.settings.shard_count:
+            return sharding.merge_shards(
+                lambda shard_prefix, shard_start_after: self.__iter_listing(
+                    shard_prefix, page_size, strict, shard_start_after, bucket=bucket
+                ),
+                prefix,
+                start_after,
+                self.settings.data_dir,
+                self.settings.shard_count,
+            )
+        return self.__iter_listing(
+            self.__prefix_key(prefix),
+            page_size,
+            strict,
+            self.__prefix_key(start_after) if start_after else None,
+            bucket=bucket,
+        )
+
+    def __iter_listing(
+        self, prefix: str, page_size: int, strict: bool, start_after: str | None, *, bucket: str | None
+    ) -> Iterator[dict[str, str | int]]:
+        """
+        Iterate over the objects under a prefix in the bucket, as `iter_objects` does
+        :param prefix: The prefix in the bucket, including the data directory and shard
+        :param start_after: Only return objects with keys in the bucket after this one
+        :return: Iterator of dictionaries containing object information
+        """
+        parts_prefix = self.__upload_parts_prefix()
+        try:
+            # start_offset is inclusive, so the start key itself is skipped below
+            pages = self.client.list_blobs(
+                self.__bucket_for(bucket), prefix=prefix, page_size=page_size, start_offset=start_after
+            ).pages
+            while True:
+                self._throttle(key=prefix)
+                page = next(pages, None)
+                if page is None:
+                    return
+                for blob in page:
+                    if blob.name != start_after and not blob.name.startswith(parts_prefix):
+                        yield self.__object_info(blob)
+        except GoogleCloudError:
+            if strict:
+                raise
+            self.logger.exception("Failed to list objects with prefix {prefix}", prefix=prefix)
+
     def get_object_metadata(
         self,
         key: str,
+        *,
+        bucket: str | None = None,
     ) -> dict[str, str | int | dict[str, Any]] | None:
         """
         Get metadata for a Cloud Storage object
 
         Args:
             key: Cloud Storage object key (path)
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             Dictionary containing object metadata or None if not found
         """
         key = self.__prefix_key(key)
+        self._throttle(key=key)
         try:
-            blob = self.bucket.blob(key)
+            blob = self.__bucket_for(bucket).blob(key)
             blob.reload()
 
             return {
@@ -288,38 +968,52 @@ class GCPFileStore(FileStore):
         self,
         source_key: str,
         dest_key: str,
+        *,
+        source_bucket: str | None = None,
+        dest_bucket: str | None = None,
+        size: int | None = None,  # noqa: ARG002
     ) -> bool:
         """
-        Copy an object within Cloud Storage
+        Copy an object within Cloud Storage, or between buckets.
+        The copy is done server-side, except against the emulator used in local and test environments
 
         Args:
             source_key: Source Cloud Storage object key
             dest_key: Destination Cloud Storage object key
+            source_bucket: Bucket to copy from instead of the configured one
+            dest_bucket: Bucket to copy to instead of the configured one
+            size: The source object's size in bytes, if known; not needed by Cloud Storage
 
         Returns:
             bool: True if successful, False otherwise
         """
         source_key = self.__prefix_key(source_key)
         dest_key = self.__prefix_key(dest_key)
+        self._throttle(key=dest_key)
         try:
-            # Workaround for gcsemulator not supporting copyTo operation
-            # Read the source object and write it as destination
-            source_blob = self.bucket.blob(source_key)
+            source = self.__bucket_for(source_bucket)
+            destination = self.__bucket_for(dest_bucket)
+            source_blob = source.blob(source_key)
             if not source_blob.exists():
                 self.logger.warning("Source object not found: {source_key}", source_key=source_key)
                 return False
 
-            source_data = source_blob.download_as_bytes()
-            source_metadata = source_blob.metadata or {}
-            source_content_type = source_blob.content_type
+            if self.settings.environment.lower() in ["local", "test"]:
+                # Workaround for gcsemulator not supporting copyTo operation
+                # Read the source object and write it as destination
+                source_data = source_blob.download_as_bytes()
+                source_metadata = source_blob.metadata or {}
+                source_content_type = source_blob.content_type
 
-            dest_blob = self.bucket.blob(dest_key)
-            if source_metadata:
-                dest_blob.metadata = source_metadata
-            if source_content_type:
-                dest_blob.content_type = source_content_type
+                dest_blob = destination.blob(dest_key)
+                if source_metadata:
+                    dest_blob.metadata = source_metadata
+                if source_content_type:
+                    dest_blob.content_type = source_content_type
 
-            dest_blob.upload_from_string(source_data)
+                dest_blob.upload_from_string(source_data)
+            else:
+                source.copy_blob(source_blob, destination, dest_key)
 
         except GoogleCloudError:
             self.logger.exception(
@@ -329,7 +1023,12 @@ class GCPFileStore(FileStore):
             )
             return False
         else:
-            self.logger.info("Successfully copied {source_key} to {dest_key}", source_key=source_key, dest_key=dest_key)
+            self._log_success(
+                "copy_object",
+                "Successfully copied {source_key} to {dest_key}",
+                source_key=source_key,
+                dest_key=dest_key,
+            )
             return True
 
     def upload_json(
@@ -337,6 +1036,8 @@ class GCPFileStore(FileStore):
         key: str,
         data: dict | list,
         metadata: dict[str, str] | None = None,
+        *,
+        bucket: str | None = None,
     ) -> bool:
         """
         Upload JSON data to Cloud Storage
@@ -345,6 +1046,7 @@ class GCPFileStore(FileStore):
             key: Cloud Storage object key (path)
             data: Dictionary or list to serialize as JSON
             metadata: Optional metadata dictionary
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             bool: True if successful, False otherwise
@@ -356,6 +1058,7 @@ class GCPFileStore(FileStore):
                 data=json_data,
                 metadata=metadata,
                 content_type="application/json",
+                bucket=bucket,
             )
         except (TypeError, ValueError):
             self.logger.exception("Failed to serialize data as JSON")
@@ -364,17 +1067,20 @@ class GCPFileStore(FileStore):
     def download_json(
         self,
         key: str,
+        *,
+        bucket: str | None = None,
     ) -> dict | list | None:
         """
         Download and parse JSON data from Cloud Storage
 
         Args:
             key: Cloud Storage object key (path)
+            bucket: Bucket to use instead of the configured one
 
         Returns:
             Parsed JSON data (dict or list) or None if not found/invalid
         """
-        content = self.read_object(key, as_text=True)
+        content = self.read_object(key, as_text=True, bucket=bucket)
         if content is None:
             return None
 
@@ -391,6 +1097,7 @@ class GCPFileStore(FileStore):
         Returns:
             A list of dicts containing the name and creation time for each bucket
         """
+        self._throttle()
         try:
             buckets = self.client.list_buckets()
             return [{"Name": bucket.name, "CreationTime": bucket.time_created} for bucket in buckets]
@@ -407,6 +1114,7 @@ class GCPFileStore(FileStore):
         """
         if name is None:
             name = self.settings.bucket_name
+        self._throttle()
         try:
             bucket = self.client.bucket(name)
             bucket.create()
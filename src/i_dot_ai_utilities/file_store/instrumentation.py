@@ -0,0 +1,364 @@
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, TypeVar, cast
+
+from i_dot_ai_utilities.file_store.types.operation_event import OperationEvent, OperationOutcome
+from i_dot_ai_utilities.metrics.interfaces import MetricsWriter
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+MethodT = TypeVar("MethodT", bound=Callable[..., Any])
+ResultT = TypeVar("ResultT")
+
+INSTRUMENTED_OPERATIONS = frozenset(
+    {
+        "read_object",
+        "read_object_with_etag",
+        "read_range",
+        "read_ranges",
+        "put_object",
+        "update_object",
+        "delete_object",
+        "delete_objects",
+        "object_exists",
+        "download_fileobj",
+        "download_object_url",
+        "list_objects",
+        "get_object_metadata",
+        "copy_object",
+        "upload_json",
+        "download_json",
+        "list_buckets",
+        "create_bucket",
+        "compare_and_swap_json",
+        "extract_archive",
+    }
+)
+# Operations that return False or None as a normal answer rather than to signal a logged error
+_NO_FAILURE_RESULT = frozenset({"object_exists", "create_bucket"})
+
+DEFAULT_DURATION_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class FileStoreHook(ABC):
+    """
+    Receives an `OperationEvent` after every instrumented `FileStore` operation.
+    Hooks are called on the thread that ran the operation, so they should be quick and thread-safe.
+    """
+
+    @abstractmethod
+    def on_operation(self, event: OperationEvent) -> None:
+        pass
+
+
+class _Operation:
+    __slots__ = ("bytes_in", "bytes_out", "lock", "name", "requests", "retries", "store")
+
+    def __init__(self, store: "FileStore", name: str):
+        self.store = store
+        self.name = name
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.requests = 0
+        self.retries = 0
+        # Worker threads of one operation (parallel parts, ranged reads) record into it at the same time
+        self.lock = threading.Lock()
+
+
+# The operations running in the current context, outermost first. Worker threads get them through `carry`.
+_active: contextvars.ContextVar[tuple[_Operation, ...]] = contextvars.ContextVar("file_store_operations", default=())
+
+
+def _record(*, requests: int = 0, retries: int = 0, bytes_in: int = 0, bytes_out: int = 0) -> None:
+    for operation in _active.get():
+        with operation.lock:
+            operation.requests += requests
+            operation.retries += retries
+            operation.bytes_in += bytes_in
+            operation.bytes_out += bytes_out
+
+
+def record_request(bytes_out: int = 0) -> None:
+    """
+    Count a backend request, and the bytes it uploads, against every operation running in this context
+    :param bytes_out: Number of bytes the request uploads
+    """
+    _record(requests=1, bytes_out=bytes_out)
+
+
+def record_bytes_in(num_bytes: int) -> None:
+    """
+    Count downloaded bytes against every operation running in this context
+    :param num_bytes: Number of bytes downloaded
+    """
+    _record(bytes_in=num_bytes)
+
+
+def record_retry(count: int = 1) -> None:
+    """
+    Count retries against every operation running in this context
+    :param count: Number of retries
+    """
+    _record(retries=count)
+
+
+def carry(function: Callable[..., ResultT]) -> Callable[..., ResultT]:
+    """
+    Wrap a function so requests and bytes it records on another thread (a worker of a parallel transfer, or an
+    SDK callback) count towards the operations running where it was wrapped
+    :param function: The function to wrap, on the thread running the operation
+    :return: The wrapped function
+    """
+    operations = _active.get()
+    if not operations:
+        return function
+
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> ResultT:
+        token = _active.set(operations)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _active.reset(token)
+
+    return wrapper
+
+
+class OperationThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Thread pool whose tasks count towards the operations running where they're submitted, for the worker
+    pools of parallel transfers
+    """
+
+    def submit(self, fn: Callable[..., ResultT], /, *args: Any, **kwargs: Any) -> Future[ResultT]:
+        return super().submit(carry(fn), *args, **kwargs)
+
+
+def _operation_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> str | None:
+    if args and isinstance(args[0], str):
+        return args[0]
+    key = kwargs.get("key", kwargs.get("source_key", kwargs.get("prefix")))
+    return key if isinstance(key, str) else None
+
+
+def _operation_dest_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> str | None:
+    key = args[1] if len(args) > 1 else kwargs.get("dest_key")
+    return key if isinstance(key, str) else None
+
+
+def _outcome(name: str, result: object) -> OperationOutcome:
+    if name not in _NO_FAILURE_RESULT and (result is None or result is False):
+        return "failure"
+    return "success"
+
+
+def _emit(operation: _Operation, event: OperationEvent) -> None:
+    for hook in operation.store.hooks:
+        try:
+            hook.on_operation(event)
+        except Exception:
+            operation.store.logger.exception("Instrumentation hook failed for {operation}", operation=operation.name)
+
+
+def _run(operation: _Operation, method: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]) -> object:
+    token = _active.set((*_active.get(), operation))
+    outcome: OperationOutcome = "error"
+    error: str | None = None
+    start = time.perf_counter()
+    try:
+        result = method(operation.store, *args, **kwargs)
+        outcome = _outcome(operation.name, result)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _active.reset(token)
+        event = OperationEvent(
+            operation=operation.name,
+            key=_operation_key(args, kwargs),
+            duration_seconds=duration,
+            bytes_in=operation.bytes_in,
+            bytes_out=operation.bytes_out,
+            requests=operation.requests,
+            retries=operation.retries,
+            outcome=outcome,
+            error=error,
+        )
+        if operation.name == "copy_object":
+            event["dest_key"] = _operation_dest_key(args, kwargs)
+        _emit(operation, event)
+    return result
+
+
+def instrumented(name: str, method: MethodT) -> MethodT:
+    """
+    Wrap a `FileStore` method so it reports an `OperationEvent` to the store's hooks.
+    With no hooks registered the wrapper adds a single attribute check to the call.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "FileStore", *args: Any, **kwargs: Any) -> Any:
+        if not self.hooks:
+            return method(self, *args, **kwargs)
+        stack = _active.get()
+        if stack and stack[-1].store is self and stack[-1].name == name:
+            # An override calling super() is one operation, not two
+            return method(self, *args, **kwargs)
+        return _run(_Operation(self, name), method, args, kwargs)
+
+    wrapper.__file_store_instrumented__ = True  # type: ignore[attr-defined]
+    return cast("MethodT", wrapper)
+
+
+def instrument_class(cls: type) -> None:
+    """
+    Wrap every instrumented operation defined directly on `cls`
+    """
+    for name in INSTRUMENTED_OPERATIONS:
+        method = cls.__dict__.get(name)
+        if (
+            callable(method)
+            and not getattr(method, "__isabstractmethod__", False)
+            and not getattr(method, "__file_store_instrumented__", False)
+        ):
+            setattr(cls, name, instrumented(name, method))
+
+
+class MetricsWriterHook(FileStoreHook):
+    """
+    Writes the duration, bytes transferred and retries of each operation to a `MetricsWriter`,
+    e.g. `CloudwatchEmbeddedMetricsWriter`, with the operation name and outcome as dimensions.
+
+    :param writer: The metrics writer to emit to
+    :param metric_prefix: Prefix of the metric names
+    :param operations: Only emit metrics for these operations, or every operation if None
+    """
+
+    def __init__(
+        self, writer: MetricsWriter, metric_prefix: str = "file_store", operations: Sequence[str] | None = None
+    ):
+        self.writer = writer
+        self.metric_prefix = metric_prefix
+        self.operations = frozenset(operations) if operations is not None else None
+
+    def on_operation(self, event: OperationEvent) -> None:
+        if self.operations is not None and event["operation"] not in self.operations:
+            return
+        dimensions = {"operation": event["operation"], "outcome": event["outcome"]}
+        # The writer rejects zero values, so counters that didn't move are left out
+        values = {
+            "duration_ms": event["duration_seconds"] * 1000,
+            "bytes_in": event["bytes_in"],
+            "bytes_out": event["bytes_out"],
+            "retries": event["retries"],
+        }
+        metrics = {f"{self.metric_prefix}_{name}": value for name, value in values.items() if value}
+        if metrics:
+            # One call per operation, which `CloudwatchEmbeddedMetricsWriter` writes as a single EMF document
+            self.writer.put_metrics(metrics, dimensions)
+
+
+class _OperationStats:
+    __slots__ = ("bucket_counts", "bytes_in", "bytes_out", "count", "outcomes", "requests", "retries", "total_seconds")
+
+    def __init__(self, num_buckets: int):
+        self.bucket_counts = [0] * num_buckets
+        self.outcomes: Counter[str] = Counter()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.requests = 0
+        self.retries = 0
+
+
+class HistogramHook(FileStoreHook):
+    """
+    Keeps an in-memory duration histogram and transfer totals per operation, for benchmarks, tests
+    and exposing on a debug endpoint. Percentiles are estimated as the upper bound of the bucket they fall in.
+
+    :param buckets: Upper bounds of the duration buckets in seconds, in ascending order;
+        durations above the last bound are counted in an overflow bucket
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._stats: dict[str, _OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def on_operation(self, event: OperationEvent) -> None:
+        index = bisect.bisect_left(self.buckets, event["duration_seconds"])
+        with self._lock:
+            stats = self._stats.get(event["operation"])
+            if stats is None:
+                stats = self._stats[event["operation"]] = _OperationStats(len(self.buckets) + 1)
+            stats.bucket_counts[index] += 1
+            stats.outcomes[event["outcome"]] += 1
+            stats.count += 1
+            stats.total_seconds += event["duration_seconds"]
+            stats.bytes_in += event["bytes_in"]
+            stats.bytes_out += event["bytes_out"]
+            stats.requests += event["requests"]
+            stats.retries += event["retries"]
+
+    def _percentile(self, stats: _OperationStats, quantile: float) -> float:
+        target = quantile * stats.count
+        seen = 0
+        for bound, count in zip((*self.buckets, float("inf")), stats.bucket_counts, strict=True):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns:
+            For each operation seen: count, outcomes, mean and estimated p50/p90/p99 duration in seconds,
+            bytes in and out, requests, retries and the raw bucket counts
+        """
+        with self._lock:
+            return {
+                name: {
+                    "count": stats.count,
+                    "outcomes": dict(stats.outcomes),
+                    "mean_seconds": stats.total_seconds / stats.count,
+                    "p50_seconds": self._percentile(stats, 0.5),
+                    "p90_seconds": self._percentile(stats, 0.9),
+                    "p99_seconds": self._percentile(stats, 0.99),
+                    "bytes_in": stats.bytes_in,
+                    "bytes_out": stats.bytes_out,
+                    "requests": stats.requests,
+                    "retries": stats.retries,
+                    "buckets": dict(zip((*self.buckets, float("inf")), stats.bucket_counts, strict=True)),
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
@@ -0,0 +1,280 @@
+import sqlite3
+import threading
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from i_dot_ai_utilities.file_store.types.object_change import ObjectChange, ObjectChangeType
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    etag TEXT NOT NULL,
+    last_modified TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS inventory_state (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _prefix_end(prefix: str) -> str | None:
+    """
+    Returns the smallest string greater than every string starting with `prefix`,
+    so prefix queries can use the primary key index as a range scan
+    """
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _deleted(key: str) -> ObjectChange:
+    return ObjectChange(type=ObjectChangeType.DELETED, key=key, size=0, etag="", last_modified="")
+
+
+def _row_to_object(row: tuple[str, int, str, str]) -> dict[str, str | int]:
+    return {"key": row[0], "size": row[1], "etag": row[2], "last_modified": row[3]}
+
+
+class ObjectInventory:
+    """
+    Sorted index of the objects under a prefix, kept in SQLite so listing, range and pagination
+    queries are answered locally instead of by the backend.
+
+    The index is brought up to date with `refresh` (or `poll`, which also yields each change), which lists
+    the prefix once and merges it against the stored index in key order, writing only what changed.
+    Keys are stored relative to the data directory, i.e. as they are passed to the other `FileStore` methods.
+
+    :param store: The file store to index
+    :param prefix: Prefix of the objects to index
+    :param path: Path of the SQLite database, or `:memory:` to keep the index in memory
+    """
+
+    def __init__(self, store: "FileStore", prefix: str = "", path: str | Path = ":memory:"):
+        self.store = store
+        self.prefix = prefix
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(_SCHEMA)
+            stored_prefix = self._get_state("prefix")
+            if stored_prefix is None:
+                self._set_state("prefix", prefix)
+        if stored_prefix not in (None, prefix):
+            self._connection.close()
+            message = f"Inventory at {path} was built for prefix {stored_prefix!r}, not {prefix!r}"
+            raise ValueError(message)
+
+    def _get_state(self, name: str) -> str | None:
+        row = self._connection.execute("SELECT value FROM inventory_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, name: str, value: str) -> None:
+        self._connection.execute(
+            "INSERT INTO inventory_state (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, value),
+        )
+
+    @property
+    def refreshed_at(self) -> str | None:
+        """ISO timestamp of the last completed refresh, or None if the index has never been built"""
+        with self._lock:
+            return self._get_state("refreshed_at")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _stored_objects(self) -> Iterator[tuple[str, str]]:
+        """Yields stored `(key, etag)` pairs in key order, a page at a time so writes can interleave"""
+        last_key = ""
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT key, etag FROM objects WHERE key > ? ORDER BY key LIMIT ?", (last_key, _BATCH_SIZE)
+                ).fetchall()
+            yield from rows
+            if len(rows) < _BATCH_SIZE:
+                return
+            last_key = rows[-1][0]
+
+    def _listed_objects(self) -> Iterator[dict[str, str | int]]:
+        for obj in self.store.iter_objects(self.prefix, strict=True):
+            yield {**obj, "key": self.store.relative_key(str(obj["key"]))}
+
+    def _diff(self) -> Iterator[ObjectChange]:
+        """Merges the current listing with the stored index, both in key order, yielding the differences"""
+        stored = self._stored_objects()
+        stored_entry = next(stored, None)
+        for obj in self._listed_objects():
+            key, etag = str(obj["key"]), str(obj["etag"])
+            while stored_entry is not None and stored_entry[0] < key:
+                yield _deleted(stored_entry[0])
+                stored_entry = next(stored, None)
+            change_type = None
+            if stored_entry is None or stored_entry[0] != key:
+                change_type = ObjectChangeType.CREATED
+            else:
+                if stored_entry[1] != etag:
+                    change_type = ObjectChangeType.UPDATED
+                stored_entry = next(stored, None)
+            if change_type is not None:
+                yield ObjectChange(
+                    type=change_type, key=key, size=int(obj["size"]), etag=etag, last_modified=str(obj["last_modified"])
+                )
+        while stored_entry is not None:
+            yield _deleted(stored_entry[0])
+            stored_entry = next(stored, None)
+
+    def apply_changes(self, changes: list[ObjectChange]) -> None:
+        """
+        Apply changes to the index, e.g. ones the caller made itself and doesn't want to wait for a refresh to see
+
+        Args:
+            changes: Changes to apply
+        """
+        upserts = [
+            (change["key"], change["size"], change["etag"], change["last_modified"])
+            for change in changes
+            if change["type"] != ObjectChangeType.DELETED
+        ]
+        deletes = [(change["key"],) for change in changes if change["type"] == ObjectChangeType.DELETED]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO objects (key, size, etag, last_modified) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET size = excluded.size, etag = excluded.etag, "
+                "last_modified = excluded.last_modified",
+                upserts,
+            )
+            self._connection.executemany("DELETE FROM objects WHERE key = ?", deletes)
+
+    def poll(self) -> Iterator[ObjectChange]:
+        """
+        List the prefix, update the index and yield each created, updated or deleted object.
+        Changes are written in batches as they are found; if iteration stops early, the changes
+        yielded so far are kept and the rest are picked up by the next poll.
+
+        Returns:
+            Iterator of changes since the last poll or refresh
+        """
+        batch: list[ObjectChange] = []
+        completed = False
+        try:
+            for change in self._diff():
+                batch.append(change)
+                if len(batch) >= _BATCH_SIZE:
+                    self.apply_changes(batch)
+                    batch = []
+                yield change
+            completed = True
+        finally:
+            self.apply_changes(batch)
+            if completed:
+                with self._lock, self._connection:
+                    self._set_state("refreshed_at", datetime.now(timezone.utc).isoformat())
+
+    def refresh(self) -> dict[str, int]:
+        """
+        Bring the index up to date with the backend, writing only what changed
+
+        Returns:
+            Number of objects created, updated and deleted since the last refresh
+        """
+        counts = {change_type.value: 0 for change_type in ObjectChangeType}
+        for change in self.poll():
+            counts[change["type"].value] += 1
+        return counts
+
+    def get(self, key: str) -> dict[str, str | int] | None:
+        """
+        Look up a single object
+
+        Args:
+            key: Object key (path)
+
+        Returns:
+            Dictionary containing object information, or None if it isn't in the index
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT key, size, etag, last_modified FROM objects WHERE key = ?", (key,)
+            ).fetchone()
+        return _row_to_object(row) if row else None
+
+    def list_objects(
+        self, prefix: str = "", start_after: str | None = None, limit: int = 1000
+    ) -> list[dict[str, str | int]]:
+        """
+        List indexed objects in key order, optionally filtered by prefix.
+        Paginate by passing the last key of a page as `start_after` for the next one.
+
+        Args:
+            prefix: Optional prefix to filter objects
+            start_after: Only return keys after this one
+            limit: Maximum number of objects to return
+
+        Returns:
+            List of dictionaries containing object information
+        """
+        return self.range(max(prefix, start_after or ""), _prefix_end(prefix), limit=limit, inclusive=not start_after)
+
+    def range(
+        self, start: str = "", end: str | None = None, limit: int = 1000, inclusive: bool = True
+    ) -> list[dict[str, str | int]]:
+        """
+        List indexed objects with keys from `start` up to but excluding `end`, in key order
+
+        Args:
+            start: First key of the range
+            end: Key the range stops before, or None for no upper bound
+            limit: Maximum number of objects to return
+            inclusive: Whether a key equal to `start` is included
+
+        Returns:
+            List of dictionaries containing object information
+        """
+        query = "SELECT key, size, etag, last_modified FROM objects WHERE key " + (">= ?" if inclusive else "> ?")  # noqa: S608
+        parameters: list[str | int] = [start]
+        if end is not None:
+            query += " AND key < ?"
+            parameters.append(end)
+        query += " ORDER BY key LIMIT ?"
+        parameters.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+        return [_row_to_object(row) for row in rows]
+
+    def count(self, prefix: str = "") -> int:
+        """
+        Args:
+            prefix: Optional prefix to filter objects
+
+        Returns:
+            Number of indexed objects under the prefix
+        """
+        return int(self._aggregate("COUNT(*)", prefix))
+
+    def total_size(self, prefix: str = "") -> int:
+        """
+        Args:
+            prefix: Optional prefix to filter objects
+
+        Returns:
+            Total size in bytes of the indexed objects under the prefix
+        """
+        return int(self._aggregate("COALESCE(SUM(size), 0)", prefix))
+
+    def _aggregate(self, expression: str, prefix: str) -> int:
+        end = _prefix_end(prefix)
+        query = f"SELECT {expression} FROM objects WHERE key >= ?" + (" AND key < ?" if end is not None else "")  # noqa: S608
+        parameters = [prefix] if end is None else [prefix, end]
+        with self._lock:
+            return int(self._connection.execute(query, parameters).fetchone()[0])
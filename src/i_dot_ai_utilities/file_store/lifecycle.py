@@ -0,0 +1,189 @@
+import math
+import threading
+import time
+from collections.abc import Callable, Mapping
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from i_dot_ai_utilities.file_store.prefetch import prefetch_map
+from i_dot_ai_utilities.file_store.types.object_change import ObjectChangeType
+from i_dot_ai_utilities.file_store.types.sweep_result import SweepResult
+from i_dot_ai_utilities.file_store.watch import DEFAULT_FULL_SCAN_EVERY, PrefixWatcher
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+# Letters only: Azure metadata names must be identifiers, so can't contain hyphens, and HTTP servers and proxies
+# commonly drop headers containing underscores
+EXPIRES_AT_METADATA_KEY = "iaiexpiresat"
+DEFAULT_SWEEP_INTERVAL = 300.0
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_METADATA_WORKERS = 8
+
+
+def with_expiry(
+    metadata: dict[str, str] | None, ttl: timedelta | None, now: float | None = None
+) -> dict[str, str] | None:
+    """
+    Add the expiry time for a TTL to an object's metadata
+
+    Args:
+        metadata: The object's metadata, if any
+        ttl: How long the object should live for, or None for no expiry
+        now: The current Unix time; defaults to the system clock
+
+    Returns:
+        The metadata, including the expiry time if `ttl` is set
+    """
+    if ttl is None:
+        return metadata
+    expires_at = (time.time() if now is None else now) + ttl.total_seconds()
+    return {**(metadata or {}), EXPIRES_AT_METADATA_KEY: str(math.ceil(expires_at))}
+
+
+def expiry_from_metadata(metadata: Mapping[str, str] | None) -> float | None:
+    """
+    Args:
+        metadata: An object's metadata
+
+    Returns:
+        The Unix time the object expires at, or None if it has no valid expiry
+    """
+    value = (metadata or {}).get(EXPIRES_AT_METADATA_KEY)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class ExpirySweeper:
+    """
+    Deletes objects under a prefix whose TTL, set with `put_object(..., ttl=...)`, has passed.
+
+    Sweeps are incremental, so one sweeper should be kept and run on a schedule. Listings go through a
+    `PrefixWatcher`, which lists only keys after the last one seen on most sweeps and the whole prefix every
+    `full_scan_every` sweeps, and metadata is only read for objects that are new or whose ETag has changed.
+    Expiry times are kept in memory, so objects already known to expire are found without being listed again;
+    their metadata is read again before they're deleted, so an object rewritten under the same key with a later
+    expiry, or none, is kept. Batch deletes aren't conditional, so a rewrite between that read and the delete
+    can still be lost.
+
+    :param store: The file store to sweep
+    :param prefix: Prefix of the objects to sweep
+    :param full_scan_every: Number of sweeps between full listings of the prefix
+    :param batch_size: Maximum number of keys passed to each `delete_objects` call
+    :param max_workers: Number of metadata reads in flight at once
+    :param clock: Returns the current Unix time
+    """
+
+    def __init__(
+        self,
+        store: "FileStore",
+        prefix: str = "",
+        full_scan_every: int = DEFAULT_FULL_SCAN_EVERY,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_workers: int = DEFAULT_METADATA_WORKERS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.store = store
+        self.watcher = PrefixWatcher(store, prefix, full_scan_every, include_existing=True)
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.expiries: dict[str, float] = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def _read_expiry(self, key: str) -> tuple[bool, float | None]:
+        metadata = self.store.get_object_metadata(key)
+        if metadata is None:
+            return False, None
+        user_metadata = metadata.get("metadata")
+        return True, expiry_from_metadata(user_metadata if isinstance(user_metadata, dict) else None)
+
+    def _inspect(self, keys: list[str]) -> None:
+        for key, (found, expiry) in prefetch_map(keys, self._read_expiry, depth=self.max_workers):
+            self._remember(key, found, expiry)
+
+    def _remember(self, key: str, found: bool, expiry: float | None) -> None:
+        if not found:
+            # Forget the object, so the next full scan reports it and it's inspected again
+            self.watcher.state.pop(key, None)
+            self.expiries.pop(key, None)
+        elif expiry is None:
+            self.expiries.pop(key, None)
+        else:
+            self.expiries[key] = expiry
+
+    def _confirm_expired(self, keys: list[str], now: float) -> list[str]:
+        """
+        Re-read the metadata of objects whose cached expiry has passed, since an object rewritten under the same
+        key since it was inspected may have a later expiry or none, and incremental listings don't report it
+        :param keys: Keys whose cached expiry has passed
+        :param now: The current Unix time
+        :return: The keys whose current metadata shows they've expired
+        """
+        expired = []
+        for key, (found, expiry) in prefetch_map(keys, self._read_expiry, depth=self.max_workers):
+            self._remember(key, found, expiry)
+            if found and expiry is not None and expiry <= now:
+                expired.append(key)
+        return expired
+
+    def sweep(self) -> SweepResult:
+        """
+        Find new and changed objects, then delete every object whose expiry time has passed, checked against
+        the object's current metadata just before the delete
+
+        Returns:
+            SweepResult: Counts of objects inspected, expired, deleted and that failed to delete
+        """
+        with self._lock:
+            changed: list[str] = []
+            for change in self.watcher.poll():
+                if change["type"] == ObjectChangeType.DELETED:
+                    self.expiries.pop(change["key"], None)
+                else:
+                    changed.append(change["key"])
+            self._inspect(changed)
+
+            now = self._clock()
+            candidates = sorted(key for key, expiry in self.expiries.items() if expiry <= now)
+            expired = self._confirm_expired(candidates, now)
+            failed: set[str] = set()
+            for start in range(0, len(expired), self.batch_size):
+                failed.update(self.store.delete_objects(expired[start : start + self.batch_size]))
+            for key in expired:
+                if key not in failed:
+                    del self.expiries[key]
+                    self.watcher.state.pop(key, None)
+            return SweepResult(
+                inspected=len(changed),
+                expired=len(expired),
+                deleted=len(expired) - len(failed),
+                failed=len(failed),
+            )
+
+
+def sweep_periodically(
+    sweeper: ExpirySweeper, interval: float = DEFAULT_SWEEP_INTERVAL, stop: threading.Event | None = None
+) -> None:
+    """
+    Run `sweeper` every `interval` seconds until `stop` is set, logging each sweep that deleted anything
+
+    Args:
+        sweeper: The sweeper to run
+        interval: Seconds to wait between sweeps
+        stop: Event that ends the loop when set; runs forever if None
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        result = sweeper.sweep()
+        if result["expired"]:
+            sweeper.store.logger.info(
+                "Deleted {deleted} of {expired} expired objects with prefix {prefix}",
+                deleted=result["deleted"],
+                expired=result["expired"],
+                prefix=sweeper.watcher.prefix,
+            )
+        stop.wait(interval)
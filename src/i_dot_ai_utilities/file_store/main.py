@@ -1,19 +1,1078 @@
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, BinaryIO
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, cast
 
 from azure.storage.blob import BlobServiceClient
 from google.cloud.storage import Client
 from mypy_boto3_s3.client import S3Client
 from mypy_boto3_s3.type_defs import BucketTypeDef
 
+from i_dot_ai_utilities.file_store import (
+    archive,
+    bulk,
+    existence,
+    instrumentation,
+    lifecycle,
+    moves,
+    packs,
+    prefetch,
+    sharding,
+    tables,
+    transfers,
+)
+from i_dot_ai_utilities.file_store import ranges as ranges_module
+from i_dot_ai_utilities.file_store import watch as prefix_watch
+from i_dot_ai_utilities.file_store.encryption import DEFAULT_CHUNK_SIZE, EncryptedFileStore, KeyWrapper
+from i_dot_ai_utilities.file_store.existence import ExistenceIndex
+from i_dot_ai_utilities.file_store.instrumentation import FileStoreHook, MethodT
+from i_dot_ai_utilities.file_store.inventory import ObjectInventory
+from i_dot_ai_utilities.file_store.rate_limiter import RateLimiter, key_prefix
+from i_dot_ai_utilities.file_store.remote_file import (
+    DEFAULT_BLOCK_SIZE,
+    DEFAULT_CACHE_BLOCKS,
+    DEFAULT_READ_AHEAD,
+    RemoteFile,
+)
+from i_dot_ai_utilities.file_store.settings import Settings
+from i_dot_ai_utilities.file_store.success_log import SuccessLogger
+from i_dot_ai_utilities.file_store.types.bulk_result import BulkTransformResult
+from i_dot_ai_utilities.file_store.types.move_prefix_result import MovePrefixResult
+from i_dot_ai_utilities.file_store.types.object_change import ObjectChange
+from i_dot_ai_utilities.file_store.types.pack_compaction_result import PackCompactionResult
+from i_dot_ai_utilities.file_store.types.put_object_result import PutObjectResult
+from i_dot_ai_utilities.file_store.types.sweep_result import SweepResult
+from i_dot_ai_utilities.file_store.types.warm_up_result import WarmUpResult
+from i_dot_ai_utilities.file_store.warm_up import BARRIER_SECONDS
+from i_dot_ai_utilities.file_store.write_stream import DEFAULT_PART_SIZE, MultipartUpload, ObjectWriteStream
+from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+_CAS_BACKOFF_SECONDS = 0.05
+
+
+class _ClientLock:
+    """
+    Lock serialising client creation and the creation of each store's own lock. A lock held by another thread
+    at fork time stays locked forever in the child, so a fresh one is created in each forked process.
+    """
+
+    lock = threading.Lock()
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_ClientLock.reset)
+
+
+# Methods that write an object, with the position and name of the argument holding its key and the name of the
+# argument holding its bucket
+_WRITE_METHODS = {"put_object": (0, "key", "bucket"), "copy_object": (1, "dest_key", "dest_bucket")}
+
+
+def _notifying_writes(method: MethodT, key_position: int, key_name: str, bucket_name: str) -> MethodT:
+    """
+    Wrap a `FileStore` write method so the store's write listeners are told about each object it writes.
+    With no listeners registered the wrapper adds a single attribute check to the call.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "FileStore", *args: Any, **kwargs: Any) -> Any:
+        result = method(self, *args, **kwargs)
+        if result and self.write_listeners:
+            key = args[key_position] if len(args) > key_position else kwargs.get(key_name)
+            if isinstance(key, str):
+                self._notify_written(key, kwargs.get(bucket_name))
+        return result
+
+    return cast("MethodT", wrapper)
+
 
 class FileStore(ABC):
+    logger: StructuredLogger
+    settings: Settings
+    rate_limiter: RateLimiter | None = None
+    hooks: tuple[FileStoreHook, ...] = ()
+    write_listeners: tuple[Callable[[str], None], ...] = ()
+    success_log: SuccessLogger | None = None
+    _client_pid: int | None = None
+    _state_lock: tuple[int, threading.Lock] | None = None
+    _expiry_sweepers: dict[str, lifecycle.ExpirySweeper] | None = None
+    _pack_readers: packs.PackReaderCache | None = None
+    # Smallest part a backend accepts in a multipart upload, other than the last
+    min_part_size = 1
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        instrumentation.instrument_class(cls)
+        for name, (key_position, key_name, bucket_name) in _WRITE_METHODS.items():
+            method = cls.__dict__.get(name)
+            if callable(method) and not getattr(method, "__isabstractmethod__", False):
+                setattr(cls, name, _notifying_writes(method, key_position, key_name, bucket_name))
+
+    def add_hook(self, hook: FileStoreHook) -> None:
+        """
+        Report every operation on this store to `hook`, with its duration, bytes transferred, retries and outcome.
+        Hooks add no measurable overhead to stores that have none.
+
+        Args:
+            hook: The hook to add, e.g. `HistogramHook()` or `MetricsWriterHook(CloudwatchEmbeddedMetricsWriter(...))`
+        """
+        self.hooks = (*self.hooks, hook)
+
+    def remove_hook(self, hook: FileStoreHook) -> None:
+        """
+        Args:
+            hook: A hook previously passed to `add_hook`
+        """
+        self.hooks = tuple(existing for existing in self.hooks if existing is not hook)
+
+    def add_write_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        Call `listener` with the key of every object written to the configured bucket through this store, by
+        `put_object` (and the methods built on it), `copy_object` and `open_write_stream`, so writers such as
+        packs and `EncryptedFileStore` are included. Unlike hooks, listeners leave other operations untouched.
+
+        Args:
+            listener: Called with the key (as passed to the store) once the object is written
+        """
+        self.write_listeners = (*self.write_listeners, listener)
+
+    def remove_write_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        Args:
+            listener: A listener previously passed to `add_write_listener`
+        """
+        self.write_listeners = tuple(existing for existing in self.write_listeners if existing != listener)
+
+    def _notify_written(self, key: str, bucket: str | None = None) -> None:
+        """
+        Tell the write listeners an object has been written
+        :param key: The object key, as passed to the store
+        :param bucket: The bucket it was written to, or None for the configured bucket
+        """
+        if bucket is not None and bucket != self.settings.bucket_name:
+            return
+        for listener in self.write_listeners:
+            try:
+                listener(key)
+            except Exception:
+                self.logger.exception("Write listener failed for {key}", key=key)
+
+    def _ensure_clients(self) -> None:
+        """
+        Build the backend clients if they haven't been built in this process. Clients hold connection pools
+        whose sockets must not be shared between processes, so a store inherited through a fork
+        (gunicorn pre-fork, multiprocessing) gets its own clients on first use in the child.
+        """
+        if self._client_pid == os.getpid():
+            return
+        with _ClientLock.lock:
+            if self._client_pid != os.getpid():
+                self._create_clients()
+                self._client_pid = os.getpid()
+
+    def _lazy_state_lock(self) -> threading.Lock:
+        """
+        Returns the lock guarding this store's lazily created state (expiry sweepers, the pack reader cache), so
+        stores don't contend on a shared lock. Like clients, a fresh lock is created in each forked process.
+        :return: The store's lock for the current process
+        """
+        state_lock = self._state_lock
+        if state_lock is None or state_lock[0] != os.getpid():
+            with _ClientLock.lock:
+                state_lock = self._state_lock
+                if state_lock is None or state_lock[0] != os.getpid():
+                    state_lock = self._state_lock = (os.getpid(), threading.Lock())
+        return state_lock[1]
+
+    @abstractmethod
+    def _create_clients(self) -> None:
+        """
+        Create the backend clients for the current process
+        """
+
+    @abstractmethod
+    def _ping(self) -> bool:
+        """
+        Make a cheap request to the configured bucket, to resolve credentials and open a pooled connection
+        :return: True if the backend answered, even with an error such as access denied, False otherwise
+        """
+
+    def warm_up(self, connections: int | None = None) -> WarmUpResult:
+        """
+        Move client start-up out of the first requests: build the client, resolve credentials and the endpoint
+        with one request, then open `connections` pooled connections with concurrent requests. Connections
+        beyond the client's pool size (10 for boto3 by default) are closed again once used.
+
+        Args:
+            connections: Connections to open, or None for `settings.warm_up_connections`
+
+        Returns:
+            WarmUpResult: The connections opened and time taken
+        """
+        requested = self.settings.warm_up_connections if connections is None else connections
+        started = time.perf_counter()
+        self._ensure_clients()
+        opened = int(requested > 0 and self._ping())
+        first_request_seconds = time.perf_counter() - started
+        if opened and requested > 1:
+            barrier = threading.Barrier(requested)
+
+            def ping(_: int) -> bool:
+                with contextlib.suppress(threading.BrokenBarrierError):
+                    barrier.wait(BARRIER_SECONDS)
+                return self._ping()
+
+            with ThreadPoolExecutor(max_workers=requested) as pool:
+                opened = sum(pool.map(ping, range(requested)))
+        seconds = time.perf_counter() - started
+        self.logger.info(
+            "Warmed up file store with {connections} of {requested} connections in {seconds}s",
+            connections=opened,
+            requested=requested,
+            seconds=round(seconds, 3),
+        )
+        return WarmUpResult(
+            requested=requested, connections=opened, first_request_seconds=first_request_seconds, seconds=seconds
+        )
+
+    async def warm_up_async(self, connections: int | None = None) -> WarmUpResult:
+        """
+        Async variant of `warm_up`, run on a worker thread so the event loop isn't blocked
+
+        Args:
+            connections: Connections to open, or None for `settings.warm_up_connections`
+
+        Returns:
+            WarmUpResult: The connections opened and time taken
+        """
+        return await asyncio.to_thread(self.warm_up, connections)
+
+    @staticmethod
+    def _payload_size(data: str | bytes | BinaryIO) -> int:
+        """
+        Best-effort size of an upload payload in bytes, 0 if it can't be determined without reading it
+        """
+        if isinstance(data, str):
+            return len(data.encode("utf-8"))
+        if isinstance(data, bytes | bytearray | memoryview):
+            return len(data)
+        # Seeking comes first: `fileno()` on a `SpooledTemporaryFile` rolls it over to disk
+        try:
+            position = data.tell()
+            size = data.seek(0, os.SEEK_END) - position
+            data.seek(position)
+        except (AttributeError, OSError, ValueError):
+            pass
+        else:
+            return size
+        try:
+            return os.fstat(data.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            return 0
+
+    def rate_limiter_for(self, key: str) -> RateLimiter | None:
+        """
+        Returns the limiter requests for a key draw from: the store's, or with `IAI_FS_RATE_LIMIT_PREFIX_DEPTH`
+        set, the limiter for the key's prefix
+
+        Args:
+            key: The object key
+
+        Returns:
+            RateLimiter | None: The limiter, or None if no limits are configured
+        """
+        return self.__limiter_for(sharding.physical_key(key, self.settings.data_dir, self.settings.shard_count))
+
+    def __limiter_for(self, key: str | None) -> RateLimiter | None:
+        """
+        Returns the limiter for a request
+        :param key: The key in the bucket the request is for, or None if it isn't for one object or prefix
+        :return: The store's limiter, or its child for the key's prefix
+        """
+        depth = self.settings.rate_limit_prefix_depth
+        if self.rate_limiter is None or not depth or key is None:
+            return self.rate_limiter
+        return self.rate_limiter.for_prefix(key_prefix(self.relative_key(key), depth))
+
+    def _throttle(self, data: str | bytes | BinaryIO | None = None, *, key: str | None = None) -> None:
+        """
+        Wait for the shared rate limiter, if configured, before issuing a request
+        :param data: The payload being uploaded, if any
+        :param key: The key in the bucket the request is for, which picks the limiter when limiting per prefix
+        """
+        if self.rate_limiter is None and not self.hooks:
+            return
+        num_bytes = self._payload_size(data) if data is not None else 0
+        instrumentation.record_request(num_bytes)
+        limiter = self.__limiter_for(key)
+        if limiter is not None:
+            limiter.acquire(num_bytes)
+
+    def _record_transfer(self, num_bytes: int, *, key: str | None = None) -> None:
+        """
+        Charge bytes only known once a request has completed (e.g. downloads) to the shared rate limiter
+        :param num_bytes: Number of bytes transferred
+        :param key: The key in the bucket the request was for
+        """
+        instrumentation.record_bytes_in(num_bytes)
+        limiter = self.__limiter_for(key)
+        if limiter is not None:
+            limiter.record_bytes(num_bytes)
+
+    def _transfer_concurrency(self, size: int | None, max_concurrency: int | None = None) -> int:
+        """
+        Number of concurrent requests to transfer an object with, tuned by its size
+        :param size: The object's size in bytes, or None if it isn't known
+        :param max_concurrency: Limit for this call, instead of the store's `transfer_max_concurrency`
+        """
+        block_size = transfers.block_size_for(size, self.settings.transfer_block_size)
+        return transfers.concurrency_for(size, block_size, max_concurrency or self.settings.transfer_max_concurrency)
+
+    def _success_payload_size(self, data: str | bytes | BinaryIO) -> int:
+        """
+        Size of an upload payload if the success log needs it, measured before the upload consumes it
+        :param data: The payload being uploaded
+        """
+        return self._payload_size(data) if self.success_log is not None and self.success_log.counts_bytes else 0
+
+    def _log_success(self, operation: str, message_template: str, num_bytes: int = 0, **kwargs: Any) -> None:
+        """
+        Log a successful operation according to the store's success logging mode
+        :param operation: Name of the operation, e.g. `put_object`
+        :param message_template: Message logged when successes are logged individually
+        :param num_bytes: Bytes transferred, counted when successes are summarised
+        """
+        if self.success_log is None:
+            self.logger.info(message_template, **kwargs)
+        else:
+            self.success_log.log(operation, message_template, num_bytes, **kwargs)
+
+    def relative_key(self, key: str) -> str:
+        """
+        Returns a key as returned by `list_objects` without the data directory,
+        so it can be passed back to the other methods
+        :param key: The full object key
+        :return: The key relative to the data directory
+        """
+        data_dir = self.settings.data_dir
+        return key[len(data_dir) + 1 :] if data_dir and key.startswith(f"{data_dir}/") else key
+
+    def stream_archive(
+        self,
+        prefix: str,
+        archive_format: archive.ArchiveFormat = "zip",
+        max_in_flight: int = 8,
+    ) -> Iterator[bytes]:
+        """
+        Stream a zip or tar archive of every object under a prefix, downloading members concurrently
+        ahead of the archive writer in bounded memory. Raises `OSError` once the bytes already written
+        have been yielded if an object can't be read.
+
+        Args:
+            prefix: Prefix of the objects to archive; member names are relative to it as a directory
+            archive_format: `zip` or `tar`
+            max_in_flight: Number of members downloaded concurrently
+
+        Returns:
+            Iterator of archive bytes
+        """
+        return archive.stream_archive(self, prefix, archive_format, max_in_flight=max_in_flight)
+
+    def extract_archive(
+        self,
+        key: str,
+        dest_prefix: str,
+        archive_format: archive.ArchiveFormat | None = None,
+        max_in_flight: int = 8,
+    ) -> list[str] | None:
+        """
+        Extract a zip or tar archive object into objects under a prefix, uploading members
+        concurrently as they are decoded
+
+        Args:
+            key: Key of the archive object
+            dest_prefix: Prefix the members are uploaded under
+            archive_format: `zip` or `tar`, detected from the archive contents if None
+            max_in_flight: Number of members uploaded concurrently
+
+        Returns:
+            List of keys that were uploaded, or None if the archive couldn't be read
+        """
+        return archive.extract_archive(self, key, dest_prefix, archive_format, max_in_flight=max_in_flight)
+
+    def prefetch_iter(
+        self,
+        keys: str | Iterable[str],
+        depth: int = prefetch.DEFAULT_DEPTH,
+        max_bytes: int = prefetch.DEFAULT_MAX_BYTES,
+    ) -> Iterator[tuple[str, bytes | None]]:
+        """
+        Read objects in order with up to `depth` downloads in flight ahead of the consumer,
+        holding at most roughly `max_bytes` of downloaded but unconsumed content
+
+        Args:
+            keys: A prefix to read every object under, or an iterable of keys
+            depth: Maximum number of downloads running or waiting to be consumed
+            max_bytes: Memory budget for downloaded objects waiting to be consumed
+
+        Returns:
+            Iterator of `(key, content)` pairs, where content is None if the object couldn't be read
+        """
+        return prefetch.prefetch_iter(self, keys, depth=depth, max_bytes=max_bytes)
+
+    def bulk_transform(
+        self,
+        keys: str | Iterable[str],
+        transform: Callable[[bytes], bytes | None],
+        dest_key: Callable[[str], str] | None = None,
+        io_workers: int = bulk.DEFAULT_IO_WORKERS,
+        processes: int | None = None,
+    ) -> Iterator[BulkTransformResult]:
+        """
+        Download objects, transform each one in a process pool and upload the results, streaming back a result
+        per object as it completes. Transfers run on I/O threads so they overlap with transforms.
+        See `bulk.bulk_transform` for more options, e.g. uploading to another store.
+
+        Args:
+            keys: A prefix to process every object under, or an iterable of keys
+            transform: Picklable function returning the bytes to upload, or None to skip the upload
+            dest_key: Maps a source key to the key to upload to; defaults to overwriting the source
+            io_workers: Number of threads for downloads and uploads
+            processes: Number of transform processes; defaults to the number of CPUs
+
+        Returns:
+            Iterator of results with the key, destination key, success flag and error for each object
+        """
+        return bulk.bulk_transform(
+            self,
+            keys,
+            transform,
+            dest_key=dest_key,
+            io_workers=io_workers,
+            processes=processes,
+        )
+
+    def put_objects(
+        self,
+        items: Iterable[bulk.PutObjectItem],
+        max_workers: int = bulk.DEFAULT_IO_WORKERS,
+        max_bytes: int = prefetch.DEFAULT_MAX_BYTES,
+    ) -> list[PutObjectResult]:
+        """
+        Upload many objects concurrently, taking items from `items` only as uploads finish so memory stays bounded
+
+        Args:
+            items: `(key, data)`, `(key, data, metadata)` or `(key, data, metadata, content_type)` tuples
+            max_workers: Maximum number of concurrent uploads
+            max_bytes: Memory budget for the data of the items being uploaded
+
+        Returns:
+            A result per item, in the order given, with the key, success flag and error
+        """
+        return bulk.put_objects(self, items, max_workers=max_workers, max_bytes=max_bytes)
+
+    async def put_objects_async(
+        self,
+        items: Iterable[bulk.PutObjectItem] | AsyncIterable[bulk.PutObjectItem],
+        max_workers: int = bulk.DEFAULT_IO_WORKERS,
+    ) -> list[PutObjectResult]:
+        """
+        Async variant of `put_objects`; uploads run on worker threads so the event loop isn't blocked
+
+        Args:
+            items: `(key, data)`, `(key, data, metadata)` or `(key, data, metadata, content_type)` tuples,
+                from a sync or async iterable
+            max_workers: Maximum number of concurrent uploads
+
+        Returns:
+            A result per item, in the order given, with the key, success flag and error
+        """
+        return await bulk.put_objects_async(self, items, max_workers=max_workers)
+
+    def move_object(
+        self,
+        source_key: str,
+        dest_key: str,
+        *,
+        source_bucket: str | None = None,
+        dest_bucket: str | None = None,
+    ) -> bool:
+        """
+        Move (rename) an object with a server-side copy and a delete of the source. Not atomic: if the delete
+        fails, the object exists at both keys.
+
+        Args:
+            source_key: Key to move from
+            dest_key: Key to move to
+            source_bucket: Bucket to move from instead of the configured one
+            dest_bucket: Bucket to move to instead of the configured one
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return moves.move_object(self, source_key, dest_key, source_bucket=source_bucket, dest_bucket=dest_bucket)
+
+    def move_prefix(
+        self,
+        source_prefix: str,
+        dest_prefix: str,
+        *,
+        max_workers: int = moves.DEFAULT_MOVE_WORKERS,
+        delete_batch_size: int = moves.DEFAULT_DELETE_BATCH_SIZE,
+        checkpoint: str | Path | None = None,
+        source_bucket: str | None = None,
+        dest_bucket: str | None = None,
+    ) -> MovePrefixResult:
+        """
+        Move (rename) every object under a prefix with up to `max_workers` concurrent server-side copies, deleting
+        the copied sources in batches with `delete_objects` while the next objects are copied. With a checkpoint
+        file, an interrupted move picks up after the last deleted batch and retries the objects that failed.
+
+        Args:
+            source_prefix: Prefix to move from
+            dest_prefix: Prefix to move to; each key keeps the part after `source_prefix`
+            max_workers: Maximum number of concurrent copies
+            delete_batch_size: Copied objects deleted per `delete_objects` call
+            checkpoint: Path of a JSON file recording progress, removed once everything has been moved
+            source_bucket: Bucket to move from instead of the configured one
+            dest_bucket: Bucket to move to instead of the configured one
+
+        Returns:
+            MovePrefixResult: Objects and bytes moved, keys that failed, and objects and bytes per second
+        """
+        return moves.move_prefix(
+            self,
+            source_prefix,
+            dest_prefix,
+            max_workers=max_workers,
+            delete_batch_size=delete_batch_size,
+            checkpoint=checkpoint,
+            source_bucket=source_bucket,
+            dest_bucket=dest_bucket,
+        )
+
+    def inventory(self, prefix: str = "", path: str | Path = ":memory:") -> ObjectInventory:
+        """
+        Open a local index of the objects under a prefix, for repeated listing, range and pagination
+        queries without going back to the backend. Call `refresh` on it to build or update it.
+
+        Args:
+            prefix: Prefix of the objects to index
+            path: Path of the SQLite database, so the index can be reused across runs, or `:memory:`
+
+        Returns:
+            ObjectInventory: The index
+        """
+        return ObjectInventory(self, prefix, path)
+
+    def existence_index(
+        self,
+        prefix: str = "",
+        *,
+        capacity: int | None = None,
+        false_positive_rate: float = existence.DEFAULT_FALSE_POSITIVE_RATE,
+    ) -> ExistenceIndex:
+        """
+        Build a Bloom filter of the keys under a prefix from a listing, so `object_exists` checks for keys that
+        don't exist are answered without a request. The index follows writes made through this store; call
+        `refresh` on it to pick up writes made elsewhere and `close` to stop following this store's writes.
+
+        Args:
+            prefix: Prefix of the keys to index
+            capacity: Number of keys to size the filter for, or None for twice the number listed
+            false_positive_rate: Rate of missing keys checked with the backend once the filter is full
+
+        Returns:
+            ExistenceIndex: The index
+        """
+        index = ExistenceIndex(self, prefix, capacity=capacity, false_positive_rate=false_positive_rate)
+        self.add_write_listener(index.add)
+        index.refresh()
+        return index
+
+    def encrypted(self, key_wrapper: KeyWrapper, chunk_size: int = DEFAULT_CHUNK_SIZE) -> EncryptedFileStore:
+        """
+        Client-side envelope encryption over this store: each object is encrypted with its own data key in
+        AES-GCM chunks, so uploads stream and ranged reads decrypt only the chunks they cover.
+
+        Args:
+            key_wrapper: Wraps and unwraps the data keys, e.g. a `LocalKeyWrapper`
+            chunk_size: Plaintext bytes per chunk
+
+        Returns:
+            EncryptedFileStore: The encrypting store
+        """
+        return EncryptedFileStore(self, key_wrapper, chunk_size)
+
+    def sweep_expired(
+        self, prefix: str = "", full_scan_every: int = prefix_watch.DEFAULT_FULL_SCAN_EVERY
+    ) -> SweepResult:
+        """
+        Delete the objects under a prefix whose TTL, set with `put_object(..., ttl=...)`, has passed.
+
+        The store keeps one `ExpirySweeper` per prefix, so calling this on a schedule is incremental: most calls
+        only list keys after the last one seen and only read the metadata of new or changed objects, and the
+        whole prefix is listed every `full_scan_every` calls. Expired objects are deleted with `delete_objects`.
+
+        Args:
+            prefix: Prefix of the objects to sweep
+            full_scan_every: Number of sweeps between full listings, used when the prefix is first swept
+
+        Returns:
+            SweepResult: Counts of objects inspected, expired, deleted and that failed to delete
+        """
+        with self._lazy_state_lock():
+            if self._expiry_sweepers is None:
+                self._expiry_sweepers = {}
+            sweeper = self._expiry_sweepers.get(prefix)
+            if sweeper is None:
+                sweeper = self._expiry_sweepers[prefix] = lifecycle.ExpirySweeper(self, prefix, full_scan_every)
+        return sweeper.sweep()
+
+    def start_expiry_sweeper(
+        self,
+        prefix: str = "",
+        interval: float = lifecycle.DEFAULT_SWEEP_INTERVAL,
+        full_scan_every: int = prefix_watch.DEFAULT_FULL_SCAN_EVERY,
+    ) -> threading.Event:
+        """
+        Run `sweep_expired` for a prefix every `interval` seconds on a daemon thread
+
+        Args:
+            prefix: Prefix of the objects to sweep
+            interval: Seconds to wait between sweeps
+            full_scan_every: Number of sweeps between full listings of the prefix
+
+        Returns:
+            threading.Event: Set it to stop the sweeper
+        """
+        stop = threading.Event()
+        sweeper = lifecycle.ExpirySweeper(self, prefix, full_scan_every)
+        threading.Thread(
+            target=lifecycle.sweep_periodically,
+            args=(sweeper, interval, stop),
+            name=f"file-store-sweeper-{prefix}",
+            daemon=True,
+        ).start()
+        return stop
+
+    def watch(
+        self,
+        prefix: str = "",
+        interval: float = prefix_watch.DEFAULT_INTERVAL,
+        full_scan_every: int = prefix_watch.DEFAULT_FULL_SCAN_EVERY,
+        include_existing: bool = False,
+        stop: threading.Event | None = None,
+    ) -> Iterator[ObjectChange]:
+        """
+        Poll a prefix every `interval` seconds and yield an event for each object created, updated or deleted.
+        Polls in between full listings only list keys after the last one seen, so new objects are picked up
+        cheaply; updates and deletions are picked up by the full listing every `full_scan_every` polls.
+
+        Args:
+            prefix: Prefix of the objects to watch
+            interval: Seconds to wait between polls
+            full_scan_every: Number of polls between full listings of the prefix
+            include_existing: Whether objects already present when watching starts are reported as created
+            stop: Event that ends the iteration when set; runs until the consumer stops if None
+
+        Returns:
+            Iterator of changes
+        """
+        watcher = prefix_watch.PrefixWatcher(self, prefix, full_scan_every, include_existing)
+        return prefix_watch.watch(watcher, interval, stop)
+
+    def watch_async(
+        self,
+        prefix: str = "",
+        interval: float = prefix_watch.DEFAULT_INTERVAL,
+        full_scan_every: int = prefix_watch.DEFAULT_FULL_SCAN_EVERY,
+        include_existing: bool = False,
+        stop: asyncio.Event | None = None,
+    ) -> AsyncIterator[ObjectChange]:
+        """
+        Async variant of `watch`; listings run in a worker thread so the event loop isn't blocked
+
+        Args:
+            prefix: Prefix of the objects to watch
+            interval: Seconds to wait between polls
+            full_scan_every: Number of polls between full listings of the prefix
+            include_existing: Whether objects already present when watching starts are reported as created
+            stop: Event that ends the iteration when set; runs until the consumer stops if None
+
+        Returns:
+            Async iterator of changes
+        """
+        watcher = prefix_watch.PrefixWatcher(self, prefix, full_scan_every, include_existing)
+        return prefix_watch.watch_async(watcher, interval, stop)
+
+    def open_write_stream(
+        self,
+        key: str,
+        part_size: int = DEFAULT_PART_SIZE,
+        metadata: dict[str, str] | None = None,
+        content_type: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> ObjectWriteStream:
+        """
+        Open a writable stream that uploads an object in parts as it's written, for outputs generated
+        incrementally that shouldn't be held in memory. Use it as a context manager: the object is committed
+        when the block exits and the upload is aborted if it raises. Wrap it in `io.TextIOWrapper` to write text.
+
+        Args:
+            key: Object key (path)
+            part_size: Bytes buffered before each part is uploaded; at least `min_part_size`
+            metadata: Optional metadata dictionary
+            content_type: Optional content type
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            ObjectWriteStream: The stream, which raises `OSError` if the upload fails
+        """
+        if part_size < self.min_part_size:
+            message = f"part_size must be at least {self.min_part_size} bytes"
+            raise ValueError(message)
+        return ObjectWriteStream(
+            key,
+            part_size,
+            lambda: self._start_multipart_upload(key, metadata, content_type, bucket=bucket),
+            lambda data: self.put_object(key, data, metadata, content_type, bucket=bucket),
+            on_complete=partial(self._notify_written, key, bucket),
+        )
+
+    def open(
+        self,
+        key: str,
+        mode: str = "rb",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        cache_blocks: int = DEFAULT_CACHE_BLOCKS,
+        read_ahead: int = DEFAULT_READ_AHEAD,
+        *,
+        bucket: str | None = None,
+    ) -> RemoteFile:
+        """
+        Open an object as a read-only, seekable binary file that fetches blocks with ranged reads as they're
+        read, for libraries that need a real file (zipfile, pyarrow, PDF readers) without downloading the
+        whole object first. Wrap it in `io.BufferedReader` for efficient small reads, or `io.TextIOWrapper`
+        to read text.
+
+        Args:
+            key: Object key (path)
+            mode: Only `rb` is supported
+            block_size: Bytes fetched per block
+            cache_blocks: Number of recently read blocks to keep in memory
+            read_ahead: Largest number of blocks to fetch ahead of sequential reads
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            RemoteFile: The file, which raises `OSError` if a read fails
+        """
+        if mode != "rb":
+            message = f"Unsupported mode {mode!r}; only 'rb' is supported"
+            raise ValueError(message)
+        metadata = self.get_object_metadata(key, bucket=bucket)
+        size = metadata["content_length"] if metadata else None
+        if not isinstance(size, int):
+            message = f"Object not found: {key}"
+            raise FileNotFoundError(message)
+        return RemoteFile(
+            key,
+            size,
+            partial(self.read_ranges, key, bucket=bucket),
+            block_size=block_size,
+            cache_blocks=cache_blocks,
+            read_ahead=read_ahead,
+        )
+
+    def read_ranges(
+        self,
+        key: str,
+        ranges: Sequence[tuple[int, int]],
+        max_gap: int = ranges_module.DEFAULT_MAX_GAP,
+        max_workers: int = ranges_module.DEFAULT_RANGE_WORKERS,
+        *,
+        bucket: str | None = None,
+        if_match_etag: str | None = None,
+    ) -> list[bytes] | None:
+        """
+        Read several parts of an object, e.g. the column chunks of a Parquet file. Ranges that overlap or are
+        at most `max_gap` bytes apart are fetched with one `read_range` request, and the requests run concurrently.
+
+        Args:
+            key: Object key (path)
+            ranges: `(start, length)` pairs with non-negative starts and lengths
+            max_gap: Largest number of unwanted bytes read between two ranges to save a request
+            max_workers: Maximum number of concurrent requests
+            bucket: Bucket or container to use instead of the configured one
+            if_match_etag: Only read if the object's current ETag (or generation) matches this value
+
+        Returns:
+            The bytes of each range in the order given, shorter than asked for where a range runs past the end
+            of the object, None if the object wasn't found, has changed or a request failed
+        """
+        return ranges_module.read_ranges(
+            partial(self.read_range, key, bucket=bucket, if_match_etag=if_match_etag),
+            ranges,
+            max_gap=max_gap,
+            max_workers=max_workers,
+        )
+
+    def write_table(
+        self,
+        key: str,
+        data: "pa.Table | Iterable[pa.Table | pa.RecordBatch]",
+        row_group_size: int = tables.DEFAULT_ROW_GROUP_SIZE,
+        compression: str = tables.DEFAULT_COMPRESSION,
+        *,
+        part_size: int = DEFAULT_PART_SIZE,
+        bucket: str | None = None,
+    ) -> bool:
+        """
+        Write an Arrow table as a Parquet file, streaming row groups up with `open_write_stream` as they're
+        written, so tables generated in batches never have to be held in memory. Requires pyarrow.
+
+        Args:
+            key: Object key (path)
+            data: A table, or an iterable of tables or record batches with the same schema
+            row_group_size: Rows per row group; smaller row groups let readers skip more data
+            compression: Parquet compression codec
+            part_size: Bytes buffered before each part is uploaded; at least `min_part_size`
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        return tables.write_table(
+            self,
+            key,
+            data,
+            row_group_size=row_group_size,
+            compression=compression,
+            part_size=part_size,
+            bucket=bucket,
+        )
+
+    def read_table(
+        self,
+        key: str,
+        columns: Sequence[str] | None = None,
+        row_groups: Sequence[int] | None = None,
+        filters: Sequence[tables.Filter] | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> "pa.Table | None":
+        """
+        Read a Parquet file as an Arrow table, fetching only the footer and the column chunks needed with
+        concurrent ranged reads. Requires pyarrow.
+
+        Args:
+            key: Object key (path)
+            columns: Columns to read; every column if None
+            row_groups: Indexes of the row groups to read; every row group if None
+            filters: `(column, operator, value)` conditions rows must all meet, with operators `=`, `==`, `!=`,
+                `<`, `<=`, `>`, `>=`, `in` and `not in`; row groups whose statistics rule them out aren't read
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            The table, None if the object wasn't found or isn't a valid Parquet file
+        """
+        return tables.read_table(self, key, columns, row_groups, filters, bucket=bucket)
+
+    def open_pack_writer(
+        self, key: str, part_size: int = DEFAULT_PART_SIZE, *, bucket: str | None = None
+    ) -> packs.PackWriter:
+        """
+        Open a writer that appends many small records into one pack object, for data that would otherwise
+        be stored as huge numbers of tiny objects. Use it as a context manager: the pack is committed when
+        the block exits and nothing is written if it raises.
+
+        Args:
+            key: Object key (path) of the pack
+            part_size: Bytes buffered before each part is uploaded; at least `min_part_size`
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            PackWriter: The writer, which raises `OSError` if the upload fails
+        """
+        return packs.PackWriter(
+            self.open_write_stream(key, part_size, content_type=packs.PACK_CONTENT_TYPE, bucket=bucket),
+            on_commit=partial(self._pack_reader_cache().discard, key, bucket),
+        )
+
+    def open_pack(self, key: str, *, bucket: str | None = None) -> packs.PackReader:
+        """
+        Open a pack written with `open_pack_writer` to read single records with ranged reads.
+        The store keeps the indexes of the packs it has most recently opened, so reading a record from
+        a pack that's already open is a single request.
+
+        Args:
+            key: Object key (path) of the pack
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            PackReader: The reader, whose reads return None if the pack or record isn't found
+        """
+        return self._pack_reader_cache().get(key, bucket)
+
+    def compact_packs(
+        self,
+        keys: Sequence[str],
+        dest_key: str,
+        keep: Callable[[str], bool] | None = None,
+        delete_sources: bool = False,
+        *,
+        bucket: str | None = None,
+    ) -> PackCompactionResult | None:
+        """
+        Merge packs into one new pack, dropping records replaced by a later pack or rejected by `keep`,
+        so many small packs, or packs full of stale records, can be rewritten as one.
+
+        Args:
+            keys: The packs to compact, oldest first; for records with the same name the latest pack wins
+            dest_key: Object key (path) of the new pack, which may be one of `keys`
+            keep: Returns whether to keep the record with a name; keeps every live record if None
+            delete_sources: Whether to delete the packs in `keys` once the new pack is committed
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            PackCompactionResult: Counts of the packs read and records written and dropped, None if it failed
+        """
+        return packs.compact_packs(
+            self, self._pack_reader_cache(), keys, dest_key, keep, delete_sources=delete_sources, bucket=bucket
+        )
+
+    def _pack_reader_cache(self) -> packs.PackReaderCache:
+        if self._pack_readers is None:
+            with self._lazy_state_lock():
+                if self._pack_readers is None:
+                    self._pack_readers = packs.PackReaderCache(self)
+        return self._pack_readers
+
+    def compare_and_swap_json(
+        self,
+        key: str,
+        fn: Callable[[dict | list | None], dict | list],
+        max_retries: int = 5,
+        metadata: dict[str, str] | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> dict | list | None:
+        """
+        Atomically update a JSON object using optimistic concurrency.
+
+        The object is read along with its ETag, `fn` is applied to the parsed content (None if the object
+        doesn't exist yet) and the result is written back only if the object hasn't changed in the meantime.
+        If another writer got there first, the read/apply/write cycle is retried with a short randomised
+        backoff, up to `max_retries` times. A write failing for any other reason, which leaves the object
+        unchanged, isn't retried. `fn` may therefore be called more than once and shouldn't have side effects.
+
+        Args:
+            key: Object key (path)
+            fn: Function returning the new content given the current content
+            max_retries: Maximum number of retries after a conflicting write
+            metadata: Optional metadata dictionary
+            bucket: Bucket or container to use instead of the configured one
+
+        Returns:
+            The content that was written, or None if the update failed or retries were exhausted
+        """
+        current = self.read_object_with_etag(key, bucket=bucket)
+        for attempt in range(max_retries + 1):
+            etag = current[1] if current else None
+            try:
+                data = fn(json.loads(current[0]) if current else None)
+                json_data = json.dumps(data, indent=2)
+            except (TypeError, ValueError):
+                self.logger.exception("Failed to update JSON in {key}", key=key)
+                return None
+            written = self.put_object(
+                key,
+                json_data,
+                metadata=metadata,
+                content_type="application/json",
+                if_match_etag=etag,
+                if_none_match=etag is None,
+                bucket=bucket,
+            )
+            if written:
+                return data
+            if attempt == max_retries:
+                break
+            time.sleep(random.uniform(0, _CAS_BACKOFF_SECONDS * 2**attempt))  # noqa: S311
+            # Backends report a failed precondition like any other failed write, so a write only counts as a
+            # conflict if another writer has changed the object since it was read
+            current = self.read_object_with_etag(key, bucket=bucket)
+            if (current[1] if current else None) == etag:
+                self.logger.error("Failed to update {key}", key=key)
+                return None
+            instrumentation.record_retry()
+        self.logger.warning(
+            "Gave up updating {key} after {attempts} conflicting writes", key=key, attempts=max_retries + 1
+        )
+        return None
+
+    @abstractmethod
+    def _start_multipart_upload(
+        self,
+        key: str,
+        metadata: dict[str, str] | None = None,
+        content_type: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> MultipartUpload | None:
+        """
+        Start a multipart upload for `open_write_stream`, returning None if it couldn't be started
+        """
+
     @abstractmethod
     def get_client(self) -> S3Client | BlobServiceClient | Client:
         pass
 
     @abstractmethod
-    def read_object(self, key: str, as_text: bool = False, encoding: str = "utf-8") -> bytes | str | None:
+    def read_object(
+        self,
+        key: str,
+        as_text: bool = False,
+        encoding: str = "utf-8",
+        *,
+        bucket: str | None = None,
+        max_concurrency: int | None = None,
+    ) -> bytes | str | None:
+        pass
+
+    @abstractmethod
+    def read_object_with_etag(self, key: str, *, bucket: str | None = None) -> tuple[bytes, str] | None:
+        pass
+
+    @abstractmethod
+    def read_range(
+        self,
+        key: str,
+        start: int,
+        length: int | None = None,
+        *,
+        bucket: str | None = None,
+        if_match_etag: str | None = None,
+    ) -> bytes | None:
         pass
 
     @abstractmethod
@@ -23,6 +1082,12 @@ class FileStore(ABC):
         data: str | bytes | BinaryIO,
         metadata: dict[str, str] | None = None,
         content_type: str | None = None,
+        *,
+        if_match_etag: str | None = None,
+        if_none_match: bool = False,
+        bucket: str | None = None,
+        ttl: timedelta | None = None,
+        max_concurrency: int | None = None,
     ) -> bool:
         pass
 
@@ -33,29 +1098,58 @@ class FileStore(ABC):
         data: str | bytes | BinaryIO,
         metadata: dict[str, str] | None = None,
         content_type: str | None = None,
+        *,
+        if_match_etag: str | None = None,
+        bucket: str | None = None,
     ) -> bool:
         pass
 
     @abstractmethod
-    def delete_object(self, key: str) -> bool:
+    def delete_object(self, key: str, *, bucket: str | None = None) -> bool:
         pass
 
     @abstractmethod
-    def object_exists(self, key: str) -> bool:
+    def delete_objects(self, keys: Sequence[str], *, bucket: str | None = None) -> list[str]:
         pass
 
     @abstractmethod
-    def download_object_url(self, key: str, expiration: int = 3600) -> str | None:
+    def object_exists(self, key: str, *, bucket: str | None = None) -> bool:
         pass
 
     @abstractmethod
-    def list_objects(self, prefix: str = "", max_keys: int = 1000) -> list[dict[str, str | int]]:
+    def download_fileobj(
+        self, key: str, fileobj: BinaryIO, *, bucket: str | None = None, max_concurrency: int | None = None
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def download_object_url(self, key: str, expiration: int = 3600, *, bucket: str | None = None) -> str | None:
+        pass
+
+    @abstractmethod
+    def list_objects(
+        self, prefix: str = "", max_keys: int = 1000, *, bucket: str | None = None
+    ) -> list[dict[str, str | int]]:
+        pass
+
+    @abstractmethod
+    def iter_objects(
+        self,
+        prefix: str = "",
+        page_size: int = 1000,
+        strict: bool = False,
+        start_after: str | None = None,
+        *,
+        bucket: str | None = None,
+    ) -> Iterator[dict[str, str | int]]:
         pass
 
     @abstractmethod
     def get_object_metadata(
         self,
         key: str,
+        *,
+        bucket: str | None = None,
     ) -> dict[str, str | int | dict[str, Any]] | None:
         pass
 
@@ -64,6 +1158,10 @@ class FileStore(ABC):
         self,
         source_key: str,
         dest_key: str,
+        *,
+        source_bucket: str | None = None,
+        dest_bucket: str | None = None,
+        size: int | None = None,
     ) -> bool:
         pass
 
@@ -73,6 +1171,8 @@ class FileStore(ABC):
         key: str,
         data: dict | list,
         metadata: dict[str, str] | None = None,
+        *,
+        bucket: str | None = None,
     ) -> bool:
         pass
 
@@ -80,6 +1180,8 @@ class FileStore(ABC):
     def download_json(
         self,
         key: str,
+        *,
+        bucket: str | None = None,
     ) -> dict | list | None:
         pass
 
@@ -92,3 +1194,6 @@ class FileStore(ABC):
     @abstractmethod
     def create_bucket(self, name: str) -> None:
         pass
+
+
+instrumentation.instrument_class(FileStore)
@@ -0,0 +1,258 @@
+import json
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, TypedDict
+
+from i_dot_ai_utilities.file_store import prefetch
+from i_dot_ai_utilities.file_store.types.move_prefix_result import MovePrefixResult
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+DEFAULT_MOVE_WORKERS = 16
+DEFAULT_DELETE_BATCH_SIZE = 1000
+
+
+def move_object(
+    store: "FileStore",
+    source_key: str,
+    dest_key: str,
+    *,
+    source_bucket: str | None = None,
+    dest_bucket: str | None = None,
+) -> bool:
+    """
+    Move an object with a server-side copy followed by a delete of the source
+
+    Args:
+        store: The store holding the object
+        source_key: Key to move from
+        dest_key: Key to move to
+        source_bucket: Bucket to move from instead of the configured one
+        dest_bucket: Bucket to move to instead of the configured one
+
+    Returns:
+        bool: True if successful, False otherwise; if only the delete failed the object exists at both keys
+    """
+    if not store.copy_object(source_key, dest_key, source_bucket=source_bucket, dest_bucket=dest_bucket):
+        return False
+    return store.delete_object(source_key, bucket=source_bucket)
+
+
+class _Checkpoint(TypedDict):
+    source_prefix: str
+    dest_prefix: str
+    # Every listed key up to and including this one has been moved or recorded in `failed`
+    start_after: str | None
+    # Keys that couldn't be moved, with their sizes, retried when the move is resumed
+    failed: dict[str, int]
+    moved: int
+    bytes: int
+    seconds: float
+
+
+class _Item(NamedTuple):
+    key: str
+    size: int
+    # False for keys retried from the checkpoint, which don't advance the listing position
+    listed: bool
+
+
+class _PrefixMove:
+    """
+    One `move_prefix` run. Copies run on `prefetch_map`'s threads and come back in listing order; copied
+    keys are deleted in batches on a single deleter thread while the next batch is copied, and the
+    checkpoint moves past a batch only once it's deleted, so a resumed move never skips a key.
+    """
+
+    def __init__(
+        self,
+        store: "FileStore",
+        state: _Checkpoint,
+        checkpoint: Path | None,
+        source_bucket: str | None,
+        dest_bucket: str | None,
+    ):
+        self.store = store
+        self.state = state
+        self.checkpoint = checkpoint
+        self.source_bucket = source_bucket
+        self.dest_bucket = dest_bucket
+        self._lock = threading.Lock()
+
+    def dest_key(self, key: str) -> str:
+        return self.state["dest_prefix"] + key[len(self.state["source_prefix"]) :]
+
+    def copy(self, item: _Item) -> bool:
+        return self.store.copy_object(
+            item.key,
+            self.dest_key(item.key),
+            source_bucket=self.source_bucket,
+            dest_bucket=self.dest_bucket,
+            size=item.size,
+        )
+
+    def fail(self, item: _Item) -> None:
+        with self._lock:
+            self.state["failed"][item.key] = item.size
+
+    def delete(self, batch: list[_Item], start_after: str | None) -> None:
+        """
+        Delete the sources of a batch of copied objects and move the checkpoint past them
+        :param batch: The copied objects
+        :param start_after: The last listed key up to which every object has been copied or failed
+        """
+        failed = set(self.store.delete_objects([item.key for item in batch], bucket=self.source_bucket))
+        with self._lock:
+            for item in batch:
+                if item.key in failed:
+                    self.state["failed"][item.key] = item.size
+                else:
+                    self.state["failed"].pop(item.key, None)
+                    self.state["moved"] += 1
+                    self.state["bytes"] += item.size
+            self.state["start_after"] = start_after
+            self.save()
+
+    def save(self) -> None:
+        if self.checkpoint is None:
+            return
+        temporary = self.checkpoint.with_name(f"{self.checkpoint.name}.tmp")
+        temporary.write_text(json.dumps(self.state))
+        temporary.replace(self.checkpoint)
+
+    def run(self, items: Iterator[_Item], max_workers: int, delete_batch_size: int) -> None:
+        batch: list[_Item] = []
+        start_after = self.state["start_after"]
+        pending: Future[None] | None = None
+        with ThreadPoolExecutor(max_workers=1) as deleter:
+            for item, copied in prefetch.prefetch_map(items, self.copy, depth=max_workers):
+                if copied:
+                    batch.append(item)
+                else:
+                    self.fail(item)
+                if item.listed:
+                    start_after = item.key
+                if len(batch) >= delete_batch_size:
+                    if pending is not None:
+                        pending.result()
+                    pending = deleter.submit(self.delete, batch, start_after)
+                    batch = []
+            if pending is not None:
+                pending.result()
+        if batch:
+            self.delete(batch, start_after)
+        else:
+            with self._lock:
+                self.state["start_after"] = start_after
+
+    def finish(self, seconds: float) -> None:
+        """
+        Add a run's duration to the checkpoint and save it
+        :param seconds: How long the run took
+        """
+        with self._lock:
+            self.state["seconds"] += seconds
+            self.save()
+
+
+def _load_checkpoint(path: Path | None, source_prefix: str, dest_prefix: str) -> tuple[_Checkpoint, bool]:
+    """
+    Read a move's checkpoint, or start a new one
+    :param path: The checkpoint file, or None not to keep one
+    :param source_prefix: Prefix being moved from
+    :param dest_prefix: Prefix being moved to
+    :return: The checkpoint and whether it was resumed from the file
+    """
+    if path is not None and path.exists():
+        state: _Checkpoint = json.loads(path.read_text())
+        if (state["source_prefix"], state["dest_prefix"]) != (source_prefix, dest_prefix):
+            message = f"Checkpoint {path} is for a move from {state['source_prefix']} to {state['dest_prefix']}"
+            raise ValueError(message)
+        return state, True
+    state = _Checkpoint(
+        source_prefix=source_prefix,
+        dest_prefix=dest_prefix,
+        start_after=None,
+        failed={},
+        moved=0,
+        bytes=0,
+        seconds=0.0,
+    )
+    return state, False
+
+
+def move_prefix(
+    store: "FileStore",
+    source_prefix: str,
+    dest_prefix: str,
+    *,
+    max_workers: int = DEFAULT_MOVE_WORKERS,
+    delete_batch_size: int = DEFAULT_DELETE_BATCH_SIZE,
+    checkpoint: str | Path | None = None,
+    source_bucket: str | None = None,
+    dest_bucket: str | None = None,
+) -> MovePrefixResult:
+    """
+    Move every object under a prefix to another prefix with concurrent server-side copies, deleting the sources
+    in batches with `delete_objects` as copies complete. Listing errors are raised, with the checkpoint saved.
+
+    Args:
+        store: The store holding the objects
+        source_prefix: Prefix to move from
+        dest_prefix: Prefix to move to; each key keeps the part after `source_prefix`
+        max_workers: Maximum number of concurrent copies
+        delete_batch_size: Copied objects deleted per `delete_objects` call
+        checkpoint: JSON file recording progress, so an interrupted move resumes where it stopped and retries
+            the objects that failed; removed once everything has been moved
+        source_bucket: Bucket to move from instead of the configured one
+        dest_bucket: Bucket to move to instead of the configured one
+
+    Returns:
+        MovePrefixResult: Objects and bytes moved, failed keys and throughput, over every run of the move
+    """
+    if source_prefix == dest_prefix or (dest_bucket == source_bucket and dest_prefix.startswith(source_prefix)):
+        message = "dest_prefix must not be inside source_prefix, or moved objects would be listed again"
+        raise ValueError(message)
+    path = Path(checkpoint) if checkpoint is not None else None
+    state, resumed = _load_checkpoint(path, source_prefix, dest_prefix)
+    move = _PrefixMove(store, state, path, source_bucket, dest_bucket)
+    retries = dict(state["failed"])
+    listing = store.iter_objects(source_prefix, strict=True, start_after=state["start_after"], bucket=source_bucket)
+    listed = (_Item(store.relative_key(str(obj["key"])), int(obj["size"]), listed=True) for obj in listing)
+    items = chain(
+        (_Item(key, size, listed=False) for key, size in retries.items()),
+        (item for item in listed if item.key not in retries),
+    )
+    started = time.perf_counter()
+    try:
+        move.run(items, max_workers, max(1, delete_batch_size))
+    finally:
+        move.finish(time.perf_counter() - started)
+    if path is not None and not state["failed"]:
+        path.unlink(missing_ok=True)
+    seconds = state["seconds"]
+    store.logger.info(
+        "Moved {moved} objects ({bytes} bytes) from {source_prefix} to {dest_prefix} in {seconds}s, {failed} failed",
+        moved=state["moved"],
+        bytes=state["bytes"],
+        source_prefix=source_prefix,
+        dest_prefix=dest_prefix,
+        seconds=round(seconds, 3),
+        failed=len(state["failed"]),
+    )
+    return MovePrefixResult(
+        source_prefix=source_prefix,
+        dest_prefix=dest_prefix,
+        moved=state["moved"],
+        failed=sorted(state["failed"]),
+        bytes=state["bytes"],
+        seconds=seconds,
+        objects_per_second=state["moved"] / seconds if seconds else 0.0,
+        bytes_per_second=state["bytes"] / seconds if seconds else 0.0,
+        resumed=resumed,
+    )
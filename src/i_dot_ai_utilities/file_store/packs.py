@@ -0,0 +1,411 @@
+import json
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from types import TracebackType
+from typing import TYPE_CHECKING, Self
+
+from i_dot_ai_utilities.file_store.types.pack_compaction_result import PackCompactionResult
+from i_dot_ai_utilities.file_store.write_stream import DEFAULT_PART_SIZE, ObjectWriteStream
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+PACK_MAGIC = b"IAIPACK1"
+PACK_CONTENT_TYPE = "application/octet-stream"
+PACK_FORMAT_VERSION = 1
+# Bytes read from the end of a pack to open it, so most indexes arrive with the footer in a single request
+DEFAULT_TAIL_SIZE = 64 * 1024
+DEFAULT_CACHED_PACKS = 128
+
+# Offset and length of the index, then the magic bytes
+_FOOTER = struct.Struct(">QQ8s")
+
+PackIndex = dict[str, tuple[int, int]]
+
+
+class PackWriter:
+    """
+    Writes many small records into one pack object, streaming them up in parts as they're added.
+
+    A pack is the records' bytes back to back, followed by a JSON index of each record's name, offset and
+    length, followed by a fixed-size footer locating the index. Readers open a pack by reading its tail,
+    then fetch single records with ranged reads, so a record costs one request however large the pack is.
+
+    The pack is committed on `close` (or when a `with` block exits normally) and nothing is written if the
+    block raises. Adding a name that's already in the pack replaces the earlier record, whose bytes stay
+    in the pack until it's compacted. Failed uploads raise `OSError`.
+
+    :param stream: The stream the pack is written to
+    :param on_commit: Called once the pack is committed, e.g. to drop a cached index of the pack it replaced
+    """
+
+    def __init__(self, stream: ObjectWriteStream, on_commit: Callable[[], None] | None = None):
+        self.stream = stream
+        self.index: PackIndex = {}
+        self.on_commit = on_commit
+
+    @property
+    def key(self) -> str:
+        return self.stream.key
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, name: str, data: str | bytes) -> None:
+        """
+        Append a record to the pack
+
+        Args:
+            name: The record's name, used to read it back
+            data: The record's content; text is encoded as UTF-8
+        """
+        payload = data.encode("utf-8") if isinstance(data, str) else data
+        offset = self.stream.tell()
+        self.stream.write(payload)
+        self.index[name] = (offset, len(payload))
+
+    def add_json(self, name: str, data: dict | list) -> None:
+        """
+        Append a record serialised as JSON
+
+        Args:
+            name: The record's name, used to read it back
+            data: The record's content
+        """
+        self.add(name, json.dumps(data))
+
+    def close(self) -> None:
+        """
+        Write the index and footer and commit the pack
+        """
+        if self.stream.closed:
+            return
+        index_offset = self.stream.tell()
+        index = json.dumps(
+            {"version": PACK_FORMAT_VERSION, "records": {name: list(span) for name, span in self.index.items()}},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.stream.write(index)
+        self.stream.write(_FOOTER.pack(index_offset, len(index), PACK_MAGIC))
+        self.stream.close()
+        if self.on_commit is not None:
+            self.on_commit()
+
+    def abort(self) -> None:
+        """
+        Discard the records added so far without creating the pack
+        """
+        self.stream.abort()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PackReader:
+    """
+    Reads records from a pack written by `PackWriter`. The pack's index is read on first use and kept with
+    the pack's ETag, so every later record read is a single ranged read. Reads are conditional on the ETag:
+    if the pack has been rewritten or deleted since its index was read, the index is read again and the
+    record looked up in the new one, so a stale index never returns another record's bytes.
+
+    :param store: The store holding the pack
+    :param key: The pack's key
+    :param bucket: Bucket or container to use instead of the configured one
+    :param tail_size: Bytes read from the end of the pack to find its index
+    """
+
+    def __init__(self, store: "FileStore", key: str, *, bucket: str | None = None, tail_size: int = DEFAULT_TAIL_SIZE):
+        self.store = store
+        self.key = key
+        self.bucket = bucket
+        self.tail_size = max(tail_size, _FOOTER.size)
+        self._index: PackIndex | None = None
+        self._etag: str | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> PackIndex | None:
+        """
+        The offset and length of each record by name, or None if the pack couldn't be read
+        """
+        loaded = self.__loaded()
+        return loaded[0] if loaded is not None else None
+
+    def __loaded(self) -> tuple[PackIndex, str] | None:
+        """
+        The index and the ETag of the pack it was read from, reading them if they haven't been
+        :return: The index and ETag, or None if the pack couldn't be read
+        """
+        with self._lock:
+            if self._index is None or self._etag is None:
+                loaded = self.__load_index()
+                if loaded is None:
+                    return None
+                self._index, self._etag = loaded
+            return self._index, self._etag
+
+    def __changed(self, etag: str) -> bool:
+        """
+        Check whether the pack has been rewritten or deleted since its index was read with `etag`, and forget
+        the index if it has, so it's read again
+        :param etag: The ETag the index was read with
+        :return: True if the pack has changed
+        """
+        metadata = self.store.get_object_metadata(self.key, bucket=self.bucket)
+        if metadata is not None and metadata.get("etag") == etag:
+            return False
+        with self._lock:
+            if self._etag == etag:
+                self._index = self._etag = None
+        return True
+
+    def __load_index(self) -> tuple[PackIndex, str] | None:
+        """
+        Read the pack's ETag, then its footer and index, in one ranged read if the index fits in the tail
+        :return: The index and ETag, or None if the pack couldn't be read
+        """
+        metadata = self.store.get_object_metadata(self.key, bucket=self.bucket)
+        if metadata is None:
+            return None
+        etag, size = metadata.get("etag"), metadata.get("content_length")
+        if not isinstance(etag, str) or not isinstance(size, int):
+            self.store.logger.error("Failed to read the ETag and size of pack {key}", key=self.key)
+            return None
+        tail = self.store.read_range(self.key, max(0, size - self.tail_size), bucket=self.bucket, if_match_etag=etag)
+        if tail is None:
+            return None
+        if len(tail) < _FOOTER.size or not tail.endswith(PACK_MAGIC):
+            self.store.logger.error("Object {key} is not a pack", key=self.key)
+            return None
+        index_offset, index_length, _ = _FOOTER.unpack(tail[-_FOOTER.size :])
+        if index_length + _FOOTER.size <= len(tail):
+            raw = tail[len(tail) - _FOOTER.size - index_length : len(tail) - _FOOTER.size]
+        else:
+            raw = (
+                self.store.read_range(self.key, index_offset, index_length, bucket=self.bucket, if_match_etag=etag)
+                or b""
+            )
+        try:
+            records = json.loads(raw)["records"]
+            return {name: (int(offset), int(length)) for name, (offset, length) in records.items()}, etag
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.store.logger.exception("Failed to read the index of pack {key}", key=self.key)
+            return None
+
+    def names(self) -> list[str]:
+        """
+        Returns:
+            The names of the records in the pack, in the order they were written; empty if it couldn't be read
+        """
+        return list(self.index or {})
+
+    def __contains__(self, name: object) -> bool:
+        return name in (self.index or {})
+
+    def read(self, name: str) -> bytes | None:
+        """
+        Read one record with a ranged read
+
+        Args:
+            name: The record's name
+
+        Returns:
+            The record's content, None if the pack or record wasn't found
+        """
+        for attempt in range(2):
+            loaded = self.__loaded()
+            if loaded is None:
+                return None
+            index, etag = loaded
+            span = index.get(name)
+            if span is None:
+                self.store.logger.warning("Record {name} not found in pack {key}", name=name, key=self.key)
+                return None
+            offset, length = span
+            data = self.store.read_range(self.key, offset, length, bucket=self.bucket, if_match_etag=etag)
+            if data is not None or attempt or not self.__changed(etag):
+                break
+        if data is not None and len(data) != length:
+            self.store.logger.error("Pack {key} is truncated", key=self.key)
+            return None
+        return data
+
+    def read_many(self, names: Sequence[str]) -> dict[str, bytes] | None:
+        """
+        Read several records with `read_ranges`, so records stored close together are fetched in one request
+
+        Args:
+            names: The records' names; names not in the pack are left out of the result
+
+        Returns:
+            The content of each record found by name, None if the pack couldn't be read
+        """
+        for attempt in range(2):
+            loaded = self.__loaded()
+            if loaded is None:
+                return None
+            index, etag = loaded
+            found = [name for name in names if name in index]
+            contents = self.store.read_ranges(
+                self.key, [index[name] for name in found], bucket=self.bucket, if_match_etag=etag
+            )
+            if contents is not None or attempt or not self.__changed(etag):
+                break
+        if contents is None:
+            return None
+        return dict(zip(found, contents, strict=True))
+
+    def read_json(self, name: str) -> dict | list | None:
+        """
+        Read one record written with `PackWriter.add_json`
+
+        Args:
+            name: The record's name
+
+        Returns:
+            The parsed record, None if the pack or record wasn't found or isn't valid JSON
+        """
+        data = self.read(name)
+        if data is None:
+            return None
+        try:
+            result: dict | list = json.loads(data)
+        except ValueError:
+            self.store.logger.exception("Failed to parse record {name} in pack {key}", name=name, key=self.key)
+            return None
+        return result
+
+
+class PackReaderCache:
+    """
+    The most recently used `PackReader`s of a store, so each pack's index is read once while the pack is in use
+
+    :param store: The store holding the packs
+    :param max_packs: Number of packs to keep open
+    """
+
+    def __init__(self, store: "FileStore", max_packs: int = DEFAULT_CACHED_PACKS):
+        self.store = store
+        self.max_packs = max_packs
+        self._readers: OrderedDict[tuple[str | None, str], PackReader] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, bucket: str | None = None) -> PackReader:
+        with self._lock:
+            reader = self._readers.get((bucket, key))
+            if reader is None:
+                reader = self._readers[bucket, key] = PackReader(self.store, key, bucket=bucket)
+            self._readers.move_to_end((bucket, key))
+            while len(self._readers) > self.max_packs:
+                self._readers.popitem(last=False)
+            return reader
+
+    def discard(self, key: str, bucket: str | None = None) -> None:
+        with self._lock:
+            self._readers.pop((bucket, key), None)
+
+
+def _copy_records(reader: PackReader, index: PackIndex, names: Sequence[str], writer: PackWriter) -> int:
+    """
+    Copy records from a pack into a pack being written, downloading the source pack once to a temporary file
+    :param reader: The source pack
+    :param index: The source pack's index
+    :param names: The names of the records to copy
+    :param writer: The pack being written
+    :return: The number of record bytes copied
+    """
+    if not names:
+        return 0
+    num_bytes = 0
+    with tempfile.TemporaryFile() as local:
+        if not reader.store.download_fileobj(reader.key, local, bucket=reader.bucket):
+            message = f"Failed to download pack {reader.key}"
+            raise OSError(message)
+        for name in names:
+            offset, length = index[name]
+            local.seek(offset)
+            writer.add(name, local.read(length))
+            num_bytes += length
+    return num_bytes
+
+
+def compact_packs(
+    store: "FileStore",
+    cache: PackReaderCache,
+    keys: Sequence[str],
+    dest_key: str,
+    keep: Callable[[str], bool] | None = None,
+    *,
+    delete_sources: bool = False,
+    part_size: int = DEFAULT_PART_SIZE,
+    bucket: str | None = None,
+) -> PackCompactionResult | None:
+    """
+    Copy the live records of several packs into one new pack. When packs have records with the same name,
+    the record in the latest pack in `keys` wins. Each source pack that has live records is downloaded once
+    to a temporary file rather than read record by record.
+
+    Args:
+        store: The store holding the packs
+        cache: The store's open packs, whose entries for deleted source packs are discarded
+        keys: The packs to compact, oldest first
+        dest_key: The key of the new pack
+        keep: Returns whether to keep the record with a name; keeps every record if None
+        delete_sources: Whether to delete the source packs once the new pack is committed
+        part_size: Bytes uploaded per part of the new pack
+        bucket: Bucket or container to use instead of the configured one
+
+    Returns:
+        PackCompactionResult: Counts of the packs read and records written and dropped, None if it failed
+    """
+    readers = [cache.get(key, bucket) for key in keys]
+    indexes: list[PackIndex] = []
+    for reader in readers:
+        index = reader.index
+        if index is None:
+            store.logger.error(
+                "Failed to compact packs into {key}: can't read {source}", key=dest_key, source=reader.key
+            )
+            return None
+        indexes.append(index)
+    latest = {name: position for position, index in enumerate(indexes) for name in index}
+
+    records = num_bytes = 0
+    try:
+        with store.open_pack_writer(dest_key, part_size, bucket=bucket) as writer:
+            for position, (reader, index) in enumerate(zip(readers, indexes, strict=True)):
+                names = [name for name in index if latest[name] == position and (keep is None or keep(name))]
+                num_bytes += _copy_records(reader, index, names, writer)
+                records += len(names)
+    except OSError:
+        store.logger.exception("Failed to compact packs into {key}", key=dest_key)
+        return None
+
+    if delete_sources:
+        sources = [key for key in keys if key != dest_key]
+        for key in sources:
+            cache.discard(key, bucket)
+        failed = store.delete_objects(sources, bucket=bucket)
+        if failed:
+            store.logger.warning("Failed to delete {count} compacted packs", count=len(failed))
+    return PackCompactionResult(
+        key=dest_key,
+        packs=len(keys),
+        records=records,
+        dropped=sum(len(index) for index in indexes) - records,
+        bytes=num_bytes,
+    )
@@ -0,0 +1,134 @@
+from collections import deque
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, TypeVar, cast
+
+from i_dot_ai_utilities.file_store import instrumentation
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+ItemT = TypeVar("ItemT")
+ResultT = TypeVar("ResultT")
+
+DEFAULT_DEPTH = 8
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+_EXHAUSTED = object()
+
+
+def _no_size(_: object) -> int:
+    return 0
+
+
+def _cancel_pending(
+    pending: Iterable[tuple[ItemT, Future[ResultT]]], discard: Callable[[ResultT], None] | None
+) -> None:
+    for _, future in pending:
+        if not future.cancel() and discard is not None and future.exception() is None:
+            discard(future.result())
+
+
+def prefetch_map(
+    items: Iterable[ItemT],
+    fetch: Callable[[ItemT], ResultT],
+    *,
+    depth: int = DEFAULT_DEPTH,
+    max_bytes: int | None = None,
+    estimate_size: Callable[[ItemT], int] = _no_size,
+    result_size: Callable[[ResultT], int] = _no_size,
+    discard: Callable[[ResultT], None] | None = None,
+) -> Generator[tuple[ItemT, ResultT], None, None]:
+    """
+    Apply `fetch` to each item on a thread pool, keeping up to `depth` calls running ahead of the
+    consumer, and yield `(item, result)` pairs in input order.
+
+    When `max_bytes` is set, a new fetch is only started while the bytes held by fetched-but-unconsumed
+    results (or, for fetches still running, their estimated size) stay within the budget. One fetch is
+    always allowed so an item larger than the budget can't stall the pipeline.
+
+    Args:
+        items: Items to fetch; consumed lazily
+        fetch: Function called on a worker thread for each item
+        depth: Maximum number of fetches running or waiting to be consumed
+        max_bytes: Memory budget for results waiting to be consumed, or None for no budget
+        estimate_size: Size of an item's result before it has been fetched, e.g. from a listing
+        result_size: Size of a fetched result
+        discard: Called on results that are never yielded because the consumer stopped early
+
+    Returns:
+        Generator of `(item, result)` pairs in input order
+    """
+    source: Iterator[ItemT] = iter(items)
+    pending: deque[tuple[ItemT, Future[ResultT]]] = deque()
+    next_item: list[ItemT] = []
+
+    def held_bytes() -> int:
+        return sum(
+            result_size(future.result()) if future.done() and not future.exception() else estimate_size(item)
+            for item, future in pending
+        )
+
+    def has_budget(item: ItemT) -> bool:
+        return max_bytes is None or not pending or held_bytes() + estimate_size(item) <= max_bytes
+
+    with instrumentation.OperationThreadPoolExecutor(max_workers=depth) as executor:
+
+        def fill() -> None:
+            while len(pending) < depth:
+                if not next_item and (item := next(source, _EXHAUSTED)) is not _EXHAUSTED:
+                    next_item.append(cast("ItemT", item))
+                if not next_item or not has_budget(next_item[0]):
+                    return
+                item = next_item.pop()
+                pending.append((item, executor.submit(fetch, item)))
+
+        try:
+            fill()
+            while pending:
+                item, future = pending[0]
+                result = future.result()
+                pending.popleft()
+                fill()
+                yield item, result
+        finally:
+            _cancel_pending(pending, discard)
+
+
+def prefetch_iter(
+    store: "FileStore",
+    keys: str | Iterable[str],
+    *,
+    depth: int = DEFAULT_DEPTH,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Iterator[tuple[str, bytes | None]]:
+    """
+    Read objects with up to `depth` downloads in flight ahead of the consumer, yielding them in order.
+
+    Args:
+        store: The file store to read from
+        keys: Either a prefix, in which case every object under it is read in listing order,
+            or an iterable of keys
+        depth: Maximum number of downloads running or waiting to be consumed
+        max_bytes: Memory budget for downloaded objects waiting to be consumed
+
+    Returns:
+        Iterator of `(key, content)` pairs, where content is None if the object couldn't be read
+    """
+    items: Iterable[tuple[str, int]] = (
+        ((store.relative_key(str(obj["key"])), int(obj["size"])) for obj in store.iter_objects(keys))
+        if isinstance(keys, str)
+        else ((key, 0) for key in keys)
+    )
+
+    def read(item: tuple[str, int]) -> bytes | None:
+        return cast("bytes | None", store.read_object(item[0]))
+
+    for (key, _), content in prefetch_map(
+        items,
+        read,
+        depth=depth,
+        max_bytes=max_bytes,
+        estimate_size=lambda item: item[1],
+        result_size=lambda content: len(content) if content is not None else 0,
+    ):
+        yield key, content
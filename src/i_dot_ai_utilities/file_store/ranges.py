@@ -0,0 +1,126 @@
+import bisect
+from collections.abc import Callable, Sequence
+from typing import cast
+
+from i_dot_ai_utilities.file_store import instrumentation
+
+# Reading a gap this small costs less than the latency of another request
+DEFAULT_MAX_GAP = 64 * 1024
+# Coalesced requests stop growing at this size, so a large read still runs as several concurrent requests
+DEFAULT_MAX_REQUEST_SIZE = 32 * 1024 * 1024
+DEFAULT_RANGE_WORKERS = 8
+
+
+def check_range(start: int, length: int | None) -> None:
+    """
+    Validate a byte range for `read_range`: `length` bytes from `start`, to the end of the object if `length`
+    is None, or the last `-start` bytes if `start` is negative
+    :param start: Offset of the first byte, or minus the number of bytes at the end of the object
+    :param length: Number of bytes, None to read to the end
+    """
+    if length is not None and length < 0:
+        message = "length must not be negative"
+        raise ValueError(message)
+    if start < 0 and length is not None:
+        message = "length can't be given with a negative start"
+        raise ValueError(message)
+
+
+def last_byte(start: int, length: int | None) -> int | None:
+    """
+    Offset of the last byte of a range with a non-negative start, as used in HTTP range headers, or None
+    if the range runs to the end of the object
+    :param start: Offset of the first byte
+    :param length: Number of bytes, at least 1, or None
+    """
+    return None if length is None else start + length - 1
+
+
+def http_range(start: int, length: int | None) -> str:
+    """
+    The `Range` header value for a byte range checked by `check_range`
+    :param start: Offset of the first byte, or minus the number of bytes at the end of the object
+    :param length: Number of bytes, at least 1, or None
+    """
+    if start < 0:
+        return f"bytes={start}"
+    end = last_byte(start, length)
+    return f"bytes={start}-{'' if end is None else end}"
+
+
+def coalesce(
+    ranges: Sequence[tuple[int, int]],
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_request_size: int = DEFAULT_MAX_REQUEST_SIZE,
+) -> list[tuple[int, int]]:
+    """
+    Merge byte ranges that overlap or are separated by at most `max_gap` bytes into as few requests as possible
+
+    Args:
+        ranges: `(start, length)` pairs with non-negative starts and lengths
+        max_gap: Largest number of unwanted bytes to read to save a request
+        max_request_size: Size above which ranges are no longer merged into a request
+
+    Returns:
+        `(start, length)` pairs of the requests, in order of offset
+    """
+    requests: list[tuple[int, int]] = []
+    for start, length in sorted(ranges):
+        if length == 0:
+            continue
+        if requests:
+            request_start, request_length = requests[-1]
+            request_end = request_start + request_length
+            end = max(request_end, start + length)
+            if start <= request_end + max_gap and end - request_start <= max_request_size:
+                requests[-1] = (request_start, end - request_start)
+                continue
+        requests.append((start, length))
+    return requests
+
+
+def read_ranges(
+    read: Callable[[int, int], bytes | None],
+    ranges: Sequence[tuple[int, int]],
+    *,
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_request_size: int = DEFAULT_MAX_REQUEST_SIZE,
+    max_workers: int = DEFAULT_RANGE_WORKERS,
+) -> list[bytes] | None:
+    """
+    Read several byte ranges of one object, coalescing nearby ranges and running the requests concurrently
+
+    Args:
+        read: Reads `length` bytes from `start`, returning None if the read failed
+        ranges: `(start, length)` pairs with non-negative starts and lengths
+        max_gap: Largest number of unwanted bytes to read to save a request
+        max_request_size: Size above which ranges are no longer merged into a request
+        max_workers: Maximum number of concurrent requests
+
+    Returns:
+        The bytes of each range in the order given, None if any request failed
+    """
+    for start, length in ranges:
+        if start < 0 or length < 0:
+            message = "ranges must have non-negative starts and lengths"
+            raise ValueError(message)
+    requests = coalesce(ranges, max_gap, max_request_size)
+    if len(requests) <= 1 or max_workers <= 1:
+        chunks = [read(start, length) for start, length in requests]
+    else:
+        with instrumentation.OperationThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as pool:
+            chunks = list(pool.map(lambda request: read(*request), requests))
+    if any(chunk is None for chunk in chunks):
+        return None
+
+    # The request holding a range is the last one starting at or before it
+    request_starts = [start for start, _ in requests]
+    results = []
+    for start, length in ranges:
+        if length == 0:
+            results.append(b"")
+            continue
+        position = bisect.bisect_right(request_starts, start) - 1
+        offset = start - request_starts[position]
+        results.append(cast("bytes", chunks[position])[offset : offset + length])
+    return results
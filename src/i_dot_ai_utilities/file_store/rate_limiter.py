@@ -0,0 +1,367 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+
+from i_dot_ai_utilities.file_store.settings import Settings
+
+DEFAULT_MAX_PREFIXES = 1024
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Reservations larger than the
+    available tokens are allowed and put the bucket into debt, so a single large transfer is delayed
+    rather than rejected, and subsequent callers wait for the debt to be repaid.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            message = "Token bucket rate must be greater than zero"
+            raise ValueError(message)
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._consumed = 0.0
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def reset_lock(self) -> None:
+        """
+        Replace the lock after a fork, since the child can inherit it held by a thread that doesn't exist there
+        """
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` tokens from the bucket
+
+        Args:
+            amount: Number of tokens to take
+
+        Returns:
+            float: Seconds the caller must wait before proceeding
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            self._consumed += amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def delay(self, amount: float) -> float:
+        """
+        Seconds until `amount` tokens could be taken without waiting, without taking them
+
+        Args:
+            amount: Number of tokens; amounts over the capacity count as the capacity, as they go into debt
+
+        Returns:
+            float: Seconds until the tokens are available
+        """
+        with self._lock:
+            self._refill()
+            return max(0.0, min(amount, self.capacity) - self._tokens) / self.rate
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def is_full(self) -> bool:
+        with self._lock:
+            self._refill()
+            return self._tokens >= self.capacity
+
+    def consumed(self) -> float:
+        with self._lock:
+            return self._consumed
+
+
+class RateLimiter:
+    """
+    Request-rate and bandwidth limiter shared by every `FileStore` pointing at the same scope.
+
+    `acquire` blocks the calling thread and `acquire_async` suspends the calling coroutine; both draw from
+    the same buckets, so threaded and async callers in one process share a single budget. `ready_async`
+    suspends a coroutine until the budget is available without taking it, for async code that hands its
+    requests to threads which `acquire` it.
+
+    `for_prefix` returns a child limiter with the same limits and a budget of its own, for limiting each key
+    prefix separately. Up to `max_prefixes` children are kept; beyond that, idle children (whose budget has
+    refilled, so a new one would behave the same) are dropped first, then the least recently used.
+
+    :param requests_per_second: Maximum sustained requests per second, or None for no limit
+    :param bytes_per_second: Maximum sustained bytes per second, or None for no limit
+    :param burst_seconds: How many seconds of budget may be spent at once after a quiet period
+    :param max_prefixes: Maximum number of prefix limiters kept
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float | None = None,
+        bytes_per_second: float | None = None,
+        burst_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        *,
+        max_prefixes: int = DEFAULT_MAX_PREFIXES,
+    ):
+        self.requests = (
+            TokenBucket(requests_per_second, requests_per_second * burst_seconds, clock)
+            if requests_per_second
+            else None
+        )
+        self.bytes = (
+            TokenBucket(bytes_per_second, bytes_per_second * burst_seconds, clock) if bytes_per_second else None
+        )
+        self._limits = (requests_per_second, bytes_per_second, burst_seconds, clock)
+        self._max_prefixes = max_prefixes
+        self._prefixes: OrderedDict[str, RateLimiter] = OrderedDict()
+        self._waited = 0.0
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def reset_lock(self) -> None:
+        """
+        Replace the lock after a fork, since the child can inherit it held by a thread that doesn't exist there
+        """
+        self._lock = threading.Lock()
+
+    def for_prefix(self, prefix: str) -> "RateLimiter":
+        """
+        Return the limiter for a key prefix, with the same limits as this one, creating it on first use
+
+        Args:
+            prefix: The key prefix
+
+        Returns:
+            RateLimiter: The prefix's limiter
+        """
+        with self._lock:
+            limiter = self._prefixes.get(prefix)
+            if limiter is not None:
+                self._prefixes.move_to_end(prefix)
+                return limiter
+            if len(self._prefixes) >= self._max_prefixes:
+                self._evict_prefixes()
+            limiter = self._prefixes[prefix] = RateLimiter(*self._limits)
+            return limiter
+
+    def is_idle(self) -> bool:
+        """
+        Whether every bucket has refilled, so the limiter would let through the same requests as a new one
+        """
+        return all(bucket is None or bucket.is_full() for bucket in (self.requests, self.bytes))
+
+    def _evict_prefixes(self) -> None:
+        """
+        Make room for a prefix limiter by dropping the idle ones, or the least recently used if none are idle.
+        Called with the lock held.
+        """
+        for prefix in [prefix for prefix, limiter in self._prefixes.items() if limiter.is_idle()]:
+            del self._prefixes[prefix]
+        while len(self._prefixes) >= self._max_prefixes:
+            self._prefixes.popitem(last=False)
+
+    def reserve(self, num_bytes: int = 0, requests: int = 1) -> float:
+        """
+        Take budget for a request without waiting, for callers that schedule their own delays
+
+        Args:
+            num_bytes: Number of bytes the request will transfer, if known up front
+            requests: Number of requests to account for
+
+        Returns:
+            float: Seconds the caller must wait before proceeding
+        """
+        wait = 0.0
+        if self.requests is not None and requests:
+            wait = self.requests.reserve(requests)
+        if self.bytes is not None and num_bytes:
+            wait = max(wait, self.bytes.reserve(num_bytes))
+        if wait:
+            with self._lock:
+                self._waited += wait
+        return wait
+
+    def acquire(self, num_bytes: int = 0, requests: int = 1) -> None:
+        """
+        Block until the budget allows a request transferring `num_bytes`
+
+        Args:
+            num_bytes: Number of bytes the request will transfer, if known up front
+            requests: Number of requests to account for
+        """
+        wait = self.reserve(num_bytes, requests)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, num_bytes: int = 0, requests: int = 1) -> None:
+        """
+        Async variant of `acquire`, which suspends the coroutine instead of blocking the thread
+
+        Args:
+            num_bytes: Number of bytes the request will transfer, if known up front
+            requests: Number of requests to account for
+        """
+        wait = self.reserve(num_bytes, requests)
+        if wait:
+            await asyncio.sleep(wait)
+
+    async def ready_async(self, num_bytes: int = 0, requests: int = 1) -> None:
+        """
+        Suspend the coroutine until the budget allows a request transferring `num_bytes`, without taking it.
+        Async code that runs its requests on worker threads waits here, so the wait doesn't hold a thread.
+
+        Args:
+            num_bytes: Number of bytes the request will transfer, if known up front
+            requests: Number of requests to account for
+        """
+        wait = 0.0
+        if self.requests is not None and requests:
+            wait = self.requests.delay(requests)
+        if self.bytes is not None and num_bytes:
+            wait = max(wait, self.bytes.delay(num_bytes))
+        if wait:
+            await asyncio.sleep(wait)
+
+    def record_bytes(self, num_bytes: int) -> None:
+        """
+        Account for bytes whose size was only known after the request completed (e.g. downloads).
+        The cost is charged to the bucket, delaying the next caller rather than this one.
+
+        Args:
+            num_bytes: Number of bytes transferred
+        """
+        if self.bytes is not None and num_bytes:
+            self.bytes.reserve(num_bytes)
+
+    def utilisation(self) -> dict[str, dict[str, float] | float]:
+        """
+        Report the current state of the limiter
+
+        Returns:
+            A dict with, for each configured bucket, its limit, currently available tokens,
+            utilisation (0.0 idle to 1.0 saturated, above 1.0 when in debt) and total consumed,
+            plus the total seconds callers have been made to wait
+        """
+        result: dict[str, dict[str, float] | float] = {}
+        for name, bucket in (("requests", self.requests), ("bytes", self.bytes)):
+            if bucket is None:
+                continue
+            available = bucket.available()
+            result[name] = {
+                "limit_per_second": bucket.rate,
+                "available": available,
+                "utilisation": 1 - available / bucket.capacity,
+                "consumed": bucket.consumed(),
+            }
+        with self._lock:
+            result["waited_seconds"] = self._waited
+        return result
+
+    def prefix_utilisation(self) -> dict[str, dict[str, dict[str, float] | float]]:
+        """
+        Report the state of each prefix's limiter, as `utilisation` does
+
+        Returns:
+            A dict of each prefix that has been used to its limiter's utilisation
+        """
+        with self._lock:
+            prefixes = dict(self._prefixes)
+        return {prefix: limiter.utilisation() for prefix, limiter in sorted(prefixes.items())}
+
+
+def key_prefix(key: str, depth: int) -> str:
+    """
+    Return the first `depth` directories of a key, e.g. `a/b/` for `a/b/c/d.txt` at depth 2
+
+    Args:
+        key: The object key
+        depth: Number of directories
+
+    Returns:
+        str: The prefix, ending in `/`, or an empty string for keys with no directory
+    """
+    return "".join(f"{part}/" for part in key.split("/")[:-1][:depth])
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+_instances: "weakref.WeakSet[TokenBucket | RateLimiter]" = weakref.WeakSet()
+
+
+def _reset_after_fork() -> None:
+    """
+    Give the child fresh locks; limiters keep their state, so each process carries on with the same budget
+    """
+    global _limiters_lock  # noqa: PLW0603
+    _limiters_lock = threading.Lock()
+    for instance in list(_instances):
+        instance.reset_lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_rate_limiter(
+    scope: str,
+    requests_per_second: float | None = None,
+    bytes_per_second: float | None = None,
+    burst_seconds: float = 1.0,
+) -> RateLimiter:
+    """
+    Return the process-wide limiter for `scope`, creating it on first use.
+    Limits passed after the limiter has been created are ignored.
+
+    Args:
+        scope: Identifier shared by all callers that should draw from the same budget
+        requests_per_second: Maximum sustained requests per second, or None for no limit
+        bytes_per_second: Maximum sustained bytes per second, or None for no limit
+        burst_seconds: How many seconds of budget may be spent at once
+
+    Returns:
+        RateLimiter: The shared limiter
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(scope)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_second, bytes_per_second, burst_seconds)
+            _limiters[scope] = limiter
+        return limiter
+
+
+def rate_limiter_from_settings(backend: str, settings: Settings) -> RateLimiter | None:
+    """
+    Return the shared limiter for a store, scoped by backend, bucket and data directory,
+    or None if no limits are configured. With `rate_limit_prefix_depth` set, the store limits each
+    key prefix with the limiter's `for_prefix` children.
+
+    Args:
+        backend: Name of the storage backend, e.g. `s3`
+        settings: The file store settings
+
+    Returns:
+        RateLimiter | None: The shared limiter, if limits are configured
+    """
+    if not settings.rate_limit_requests_per_second and not settings.rate_limit_bytes_per_second:
+        return None
+    scope = settings.rate_limit_scope or f"{backend}:{settings.bucket_name}:{settings.data_dir}"
+    return get_rate_limiter(
+        scope,
+        settings.rate_limit_requests_per_second,
+        settings.rate_limit_bytes_per_second,
+        settings.rate_limit_burst_seconds,
+    )
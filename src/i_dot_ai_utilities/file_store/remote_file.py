@@ -0,0 +1,185 @@
+import io
+import os
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_CACHE_BLOCKS = 32
+DEFAULT_READ_AHEAD = 8
+
+
+class RemoteFile(io.RawIOBase):
+    """
+    Read-only, seekable file over an object, fetching the blocks it reads with ranged reads, so libraries
+    that seek around a file (zipfile, pyarrow, PDF readers) only download the parts they need.
+
+    Blocks are kept in an LRU cache of `cache_blocks` blocks. While reads are sequential, each block fetch also
+    fetches the blocks after it, doubling the number fetched ahead on each fetch up to `read_ahead` blocks, so
+    sequential reads make few, large requests; a seek elsewhere resets the window. Reads that need several
+    blocks fetch them together, with nearby runs of missing blocks coalesced into one request.
+
+    Like other file objects it isn't safe to share between threads. Failed reads raise `OSError`.
+
+    :param key: The object key, for error messages
+    :param size: The object's size in bytes
+    :param read_ranges: Reads `(start, length)` ranges of the object, returning None if a read failed
+    :param block_size: Bytes per block
+    :param cache_blocks: Number of blocks to cache
+    :param read_ahead: Largest number of blocks to fetch ahead of a sequential read
+    """
+
+    def __init__(
+        self,
+        key: str,
+        size: int,
+        read_ranges: Callable[[Sequence[tuple[int, int]]], list[bytes] | None],
+        *,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        cache_blocks: int = DEFAULT_CACHE_BLOCKS,
+        read_ahead: int = DEFAULT_READ_AHEAD,
+    ):
+        super().__init__()
+        if block_size < 1:
+            message = "block_size must be positive"
+            raise ValueError(message)
+        self.key = key
+        self.size = size
+        self.block_size = block_size
+        self.cache_blocks = max(cache_blocks, 1)
+        self.read_ahead = max(read_ahead, 0)
+        self.bytes_fetched = 0
+        self._read_ranges = read_ranges
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._position = 0
+        self._next_block = 0
+        self._window = 0
+
+    @property
+    def name(self) -> str:
+        return self.key
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = self.size + offset
+        else:
+            message = f"Invalid whence: {whence}"
+            raise ValueError(message)
+        if position < 0:
+            message = f"Negative seek position {position}"
+            raise ValueError(message)
+        self._position = position
+        return position
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        if self.closed:
+            message = "I/O operation on closed file"
+            raise ValueError(message)
+        view = memoryview(buffer).cast("B")
+        start = self._position
+        end = min(self.size, start + len(view))
+        if end <= start:
+            return 0
+        first, last = start // self.block_size, (end - 1) // self.block_size
+        written = 0
+        for index, block in self.__blocks(first, last).items():
+            block_start = index * self.block_size
+            low = max(start, block_start) - block_start
+            high = min(end, block_start + len(block)) - block_start
+            if high <= low:
+                break
+            view[written : written + high - low] = block[low:high]
+            written += high - low
+        self._position += written
+        return written
+
+    def readall(self) -> bytes:
+        return self.read(max(0, self.size - self._position)) or b""
+
+    def prefetch(self, ranges: Sequence[tuple[int, int]]) -> None:
+        """
+        Fetch the blocks covering byte ranges that are about to be read, e.g. the column chunks a Parquet reader
+        needs, in one concurrent `read_ranges` call. The cache grows to hold them until they're read.
+
+        Args:
+            ranges: `(start, length)` pairs
+        """
+        wanted = {
+            index
+            for start, length in ranges
+            if length > 0 and start < self.size
+            for index in range(start // self.block_size, (min(start + length, self.size) - 1) // self.block_size + 1)
+        }
+        missing = sorted(wanted - self._blocks.keys())
+        self.cache_blocks = max(self.cache_blocks, len(self._blocks) + len(missing))
+        if missing:
+            self.__fetch(missing)
+
+    def __blocks(self, first: int, last: int) -> dict[int, bytes]:
+        """
+        Return blocks `first` to `last`, fetching any that aren't cached along with the blocks to read ahead
+        :param first: Index of the first block
+        :param last: Index of the last block
+        :return: The blocks by index, in order
+        """
+        blocks: dict[int, bytes] = {}
+        missing = []
+        for index in range(first, last + 1):
+            block = self._blocks.get(index)
+            if block is None:
+                missing.append(index)
+            else:
+                self._blocks.move_to_end(index)
+                blocks[index] = block
+        if missing:
+            sequential = first == self._next_block
+            self._window = min(max(1, self._window * 2), self.read_ahead) if sequential else 0
+            block_count = -(-self.size // self.block_size)
+            ahead = range(last + 1, min(last + 1 + self._window, block_count))
+            fetched = self.__fetch([*missing, *(index for index in ahead if index not in self._blocks)])
+            blocks.update((index, fetched[index]) for index in missing)
+            blocks = dict(sorted(blocks.items()))
+        self._next_block = last + 1
+        return blocks
+
+    def __fetch(self, indexes: list[int]) -> dict[int, bytes]:
+        """
+        Fetch blocks, one range per run of consecutive blocks, and add them to the cache
+        :param indexes: Indexes of the blocks, in ascending order
+        :return: The blocks by index
+        """
+        runs: list[tuple[int, int]] = []
+        for index in indexes:
+            if runs and runs[-1][0] + runs[-1][1] == index:
+                runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+            else:
+                runs.append((index, 1))
+        chunks = self._read_ranges([(index * self.block_size, count * self.block_size) for index, count in runs])
+        if chunks is None:
+            message = f"Failed to read {self.key}"
+            raise OSError(message)
+        fetched = {}
+        for (first, count), chunk in zip(runs, chunks, strict=True):
+            self.bytes_fetched += len(chunk)
+            for offset in range(count):
+                block = chunk[offset * self.block_size : (offset + 1) * self.block_size]
+                fetched[first + offset] = self._blocks[first + offset] = block
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return fetched
+
+    def close(self) -> None:
+        self._blocks.clear()
+        super().close()
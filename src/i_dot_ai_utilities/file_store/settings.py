@@ -1,6 +1,10 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from i_dot_ai_utilities.file_store.transfers import DEFAULT_MAX_CONCURRENCY
+from i_dot_ai_utilities.file_store.types.success_log_mode import SuccessLogMode
+from i_dot_ai_utilities.file_store.warm_up import DEFAULT_WARM_UP_CONNECTIONS
+
 
 class Settings(BaseSettings):
     """
@@ -25,6 +29,28 @@ class Settings(BaseSettings):
     - **IAI_FS_AZURE_ACCOUNT_KEY**: The Azure account key
     - **IAI_DATA_DIR**: The data directory to use inside the set S3 bucket
     (defaults to `app_data`)
+    - **IAI_FS_RATE_LIMIT_REQUESTS_PER_SECOND**: Maximum requests per second shared by every store
+    in the process pointing at the same backend, bucket and data directory (unlimited if unset)
+    - **IAI_FS_RATE_LIMIT_BYTES_PER_SECOND**: Maximum bytes per second for the same scope (unlimited if unset)
+    - **IAI_FS_RATE_LIMIT_BURST_SECONDS**: Seconds of budget that can be spent at once (defaults to `1`)
+    - **IAI_FS_RATE_LIMIT_SCOPE**: Overrides the limiter scope, so stores for different backends or
+    buckets can share one budget (e.g. a NAT gateway)
+    - **IAI_FS_RATE_LIMIT_PREFIX_DEPTH**: Also limit each key prefix of this many directories separately, each
+    with the limits above (defaults to `0`, no per-prefix limits)
+    - **IAI_FS_SUCCESS_LOG_MODE**: How successful uploads, deletes and copies are logged: `per_call` (default),
+    `sampled`, `summary` (one line per operation type every `IAI_FS_SUCCESS_LOG_SUMMARY_SECONDS`) or `off`
+    - **IAI_FS_SUCCESS_LOG_SAMPLE_RATE**: Fraction of successes logged in `sampled` mode (defaults to `0.01`)
+    - **IAI_FS_SUCCESS_LOG_SUMMARY_SECONDS**: Seconds between summary lines in `summary` mode (defaults to `60`)
+    - **IAI_FS_SHARD_COUNT**: Spread objects over this many hash-derived prefixes under the data directory, to
+    scale past per-prefix request rate limits (defaults to `0`, no sharding). Changing it moves every key,
+    so it must stay the same for the lifetime of the data
+    - **IAI_FS_SHARE_CLIENTS**: Whether stores with the same backend, credentials and client options share one
+    client and connection pool in each process (defaults to `true`)
+    - **IAI_FS_TRANSFER_MAX_CONCURRENCY**: Largest number of concurrent requests used to upload or download one
+    large object (defaults to `8`); objects are transferred in one request up to 8 MiB
+    - **IAI_FS_TRANSFER_BLOCK_SIZE**: Bytes per block, part or chunk of large transfers (chosen by object size if
+    unset, at least 8 MiB)
+    - **IAI_FS_WARM_UP_CONNECTIONS**: Connections `warm_up` opens when it isn't given a number (defaults to `4`)
 
     """
 
@@ -39,5 +65,18 @@ class Settings(BaseSettings):
     azure_account_url: str | None = Field(default=None)
     azure_connection_string: str | None = Field(default=None)
     azure_account_key: str | None = Field(default=None)
+    rate_limit_requests_per_second: float | None = Field(default=None)
+    rate_limit_bytes_per_second: float | None = Field(default=None)
+    rate_limit_burst_seconds: float = Field(default=1.0)
+    rate_limit_scope: str | None = Field(default=None)
+    rate_limit_prefix_depth: int = Field(default=0, ge=0)
+    success_log_mode: SuccessLogMode = Field(default=SuccessLogMode.PER_CALL)
+    success_log_sample_rate: float = Field(default=0.01)
+    success_log_summary_seconds: float = Field(default=60.0)
+    share_clients: bool = Field(default=True)
+    shard_count: int = Field(default=0, ge=0)
+    transfer_max_concurrency: int = Field(default=DEFAULT_MAX_CONCURRENCY, ge=1)
+    transfer_block_size: int | None = Field(default=None, gt=0)
+    warm_up_connections: int = Field(default=DEFAULT_WARM_UP_CONNECTIONS, ge=0)
 
     model_config = SettingsConfigDict(extra="ignore", env_prefix="IAI_FS_", case_sensitive=False)
@@ -0,0 +1,79 @@
+import heapq
+import zlib
+from collections.abc import Callable, Iterator
+
+
+def shard_of(key: str, shard_count: int) -> str:
+    """
+    The shard a key is stored in: a fixed-width hex number derived from a hash of the key, so keys spread
+    evenly over the shards whatever their naming scheme
+
+    Args:
+        key: The object key, relative to the data directory
+        shard_count: Number of shards
+
+    Returns:
+        str: The shard's prefix
+    """
+    width = len(f"{shard_count - 1:x}")
+    return f"{zlib.crc32(key.encode('utf-8')) % shard_count:0{width}x}"
+
+
+def shard_names(shard_count: int) -> list[str]:
+    """
+    Args:
+        shard_count: Number of shards
+
+    Returns:
+        The prefix of every shard, in order
+    """
+    width = len(f"{shard_count - 1:x}")
+    return [f"{shard:0{width}x}" for shard in range(shard_count)]
+
+
+def physical_key(key: str, data_dir: str, shard_count: int) -> str:
+    """
+    Map a key to where it's stored: `<data_dir>/<shard>/<key>`, leaving out the parts that aren't configured
+
+    Args:
+        key: The object key
+        data_dir: The data directory, or an empty string
+        shard_count: Number of shards, or 0 if keys aren't sharded
+
+    Returns:
+        str: The key in the bucket
+    """
+    if shard_count:
+        key = f"{shard_of(key, shard_count)}/{key}"
+    return key if not data_dir else f"{data_dir}/{key}"
+
+
+def merge_shards(
+    list_shard: Callable[[str, str | None], Iterator[dict[str, str | int]]],
+    prefix: str,
+    start_after: str | None,
+    data_dir: str,
+    shard_count: int,
+) -> Iterator[dict[str, str | int]]:
+    """
+    List a prefix in every shard and merge the listings in key order, with the shard taken out of each key,
+    so sharded listings look like unsharded ones. Each shard's first page is fetched as the merge starts.
+
+    Args:
+        list_shard: Lists the objects under a prefix in the bucket, after an optional key in the bucket
+        prefix: The prefix to list, relative to the data directory
+        start_after: Only return objects with keys after this one, relative to the data directory
+        data_dir: The data directory, or an empty string
+        shard_count: Number of shards
+
+    Returns:
+        Iterator of object information, in key order
+    """
+    base = f"{data_dir}/" if data_dir else ""
+
+    def unsharded(shard: str) -> Iterator[dict[str, str | int]]:
+        shard_base = f"{base}{shard}/"
+        for obj in list_shard(shard_base + prefix, shard_base + start_after if start_after else None):
+            yield {**obj, "key": base + str(obj["key"])[len(shard_base) :]}
+
+    return heapq.merge(*(unsharded(shard) for shard in shard_names(shard_count)), key=lambda obj: str(obj["key"]))
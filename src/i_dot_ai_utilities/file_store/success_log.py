@@ -0,0 +1,140 @@
+import atexit
+import random
+import threading
+import time
+import weakref
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+from i_dot_ai_utilities.file_store.settings import Settings
+from i_dot_ai_utilities.file_store.types.success_log_mode import SuccessLogMode
+from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
+
+
+class SuccessLogger:
+    """
+    Logs successful operations according to a `SuccessLogMode`, so bulk jobs don't spend a log line on every object.
+
+    - `per_call` logs every operation, as before
+    - `sampled` logs roughly `sample_rate` of operations
+    - `summary` counts operations and bytes and logs one line every `summary_seconds`, with the totals and
+      the count and bytes of each operation type
+    - `off` logs nothing
+
+    Summaries are written by the first operation after the interval ends, and by `flush`, which is also
+    called at interpreter exit for every summary logger still alive.
+
+    :param logger: The logger to write to
+    :param mode: How successes are logged
+    :param sample_rate: Fraction of operations logged in `sampled` mode
+    :param summary_seconds: Seconds between summary lines in `summary` mode
+    """
+
+    def __init__(
+        self,
+        logger: StructuredLogger,
+        mode: SuccessLogMode = SuccessLogMode.PER_CALL,
+        sample_rate: float = 0.01,
+        summary_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.logger = logger
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.summary_seconds = summary_seconds
+        self._clock = clock
+        self._counts: Counter[str] = Counter()
+        self._bytes: Counter[str] = Counter()
+        self._window_start = clock()
+        self._lock = threading.Lock()
+        if mode == SuccessLogMode.SUMMARY:
+            _summary_loggers.add(self)
+
+    @property
+    def counts_bytes(self) -> bool:
+        """Whether callers should pass the size of the payload, which is only used in summaries"""
+        return self.mode == SuccessLogMode.SUMMARY
+
+    def log(self, operation: str, message_template: str, num_bytes: int = 0, **kwargs: Any) -> None:
+        """
+        Record a successful operation
+
+        Args:
+            operation: Name of the operation, e.g. `put_object`
+            message_template: Message logged in `per_call` and `sampled` modes
+            num_bytes: Bytes transferred, counted in `summary` mode
+            kwargs: Values interpolated into the message
+        """
+        if self.mode == SuccessLogMode.OFF:
+            return
+        if self.mode == SuccessLogMode.PER_CALL:
+            self.logger.info(message_template, **kwargs)
+        elif self.mode == SuccessLogMode.SAMPLED:
+            if random.random() < self.sample_rate:  # noqa: S311
+                self.logger.info(message_template, sample_rate=self.sample_rate, **kwargs)
+        else:
+            self._count(operation, num_bytes)
+
+    def _count(self, operation: str, num_bytes: int) -> None:
+        with self._lock:
+            self._counts[operation] += 1
+            self._bytes[operation] += num_bytes
+            if self._clock() - self._window_start < self.summary_seconds:
+                return
+            counts, total_bytes, seconds = self._take_window()
+        self._write_summary(counts, total_bytes, seconds)
+
+    def _take_window(self) -> tuple[Counter[str], Counter[str], float]:
+        now = self._clock()
+        window = (self._counts, self._bytes, now - self._window_start)
+        self._counts, self._bytes, self._window_start = Counter(), Counter(), now
+        return window
+
+    def _write_summary(self, counts: Counter[str], total_bytes: Counter[str], seconds: float) -> None:
+        self.logger.info(
+            "File store: {count} operations succeeded ({num_bytes} bytes) in the last {seconds}s",
+            count=counts.total(),
+            num_bytes=total_bytes.total(),
+            seconds=round(seconds, 1),
+            operations={
+                operation: {"count": count, "num_bytes": total_bytes[operation]}
+                for operation, count in sorted(counts.items())
+            },
+        )
+
+    def flush(self) -> None:
+        """
+        Write the summary of operations counted so far, in `summary` mode
+        """
+        with self._lock:
+            if not self._counts:
+                return
+            counts, total_bytes, seconds = self._take_window()
+        self._write_summary(counts, total_bytes, seconds)
+
+
+_summary_loggers: "weakref.WeakSet[SuccessLogger]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    for success_log in list(_summary_loggers):
+        success_log.flush()
+
+
+def success_logger_from_settings(logger: StructuredLogger, settings: Settings) -> SuccessLogger:
+    """
+    Args:
+        logger: The store's logger
+        settings: The file store settings
+
+    Returns:
+        SuccessLogger: A success logger configured from `IAI_FS_SUCCESS_LOG_*` settings
+    """
+    return SuccessLogger(
+        logger,
+        settings.success_log_mode,
+        settings.success_log_sample_rate,
+        settings.success_log_summary_seconds,
+    )
@@ -0,0 +1,263 @@
+from collections.abc import Iterable, Sequence
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
+
+from i_dot_ai_utilities.file_store.write_stream import DEFAULT_PART_SIZE, ObjectWriteStream
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from i_dot_ai_utilities.file_store.main import FileStore
+    from i_dot_ai_utilities.file_store.remote_file import RemoteFile
+
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+DEFAULT_ROW_GROUP_SIZE = 128 * 1024
+DEFAULT_COMPRESSION = "zstd"
+# Column chunks are fetched whole, so blocks only need to be large enough to keep the number of blocks down
+DEFAULT_TABLE_BLOCK_SIZE = 64 * 1024
+
+# `(column, operator, value)`, as in `pyarrow.parquet.read_table`
+Filter = tuple[str, str, Any]
+
+
+def _import_pyarrow() -> tuple[ModuleType, ModuleType]:
+    """
+    Import pyarrow, which is an optional dependency
+    :return: The `pyarrow` and `pyarrow.parquet` modules
+    """
+    try:
+        import pyarrow as pa  # noqa: PLC0415
+        import pyarrow.parquet as pq  # noqa: PLC0415
+    except ImportError as e:
+        message = "Reading and writing tables requires pyarrow: install i-dot-ai-utilities[parquet]"
+        raise ImportError(message) from e
+    return pa, pq
+
+
+def _row_groups(data: "pa.Table | Iterable[pa.Table | pa.RecordBatch]", row_group_size: int) -> Iterable["pa.Table"]:
+    """
+    Regroup tables and record batches into tables of about `row_group_size` rows, so data generated in small
+    batches isn't written as many tiny row groups
+    :param data: A table, or tables or record batches with the same schema
+    :param row_group_size: Rows per row group
+    :return: Tables of `row_group_size` rows, the last of which may be smaller
+    """
+    pa, _ = _import_pyarrow()
+    batches: list[Any] = []
+    rows = 0
+    for part in [data] if isinstance(data, pa.Table) else data:
+        for batch in part.to_batches() if isinstance(part, pa.Table) else [part]:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= row_group_size:
+                table = pa.Table.from_batches(batches)
+                for offset in range(0, rows - rows % row_group_size, row_group_size):
+                    yield table.slice(offset, row_group_size)
+                remainder = table.slice(rows - rows % row_group_size)
+                batches, rows = remainder.to_batches(), remainder.num_rows
+    if batches:
+        yield pa.Table.from_batches(batches)
+
+
+def _write_row_groups(
+    stream: ObjectWriteStream,
+    data: "pa.Table | Iterable[pa.Table | pa.RecordBatch]",
+    row_group_size: int,
+    compression: str,
+) -> None:
+    """
+    Write data to a stream as a Parquet file
+    :param stream: The stream
+    :param data: A table, or tables or record batches with the same schema
+    :param row_group_size: Rows per row group
+    :param compression: Parquet compression codec
+    """
+    _, pq = _import_pyarrow()
+    writer = None
+    for table in _row_groups(data, row_group_size):
+        if writer is None:
+            writer = pq.ParquetWriter(stream, table.schema, compression=compression)
+        writer.write_table(table, row_group_size=row_group_size)
+    if writer is None:
+        message = "No data to write"
+        raise ValueError(message)
+    writer.close()
+
+
+def write_table(
+    store: "FileStore",
+    key: str,
+    data: "pa.Table | Iterable[pa.Table | pa.RecordBatch]",
+    *,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = DEFAULT_COMPRESSION,
+    part_size: int = DEFAULT_PART_SIZE,
+    bucket: str | None = None,
+) -> bool:
+    """
+    Write a Parquet file through `open_write_stream`, uploading parts as row groups are written
+
+    Args:
+        store: The store to write to
+        key: Object key (path)
+        data: A table, or tables or record batches with the same schema, consumed as they're written
+        row_group_size: Rows per row group
+        compression: Parquet compression codec
+        part_size: Bytes uploaded per part
+        bucket: Bucket or container to use instead of the configured one
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        with store.open_write_stream(key, part_size, content_type=PARQUET_CONTENT_TYPE, bucket=bucket) as stream:
+            _write_row_groups(stream, data, row_group_size, compression)
+    except (OSError, ValueError):
+        store.logger.exception("Failed to write table {key}", key=key)
+        return False
+    return True
+
+
+def _selected(path: str, columns: Sequence[str]) -> bool:
+    return any(path == column or path.startswith(f"{column}.") for column in columns)
+
+
+def column_chunk_ranges(
+    metadata: Any, row_groups: Sequence[int], columns: Sequence[str] | None
+) -> list[tuple[int, int]]:
+    """
+    Byte ranges of the column chunks a read of some columns of some row groups needs
+
+    Args:
+        metadata: The file's `pyarrow.parquet.FileMetaData`
+        row_groups: Indexes of the row groups
+        columns: Names of the columns, including parents of nested columns; every column if None
+
+    Returns:
+        `(start, length)` pairs
+    """
+    ranges = []
+    for index in row_groups:
+        row_group = metadata.row_group(index)
+        for position in range(row_group.num_columns):
+            chunk = row_group.column(position)
+            if columns is not None and not _selected(chunk.path_in_schema, columns):
+                continue
+            start = chunk.dictionary_page_offset if chunk.has_dictionary_page else chunk.data_page_offset
+            ranges.append((start, chunk.total_compressed_size))
+    return ranges
+
+
+def _may_match(row_group: Any, condition: Filter) -> bool:  # noqa: PLR0911
+    """
+    Whether a row group's statistics allow a row to match a condition; True if there are no statistics
+    :param row_group: The row group's `pyarrow.parquet.RowGroupMetaData`
+    :param condition: The condition
+    """
+    name, operator, value = condition
+    chunks = (row_group.column(position) for position in range(row_group.num_columns))
+    chunk = next((chunk for chunk in chunks if chunk.path_in_schema == name), None)
+    statistics = chunk.statistics if chunk is not None else None
+    if statistics is None or not statistics.has_min_max:
+        return True
+    low, high = statistics.min, statistics.max
+    try:
+        if operator in ("=", "=="):
+            return bool(low <= value <= high)
+        if operator == "<":
+            return bool(low < value)
+        if operator == "<=":
+            return bool(low <= value)
+        if operator == ">":
+            return bool(high > value)
+        if operator == ">=":
+            return bool(high >= value)
+        if operator == "in":
+            return any(low <= item <= high for item in value)
+    except TypeError:
+        return True
+    return True
+
+
+def matching_row_groups(metadata: Any, row_groups: Sequence[int], filters: Sequence[Filter]) -> list[int]:
+    """
+    The row groups whose column statistics show they may hold rows matching every filter
+
+    Args:
+        metadata: The file's `pyarrow.parquet.FileMetaData`
+        row_groups: Indexes of the row groups to consider
+        filters: Conditions that must all hold
+
+    Returns:
+        Indexes of the row groups that can't be skipped
+    """
+    return [
+        index for index in row_groups if all(_may_match(metadata.row_group(index), condition) for condition in filters)
+    ]
+
+
+def read_parquet(
+    remote: "RemoteFile",
+    columns: Sequence[str] | None = None,
+    row_groups: Sequence[int] | None = None,
+    filters: Sequence[Filter] | None = None,
+) -> "pa.Table":
+    """
+    Read a Parquet file, fetching only the footer and the column chunks of the columns and row groups needed
+
+    Args:
+        remote: The file
+        columns: Columns to read; every column if None
+        row_groups: Row groups to read; every row group if None
+        filters: Conditions rows must all meet; row groups whose statistics rule them out aren't read
+
+    Returns:
+        The table
+    """
+    _, pq = _import_pyarrow()
+    parquet = pq.ParquetFile(remote)
+    groups = list(range(parquet.num_row_groups)) if row_groups is None else list(row_groups)
+    if filters:
+        groups = matching_row_groups(parquet.metadata, groups, filters)
+    read_columns = columns
+    if columns is not None and filters:
+        read_columns = list(dict.fromkeys([*columns, *(name for name, _, _ in filters)]))
+    remote.prefetch(column_chunk_ranges(parquet.metadata, groups, read_columns))
+    table = parquet.read_row_groups(groups, columns=read_columns)
+    if filters:
+        table = table.filter(pq.filters_to_expression(list(filters)))
+    if columns is not None:
+        table = table.select(list(columns))
+    return table
+
+
+def read_table(
+    store: "FileStore",
+    key: str,
+    columns: Sequence[str] | None = None,
+    row_groups: Sequence[int] | None = None,
+    filters: Sequence[Filter] | None = None,
+    *,
+    bucket: str | None = None,
+) -> "pa.Table | None":
+    """
+    Read a Parquet file with ranged reads of only the columns and row groups needed
+
+    Args:
+        store: The store to read from
+        key: Object key (path)
+        columns: Columns to read; every column if None
+        row_groups: Row groups to read; every row group if None
+        filters: Conditions rows must all meet
+        bucket: Bucket or container to use instead of the configured one
+
+    Returns:
+        The table, None if the object wasn't found or isn't a valid Parquet file
+    """
+    _import_pyarrow()
+    try:
+        with store.open(key, block_size=DEFAULT_TABLE_BLOCK_SIZE, bucket=bucket) as remote:
+            return read_parquet(remote, columns, row_groups, filters)
+    except (OSError, ValueError):
+        store.logger.exception("Failed to read table {key}", key=key)
+        return None
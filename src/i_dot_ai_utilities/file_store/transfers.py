@@ -0,0 +1,45 @@
+DEFAULT_MAX_CONCURRENCY = 8
+# Objects up to this size are transferred in a single request
+SINGLE_REQUEST_SIZE = 8 * 1024 * 1024
+MIN_BLOCK_SIZE = 8 * 1024 * 1024
+# Under S3's limit of 10,000 parts; Blob Storage allows 50,000 blocks
+MAX_BLOCKS = 10_000
+# Cloud Storage chunk sizes must be multiples of 256 KiB
+BLOCK_ALIGNMENT = 256 * 1024
+
+
+def block_size_for(size: int | None, block_size: int | None = None) -> int:
+    """
+    The block (part, chunk) size to transfer an object in: `block_size` if it's set, otherwise large enough that
+    the object fits in `MAX_BLOCKS` blocks, and at least `MIN_BLOCK_SIZE`. Rounded up to a multiple of 256 KiB.
+
+    Args:
+        size: The object's size in bytes, or None if it isn't known
+        block_size: Block size configured for the store or call, or None to choose one by size
+
+    Returns:
+        The block size in bytes
+    """
+    if block_size is None:
+        block_size = max(MIN_BLOCK_SIZE, -(-(size or 0) // MAX_BLOCKS))
+    return -(-block_size // BLOCK_ALIGNMENT) * BLOCK_ALIGNMENT
+
+
+def concurrency_for(size: int | None, block_size: int, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> int:
+    """
+    The number of blocks of an object to transfer at once: one per block up to `max_concurrency`, so small objects
+    use a single request and large ones run in parallel. Objects of unknown size use `max_concurrency`.
+
+    Args:
+        size: The object's size in bytes, or None if it isn't known
+        block_size: The block size in bytes
+        max_concurrency: Largest number of concurrent requests
+
+    Returns:
+        The number of concurrent requests, at least 1
+    """
+    if size is None:
+        return max(1, max_concurrency)
+    if size <= SINGLE_REQUEST_SIZE:
+        return 1
+    return max(1, min(max_concurrency, -(-size // block_size)))
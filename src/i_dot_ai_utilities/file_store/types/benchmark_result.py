@@ -0,0 +1,26 @@
+from typing import Literal, TypedDict
+
+BenchmarkOperation = Literal["put", "read", "list", "copy", "delete"]
+
+
+class BenchmarkResult(TypedDict):
+    """
+    Throughput and latency of one operation at one object size and concurrency level.
+    `mb_per_second` counts object bytes transferred (0 for `list` and `delete`); latency percentiles are
+    per call, in seconds, and include failed calls.
+    """
+
+    run_id: str
+    timestamp: str
+    backend: str
+    operation: BenchmarkOperation
+    object_size: int
+    concurrency: int
+    operations: int
+    errors: int
+    seconds: float
+    ops_per_second: float
+    mb_per_second: float
+    p50_seconds: float
+    p90_seconds: float
+    p99_seconds: float
@@ -0,0 +1,10 @@
+from typing import TypedDict
+
+
+class BulkTransformResult(TypedDict):
+    """The outcome of downloading, transforming and uploading one object"""
+
+    key: str
+    dest_key: str | None
+    success: bool
+    error: str | None
@@ -0,0 +1,20 @@
+from typing import TypedDict
+
+
+class ExistenceIndexStats(TypedDict):
+    """
+    Size and effectiveness of an existence index. `lookups` is `negatives + probable_positives`; of the probable
+    positives, `false_positives` turned out not to exist when checked with the backend.
+    """
+
+    prefix: str
+    keys: int
+    bits: int
+    hashes: int
+    lookups: int
+    negatives: int
+    probable_positives: int
+    false_positives: int
+    expected_false_positive_rate: float
+    false_positive_rate: float
+    refreshed_at: str | None
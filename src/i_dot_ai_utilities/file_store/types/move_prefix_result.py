@@ -0,0 +1,18 @@
+from typing import TypedDict
+
+
+class MovePrefixResult(TypedDict):
+    """
+    The outcome of moving a prefix. Counts and `seconds` cover every run of a move resumed from a checkpoint;
+    `failed` keys still exist under the source prefix.
+    """
+
+    source_prefix: str
+    dest_prefix: str
+    moved: int
+    failed: list[str]
+    bytes: int
+    seconds: float
+    objects_per_second: float
+    bytes_per_second: float
+    resumed: bool
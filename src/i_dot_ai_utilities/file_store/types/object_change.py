@@ -0,0 +1,18 @@
+from enum import Enum
+from typing import TypedDict
+
+
+class ObjectChangeType(Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
+class ObjectChange(TypedDict):
+    """A change to an object detected by comparing listings"""
+
+    type: ObjectChangeType
+    key: str
+    size: int
+    etag: str
+    last_modified: str
@@ -0,0 +1,22 @@
+from typing import Literal, NotRequired, TypedDict
+
+OperationOutcome = Literal["success", "failure", "error"]
+
+
+class OperationEvent(TypedDict):
+    """
+    Timing and transfer details of one `FileStore` operation, passed to instrumentation hooks.
+    `failure` means the operation returned None/False after logging an error; `error` means it raised.
+    `dest_key` is set for `copy_object`, whose `key` is the source.
+    """
+
+    operation: str
+    key: str | None
+    duration_seconds: float
+    bytes_in: int
+    bytes_out: int
+    requests: int
+    retries: int
+    outcome: OperationOutcome
+    error: str | None
+    dest_key: NotRequired[str | None]
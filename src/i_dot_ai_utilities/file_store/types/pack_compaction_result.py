@@ -0,0 +1,14 @@
+from typing import TypedDict
+
+
+class PackCompactionResult(TypedDict):
+    """
+    The outcome of compacting packs into one. `dropped` counts records left out because a later pack had
+    a record with the same name or the `keep` filter rejected them; `bytes` counts record bytes written.
+    """
+
+    key: str
+    packs: int
+    records: int
+    dropped: int
+    bytes: int
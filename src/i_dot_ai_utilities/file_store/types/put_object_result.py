@@ -0,0 +1,9 @@
+from typing import TypedDict
+
+
+class PutObjectResult(TypedDict):
+    """The outcome of uploading one object in a batch"""
+
+    key: str
+    success: bool
+    error: str | None
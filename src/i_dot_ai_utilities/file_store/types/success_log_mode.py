@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class SuccessLogMode(Enum):
+    """How successful uploads, deletes and copies are logged"""
+
+    OFF = "off"
+    SAMPLED = "sampled"
+    SUMMARY = "summary"
+    PER_CALL = "per_call"
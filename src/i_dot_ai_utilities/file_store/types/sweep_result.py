@@ -0,0 +1,13 @@
+from typing import TypedDict
+
+
+class SweepResult(TypedDict):
+    """
+    The outcome of one expiry sweep. `inspected` counts the new or changed objects whose metadata was read;
+    `failed` objects are retried on the next sweep.
+    """
+
+    inspected: int
+    expired: int
+    deleted: int
+    failed: int
@@ -0,0 +1,13 @@
+from typing import TypedDict
+
+
+class WarmUpResult(TypedDict):
+    """
+    The outcome of warming up a store's client. `first_request_seconds` covers building the client, resolving
+    credentials and the first request, which the first user request would otherwise pay.
+    """
+
+    requested: int
+    connections: int
+    first_request_seconds: float
+    seconds: float
@@ -0,0 +1,41 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+DEFAULT_WARM_UP_CONNECTIONS = 4
+# How long each warm-up request waits for the others to start, so they overlap and open separate connections
+BARRIER_SECONDS = 5.0
+
+Lifespan = Callable[[Any], AbstractAsyncContextManager[Any]]
+
+
+def warm_up_lifespan(
+    stores: "FileStore | Sequence[FileStore]", connections: int | None = None, lifespan: Lifespan | None = None
+) -> Lifespan:
+    """
+    A lifespan for ASGI apps such as FastAPI that warms up stores concurrently before the app takes requests
+
+    Args:
+        stores: The store or stores to warm up
+        connections: Connections to open per store, or None for each store's `settings.warm_up_connections`
+        lifespan: The app's own lifespan, entered after the stores are warmed up
+
+    Returns:
+        The lifespan, e.g. for `FastAPI(lifespan=warm_up_lifespan(file_store))`
+    """
+    stores = [stores] if not isinstance(stores, Sequence) else list(stores)
+
+    @asynccontextmanager
+    async def warmed_up(app: Any) -> AsyncIterator[Any]:
+        await asyncio.gather(*(store.warm_up_async(connections) for store in stores))
+        if lifespan is None:
+            yield None
+            return
+        async with lifespan(app) as state:
+            yield state
+
+    return warmed_up
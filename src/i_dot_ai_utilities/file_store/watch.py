@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Iterator
+from typing import TYPE_CHECKING
+
+from i_dot_ai_utilities.file_store.types.object_change import ObjectChange, ObjectChangeType
+
+if TYPE_CHECKING:
+    from i_dot_ai_utilities.file_store.main import FileStore
+
+DEFAULT_INTERVAL = 5.0
+DEFAULT_FULL_SCAN_EVERY = 12
+
+
+class PrefixWatcher:
+    """
+    Detects objects created, updated or deleted under a prefix between successive polls.
+
+    Only `key -> etag` is kept for each object seen. Most polls are incremental: they list only keys after the
+    last key seen, which picks up new objects cheaply when keys grow over time (timestamps, sequence numbers,
+    UUIDv7s). Every `full_scan_every` polls the whole prefix is listed to pick up updates, deletions and new
+    keys that sort before the cursor. Pass `full_scan_every=1` to list the whole prefix on every poll.
+
+    :param store: The file store to watch
+    :param prefix: Prefix of the objects to watch
+    :param full_scan_every: Number of polls between full listings of the prefix
+    :param include_existing: Whether objects already present on the first poll are reported as created
+    """
+
+    def __init__(
+        self,
+        store: "FileStore",
+        prefix: str = "",
+        full_scan_every: int = DEFAULT_FULL_SCAN_EVERY,
+        include_existing: bool = False,
+    ):
+        if full_scan_every < 1:
+            message = "full_scan_every must be at least 1"
+            raise ValueError(message)
+        self.store = store
+        self.prefix = prefix
+        self.full_scan_every = full_scan_every
+        self.include_existing = include_existing
+        self.state: dict[str, str] = {}
+        self.cursor: str | None = None
+        self._polls = 0
+
+    def _listing(self, start_after: str | None) -> Iterator[tuple[str, dict[str, str | int]]]:
+        for obj in self.store.iter_objects(self.prefix, strict=True, start_after=start_after):
+            yield self.store.relative_key(str(obj["key"])), obj
+
+    @staticmethod
+    def _change(change_type: ObjectChangeType, key: str, obj: dict[str, str | int]) -> ObjectChange:
+        return ObjectChange(
+            type=change_type,
+            key=key,
+            size=int(obj["size"]),
+            etag=str(obj["etag"]),
+            last_modified=str(obj["last_modified"]),
+        )
+
+    def _scan(self, full: bool) -> list[ObjectChange]:
+        changes: list[ObjectChange] = []
+        state: dict[str, str] = {}
+        cursor = self.cursor
+        for key, obj in self._listing(None if full else self.cursor):
+            etag = str(obj["etag"])
+            previous = self.state.get(key)
+            if previous is None:
+                changes.append(self._change(ObjectChangeType.CREATED, key, obj))
+            elif previous != etag:
+                changes.append(self._change(ObjectChangeType.UPDATED, key, obj))
+            state[key] = etag
+            cursor = key if cursor is None or key > cursor else cursor
+        if full:
+            changes.extend(
+                ObjectChange(type=ObjectChangeType.DELETED, key=key, size=0, etag=etag, last_modified="")
+                for key, etag in self.state.items()
+                if key not in state
+            )
+            self.state = state
+        else:
+            self.state.update(state)
+        self.cursor = cursor
+        return changes
+
+    def poll(self) -> list[ObjectChange]:
+        """
+        List the prefix and report what changed since the previous poll.
+        If the listing fails, the error is logged, no changes are reported and the state is left as it was.
+
+        Returns:
+            List of changes since the previous poll
+        """
+        first = self._polls == 0
+        full = self._polls % self.full_scan_every == 0
+        try:
+            changes = self._scan(full)
+        except Exception:
+            self.store.logger.exception("Failed to poll objects with prefix {prefix}", prefix=self.prefix)
+            return []
+        self._polls += 1
+        if first and not self.include_existing:
+            return []
+        return changes
+
+
+def watch(
+    watcher: PrefixWatcher, interval: float = DEFAULT_INTERVAL, stop: threading.Event | None = None
+) -> Iterator[ObjectChange]:
+    """
+    Poll `watcher` every `interval` seconds, yielding each change, until `stop` is set
+
+    Args:
+        watcher: The watcher to poll
+        interval: Seconds to wait between polls
+        stop: Event that ends the iteration when set; runs until the consumer stops if None
+
+    Returns:
+        Iterator of changes
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        yield from watcher.poll()
+        stop.wait(interval)
+
+
+async def watch_async(
+    watcher: PrefixWatcher, interval: float = DEFAULT_INTERVAL, stop: asyncio.Event | None = None
+) -> AsyncIterator[ObjectChange]:
+    """
+    Async variant of `watch`; listings run in a worker thread so the event loop isn't blocked
+
+    Args:
+        watcher: The watcher to poll
+        interval: Seconds to wait between polls
+        stop: Event that ends the iteration when set; runs until the consumer stops if None
+
+    Returns:
+        Async iterator of changes
+    """
+    stop = stop or asyncio.Event()
+    while not stop.is_set():
+        for change in await asyncio.to_thread(watcher.poll):
+            yield change
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            continue
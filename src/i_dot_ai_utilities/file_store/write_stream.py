@@ -0,0 +1,158 @@
+import io
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from types import TracebackType
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+class MultipartUpload(ABC):
+    """
+    A backend upload of one object in parts, numbered from 1 and uploaded in order.
+    Nothing is visible at the destination key until `complete` succeeds.
+    """
+
+    @abstractmethod
+    def upload_part(self, part_number: int, data: bytes) -> bool:
+        """
+        Returns:
+            bool: True if successful, False otherwise
+        """
+
+    @abstractmethod
+    def complete(self) -> bool:
+        """
+        Returns:
+            bool: True if the object was committed, False otherwise
+        """
+
+    @abstractmethod
+    def abort(self) -> None:
+        """
+        Discard the parts uploaded so far
+        """
+
+
+class ObjectWriteStream(io.BufferedIOBase):
+    """
+    Writable, unseekable stream that uploads an object in parts as data is written, so the object never has
+    to be held in memory; at most one part is buffered at a time.
+
+    The object is committed on `close` (or when a `with` block exits normally) and the upload is aborted if
+    the `with` block raises, or if the stream is garbage collected without being closed, so a partial object
+    is never published. Streams that finish within one part are uploaded with a single `put_object`.
+
+    Failed uploads raise `OSError`, as file writes do, after aborting the upload.
+
+    :param key: The object key, for error messages
+    :param part_size: Bytes per part
+    :param start_upload: Starts the backend multipart upload when the first part is full
+    :param put: Uploads the whole object in one request if it fits in a single part
+    :param on_complete: Called once a multipart upload is completed; objects uploaded with `put` aren't reported
+    """
+
+    def __init__(
+        self,
+        key: str,
+        part_size: int,
+        start_upload: Callable[[], MultipartUpload | None],
+        put: Callable[[bytes], bool],
+        on_complete: Callable[[], None] | None = None,
+    ):
+        super().__init__()
+        self.key = key
+        self.part_size = part_size
+        self._start_upload = start_upload
+        self._put = put
+        self._on_complete = on_complete
+        self._upload: MultipartUpload | None = None
+        self._buffer = bytearray()
+        self._parts = 0
+        self._size = 0
+
+    @property
+    def name(self) -> str:
+        return self.key
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._size
+
+    def write(self, data: bytes | bytearray | memoryview) -> int:  # type: ignore[override]
+        if self.closed:
+            message = "I/O operation on closed stream"
+            raise ValueError(message)
+        num_bytes = memoryview(data).nbytes
+        self._buffer += data
+        self._size += num_bytes
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+            self._upload_part(part)
+        return num_bytes
+
+    def _upload_part(self, part: bytes) -> None:
+        upload = self._upload or self._start_upload()
+        if upload is None:
+            self._fail(f"Failed to start upload of {self.key}")
+            return
+        self._upload = upload
+        self._parts += 1
+        if not upload.upload_part(self._parts, part):
+            self._fail(f"Failed to upload part {self._parts} of {self.key}")
+
+    def _fail(self, message: str) -> None:
+        self.abort()
+        raise OSError(message)
+
+    def close(self) -> None:
+        """
+        Upload any buffered data and commit the object
+        """
+        if self.closed:
+            return
+        if self._upload is None:
+            committed = self._put(bytes(self._buffer))
+            self._buffer.clear()
+            super().close()
+            if not committed:
+                message = f"Failed to upload {self.key}"
+                raise OSError(message)
+            return
+        if self._buffer:
+            part = bytes(self._buffer)
+            self._buffer.clear()
+            self._upload_part(part)
+        if not self._upload.complete():
+            self._fail(f"Failed to complete upload of {self.key}")
+        super().close()
+        if self._on_complete is not None:
+            self._on_complete()
+
+    def abort(self) -> None:
+        """
+        Discard everything written and close the stream without creating the object
+        """
+        if self.closed:
+            return
+        self._buffer.clear()
+        upload, self._upload = self._upload, None
+        super().close()
+        if upload is not None:
+            upload.abort()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __del__(self) -> None:
+        self.abort()
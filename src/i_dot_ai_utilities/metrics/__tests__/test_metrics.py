@@ -99,6 +99,25 @@ def test_gracefully_handles_badly_set_dimension(capsys, metrics_writer):
     assert json.loads(log_lines[1]).get("this") == "succeeds"
 
 
+def test_metrics_share_one_document(capsys, metrics_writer):
+    metrics_writer.put_metrics({"test_duration_ms": 12.5, "test_bytes": 100}, dimensions={"dim1": "res1"})
+
+    log_lines = capsys.readouterr().out.strip().splitlines()
+    assert len(log_lines) == 1
+
+    logged_metric = json.loads(log_lines[0])
+    assert logged_metric.get("test_duration_ms") == 12.5
+    assert logged_metric.get("test_bytes") == 100
+    assert logged_metric.get("dim1") == "res1"
+
+    cloudwatch_metrics_block = logged_metric.get("_aws").get("CloudWatchMetrics")
+    assert [metric.get("Name") for metric in cloudwatch_metrics_block[0].get("Metrics")] == [
+        "test_duration_ms",
+        "test_bytes",
+    ]
+    assert cloudwatch_metrics_block[0].get("Dimensions") == [["dim1"]]
+
+
 @pytest.mark.parametrize(
     ("metric_name", "metric_value", "expected_error_message"),
     [
@@ -40,18 +40,38 @@ class CloudwatchEmbeddedMetricsWriter(MetricsWriter):
         :param dimensions: A k/v set of **low-cardinality** dimensions to add to the metric for graphing purposes.
         """
         try:
-            self._put_metric_internal(metric_name, value, dimensions)
+            self._put_metrics_internal({metric_name: value}, dimensions)
         except Exception:
             self._logger.exception("Failed to write metric")
 
-    def _put_metric_internal(self, metric_name: str, value: float, dimensions: dict | None = None) -> None:
-        if not metric_name or not value:
+    def put_metrics(
+        self,
+        values: dict[str, float],
+        dimensions: dict | None = None,
+    ) -> None:
+        """Put several time-series metrics that share dimensions to CloudWatch, as one log line.
+
+        :param values: The numerical value of each metric, by name.
+        :param dimensions: A k/v set of **low-cardinality** dimensions to add to every metric.
+        """
+        try:
+            self._put_metrics_internal(values, dimensions)
+        except Exception:
+            self._logger.exception("Failed to write metrics")
+
+    def _put_metrics_internal(self, values: dict[str, float], dimensions: dict | None = None) -> None:
+        if not values:
             msg = "Missing required parameter"
             raise ValueError(msg)
 
-        if type(metric_name) is not str or type(value) not in [int, float]:
-            msg = "Incorrect parameter type"
-            raise ValueError(msg)
+        for metric_name, value in values.items():
+            if not metric_name or not value:
+                msg = "Missing required parameter"
+                raise ValueError(msg)
+
+            if type(metric_name) is not str or type(value) not in [int, float]:
+                msg = "Incorrect parameter type"
+                raise ValueError(msg)
 
         dimensions = dimensions or {}
         dimension_names = list(dimensions.keys()) if dimensions else []
@@ -69,6 +89,7 @@ class CloudwatchEmbeddedMetricsWriter(MetricsWriter):
                                 "Unit": "Count",
                                 "StorageResolution": StorageResolution.STANDARD.value,
                             }
+                            for metric_name in values
                         ],
                     }
                 ],
@@ -76,6 +97,6 @@ class CloudwatchEmbeddedMetricsWriter(MetricsWriter):
             **dimensions,
         }
 
-        metric_payload = {**emf, metric_name: value}
+        metric_payload = {**emf, **values}
 
         print(json.dumps(metric_payload), file=sys.stdout)  # noqa: T201
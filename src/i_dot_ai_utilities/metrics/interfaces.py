@@ -10,3 +10,16 @@ class MetricsWriter(ABC):
         dimensions: dict | None = None,
     ) -> None:
         pass
+
+    def put_metrics(
+        self,
+        values: dict[str, float],
+        dimensions: dict | None = None,
+    ) -> None:
+        """Put several metrics that share dimensions. Writers that can emit them together override this.
+
+        :param values: The value of each metric, by name.
+        :param dimensions: A k/v set of **low-cardinality** dimensions to add to every metric.
+        """
+        for metric_name, value in values.items():
+            self.put_metric(metric_name, value, dimensions)